@@ -0,0 +1,47 @@
+"""
+Array versions of the functions of the truncated_normal C library,
+evaluating all the values of numpy arrays in one call.
+
+The C functions are called through ctypes on the buffers of the arrays,
+which are copied only if they are not contiguous arrays of doubles.
+"""
+import ctypes
+
+import numpy as np
+
+import truncated_normal.truncated_normal as truncnorm
+
+
+_lib = ctypes.CDLL(truncnorm._truncated_normal.__file__)
+
+
+def _make_array_function(name, num_params):
+	"""
+	Return a function taking an array and num_params floats, and returning
+	the array of results of the C function name, with the same shape.
+	"""
+	c_func = getattr(_lib, name)
+	c_func.restype = None
+	c_func.argtypes = (
+		[np.ctypeslib.ndpointer(np.float64, flags='C_CONTIGUOUS'), ctypes.c_int]
+		+ [ctypes.c_double] * num_params
+		+ [np.ctypeslib.ndpointer(np.float64, flags='C_CONTIGUOUS,WRITEABLE')])
+
+	def array_function(x, *params):
+		x = np.ascontiguousarray(x, dtype=np.float64)
+		result = np.empty_like(x)
+		c_func(*((x, x.size) + params + (result, )))
+		return result
+	array_function.__name__ = name
+	return array_function
+
+
+normal_cdf_array = _make_array_function('normal_cdf_array', 2)
+normal_pdf_array = _make_array_function('normal_pdf_array', 2)
+normal_cdf_inv_array = _make_array_function('normal_cdf_inv_array', 2)
+truncated_normal_ab_cdf_array = _make_array_function(
+	'truncated_normal_ab_cdf_array', 4)
+truncated_normal_ab_pdf_array = _make_array_function(
+	'truncated_normal_ab_pdf_array', 4)
+truncated_normal_ab_cdf_inv_array = _make_array_function(
+	'truncated_normal_ab_cdf_inv_array', 4)
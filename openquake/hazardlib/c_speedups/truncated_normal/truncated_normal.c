@@ -527,45 +527,40 @@ double normal_cdf ( double x, double a, double b )
 }
 /******************************************************************************/
 
-double *normal_cdf_array ( double *x, int n, double a, double b )
+void normal_cdf_array ( double *x, int n, double a, double b,
+  double *cdf )
 
 /******************************************************************************/
 /*
   Purpose:
 
-    NORMAL_CDF evaluates the Normal CDF.
-
-  Licensing:
-
-    This code is distributed under the GNU LGPL license.
-
-  Modified:
-
-    19 September 2004
+    NORMAL_CDF_ARRAY evaluates the Normal CDF for an array of arguments.
 
-  Author:
+  Discussion:
 
-    John Burkardt
+    The values are written in a buffer provided by the caller, so that
+    arrays can be processed without copying them.
 
   Parameters:
 
-    Input, double X, the argument of the CDF.
+    Input, double *X, the arguments of the CDF, N values.
+
+    Input, int N, the number of arguments.
 
     Input, double A, B, the parameters of the PDF.
     0.0 < B.
 
-    Output, double CDF, the value of the CDF.
+    Output, double *CDF, the N values of the CDF.
 */
 {
-  double cdf[n];
   int i;
 
-  for (i=0; i < n; i++)
+  for ( i = 0; i < n; i++ )
   {
-  	cdf[i] = normal_cdf(x[i], a, b);
+    cdf[i] = normal_cdf ( x[i], a, b );
   }
 
-  return cdf;
+  return;
 }
 /******************************************************************************/
 
@@ -625,6 +620,43 @@ double normal_cdf_inv ( double cdf, double a, double b )
 }
 /******************************************************************************/
 
+void normal_cdf_inv_array ( double *cdf, int n, double a, double b,
+  double *x )
+
+/******************************************************************************/
+/*
+  Purpose:
+
+    NORMAL_CDF_INV_ARRAY inverts the Normal CDF for an array of values.
+
+  Discussion:
+
+    The values are written in a buffer provided by the caller, so that
+    arrays can be processed without copying them.
+
+  Parameters:
+
+    Input, double *CDF, the values of the CDF, N values.
+
+    Input, int N, the number of values.
+
+    Input, double A, B, the parameters of the PDF.
+    0.0 < B.
+
+    Output, double *X, the N arguments having those CDF values.
+*/
+{
+  int i;
+
+  for ( i = 0; i < n; i++ )
+  {
+    x[i] = normal_cdf_inv ( cdf[i], a, b );
+  }
+
+  return;
+}
+/******************************************************************************/
+
 double normal_mean ( double a, double b )
 
 /******************************************************************************/
@@ -1041,53 +1073,40 @@ double normal_pdf ( double x, double a, double b )
 }
 /******************************************************************************/
 
-double *normal_pdf_array ( double *x, int n, double a, double b )
+void normal_pdf_array ( double *x, int n, double a, double b,
+  double *pdf )
 
 /******************************************************************************/
 /*
   Purpose:
 
-    NORMAL_PDF evaluates the Normal PDF.
+    NORMAL_PDF_ARRAY evaluates the Normal PDF for an array of arguments.
 
   Discussion:
 
-    PDF(A,B;X)
-      = exp ( - 0.5 * ( ( X - A ) / B )^2 )
-      / ( B * SQRT ( 2 * PI ) )
-
-    The normal PDF is also known as the Gaussian PDF.
-
-  Licensing:
-
-    This code is distributed under the GNU LGPL license.
-
-  Modified:
-
-    19 September 2004
-
-  Author:
-
-    John Burkardt
+    The values are written in a buffer provided by the caller, so that
+    arrays can be processed without copying them.
 
   Parameters:
 
-    Input, double X, the argument of the PDF.
+    Input, double *X, the arguments of the PDF, N values.
+
+    Input, int N, the number of arguments.
 
     Input, double A, B, the parameters of the PDF.
     0.0 < B.
 
-    Output, double PDF, the value of the PDF.
+    Output, double *PDF, the N values of the PDF.
 */
 {
-  double pdf[n];
   int i;
 
-  for (i=0; i < n; i++)
+  for ( i = 0; i < n; i++ )
   {
-  	pdf[i] = normal_pdf(x[i], a, b);
+    pdf[i] = normal_pdf ( x[i], a, b );
   }
 
-  return pdf;
+  return;
 }
 /******************************************************************************/
 
@@ -1953,48 +1972,43 @@ double truncated_normal_ab_cdf ( double x, double mu, double s, double a,
 }
 /******************************************************************************/
 
-double *truncated_normal_ab_cdf_array ( double *x, int n, double mu, double s,
-  double a, double b )
+void truncated_normal_ab_cdf_array ( double *x, int n, double mu, double s,
+  double a, double b, double *cdf )
 
 /******************************************************************************/
 /*
   Purpose:
 
-    TRUNCATED_NORMAL_AB_CDF evaluates the truncated Normal CDF.
-
-  Licensing:
-
-    This code is distributed under the GNU LGPL license.
-
-  Modified:
+    TRUNCATED_NORMAL_AB_CDF_ARRAY evaluates the truncated Normal CDF for an array
+    of arguments.
 
-    14 August 2013
-
-  Author:
+  Discussion:
 
-    John Burkardt
+    The values are written in a buffer provided by the caller, so that
+    arrays can be processed without copying them.
 
   Parameters:
 
-    Input, double X, the argument of the CDF.
+    Input, double *X, the arguments of the CDF, N values.
+
+    Input, int N, the number of arguments.
 
     Input, double MU, S, the mean and standard deviation of the
     parent Normal distribution.
 
     Input, double A, B, the lower and upper truncation limits.
 
-    Output, double TRUNCATED_NORMAL_AB_CDF, the value of the CDF.
+    Output, double *CDF, the N values of the CDF.
 */
 {
-  double cdf[n];
   int i;
 
-  for (i=0; i < n; i++)
+  for ( i = 0; i < n; i++ )
   {
-  	cdf[i] = truncated_normal_ab_cdf(x[i], mu, s, a, b);
+    cdf[i] = truncated_normal_ab_cdf ( x[i], mu, s, a, b );
   }
 
-  return cdf;
+  return;
 }
 /******************************************************************************/
 
@@ -2228,6 +2242,46 @@ double truncated_normal_ab_cdf_inv ( double cdf, double mu, double s, double a,
 }
 /******************************************************************************/
 
+void truncated_normal_ab_cdf_inv_array ( double *cdf, int n, double mu,
+  double s, double a, double b, double *x )
+
+/******************************************************************************/
+/*
+  Purpose:
+
+    TRUNCATED_NORMAL_AB_CDF_INV_ARRAY inverts the truncated Normal CDF for
+    an array of values.
+
+  Discussion:
+
+    The values are written in a buffer provided by the caller, so that
+    arrays can be processed without copying them.
+
+  Parameters:
+
+    Input, double *CDF, the values of the CDF, N values.
+
+    Input, int N, the number of values.
+
+    Input, double MU, S, the mean and standard deviation of the
+    parent Normal distribution.
+
+    Input, double A, B, the lower and upper truncation limits.
+
+    Output, double *X, the N arguments having those CDF values.
+*/
+{
+  int i;
+
+  for ( i = 0; i < n; i++ )
+  {
+    x[i] = truncated_normal_ab_cdf_inv ( cdf[i], mu, s, a, b );
+  }
+
+  return;
+}
+/******************************************************************************/
+
 double truncated_normal_ab_mean ( double mu, double s, double a, double b )
 
 /******************************************************************************/
@@ -2482,48 +2536,43 @@ double truncated_normal_ab_pdf ( double x, double mu, double s, double a,
 }
 /******************************************************************************/
 
-double *truncated_normal_ab_pdf_array ( double *x, int n, double mu, double s,
-  double a, double b )
+void truncated_normal_ab_pdf_array ( double *x, int n, double mu, double s,
+  double a, double b, double *pdf )
 
 /******************************************************************************/
 /*
   Purpose:
 
-    TRUNCATED_NORMAL_AB_PDF evaluates the truncated Normal PDF.
-
-  Licensing:
+    TRUNCATED_NORMAL_AB_PDF_ARRAY evaluates the truncated Normal PDF for an array
+    of arguments.
 
-    This code is distributed under the GNU LGPL license.
-
-  Modified:
-
-    14 August 2013
-
-  Author:
+  Discussion:
 
-    John Burkardt
+    The values are written in a buffer provided by the caller, so that
+    arrays can be processed without copying them.
 
   Parameters:
 
-    Input, double X, the argument of the PDF.
+    Input, double *X, the arguments of the PDF, N values.
+
+    Input, int N, the number of arguments.
 
     Input, double MU, S, the mean and standard deviation of the
     parent Normal distribution.
 
     Input, double A, B, the lower and upper truncation limits.
 
-    Output, double TRUNCATED_NORMAL_AB_PDF, the value of the PDF.
+    Output, double *PDF, the N values of the PDF.
 */
 {
-  double pdf[n];
   int i;
 
-  for (i=0; i < n; i++)
+  for ( i = 0; i < n; i++ )
   {
-  	pdf[i] = truncated_normal_ab_pdf(x[i], mu, s, a, b);
+    pdf[i] = truncated_normal_ab_pdf ( x[i], mu, s, a, b );
   }
 
-  return pdf;
+  return;
 }
 /******************************************************************************/
 
@@ -7,15 +7,16 @@ double normal_01_sample ( int *seed );
 double normal_01_variance ( );
 
 double normal_cdf ( double x, double a, double b );
-double *normal_cdf_array ( double *x, int n, double a, double b );
+void normal_cdf_array ( double *x, int n, double a, double b, double *cdf );
 double normal_cdf_inv ( double cdf, double a, double b );
+void normal_cdf_inv_array ( double *cdf, int n, double a, double b, double *x );
 double normal_mean ( double a, double b );
 double normal_moment ( int order, double mu, double sigma );
 double normal_moment_central ( int order, double mu, double sigma );
 double normal_moment_central_values ( int order, double mu, double sigma );
 double normal_moment_values ( int order, double mu, double sigma );
 double normal_pdf ( double x, double a, double b );
-double *normal_pdf_array ( double *x, int n, double a, double b );
+void normal_pdf_array ( double *x, int n, double a, double b, double *pdf );
 double normal_sample ( double a, double b, int *seed );
 double normal_variance ( double a, double b );
 
@@ -38,18 +39,20 @@ void timestamp ( );
 
 double truncated_normal_ab_cdf ( double x, double mu, double s, double a,
   double b );
-double *truncated_normal_ab_cdf_array ( double *x, int n, double mu, double s,
-  double a, double b );
+void truncated_normal_ab_cdf_array ( double *x, int n, double mu, double s,
+  double a, double b, double *cdf );
 void truncated_normal_ab_cdf_values ( int *n_data, double *mu, double *sigma,
   double *a, double *b, double *x, double *fx );
 double truncated_normal_ab_cdf_inv ( double cdf, double mu, double s, double a,
   double b );
+void truncated_normal_ab_cdf_inv_array ( double *cdf, int n, double mu,
+  double s, double a, double b, double *x );
 double truncated_normal_ab_mean ( double mu, double s, double a, double b );
 double truncated_normal_ab_moment ( int order, double mu, double s, double a, double b );
 double truncated_normal_ab_pdf ( double x, double mu, double s, double a,
   double b );
-double *truncated_normal_ab_pdf_array ( double *x, int n, double mu, double s,
-  double a, double b );
+void truncated_normal_ab_pdf_array ( double *x, int n, double mu, double s,
+  double a, double b, double *pdf );
 void truncated_normal_ab_pdf_values ( int *n_data, double *mu, double *sigma,
   double *a, double *b, double *x, double *fx );
 double truncated_normal_ab_sample ( double mu, double s, double a, double b,
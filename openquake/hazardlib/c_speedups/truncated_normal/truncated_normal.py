@@ -72,18 +72,10 @@ def normal_cdf(*args):
   return _truncated_normal.normal_cdf(*args)
 normal_cdf = _truncated_normal.normal_cdf
 
-def normal_cdf_array(*args):
-  return _truncated_normal.normal_cdf_array(*args)
-normal_cdf_array = _truncated_normal.normal_cdf_array
-
 def normal_pdf(*args):
   return _truncated_normal.normal_pdf(*args)
 normal_pdf = _truncated_normal.normal_pdf
 
-def normal_pdf_array(*args):
-  return _truncated_normal.normal_pdf_array(*args)
-normal_pdf_array = _truncated_normal.normal_pdf_array
-
 def normal_cdf_inv(*args):
   return _truncated_normal.normal_cdf_inv(*args)
 normal_cdf_inv = _truncated_normal.normal_cdf_inv
@@ -92,18 +84,10 @@ def truncated_normal_ab_cdf(*args):
   return _truncated_normal.truncated_normal_ab_cdf(*args)
 truncated_normal_ab_cdf = _truncated_normal.truncated_normal_ab_cdf
 
-def truncated_normal_ab_cdf_array(*args):
-  return _truncated_normal.truncated_normal_ab_cdf_array(*args)
-truncated_normal_ab_cdf_array = _truncated_normal.truncated_normal_ab_cdf_array
-
 def truncated_normal_ab_pdf(*args):
   return _truncated_normal.truncated_normal_ab_pdf(*args)
 truncated_normal_ab_pdf = _truncated_normal.truncated_normal_ab_pdf
 
-def truncated_normal_ab_pdf_array(*args):
-  return _truncated_normal.truncated_normal_ab_pdf_array(*args)
-truncated_normal_ab_pdf_array = _truncated_normal.truncated_normal_ab_pdf_array
-
 def truncated_normal_ab_cdf_inv(*args):
   return _truncated_normal.truncated_normal_ab_cdf_inv(*args)
 truncated_normal_ab_cdf_inv = _truncated_normal.truncated_normal_ab_cdf_inv
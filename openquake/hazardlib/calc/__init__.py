@@ -17,7 +17,8 @@
 Package :mod:`openquake.hazardlib.calc` contains hazard calculator modules
 and utilities for them, such as :mod:`~openquake.hazardlib.calc.filters`.
 """
-from openquake.hazardlib.calc.hazard_curve import hazard_curves_poissonian
+from openquake.hazardlib.calc.hazard_curve import (
+    hazard_curves_poissonian, hazard_curves_poissonian_parallel)
 from openquake.hazardlib.calc.gmf import ground_motion_fields
 from openquake.hazardlib.calc.stochastic import stochastic_event_set_poissonian
 # from disagg we want to import main calc function
@@ -22,6 +22,8 @@ import numpy
 import warnings
 
 from openquake.hazardlib.calc import filters
+from openquake.hazardlib.calc.hazard_curve import hazard_curves_poissonian
+from openquake.hazardlib.geo.geodetic import EARTH_RADIUS
 from openquake.hazardlib.geo.geodetic import npoints_between
 from openquake.hazardlib.geo.utils import get_longitudinal_extent
 from openquake.hazardlib.geo.utils import get_spherical_bounding_box
@@ -128,7 +130,8 @@ def disaggregation_poissonian_multi(
         sources, sitecol, site_imtls, gsims, time_span, truncation_level,
         n_epsilons, mag_bin_width, dist_bin_width, coord_bin_width,
         source_site_filter=filters.source_site_noop_filter,
-        rupture_site_filter=filters.rupture_site_noop_filter):
+        rupture_site_filter=filters.rupture_site_noop_filter,
+        max_distance=None):
     """
     Disaggregation for multiple sites, multiple imt's per site,
     and multiple iml's per imt.
@@ -140,6 +143,17 @@ def disaggregation_poissonian_multi(
         in turn mapping instances of :class:`IMT` to 1-D arrays of
         iml's. Note that number of iml's should be the same for
         each imt.
+    :param max_distance:
+        Optional maximum Joyner-Boore distance (in km) between a site
+        and the ruptures contributing to its hazard, usually the
+        integration distance of the filters. If given, bin edges are
+        defined before generating ruptures, from the magnitude range of
+        the sources and from the area within ``max_distance`` of each site,
+        and contributions of ruptures are accumulated in the disaggregation
+        matrices as ruptures are generated, so that memory usage does not
+        depend on the number of ruptures (see :func:`_define_bins_multi`).
+        Contributions of ruptures farther than ``max_distance`` from a site
+        are ignored.
 
     Other parameters are similar to :func:`disaggregation_poissonian`
 
@@ -154,10 +168,32 @@ def disaggregation_poissonian_multi(
         bin_edges and diss_matrix are None.
 
         Note that tectonic region type bins are replaced by source ID bins
-        in this implementation.
+        in this implementation. If ``max_distance`` is given, there is
+        one bin for each source with ruptures falling in the bins of the
+        site, otherwise one for each source that passed the source-site
+        filter.
     """
     tom = PoissonTOM(time_span)
 
+    if max_distance is not None:
+        sources = list(sources)
+        bin_edges = _define_bins_multi(
+            sources, sitecol, max_distance, mag_bin_width, dist_bin_width,
+            coord_bin_width, truncation_level, n_epsilons
+        )
+        site_matrices, _ = _accumulate_log_no_exceed_multi(
+            sources, sitecol, site_imtls, gsims, tom, truncation_level,
+            n_epsilons, source_site_filter, rupture_site_filter, bin_edges
+        )
+        for i, (site, site_matrix) in enumerate(zip(sitecol, site_matrices)):
+            if site_matrix is None:
+                yield site, None, None
+            else:
+                trt_bins, log_no_exceed = site_matrix
+                yield (site, _get_site_bin_edges(bin_edges, i, trt_bins),
+                       1 - numpy.exp(log_no_exceed))
+        return
+
     bins_data = _collect_bins_data_multi(sources, sitecol, site_imtls,
                                    gsims, tom, truncation_level, n_epsilons,
                                    source_site_filter, rupture_site_filter)
@@ -180,10 +216,14 @@ def disaggregation_poissonian_multi(
                             # For a given site, magnitudes, distances, lons,
                             # lats, trts are always the same, (and epsilon bins
                             # are data-independent), so bin_edges should be
-                            # determined only once
+                            # determined only once, and so should the bin
+                            # indices of each rupture
                             bin_edges = _define_bins(bins_data[key][imt][l], mag_bin_width, dist_bin_width,
                                                      coord_bin_width, truncation_level, n_epsilons)
-                        diss_matrix = _arrange_data_in_bins(bins_data[key][imt][l], bin_edges)
+                            bins_indices = _get_bins_indices(
+                                bins_data[key][imt][l], bin_edges)
+                        diss_matrix = _arrange_data_in_bins(
+                            bins_data[key][imt][l], bin_edges, bins_indices)
                         if i == 0 and l == 0:
                             shape = (num_imts, num_imls) + diss_matrix.shape
                             full_diss_matrix = numpy.zeros(shape)
@@ -192,6 +232,135 @@ def disaggregation_poissonian_multi(
         yield site, bin_edges, full_diss_matrix
 
 
+def hazard_curves_and_disaggregation_poissonian(
+        sources, sitecol, imtls, gsims, time_span, truncation_level,
+        n_epsilons, mag_bin_width, dist_bin_width, coord_bin_width,
+        max_distance, site_imtls=None, poes=None,
+        source_site_filter=filters.source_site_noop_filter,
+        rupture_site_filter=filters.rupture_site_noop_filter, cav_min=0.):
+    """
+    Compute hazard curves and disaggregation matrices for multiple sites,
+    in a single loop over ruptures if the iml's to disaggregate are given.
+
+    Disaggregation is done either at the iml's given in ``site_imtls``
+    or at the iml's where the hazard curves of each site reach the
+    probabilities of exceedance given in ``poes``.
+
+    In the former case ruptures, contexts and means and standard deviations
+    of the GSIMs are computed only once for both hazard curves and
+    disaggregation, so this is roughly twice as fast as calling
+    :func:`~openquake.hazardlib.calc.hazard_curve.hazard_curves_poissonian`
+    and then :func:`disaggregation_poissonian_multi`. In the latter case
+    iml's can only be known once hazard curves are computed, so hazard
+    curves are computed first, then iml's are inferred interpolating the
+    hazard curves in log-log space (clipped to the range of iml's of the
+    curves) and disaggregated in a second loop over ruptures.
+
+    :param imtls:
+        Dictionary mapping intensity measure type objects to lists of
+        intensity measure levels to compute hazard curves for, as the
+        ``imts`` parameter of
+        :func:`~openquake.hazardlib.calc.hazard_curve.hazard_curves_poissonian`.
+    :param max_distance:
+        Maximum Joyner-Boore distance (in km) between a site and the
+        ruptures contributing to its disaggregation matrix, see
+        :func:`disaggregation_poissonian_multi`.
+    :param site_imtls:
+        Dictionary mapping site (lon, lat) tuples to dictionaries
+        in turn mapping instances of :class:`IMT` to 1-D arrays of
+        iml's to disaggregate, as in :func:`disaggregation_poissonian_multi`.
+    :param poes:
+        List of probabilities of exceedance to disaggregate for each
+        imt of ``imtls``. Exactly one of ``site_imtls`` and ``poes`` must
+        be given.
+    :param cav_min:
+        CAV threshold in g.s of the hazard curves, as in
+        :func:`~openquake.hazardlib.calc.hazard_curve.hazard_curves_poissonian`
+        (default: 0. = no CAV filtering). Disaggregation matrices are not
+        CAV filtered, as the ones of :func:`disaggregation_poissonian_multi`.
+        With CAV filtering the probabilities of exceedance of the hazard
+        curves are computed apart from the disaggregated ones.
+
+    Other parameters are the same as for
+    :func:`disaggregation_poissonian_multi`. Note that ``truncation_level``
+    applies to both hazard curves and disaggregation and must be positive.
+
+    :returns:
+        A tuple of three items. The first is the hazard curves, as returned
+        by :func:`~openquake.hazardlib.calc.hazard_curve.hazard_curves_poissonian`.
+        The second is a dictionary like ``site_imtls``, with the iml's at
+        which poes were disaggregated (either ``site_imtls`` itself or
+        the iml's inferred from ``poes``, in the same order as ``poes``).
+        The third is a list of (site, bin_edges, diss_matrix) tuples, one
+        for each site, as yielded by :func:`disaggregation_poissonian_multi`
+        with ``max_distance``.
+    """
+    if (site_imtls is None) == (poes is None):
+        raise ValueError('exactly one of site_imtls and poes must be given')
+
+    sources = list(sources)
+    if poes is not None:
+        curves = hazard_curves_poissonian(
+            sources, sitecol, imtls, time_span, gsims, truncation_level,
+            source_site_filter, rupture_site_filter, cav_min
+        )
+        site_imtls = {}
+        for i, site in enumerate(sitecol):
+            key = (site.location.longitude, site.location.latitude)
+            site_imtls[key] = dict(
+                (imt, _infer_imls(imtls[imt], curves[imt][i], poes))
+                for imt in imtls
+            )
+        diss = list(disaggregation_poissonian_multi(
+            sources, sitecol, site_imtls, gsims, time_span,
+            truncation_level, n_epsilons, mag_bin_width, dist_bin_width,
+            coord_bin_width, source_site_filter, rupture_site_filter,
+            max_distance
+        ))
+        return curves, site_imtls, diss
+
+    bin_edges = _define_bins_multi(
+        sources, sitecol, max_distance, mag_bin_width, dist_bin_width,
+        coord_bin_width, truncation_level, n_epsilons
+    )
+    site_matrices, curves = _accumulate_log_no_exceed_multi(
+        sources, sitecol, site_imtls, gsims, PoissonTOM(time_span),
+        truncation_level, n_epsilons, source_site_filter,
+        rupture_site_filter, bin_edges, imtls, cav_min
+    )
+    diss = []
+    for i, (site, site_matrix) in enumerate(zip(sitecol, site_matrices)):
+        if site_matrix is None:
+            diss.append((site, None, None))
+        else:
+            trt_bins, log_no_exceed = site_matrix
+            diss.append((site, _get_site_bin_edges(bin_edges, i, trt_bins),
+                         1 - numpy.exp(log_no_exceed)))
+    return curves, site_imtls, diss
+
+
+def _infer_imls(imls, curve, poes):
+    """
+    Infer the iml's at which a hazard curve reaches given poes.
+
+    :param imls:
+        Iml's of the hazard curve, in increasing order.
+    :param curve:
+        Probabilities of exceedance of ``imls``.
+    :param poes:
+        Probabilities of exceedance to infer iml's for.
+
+    :returns:
+        1-D array of iml's corresponding to ``poes``, interpolated in
+        log-log space and clipped to the range of ``imls``.
+    """
+    log_imls = numpy.log(imls)
+    # avoid logarithms of zero, curves are decreasing so reverse them
+    log_curve = numpy.log(numpy.maximum(curve, numpy.finfo(float).tiny))
+    return numpy.exp(numpy.interp(numpy.log(poes), log_curve[::-1],
+                                  log_imls[::-1]))
+
+
 # DEPRECATED
 def disaggregation(sources, site, imt, iml, gsims, tom,
                    truncation_level, n_epsilons,
@@ -260,7 +429,10 @@ def _collect_bins_data(sources, site, imt, iml, gsims, tom,
 
             ruptures_sites = ((rupture, s_sites)
                               for rupture in source.iter_ruptures(tom))
-            for rupture, r_sites in rupture_site_filter(ruptures_sites):
+            ruptures_sitecol = ((rupture, sitecol) for rupture, _ in
+                                rupture_site_filter(ruptures_sites))
+            for rupture, _, sctx, rctx, dctx in gsim.iter_contexts(
+                    ruptures_sitecol):
                 # extract rupture parameters of interest
                 mags.append(rupture.mag)
                 [jb_dist] = rupture.surface.get_joyner_boore_distance(sitemesh)
@@ -273,7 +445,6 @@ def _collect_bins_data(sources, site, imt, iml, gsims, tom,
                 # compute conditional probability of exceeding iml given
                 # the current rupture, and different epsilon level, that is
                 # ``P(IMT >= iml | rup, epsilon_bin)`` for each of epsilon bins
-                sctx, rctx, dctx = gsim.make_contexts(sitecol, rupture)
                 [poes_given_rup_eps] = gsim.disaggregate_poe(
                     sctx, rctx, dctx, imt, iml, truncation_level, n_epsilons
                 )
@@ -312,6 +483,149 @@ def _collect_bins_data(sources, site, imt, iml, gsims, tom,
             probs_one_or_more, probs_exceed_given_rup, src_idxs)
 
 
+def _prepare_site_imls(sitecol, site_imtls):
+    """
+    Arrange iml's of all sites in a 2-D array (sites, imls) for each imt,
+    so that poes can be disaggregated for all the sites affected by a
+    rupture at once. Missing iml's are padded with infinity, which is
+    never exceeded.
+
+    :returns:
+        A tuple of three items: dictionary mapping site (lon, lat) tuples
+        to indices of sites in ``sitecol``, list of all imt's and
+        dictionary mapping imt's to 2-D arrays of iml's.
+    """
+    site_rows = {}
+    all_imts = []
+    for i, site in enumerate(sitecol):
+        key = (site.location.longitude, site.location.latitude)
+        site_rows[key] = i
+        for imt in site_imtls[key]:
+            if not imt in all_imts:
+                all_imts.append(imt)
+
+    sitecol_imls = {}
+    for imt in all_imts:
+        num_imls = max(len(site_imtls[key].get(imt, []))
+                       for key in site_rows)
+        imls = numpy.empty((len(sitecol), num_imls))
+        imls.fill(numpy.inf)
+        for key, i in site_rows.iteritems():
+            if imt in site_imtls[key]:
+                imls[i, :len(site_imtls[key][imt])] = site_imtls[key][imt]
+        sitecol_imls[imt] = imls
+
+    return site_rows, all_imts, sitecol_imls
+
+
+def _iter_ruptures_bins_data(site_rows, all_imts, sitecol_imls, gsims, tom,
+                             truncation_level, n_epsilons, sources_sites,
+                             rupture_site_filter, imtls=None, cav_min=0.):
+    """
+    Generate ruptures of the sources surviving the filters, together
+    with the values needed to bin their contributions for all the sites
+    they affect. Used by :func:`_collect_bins_data_multi` and
+    :func:`_accumulate_log_no_exceed_multi`.
+
+    :param sources_sites:
+        Output of the source-site filter.
+    :param imtls:
+        Optional dictionary mapping imt's to lists of iml's, to compute
+        conditional probabilities of exceedance ``P(IMT >= iml | rup)``
+        for, from the same means and standard deviations as the
+        disaggregated ones.
+    :param cav_min:
+        CAV threshold in g.s of the conditional probabilities of
+        exceedance computed for ``imtls``, see
+        :meth:`~openquake.hazardlib.gsim.base.GroundShakingIntensityModel.get_poes_multi`.
+        Those are then computed apart from the disaggregated ones.
+
+    Other parameters are similar to :func:`_collect_bins_data_multi`,
+    ``site_rows``, ``all_imts`` and ``sitecol_imls`` are as returned
+    by :func:`_prepare_site_imls`.
+
+    :returns:
+        Generator of tuples of: index of the source in the output of the
+        source-site filter, source, rupture, list of (lon, lat) tuples
+        of the affected sites, Joyner-Boore distances of the affected
+        sites, mesh of closest points of the rupture to the affected
+        sites, probability of one or more rupture occurrences and
+        dictionary mapping all imt's to 3-D arrays (sites, imls,
+        epsilons) of conditional probabilities of exceedance
+        ``P(IMT >= iml | rup, epsilon_bin)`` and, if ``imtls`` is given,
+        dictionary mapping its imt's to 2-D arrays (sites, imls) of
+        conditional probabilities of exceedance ``P(IMT >= iml | rup)``
+        (``None`` otherwise).
+    """
+    if imtls is None:
+        imtls = {}
+    for src_idx, (source, s_sites) in enumerate(sources_sites):
+        try:
+            tect_reg = source.tectonic_region_type
+            gsim = gsims[tect_reg]
+
+            ruptures_sites = ((rupture, s_sites)
+                              for rupture in source.iter_ruptures(tom))
+            # contexts are computed only once for all the sites
+            # affected by the rupture
+            for rupture, r_sites, sctx, rctx, dctx in gsim.iter_contexts(
+                    rupture_site_filter(ruptures_sites)):
+                r_sitemesh = r_sites.mesh
+                if hasattr(dctx, "rjb"):
+                    jb_dists = dctx.rjb
+                else:
+                    jb_dists = rupture.surface.get_joyner_boore_distance(
+                        r_sitemesh)
+                closest_points = rupture.surface.get_closest_points(r_sitemesh)
+
+                # compute probability of one or more rupture occurrences
+                prob_one_or_more = \
+                    rupture.get_probability_one_or_more_occurrences()
+
+                # compute conditional probability of exceeding iml given
+                # the current rupture, and different epsilon level, that is
+                # ``P(IMT >= iml | rup, epsilon_bin)`` for each of epsilon
+                # bins, for all sites and iml's at once
+                keys = zip(r_sitemesh.lons, r_sitemesh.lats)
+                rows = [site_rows[key] for key in keys]
+                poes_given_rup_eps = {}
+                poes_given_rup = {}
+                if imtls and cav_min:
+                    # the same as hazard_curves_poissonian()
+                    poes_given_rup = gsim.get_poes_multi(
+                        sctx, rctx, dctx, imtls, truncation_level,
+                        cav_min=cav_min
+                    )
+                for imt in all_imts:
+                    if imt in imtls and not imt in poes_given_rup:
+                        # one mean/stddev evaluation for both
+                        poes_given_rup[imt], poes_given_rup_eps[imt] = \
+                            gsim.get_poes_and_disaggregate(
+                                sctx, rctx, dctx, imt, imtls[imt],
+                                sitecol_imls[imt][rows], truncation_level,
+                                n_epsilons
+                            )
+                    else:
+                        poes_given_rup_eps[imt] = gsim.disaggregate_poe_multi(
+                            sctx, rctx, dctx, imt, sitecol_imls[imt][rows],
+                            truncation_level, n_epsilons
+                        )
+                for imt in imtls:
+                    if not imt in poes_given_rup:
+                        poes_given_rup[imt] = gsim.get_poes(
+                            sctx, rctx, dctx, imt, imtls[imt],
+                            truncation_level
+                        )
+
+                yield (src_idx, source, rupture, keys, jb_dists,
+                       closest_points, prob_one_or_more, poes_given_rup_eps,
+                       poes_given_rup if imtls else None)
+        except Exception, err:
+            msg = 'An error occurred with source id=%s. Error: %s'
+            msg %= (source.source_id, err.message)
+            raise RuntimeError(msg)
+
+
 def _collect_bins_data_multi(sources, sitecol, site_imtls, gsims,
                                 tom, truncation_level, n_epsilons,
                                 source_site_filter, rupture_site_filter):
@@ -321,7 +635,8 @@ def _collect_bins_data_multi(sources, sitecol, site_imtls, gsims,
     called by :func:`disaggregation_poissonian_multi`. This should be faster
     than calling :func:`disaggregation_poissonian` multiple times, as we
     only iterate once over the ruptures of each source. Memory may become
-    an issue for complex models, though.
+    an issue for complex models, though (see
+    :func:`_accumulate_log_no_exceed_multi` for an alternative).
 
     :param sitecol:
         instance of :class:`SiteCollection`
@@ -352,10 +667,9 @@ def _collect_bins_data_multi(sources, sitecol, site_imtls, gsims,
     probs_exceed_given_rup = {}
     src_idxs = []
 
-    sitemesh = sitecol.mesh
-
-    for site in sitecol:
-        key = (site.location.longitude, site.location.latitude)
+    site_rows, all_imts, sitecol_imls = _prepare_site_imls(sitecol,
+                                                           site_imtls)
+    for key in site_rows:
         dists[key] = []
         lons[key] = []
         lats[key] = []
@@ -367,75 +681,41 @@ def _collect_bins_data_multi(sources, sitecol, site_imtls, gsims,
             for iml in imtls[imt]:
                 probs_exceed_given_rup[key][imt].append([])
 
-    _next_trt_num = 0
     trt_nums = {}
 
     sources_sites = ((source, sitecol) for source in sources)
     # In contrast to _collect_bins_data, we need to keep track of which sites
     # are filtered out by the source_site and rupture_site filters
-    for src_idx, (source, s_sites) in \
-            enumerate(source_site_filter(sources_sites)):
-        try:
-            tect_reg = source.tectonic_region_type
-            gsim = gsims[tect_reg]
-
-            # store source ID instead of tectonic region type
-            if not source.source_id in trt_nums:
-                trt_nums[source.source_id] = src_idx
-                #_next_trt_num += 1
-            tect_reg = src_idx
-
-            ruptures_sites = ((rupture, s_sites)
-                              for rupture in source.iter_ruptures(tom))
-            for rupture, r_sites in rupture_site_filter(ruptures_sites):
-                # extract rupture parameters of interest
-                mags.append(rupture.mag)
-                tect_reg_types.append(tect_reg)
-
-                sctx, rctx, dctx = gsim.make_contexts(r_sites, rupture)
-                if hasattr(dctx, "rjb"):
-                    jb_dists = dctx["rjb"]
-                else:
-                    jb_dists = rupture.surface.get_joyner_boore_distance(sitemesh)
-                closest_points = rupture.surface.get_closest_points(sitemesh)
-
-                for site, jb_dist, closest_point in zip(r_sites, jb_dists, closest_points):
-                    key = (site.location.longitude, site.location.latitude)
-                    dists[key].append(jb_dist)
-                    lons[key].append(closest_point.longitude)
-                    lats[key].append(closest_point.latitude)
-
-                # compute probability of one or more rupture occurrences
-                probs_one_or_more.append(
-                    rupture.get_probability_one_or_more_occurrences()
-                )
-
-                # compute conditional probability of exceeding iml given
-                # the current rupture, and different epsilon level, that is
-                # ``P(IMT >= iml | rup, epsilon_bin)`` for each of epsilon bins
-                for site in r_sites:
-                    key = (site.location.longitude, site.location.latitude)
-                    imtls = site_imtls[key]
-                    imts = imtls.keys()
-                    sctx, rctx, dctx = gsim.make_contexts(SiteCollection([site]), rupture)
-                    for imt in imts:
-                        imls = imtls[imt]
-                        # in contrast to what is stated in the documentation,
-                        # disaggregate_poe does handle more than one iml
-                        poes_given_rup_eps = gsim.disaggregate_poe(
-                            sctx, rctx, dctx, imt, imls, truncation_level, n_epsilons
-                        )
-                        # collect probability of exceedance given the rupture
-                        for l in range(len(imls)):
-                            probs_exceed_given_rup[key][imt][l].append(poes_given_rup_eps[l])
-
-                # keep track of the source index, so that the probabilities can
-                # be associated to each source
-                src_idxs.append(src_idx)
-        except Exception, err:
-            msg = 'An error occurred with source id=%s. Error: %s'
-            msg %= (source.source_id, err.message)
-            raise RuntimeError(msg)
+    for (src_idx, source, rupture, keys, jb_dists, closest_points,
+         prob_one_or_more, poes_given_rup_eps, _) in _iter_ruptures_bins_data(
+            site_rows, all_imts, sitecol_imls, gsims, tom,
+            truncation_level, n_epsilons, source_site_filter(sources_sites),
+            rupture_site_filter):
+        # store source ID instead of tectonic region type
+        if not source.source_id in trt_nums:
+            trt_nums[source.source_id] = src_idx
+
+        # extract rupture parameters of interest
+        mags.append(rupture.mag)
+        tect_reg_types.append(src_idx)
+        for key, jb_dist, closest_point in zip(keys, jb_dists,
+                                               closest_points):
+            dists[key].append(jb_dist)
+            lons[key].append(closest_point.longitude)
+            lats[key].append(closest_point.latitude)
+        probs_one_or_more.append(prob_one_or_more)
+
+        # collect probability of exceedance given the rupture
+        for imt in all_imts:
+            for key, site_poes in zip(keys, poes_given_rup_eps[imt]):
+                if not imt in probs_exceed_given_rup[key]:
+                    continue
+                for l, poes in enumerate(probs_exceed_given_rup[key][imt]):
+                    poes.append(site_poes[l])
+
+        # keep track of the source index, so that the probabilities can
+        # be associated to each source
+        src_idxs.append(src_idx)
 
     bins_data = {}
 
@@ -515,64 +795,434 @@ def _define_bins(bins_data, mag_bin_width, dist_bin_width,
     return mag_bins, dist_bins, lon_bins, lat_bins, eps_bins, trt_bins
 
 
-def _arrange_data_in_bins(bins_data, bin_edges):
+def _define_bins_multi(sources, sitecol, max_distance, mag_bin_width,
+                       dist_bin_width, coord_bin_width, truncation_level,
+                       n_epsilons):
     """
-    Given bins data, as it comes from :func:`_collect_bins_data`, and bin edges
-    from :func:`_define_bins`, create a normalized 6d disaggregation matrix.
+    Define bin edges for disaggregation histograms of multiple sites
+    before generating ruptures.
+
+    Magnitude bins cover the magnitudes of the sources' MFDs, distance bins
+    cover distances up to ``max_distance``. Longitude and latitude bins of
+    each site cover the area within ``max_distance`` of the site, they are
+    aligned to multiples of ``coord_bin_width`` and their number is the
+    same for all sites. Tectonic region type bins (source ids) are only
+    known after ruptures are generated, see
+    :func:`_accumulate_log_no_exceed_multi`.
+
+    :returns:
+        A tuple of bin edges similar to the one returned by
+        :func:`_define_bins`, without tectonic region type bins and with
+        longitude and latitude bins as 2-D arrays with one row of bin
+        edges for each site of ``sitecol``.
     """
-    (mags, dists, lons, lats, tect_reg_types, trt_bins, probs_one_or_more,
-     probs_exceed_given_rup, src_idxs) = bins_data
-    mag_bins, dist_bins, lon_bins, lat_bins, eps_bins, trt_bins = bin_edges
-    shape = (len(mag_bins) - 1, len(dist_bins) - 1, len(lon_bins) - 1,
-             len(lat_bins) - 1, len(eps_bins) - 1, len(trt_bins))
-    diss_matrix = numpy.zeros(shape)
+    mags = [mag for source in sources
+            for (mag, _) in source.get_annual_occurrence_rates()]
+    mag_bins = mag_bin_width * numpy.arange(
+        int(numpy.floor(min(mags) / mag_bin_width)),
+        int(numpy.ceil(max(mags) / mag_bin_width) + 1)
+    )
 
-    src_indices = numpy.unique(src_idxs)
+    dist_bins = dist_bin_width * numpy.arange(
+        int(numpy.ceil(max_distance / dist_bin_width) + 1)
+    )
 
-    for i_mag in xrange(len(mag_bins) - 1):
-        mag_idx = mags <= mag_bins[i_mag + 1]
-        if i_mag != 0:
-            mag_idx &= mags > mag_bins[i_mag]
+    # angular distances corresponding to max_distance, in decimal degrees
+    site_lons = sitecol.mesh.lons
+    site_lats = sitecol.mesh.lats
+    dlat = numpy.degrees(max_distance / EARTH_RADIUS)
+    max_lat = min(numpy.abs(site_lats).max() + dlat, 89.)
+    dlon = min(dlat / numpy.cos(numpy.radians(max_lat)), 180.)
+
+    nlats = int(numpy.ceil(2 * dlat / coord_bin_width)) + 1
+    lat_bins = coord_bin_width * (
+        numpy.floor((site_lats - dlat) / coord_bin_width).reshape((-1, 1))
+        + numpy.arange(nlats + 1)
+    )
+    nlons = int(numpy.ceil(2 * dlon / coord_bin_width)) + 1
+    lon_bins = coord_bin_width * (
+        numpy.floor((site_lons - dlon) / coord_bin_width).reshape((-1, 1))
+        + numpy.arange(nlons + 1)
+    )
+    lon_bins = get_longitudinal_extent(0, lon_bins)
 
-        for i_dist in xrange(len(dist_bins) - 1):
-            dist_idx = dists <= dist_bins[i_dist + 1]
-            if i_dist != 0:
-                dist_idx &= dists > dist_bins[i_dist]
+    eps_bins = numpy.linspace(-truncation_level, truncation_level,
+                              n_epsilons + 1)
 
-            for i_lon in xrange(len(lon_bins) - 1):
-                extents = get_longitudinal_extent(lons, lon_bins[i_lon + 1])
-                lon_idx = extents >= 0
-                if i_lon != 0:
-                    extents = get_longitudinal_extent(lon_bins[i_lon], lons)
-                    lon_idx &= extents > 0
+    return mag_bins, dist_bins, lon_bins, lat_bins, eps_bins
 
-                for i_lat in xrange(len(lat_bins) - 1):
-                    lat_idx = lats <= lat_bins[i_lat + 1]
-                    if i_lat != 0:
-                        lat_idx &= lats > lat_bins[i_lat]
 
-                    for i_eps in xrange(len(eps_bins) - 1):
+def _get_site_bin_edges(bin_edges, i, trt_bins):
+    """
+    Extract the bin edges of the ``i``-th site from bin edges returned
+    by :func:`_define_bins_multi`, adding the site's ``trt_bins``.
+    """
+    mag_bins, dist_bins, lon_bins, lat_bins, eps_bins = bin_edges
+    return (mag_bins, dist_bins, lon_bins[i], lat_bins[i], eps_bins,
+            trt_bins)
 
-                        for i_trt in xrange(len(trt_bins)):
-                            trt_idx = tect_reg_types == i_trt
 
-                            diss_idx = (i_mag, i_dist, i_lon,
-                                        i_lat, i_eps, i_trt)
+def _accumulate_log_no_exceed_multi(sources, sitecol, site_imtls, gsims,
+                                    tom, truncation_level, n_epsilons,
+                                    source_site_filter, rupture_site_filter,
+                                    bin_edges, imtls=None, cav_min=0.):
+    """
+    Alternative to :func:`_collect_bins_data_multi` followed by
+    :func:`_arrange_data_in_bins`, binning the contributions of ruptures
+    incrementally, as they are generated, into bins defined beforehand.
 
-                            prob_idx = (mag_idx & dist_idx & lon_idx
-                                        & lat_idx & trt_idx)
+    Contributions are accumulated in a :class:`_SparseBins` only for the
+    bins ruptures fall in, so that memory usage grows neither with the
+    number of ruptures nor with the number of sources and sites not
+    affecting each other. Dense disaggregation matrices are built one
+    site at a time.
 
-                            poe = numpy.prod(
-                                (1 - probs_one_or_more[prob_idx]) **
-                                probs_exceed_given_rup[prob_idx, i_eps]
-                            )
-                            poe = 1 - poe
+    :param sources:
+        List of seismic sources.
+    :param bin_edges:
+        Bin edges as returned by :func:`_define_bins_multi` for the same
+        ``sources`` and ``sitecol``.
+    :param imtls:
+        Optional dictionary mapping imt's to lists of iml's to compute
+        hazard curves for, in the same loop over ruptures.
+    :param cav_min:
+        CAV threshold in g.s of the hazard curves, see
+        :func:`~openquake.hazardlib.calc.hazard_curve.hazard_curves_poissonian`.
+
+    Other parameters are the same as for :func:`_collect_bins_data_multi`.
+
+    :returns:
+        A tuple of two items. The first is an iterator with one item for
+        each site of ``sitecol``: either ``None`` if no rupture contributed
+        to the hazard at the site, or a tuple of the ids of the sources
+        that contributed, used as tectonic region type bins, and an 8-D
+        array shaped as the disaggregation matrices yielded by
+        :func:`disaggregation_poissonian_multi`, but containing the
+        logarithms of the probabilities of no exceedance (that is,
+        ``log(1 - P)`` where ``P`` is the value in the disaggregation
+        matrix). The second is ``None`` if ``imtls`` is not given,
+        otherwise the hazard curves, as returned by
+        :func:`~openquake.hazardlib.calc.hazard_curve.hazard_curves_poissonian`.
+    """
+    mag_bins, dist_bins, lon_bins, lat_bins, eps_bins = bin_edges
+    shape = (len(mag_bins) - 1, len(dist_bins) - 1, lon_bins.shape[1] - 1,
+             lat_bins.shape[1] - 1)
+    num_eps = len(eps_bins) - 1
+
+    site_rows, all_imts, sitecol_imls = _prepare_site_imls(sitecol,
+                                                           site_imtls)
+    num_imls = max(imls.shape[1] for imls in sitecol_imls.values())
+
+    # logarithms of probabilities of no exceedance, summed in each
+    # (site, mag, dist, lon, lat, source) bin for each imt, iml and
+    # epsilon bin
+    bins = _SparseBins((len(sitecol), numpy.prod(shape), len(sources)),
+                       (len(all_imts), num_imls, num_eps))
+
+    # coordinates are binned on their distance from the western and
+    # southern edges, which are different for each site, while bin widths
+    # are the same
+    rel_lon_bins = get_longitudinal_extent(lon_bins[0, 0], lon_bins[0])
+    rel_lon_bins[1:][rel_lon_bins[1:] <= 0] += 360
+    rel_lat_bins = lat_bins[0] - lat_bins[0, 0]
+
+    src_nums = dict((id(source), i) for i, source in enumerate(sources))
+
+    if imtls is not None:
+        curves = dict((imt, numpy.ones([len(sitecol), len(imtls[imt])]))
+                      for imt in imtls)
+
+    sources_sites = ((source, sitecol) for source in sources)
+    for (_, source, rupture, keys, jb_dists, closest_points,
+         prob_one_or_more, poes_given_rup_eps,
+         poes_given_rup) in _iter_ruptures_bins_data(
+            site_rows, all_imts, sitecol_imls, gsims, tom,
+            truncation_level, n_epsilons, source_site_filter(sources_sites),
+            rupture_site_filter, imtls, cav_min):
+        rows = numpy.array([site_rows[key] for key in keys], int)
+        if imtls is not None:
+            for imt in imtls:
+                curves[imt][rows] *= (1 - prob_one_or_more) \
+                    ** poes_given_rup[imt]
+
+        mag_idx = _digitize(numpy.array([rupture.mag]), mag_bins)[0]
+        if not mag_idx < shape[0]:
+            continue
+        dist_idxs = _digitize(numpy.asarray(jb_dists, float), dist_bins)
+        rel_lons = get_longitudinal_extent(lon_bins[rows, 0],
+                                           closest_points.lons.flatten())
+        lon_idxs = _digitize(rel_lons, rel_lon_bins)
+        rel_lats = closest_points.lats.flatten() - lat_bins[rows, 0]
+        lat_idxs = _digitize(rel_lats, rel_lat_bins)
+        inside = ((dist_idxs < shape[1]) & (rel_lons >= 0)
+                  & (lon_idxs < shape[2]) & (rel_lats >= 0)
+                  & (lat_idxs < shape[3]))
+        if not inside.any():
+            continue
+        rows = rows[inside]
+        cells = numpy.ravel_multi_index(
+            (mag_idx, dist_idxs[inside], lon_idxs[inside], lat_idxs[inside]),
+            shape
+        )
+
+        if prob_one_or_more >= 1:
+            log_no_occur = -numpy.inf
+        else:
+            log_no_occur = numpy.log1p(-prob_one_or_more)
+        contribs = numpy.zeros((len(rows), len(all_imts), num_imls, num_eps))
+        for i, imt in enumerate(all_imts):
+            poes = poes_given_rup_eps[imt][inside]
+            nonzero = poes > 0
+            contribs[:, i, :poes.shape[1]][nonzero] = \
+                log_no_occur * poes[nonzero]
+        bins.add((rows, cells, src_nums[id(source)]), contribs)
+
+    def iter_site_matrices():
+        for key, i in sorted(site_rows.iteritems(), key=lambda item: item[1]):
+            (cells, src_idxs), values = bins.get(i)
+            if not len(values):
+                yield None
+                continue
+            # tectonic region type bins of the site are the sources
+            # contributing to it, in the same order as ``sources``
+            site_srcs, trts = numpy.unique(src_idxs, return_inverse=True)
+            imts = site_imtls[key].keys()
+            imt_idxs = [all_imts.index(imt) for imt in imts]
+            site_num_imls = len(site_imtls[key][imts[0]])
+            matrix = numpy.zeros(
+                (numpy.prod(shape), len(site_srcs), len(imts),
+                 site_num_imls, num_eps)
+            )
+            matrix[cells, trts] = values[:, imt_idxs, :site_num_imls]
+            matrix = matrix.reshape(shape + matrix.shape[1:])
+            # (mag, dist, lon, lat, trt, imt, iml, eps) to
+            # (imt, iml, mag, dist, lon, lat, eps, trt)
+            matrix = matrix.transpose((5, 6, 0, 1, 2, 3, 7, 4))
+            trt_bins = [sources[src].source_id for src in site_srcs]
+            yield trt_bins, matrix
+
+    if imtls is None:
+        return iter_site_matrices(), None
+    for imt in imtls:
+        curves[imt] = 1 - curves[imt]
+    return iter_site_matrices(), curves
+
+
+class _SparseBins(object):
+    """
+    Sums of values in the bins of a multidimensional grid, stored only
+    for the bins values were added to.
+
+    Values are buffered as they are added and summed in their bins when
+    the buffer reaches :attr:`MAX_BUFFERED` items, so that memory usage
+    is bounded by the number of nonempty bins plus the size of the buffer.
+
+    :param shape:
+        Shape of the grid of bins. The first axis is the one bins are
+        extracted along by :meth:`get`.
+    :param value_shape:
+        Shape of the array of values of each bin.
+    """
+    #: Maximum number of values buffered before summing them in their bins.
+    MAX_BUFFERED = 10000
+
+    def __init__(self, shape, value_shape):
+        self.shape = shape
+        self.value_shape = value_shape
+        # sorted flat indices of the nonempty bins and their sums
+        self.indices = numpy.zeros(0, numpy.int64)
+        self.values = numpy.zeros((0, ) + value_shape)
+        self._buffered_indices = []
+        self._buffered_values = []
+        self._num_buffered = 0
+
+    def add(self, multi_index, values):
+        """
+        Add ``values`` to the bins of ``multi_index``, a tuple of indices
+        along each axis of the grid, as for ``numpy.ravel_multi_index``.
+        """
+        # index arrays are broadcast against each other
+        indices = numpy.ravel_multi_index(
+            [numpy.asarray(idx, numpy.int64) for idx in multi_index],
+            self.shape
+        )
+        self._buffered_indices.append(indices)
+        self._buffered_values.append(values)
+        self._num_buffered += len(values)
+        if self._num_buffered >= self.MAX_BUFFERED:
+            self._flush()
+
+    def get(self, i):
+        """
+        Get the nonempty bins of index ``i`` along the first axis.
+
+        :returns:
+            A tuple of two items: a tuple of 1-D arrays of indices of the
+            bins along the other axes and the array of their sums,
+            in the order of the flat indices of the bins.
+        """
+        self._flush()
+        size = numpy.prod(self.shape[1:], dtype=numpy.int64)
+        start, stop = numpy.searchsorted(self.indices,
+                                         [i * size, (i + 1) * size])
+        multi_index = numpy.unravel_index(self.indices[start:stop] - i * size,
+                                          self.shape[1:])
+        return multi_index, self.values[start:stop]
+
+    def _flush(self):
+        """
+        Sum the buffered values in their bins.
+        """
+        if not self._num_buffered:
+            return
+        indices = numpy.concatenate([self.indices] + self._buffered_indices)
+        values = numpy.concatenate([self.values] + self._buffered_values)
+        self._buffered_indices = []
+        self._buffered_values = []
+        self._num_buffered = 0
+        order = numpy.argsort(indices, kind='mergesort')
+        indices = indices[order]
+        [starts] = numpy.concatenate(
+            [[True], indices[1:] != indices[:-1]]).nonzero()
+        self.indices = indices[starts]
+        self.values = numpy.add.reduceat(values[order], starts, axis=0)
+
+
+def _digitize(values, bins):
+    """
+    Find histogram bin indices of ``values`` given sorted ``bins`` edges.
 
-                            diss_matrix[diss_idx] = poe
+    Bins are closed on the right, that is bin ``i`` collects values in the
+    interval ``(bins[i], bins[i + 1]]``, except for the first bin that also
+    collects all values lower than or equal to ``bins[0]``. Values greater
+    than the last edge get an index equal to the number of bins, so that
+    they can be masked out by the caller.
+    """
+    idxs = numpy.searchsorted(bins, values, side='left') - 1
+    idxs[idxs < 0] = 0
+    return idxs
+
+
+def _digitize_lons(lons, lon_bins):
+    """
+    Same as :func:`_digitize`, but for longitudes, whose bins can cross
+    the international date line.
+
+    Longitudes are located on their angular distance from the western edge,
+    then indices are adjusted so that the bin ``i`` of each longitude
+    satisfies the same conditions used for comparing longitudes in the rest
+    of the library, that is ``get_longitudinal_extent(lon, lon_bins[i + 1])
+    >= 0`` and ``get_longitudinal_extent(lon_bins[i], lon) > 0``.
+    """
+    lon_dists = get_longitudinal_extent(lon_bins[0], lons)
+    lon_bins_dists = get_longitudinal_extent(lon_bins[0], lon_bins)
+    lon_bins_dists[1:][lon_bins_dists[1:] <= 0] += 360
+    idxs = _digitize(lon_dists, lon_bins_dists)
+
+    # values lying on the bin edges can end up in the neighbouring bin
+    # because of rounding errors
+    nbins = len(lon_bins) - 1
+    upper = lon_bins[numpy.minimum(idxs + 1, nbins)]
+    idxs[(idxs < nbins) & (get_longitudinal_extent(lons, upper) < 0)] += 1
+    lower = lon_bins[numpy.minimum(idxs, nbins)]
+    idxs[(idxs > 0) & (get_longitudinal_extent(lower, lons) <= 0)] -= 1
+    return idxs
+
+
+def _get_bins_indices(bins_data, bin_edges):
+    """
+    Compute, for each rupture in ``bins_data``, the flat index of the
+    (magnitude, distance, longitude, latitude, tectonic region type) cell
+    it belongs to.
+
+    :returns:
+        A tuple of two items. First is a 1d integer array of flat indices
+        into a 5d array of shape ``(mags, dists, lons, lats, trts)``
+        (epsilon axis excluded), second is a 1d boolean array flagging
+        the ruptures falling inside the bins.
+    """
+    mags, dists, lons, lats, tect_reg_types = bins_data[:5]
+    mag_bins, dist_bins, lon_bins, lat_bins, eps_bins, trt_bins = bin_edges
+    shape = (len(mag_bins) - 1, len(dist_bins) - 1, len(lon_bins) - 1,
+             len(lat_bins) - 1, len(trt_bins))
+
+    idxs = (_digitize(mags, mag_bins), _digitize(dists, dist_bins),
+            _digitize_lons(lons, lon_bins), _digitize(lats, lat_bins),
+            numpy.asarray(tect_reg_types, int))
+    inside = numpy.ones(len(mags), bool)
+    for idx, nbins in zip(idxs, shape):
+        inside &= (idx >= 0) & (idx < nbins)
+    if not inside.any():
+        return numpy.array([], int), inside
+    flat_idxs = numpy.ravel_multi_index([idx[inside] for idx in idxs], shape)
+    return flat_idxs, inside
+
+
+def _arrange_data_in_bins(bins_data, bin_edges, bins_indices=None):
+    """
+    Given bins data, as it comes from :func:`_collect_bins_data`, and bin edges
+    from :func:`_define_bins`, create a normalized 6d disaggregation matrix.
+
+    Bin indices of each rupture are computed only once (or taken from
+    ``bins_indices``, as returned by :func:`_get_bins_indices`, when the same
+    ruptures are binned several times), then logarithms of probabilities of
+    no exceedance are summed in every bin with a single scatter pass
+    for each epsilon bin.
+    """
+    (mags, dists, lons, lats, tect_reg_types, trt_bins, probs_one_or_more,
+     probs_exceed_given_rup, src_idxs) = bins_data
+    mag_bins, dist_bins, lon_bins, lat_bins, eps_bins, trt_bins = bin_edges
+    shape = (len(mag_bins) - 1, len(dist_bins) - 1, len(lon_bins) - 1,
+             len(lat_bins) - 1, len(eps_bins) - 1, len(trt_bins))
+    diss_matrix = numpy.zeros(shape)
+    if len(mags) == 0:
+        return diss_matrix
+
+    if bins_indices is None:
+        bins_indices = _get_bins_indices(bins_data, bin_edges)
+    flat_idxs, inside = bins_indices
+    if not len(flat_idxs):
+        return diss_matrix
+
+    probs_one_or_more = probs_one_or_more[inside]
+    probs_exceed_given_rup = probs_exceed_given_rup[inside]
+    # log of probability of no exceedance, that is
+    # ``log((1 - P(rup)) ** P(IMT >= iml | rup, eps))``
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        log_no_exceed = (numpy.log1p(-probs_one_or_more)[:, None]
+                         * probs_exceed_given_rup)
+    log_no_exceed[probs_exceed_given_rup == 0] = 0
+
+    ncells = numpy.prod(shape[:4]) * shape[5]
+    cell_shape = shape[:4] + shape[5:]
+    for i_eps in xrange(shape[4]):
+        log_sums = numpy.bincount(flat_idxs, weights=log_no_exceed[:, i_eps],
+                                  minlength=ncells)
+        diss_matrix[:, :, :, :, i_eps, :] = 1 - numpy.exp(
+            log_sums.reshape(cell_shape)
+        )
 
     return diss_matrix
 
 
+def _fold(matrix, axes):
+    """
+    Fold a disaggregation matrix along ``axes``, that is compute the
+    probability of one or more exceedances over all the bins of the
+    folded dimensions: ``1 - prod(1 - matrix)``.
+
+    :param matrix:
+        Disaggregation matrix, the last six dimensions of which are
+        magnitude, distance, longitude, latitude, epsilon and tectonic
+        region type (see :func:`disaggregation_poissonian`). Leading
+        dimensions, like the imt and iml ones of the matrices yielded by
+        :func:`disaggregation_poissonian_multi`, are kept.
+    :param axes:
+        Tuple of negative indices of the dimensions to fold.
+    """
+    return 1 - numpy.prod(1 - matrix, axis=axes)
+
+
 def mag_pmf(matrix):
     """
     Fold full disaggregation matrix to magnitude PMF.
@@ -580,18 +1230,7 @@ def mag_pmf(matrix):
     :returns:
         1d array, a histogram representing magnitude PMF.
     """
-    nmags, ndists, nlons, nlats, neps, ntrts = matrix.shape
-    mag_pmf = numpy.zeros(nmags)
-    for i in xrange(nmags):
-        mag_pmf[i] = numpy.prod(
-            [1 - matrix[i][j][k][l][m][n]
-             for j in xrange(ndists)
-             for k in xrange(nlons)
-             for l in xrange(nlats)
-             for m in xrange(neps)
-             for n in xrange(ntrts)]
-        )
-    return 1 - mag_pmf
+    return _fold(matrix, (-5, -4, -3, -2, -1))
 
 
 def dist_pmf(matrix):
@@ -601,18 +1240,7 @@ def dist_pmf(matrix):
     :returns:
         1d array, a histogram representing distance PMF.
     """
-    nmags, ndists, nlons, nlats, neps, ntrts = matrix.shape
-    dist_pmf = numpy.zeros(ndists)
-    for j in xrange(ndists):
-        dist_pmf[j] = numpy.prod(
-            [1 - matrix[i][j][k][l][m][n]
-             for i in xrange(nmags)
-             for k in xrange(nlons)
-             for l in xrange(nlats)
-             for m in xrange(neps)
-             for n in xrange(ntrts)]
-        )
-    return 1 - dist_pmf
+    return _fold(matrix, (-6, -4, -3, -2, -1))
 
 
 def trt_pmf(matrix):
@@ -622,18 +1250,7 @@ def trt_pmf(matrix):
     :returns:
         1d array, a histogram representing tectonic region type PMF.
     """
-    nmags, ndists, nlons, nlats, neps, ntrts = matrix.shape
-    trt_pmf = numpy.zeros(ntrts)
-    for n in xrange(ntrts):
-        trt_pmf[n] = numpy.prod(
-            [1 - matrix[i][j][k][l][m][n]
-             for i in xrange(nmags)
-             for j in xrange(ndists)
-             for k in xrange(nlons)
-             for l in xrange(nlats)
-             for m in xrange(neps)]
-        )
-    return 1 - trt_pmf
+    return _fold(matrix, (-6, -5, -4, -3, -2))
 
 
 def mag_dist_pmf(matrix):
@@ -644,18 +1261,7 @@ def mag_dist_pmf(matrix):
         2d array. First dimension represents magnitude histogram bins,
         second one -- distance histogram bins.
     """
-    nmags, ndists, nlons, nlats, neps, ntrts = matrix.shape
-    mag_dist_pmf = numpy.zeros((nmags, ndists))
-    for i in xrange(nmags):
-        for j in xrange(ndists):
-            mag_dist_pmf[i][j] = numpy.prod(
-                [1 - matrix[i][j][k][l][m][n]
-                 for k in xrange(nlons)
-                 for l in xrange(nlats)
-                 for m in xrange(neps)
-                 for n in xrange(ntrts)]
-            )
-    return 1 - mag_dist_pmf
+    return _fold(matrix, (-4, -3, -2, -1))
 
 
 def mag_dist_eps_pmf(matrix):
@@ -667,18 +1273,7 @@ def mag_dist_eps_pmf(matrix):
         second one -- distance histogram bins, third one -- epsilon
         histogram bins.
     """
-    nmags, ndists, nlons, nlats, neps, ntrts = matrix.shape
-    mag_dist_eps_pmf = numpy.zeros((nmags, ndists, neps))
-    for i in xrange(nmags):
-        for j in xrange(ndists):
-            for m in xrange(neps):
-                mag_dist_eps_pmf[i][j][m] = numpy.prod(
-                    [1 - matrix[i][j][k][l][m][n]
-                     for k in xrange(nlons)
-                     for l in xrange(nlats)
-                     for n in xrange(ntrts)]
-                )
-    return 1 - mag_dist_eps_pmf
+    return _fold(matrix, (-4, -3, -1))
 
 
 def lon_lat_pmf(matrix):
@@ -689,18 +1284,7 @@ def lon_lat_pmf(matrix):
         2d array. First dimension represents longitude histogram bins,
         second one -- latitude histogram bins.
     """
-    nmags, ndists, nlons, nlats, neps, ntrts = matrix.shape
-    lon_lat_pmf = numpy.zeros((nlons, nlats))
-    for k in xrange(nlons):
-        for l in xrange(nlats):
-            lon_lat_pmf[k][l] = numpy.prod(
-                [1 - matrix[i][j][k][l][m][n]
-                 for i in xrange(nmags)
-                 for j in xrange(ndists)
-                 for m in xrange(neps)
-                 for n in xrange(ntrts)]
-            )
-    return 1 - lon_lat_pmf
+    return _fold(matrix, (-6, -5, -2, -1))
 
 
 def mag_lon_lat_pmf(matrix):
@@ -712,18 +1296,7 @@ def mag_lon_lat_pmf(matrix):
         second one -- longitude histogram bins, third one -- latitude
         histogram bins.
     """
-    nmags, ndists, nlons, nlats, neps, ntrts = matrix.shape
-    mag_lon_lat_pmf = numpy.zeros((nmags, nlons, nlats))
-    for i in xrange(nmags):
-        for k in xrange(nlons):
-            for l in xrange(nlats):
-                mag_lon_lat_pmf[i][k][l] = numpy.prod(
-                    [1 - matrix[i][j][k][l][m][n]
-                     for j in xrange(ndists)
-                     for m in xrange(neps)
-                     for n in xrange(ntrts)]
-                )
-    return 1 - mag_lon_lat_pmf
+    return _fold(matrix, (-5, -2, -1))
 
 
 def lon_lat_trt_pmf(matrix):
@@ -735,15 +1308,42 @@ def lon_lat_trt_pmf(matrix):
         3d array. Dimension represent longitude, latitude and tectonic region
         type histogram bins respectively.
     """
-    nmags, ndists, nlons, nlats, neps, ntrts = matrix.shape
-    lon_lat_trt_pmf = numpy.zeros((nlons, nlats, ntrts))
-    for k in xrange(nlons):
-        for l in xrange(nlats):
-            for n in xrange(ntrts):
-                lon_lat_trt_pmf[k][l][n] = numpy.prod(
-                    [1 - matrix[i][j][k][l][m][n]
-                     for i in xrange(nmags)
-                     for j in xrange(ndists)
-                     for m in xrange(neps)]
-                )
-    return 1 - lon_lat_trt_pmf
+    return _fold(matrix, (-6, -5, -2))
+
+
+def all_pmfs(matrix):
+    """
+    Fold full disaggregation matrix to all the PMFs provided by the
+    extractor functions of this module at once.
+
+    Probabilities of no exceedance ``1 - matrix`` are computed only once,
+    and lower-dimensional PMFs are folded from higher-dimensional ones
+    (e.g. magnitude PMF from magnitude / distance PMF) rather than from
+    the full matrix, so that the full matrix is traversed only three times.
+
+    :returns:
+        Dictionary mapping names of the extractor functions (``'mag_pmf'``,
+        ``'dist_pmf'``, ``'trt_pmf'``, ``'mag_dist_pmf'``,
+        ``'mag_dist_eps_pmf'``, ``'lon_lat_pmf'``, ``'mag_lon_lat_pmf'`` and
+        ``'lon_lat_trt_pmf'``) to arrays they would return.
+    """
+    no_exceed = 1 - matrix
+    # (mags, dists, eps)
+    mag_dist_eps = numpy.prod(no_exceed, axis=(-4, -3, -1))
+    mag_dist = numpy.prod(mag_dist_eps, axis=-1)
+    # (lons, lats, trts)
+    lon_lat_trt = numpy.prod(no_exceed, axis=(-6, -5, -2))
+    lon_lat = numpy.prod(lon_lat_trt, axis=-1)
+    # (mags, lons, lats)
+    mag_lon_lat = numpy.prod(no_exceed, axis=(-5, -2, -1))
+
+    return {
+        'mag_pmf': 1 - numpy.prod(mag_dist, axis=-1),
+        'dist_pmf': 1 - numpy.prod(mag_dist, axis=-2),
+        'trt_pmf': 1 - numpy.prod(lon_lat_trt, axis=(-3, -2)),
+        'mag_dist_pmf': 1 - mag_dist,
+        'mag_dist_eps_pmf': 1 - mag_dist_eps,
+        'lon_lat_pmf': 1 - lon_lat,
+        'mag_lon_lat_pmf': 1 - mag_lon_lat,
+        'lon_lat_trt_pmf': 1 - lon_lat_trt,
+    }
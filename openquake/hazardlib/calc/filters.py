@@ -51,7 +51,19 @@ Module :mod:`openquake.hazardlib.calc.filters` exports one distance-based
 filter function of each kind (see :func:`source_site_distance_filter` and
 :func:`rupture_site_distance_filter`) as well as "no operation" filters
 (:func:`source_site_noop_filter` and :func:`rupture_site_noop_filter`).
+
+Integration distance of distance-based filters can depend on magnitude
+and tectonic region type, see :func:`source_site_distance_filter`.
 """
+import numpy
+
+from openquake.hazardlib.geo.utils import get_bounding_circle
+
+
+#: Relative margin of the radius of the circles that candidate sites are
+#: selected in before the exact filtering, to make up for the approximations
+#: of polygon dilation and of bounding circles.
+BOUNDING_RADIUS_MARGIN = 1.05
 
 
 def source_site_distance_filter(integration_distance):
@@ -61,12 +73,47 @@ def source_site_distance_filter(integration_distance):
     :param integration_distance:
         Threshold distance in km, this value gets passed straight to
         :meth:`openquake.hazardlib.source.base.SeismicSource.filter_sites_by_distance_to_source`
-        which is what is actually used for filtering.
+        which is what is actually used for filtering. Instead of a number
+        it can be:
+
+        * a function taking a magnitude and returning the distance;
+        * a table of distances, that is a sequence of (magnitude, distance)
+          pairs sorted by magnitude, linearly interpolated in between
+          and extended with the first and last distances outside the range
+          of magnitudes;
+        * a dictionary mapping tectonic region types to any of the above.
+
+        Sources are filtered with the distance for their maximum magnitude
+        (distances must not decrease with magnitude for the filter not to
+        drop sites that some rupture of the source is relevant for).
+        A dictionary must have an item for all the tectonic region types
+        of the sources, :exc:`KeyError` is raised otherwise.
+
+    Only the sites within the :meth:`bounding circle
+    <openquake.hazardlib.source.base.SeismicSource.get_bounding_circle>`
+    of the source, enlarged by the integration distance, are checked,
+    looking them up with
+    :meth:`~openquake.hazardlib.site.SiteCollection.filter_by_distance`.
     """
+    get_distance = _get_distance_func(integration_distance)
+
     def filter_func(sources_sites):
         for source, sites in sources_sites:
+            if get_distance is not None:
+                max_mag = max(mag for (mag, rate) in
+                              source.get_annual_occurrence_rates(None))
+                distance = get_distance(source.tectonic_region_type, max_mag)
+            else:
+                distance = integration_distance
+            lon, lat, radius = source.get_bounding_circle()
+            c_sites = sites.filter_by_distance(
+                lon, lat,
+                (radius + distance) * BOUNDING_RADIUS_MARGIN
+            )
+            if c_sites is None:
+                continue
             s_sites = source.filter_sites_by_distance_to_source(
-                integration_distance, sites
+                distance, c_sites
             )
             if s_sites is None:
                 continue
@@ -81,13 +128,40 @@ def rupture_site_distance_filter(integration_distance):
     :param integration_distance:
         Threshold distance in km, this value gets passed straight to
         :meth:`openquake.hazardlib.source.base.SeismicSource.filter_sites_by_distance_to_rupture`
-        which is what is actually used for filtering.
+        which is what is actually used for filtering. It can depend on
+        magnitude and tectonic region type of ruptures as described
+        in :func:`source_site_distance_filter`.
+
+    Only the sites within a circle enclosing the :meth:`bounding box
+    <openquake.hazardlib.geo.surface.base.BaseSurface.get_bounding_box>`
+    of the rupture surface, enlarged by the integration distance, are
+    checked, looking them up with
+    :meth:`~openquake.hazardlib.site.SiteCollection.filter_by_distance`
+    (the spatial index of the site collection is built once and reused
+    for all the ruptures the collection is filtered for).
     """
+    get_distance = _get_distance_func(integration_distance)
+
     def filter_func(ruptures_sites):
         for rupture, sites in ruptures_sites:
+            if get_distance is not None:
+                distance = get_distance(rupture.tectonic_region_type,
+                                        rupture.mag)
+            else:
+                distance = integration_distance
+            west, east, north, south = rupture.surface.get_bounding_box()
+            lon, lat, radius = get_bounding_circle(
+                [west, east, east, west], [north, north, south, south]
+            )
+            c_sites = sites.filter_by_distance(
+                lon, lat,
+                (radius + distance) * BOUNDING_RADIUS_MARGIN
+            )
+            if c_sites is None:
+                continue
             source_cls = rupture.source_typology
             r_sites = source_cls.filter_sites_by_distance_to_rupture(
-                rupture, integration_distance, sites
+                rupture, distance, c_sites
             )
             if r_sites is None:
                 continue
@@ -95,6 +169,43 @@ def rupture_site_distance_filter(integration_distance):
     return filter_func
 
 
+def _get_distance_func(distance):
+    """
+    Convert the integration distance of distance-based filters to a function.
+
+    :param distance:
+        Integration distance, see :func:`source_site_distance_filter`.
+    :returns:
+        ``None`` if ``distance`` is a number, otherwise a function taking
+        tectonic region type and magnitude and returning the distance.
+    """
+    if isinstance(distance, dict):
+        funcs = dict((trt, _get_mag_distance_func(trt_distance))
+                     for (trt, trt_distance) in distance.iteritems())
+        return lambda trt, mag: funcs[trt](mag)
+    if callable(distance) or not numpy.isscalar(distance):
+        func = _get_mag_distance_func(distance)
+        return lambda trt, mag: func(mag)
+    return None
+
+
+def _get_mag_distance_func(distance):
+    """
+    Return a function taking magnitude and returning the distance, for
+    ``distance`` being a number, a function or a table of (magnitude,
+    distance) pairs (see :func:`source_site_distance_filter`).
+    """
+    if callable(distance):
+        return distance
+    if numpy.isscalar(distance):
+        return lambda mag: distance
+    mags, distances = numpy.array(distance, dtype=float).T
+    if not (numpy.diff(mags) > 0).all():
+        raise ValueError('magnitudes of integration distance table '
+                         'must be in strictly increasing order')
+    return lambda mag: float(numpy.interp(mag, mags, distances))
+
+
 #: Transparent source-site "no-op" filter -- behaves like a real filter
 #: but never filters anything out and doesn't have any overhead.
 source_site_noop_filter = lambda sources_sites: sources_sites
@@ -83,9 +83,10 @@ def ground_motion_fields(rupture, sites, imts, gsim, truncation_level,
 
     if truncation_level == 0:
         assert correlation_model is None
-        for imt in imts:
-            mean, _stddevs = gsim.get_mean_and_stddevs(sctx, rctx, dctx, imt,
-                                                       stddev_types=[])
+        means, _stddevs = gsim.get_mean_and_stddevs_multi(
+            sctx, rctx, dctx, imts, stddev_types=[]
+        )
+        for imt, mean in zip(imts, means):
             mean = gsim.to_imt_unit_values(mean)
             mean.shape += (1, )
             mean = mean.repeat(realizations, axis=1)
@@ -99,18 +100,27 @@ def ground_motion_fields(rupture, sites, imts, gsim, truncation_level,
         distribution = scipy.stats.truncnorm(- truncation_level,
                                              truncation_level)
 
-    for imt in imts:
+    # If the GSIM provides only total standard deviation, then we need
+    # to compute only mean and total standard deviation at the sites
+    # of interest.
+    total_stddev_only = (gsim.DEFINED_FOR_STANDARD_DEVIATION_TYPES
+                         == set([StdDev.TOTAL]))
+    if total_stddev_only:
+        stddev_types = [StdDev.TOTAL]
+    else:
+        stddev_types = [StdDev.INTER_EVENT, StdDev.INTRA_EVENT]
+    # mean and standard deviations of all the IMTs are computed at once
+    means, stddevs = gsim.get_mean_and_stddevs_multi(sctx, rctx, dctx, imts,
+                                                     stddev_types)
+
+    for i, imt in enumerate(imts):
+        mean = means[i]
 
-        if gsim.DEFINED_FOR_STANDARD_DEVIATION_TYPES == set([StdDev.TOTAL]):
-            # If the GSIM provides only total standard deviation, then we need
-            # to compute only mean and total standard deviation at the sites
-            # of interest.
+        if total_stddev_only:
             # In this case, we also assume that no correlation model is used.
             assert correlation_model is None
 
-            mean, [stddev_total] = gsim.get_mean_and_stddevs(
-                sctx, rctx, dctx, imt, [StdDev.TOTAL]
-            )
+            stddev_total = stddevs[0][i]
             stddev_total = stddev_total.reshape(stddev_total.shape + (1, ))
             mean = mean.reshape(mean.shape + (1, ))
 
@@ -119,9 +129,7 @@ def ground_motion_fields(rupture, sites, imts, gsim, truncation_level,
             )
             gmf = gsim.to_imt_unit_values(mean + total_residual)
         else:
-            mean, [stddev_inter, stddev_intra] = gsim.get_mean_and_stddevs(
-                sctx, rctx, dctx, imt, [StdDev.INTER_EVENT, StdDev.INTRA_EVENT]
-            )
+            stddev_inter, stddev_intra = stddevs[0][i], stddevs[1][i]
             stddev_intra = stddev_intra.reshape(stddev_intra.shape + (1, ))
             stddev_inter = stddev_inter.reshape(stddev_inter.shape + (1, ))
             mean = mean.reshape(mean.shape + (1, ))
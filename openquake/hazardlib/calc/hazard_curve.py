@@ -15,11 +15,17 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 :mod:`openquake.hazardlib.calc.hazard_curve` implements
-:func:`hazard_curves_poissonian`.
+:func:`hazard_curves_poissonian` and
+:func:`hazard_curves_poissonian_parallel`.
 """
+import heapq
+import itertools
+import multiprocessing
+
 import numpy
 
 from openquake.hazardlib.tom import PoissonTOM
+from openquake.hazardlib.source.split import split_source
 from openquake.hazardlib.calc import filters
 
 
@@ -80,31 +86,183 @@ def hazard_curves_poissonian(
         differentiates IMLs (the order and length are the same as
         corresponding value in ``imts`` dict).
     """
+    curves = _get_no_exceedance_curves(
+        sources, sites, imts, PoissonTOM(time_span), gsims, truncation_level,
+        source_site_filter, rupture_site_filter, cav_min
+    )
+    for imt in imts:
+        curves[imt] = 1 - curves[imt]
+    return curves
+
+
+def hazard_curves_poissonian_parallel(
+        sources, sites, imts, time_span, gsims, truncation_level,
+        source_site_filter=filters.source_site_noop_filter,
+        rupture_site_filter=filters.rupture_site_noop_filter,
+        cav_min=0., num_workers=None, num_tasks=None, source_weight=None,
+        max_source_ruptures=None):
+    """
+    Compute hazard curves as :func:`hazard_curves_poissonian`, distributing
+    the sources over a pool of worker processes.
+
+    Sources are split in tasks of about the same total weight, each
+    worker computes the products of the probabilities of no exceedance
+    of the ruptures of the sources of a task, and the partial products
+    are multiplied together (the order of the multiplications being
+    different, results may differ from those of
+    :func:`hazard_curves_poissonian` by rounding errors).
+
+    Worker processes are forked after the sources are read, so filters
+    and GSIMs do not need to be picklable, while partial hazard curves
+    are sent back to the parent process.
+
+    :param num_workers:
+        Number of worker processes, defaults to the number of CPUs. If 1,
+        tasks are computed in the calling process.
+    :param num_tasks:
+        Number of tasks to split the sources in, defaults to four times
+        the number of workers, so that workers finishing earlier can pick
+        up the remaining tasks.
+    :param source_weight:
+        Function taking a source and returning its weight, that is an
+        estimate of the computational cost of the source. Defaults to
+        the number of ruptures of the source (see
+        :meth:`~openquake.hazardlib.source.base.SeismicSource.count_ruptures`).
+    :param max_source_ruptures:
+        Optional maximum number of ruptures of a source. If given, heavier
+        sources are split with
+        :func:`~openquake.hazardlib.source.split.split_source` so that
+        tasks come out of about the same size.
+
+    Other parameters and the return value are the same as for
+    :func:`hazard_curves_poissonian`.
+    """
+    if max_source_ruptures is None:
+        sources = list(sources)
+    else:
+        sources = [split for source in sources
+                   for split in split_source(source, max_source_ruptures)]
+    if num_workers is None:
+        num_workers = multiprocessing.cpu_count()
+    if num_tasks is None:
+        num_tasks = 4 * num_workers
+    if source_weight is None:
+        weights = [source.count_ruptures() for source in sources]
+    else:
+        weights = [source_weight(source) for source in sources]
+    tasks = _split_in_tasks(weights, num_tasks)
+
+    args = (sources, sites, imts, PoissonTOM(time_span), gsims,
+            truncation_level, source_site_filter, rupture_site_filter,
+            cav_min)
+    if num_workers == 1:
+        _init_worker(args)
+        partial_curves = itertools.imap(_compute_task, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(num_workers, _init_worker, (args, ))
+        partial_curves = pool.imap_unordered(_compute_task, tasks)
+
+    try:
+        curves = dict((imt, numpy.ones([len(sites), len(imts[imt])]))
+                      for imt in imts)
+        for task_curves in partial_curves:
+            for imt in imts:
+                curves[imt] *= task_curves[imt]
+    finally:
+        if pool is None:
+            _init_worker(None)
+        else:
+            pool.terminate()
+            pool.join()
+
+    for imt in imts:
+        curves[imt] = 1 - curves[imt]
+    return curves
+
+
+def _get_no_exceedance_curves(sources, sites, imts, tom, gsims,
+                              truncation_level, source_site_filter,
+                              rupture_site_filter, cav_min):
+    """
+    Compute probabilities of no exceedance of the iml's in ``imts``
+    due to all the ruptures of ``sources``.
+
+    Parameters are the same as for :func:`hazard_curves_poissonian`,
+    except for ``tom``, the temporal occurrence model.
+
+    :returns:
+        Dictionary mapping intensity measure type objects to 2d numpy
+        arrays of probabilities of no exceedance, shaped as the hazard
+        curves returned by :func:`hazard_curves_poissonian`.
+    """
     curves = dict((imt, numpy.ones([len(sites), len(imts[imt])]))
                   for imt in imts)
-    tom = PoissonTOM(time_span)
 
     total_sites = len(sites)
     sources_sites = ((source, sites) for source in sources)
     for source, s_sites in source_site_filter(sources_sites):
         try:
+            gsim = gsims[source.tectonic_region_type]
             ruptures_sites = ((rupture, s_sites)
                               for rupture in source.iter_ruptures(tom))
-            for rupture, r_sites in rupture_site_filter(ruptures_sites):
+            for rupture, r_sites, sctx, rctx, dctx in gsim.iter_contexts(
+                    rupture_site_filter(ruptures_sites)):
                 prob = rupture.get_probability_one_or_more_occurrences()
-                gsim = gsims[rupture.tectonic_region_type]
-                sctx, rctx, dctx = gsim.make_contexts(r_sites, rupture)
+                poes = gsim.get_poes_multi(sctx, rctx, dctx, imts,
+                                           truncation_level, cav_min=cav_min)
                 for imt in imts:
-                    poes = gsim.get_poes_cav(sctx, rctx, dctx, imt, imts[imt],
-                                         truncation_level, cav_min=cav_min)
                     curves[imt] *= r_sites.expand(
-                        (1 - prob) ** poes, total_sites, placeholder=1
+                        (1 - prob) ** poes[imt], total_sites, placeholder=1
                     )
         except Exception, err:
             msg = 'An error occurred with source id=%s. Error: %s'
             msg %= (source.source_id, err.message)
             raise RuntimeError(msg)
 
-    for imt in imts:
-        curves[imt] = 1 - curves[imt]
     return curves
+
+
+def _split_in_tasks(weights, num_tasks):
+    """
+    Split items in at most ``num_tasks`` tasks of about the same total
+    weight, assigning the heaviest items first, each to the task with
+    the smallest total weight so far.
+
+    :param weights:
+        List of weights of the items.
+    :returns:
+        List of non-empty lists of indices of items, in increasing order.
+    """
+    tasks = [(0, i, []) for i in xrange(min(num_tasks, len(weights)))]
+    order = sorted(xrange(len(weights)), key=lambda i: -weights[i])
+    for i in order:
+        task_weight, task_id, indices = heapq.heappop(tasks)
+        indices.append(i)
+        heapq.heappush(tasks, (task_weight + weights[i], task_id, indices))
+    return [sorted(indices) for _, _, indices in sorted(
+        tasks, key=lambda task: task[1])]
+
+
+# arguments of _get_no_exceedance_curves in worker processes,
+# see _init_worker
+_WORKER_ARGS = None
+
+
+def _init_worker(args):
+    """
+    Store the arguments of :func:`_get_no_exceedance_curves` (with a
+    list of all the sources) for the tasks computed in the process.
+    """
+    global _WORKER_ARGS
+    _WORKER_ARGS = args
+
+
+def _compute_task(indices):
+    """
+    Compute the probabilities of no exceedance due to the sources
+    with the given indices.
+    """
+    sources = _WORKER_ARGS[0]
+    return _get_no_exceedance_curves([sources[i] for i in indices],
+                                     *_WORKER_ARGS[1:])
@@ -23,6 +23,10 @@ import numpy
 #: Earth radius in km.
 EARTH_RADIUS = 6371.0
 
+#: Maximum number of pairs of points distances are computed for at once
+#: by :func:`min_distance` and :func:`min_geodetic_distance`.
+MAX_BLOCK_SIZE = 20000
+
 
 def geodetic_distance(lons1, lats1, lons2, lats2):
     """
@@ -100,24 +104,13 @@ def min_geodetic_distance(mlons, mlats, slons, slats):
     """
     mlons, mlats, slons, slats = _prepare_coords(mlons, mlats, slons, slats)
     orig_shape = slons.shape
-    if slons.ndim == 0:
-        slons = slons.reshape((1, ))
-        slats = slats.reshape((1, ))
-    cos_mlats = numpy.cos(mlats)
-    cos_slats = numpy.cos(slats)
-
-    result = numpy.fromiter(
-        (
-            # next five lines are the same as in geodetic_distance()
-            numpy.arcsin(numpy.sqrt(
-                numpy.sin((mlats - slats[i]) / 2.0) ** 2.0
-                + cos_mlats * cos_slats[i]
-                * numpy.sin((mlons - slons[i]) / 2.0) ** 2.0
-            ).clip(-1., 1.)).min()
-            for i in xrange(len(slats))
-        ),
-        dtype=float, count=len(slats)
-    ) * (2 * EARTH_RADIUS)
+    result = numpy.empty(slons.size)
+    for block, haversines in _iter_haversines(mlons, mlats, slons, slats):
+        result[block] = haversines.min(axis=-1)
+    # the closest point is the one of the smallest haversine, there is
+    # no need to compute the distance to the others
+    result = numpy.arcsin(numpy.sqrt(result).clip(-1., 1.)) \
+        * (2 * EARTH_RADIUS)
 
     if not orig_shape:
         # original target point was a scalar, so return scalar as well
@@ -138,7 +131,9 @@ def min_distance(mlons, mlats, mdepths, slons, slats, sdepths, indices=False):
 
     Implements the same formula as in :func:`geodetic_distance` for distance
     along great circle arc and the same approach as in :func:`distance`
-    for combining it with depth distance.
+    for combining it with depth distance. Distances are computed for
+    blocks of points of the second collection, each of at most
+    :data:`MAX_BLOCK_SIZE` pairs of points.
 
     :param array mlons, mlats, mdepths:
         Numpy arrays of the same shape representing a first collection
@@ -170,34 +165,26 @@ def min_distance(mlons, mlats, mdepths, slons, slats, sdepths, indices=False):
 
     orig_shape = slons.shape
 
-    mlons = mlons.reshape(-1)
-    mlats = mlats.reshape(-1)
     mdepths = mdepths.reshape(-1)
-    slons = slons.reshape(-1)
-    slats = slats.reshape(-1)
     sdepths = sdepths.reshape(-1)
 
-    cos_mlats = numpy.cos(mlats)
-    cos_slats = numpy.cos(slats)
-
-    dist_squares = (
-        # next five lines are the same as in geodetic_distance()
-        (numpy.arcsin(numpy.sqrt(
-            numpy.sin((mlats - slats[i]) / 2.0) ** 2.0
-            + cos_mlats * cos_slats[i]
-            * numpy.sin((mlons - slons[i]) / 2.0) ** 2.0
-        ).clip(-1., 1.)) * (2 * EARTH_RADIUS)) ** 2
-        + (mdepths - sdepths[i]) ** 2
-        for i in xrange(len(slats))
-    )
     if not indices:
-        result = numpy.fromiter((numpy.sqrt(numpy.min(dist_sq))
-                                 for dist_sq in dist_squares),
-                                dtype=float, count=len(slats))
+        result = numpy.empty(slons.size)
     else:
-        result = numpy.fromiter((numpy.argmin(dsq, axis=-1)
-                                 for dsq in dist_squares),
-                                dtype=int, count=len(slats))
+        result = numpy.empty(slons.size, dtype=int)
+    for block, haversines in _iter_haversines(mlons, mlats, slons, slats):
+        # the same as in geodetic_distance() and distance()
+        dist_squares = (
+            (numpy.arcsin(numpy.sqrt(haversines).clip(-1., 1.))
+             * (2 * EARTH_RADIUS)) ** 2
+            + (mdepths - sdepths[block].reshape(-1, 1)) ** 2
+        )
+        if not indices:
+            result[block] = dist_squares.min(axis=-1)
+        else:
+            result[block] = dist_squares.argmin(axis=-1)
+    if not indices:
+        result = numpy.sqrt(result)
 
     if not orig_shape:
         # original target point was a scalar, so return scalar as well
@@ -207,6 +194,41 @@ def min_distance(mlons, mlats, mdepths, slons, slats, sdepths, indices=False):
         return result.reshape(orig_shape)
 
 
+def _iter_haversines(mlons, mlats, slons, slats):
+    """
+    Generate the haversines of the central angles between each point
+    of the first collection and each point of the second one, a block
+    of points of the second collection at a time.
+
+    Parameters are numpy arrays of coordinates in radians, as returned
+    by :func:`_prepare_coords`; arrays of a collection are flattened.
+
+    :returns:
+        Generator of tuples of two items: a slice of the flattened second
+        collection and a 2d array of haversines with one row for each
+        point of the slice and one column for each point of the first
+        collection. The slice covers at most :data:`MAX_BLOCK_SIZE` pairs
+        of points.
+    """
+    # terms of the first collection are computed once for all the blocks.
+    # halving angles before subtracting them gives the same values
+    # as halving their difference
+    half_mlons = mlons.reshape(-1) / 2.0
+    half_mlats = mlats.reshape(-1) / 2.0
+    cos_mlats = numpy.cos(mlats.reshape(-1))
+    half_slons = slons.reshape(-1, 1) / 2.0
+    half_slats = slats.reshape(-1, 1) / 2.0
+    cos_slats = numpy.cos(slats.reshape(-1, 1))
+    block_length = max(1, MAX_BLOCK_SIZE // max(1, len(half_mlons)))
+    for start in xrange(0, len(half_slons), block_length):
+        block = slice(start, start + block_length)
+        # the same as in geodetic_distance()
+        haversines = numpy.sin(half_mlats - half_slats[block]) ** 2.0
+        haversines += (cos_mlats * cos_slats[block]
+                       * numpy.sin(half_mlons - half_slons[block]) ** 2.0)
+        yield block, haversines
+
+
 def intervals_between(lon1, lat1, depth1, lon2, lat2, depth2, length):
     """
     Find a list of points between two given ones that lie on the same
@@ -456,9 +478,10 @@ else:
         mlons, mlats, slons, slats = _prepare_coords(mlons, mlats,
                                                      slons, slats)
         mdepths = sdepths = numpy.array(0.0)
-        return _geodetic_speedups.min_distance(mlons, mlats, mdepths,
-                                               slons, slats, sdepths,
-                                               indices=False)
+        return _geodetic_speedups.min_distance(
+            mlons, mlats, mdepths, slons, slats, sdepths, indices=False,
+            num_threads=speedups.global_registry.num_threads
+        )
 
     speedups.register(min_geodetic_distance, _c_min_geodetic_distance)
     del _c_min_geodetic_distance
@@ -472,8 +495,10 @@ else:
         sdepths = numpy.array(sdepths, float)
         assert mlons.shape == mdepths.shape
         assert slons.shape == sdepths.shape
-        return _geodetic_speedups.min_distance(mlons, mlats, mdepths,
-                                               slons, slats, sdepths, indices)
+        return _geodetic_speedups.min_distance(
+            mlons, mlats, mdepths, slons, slats, sdepths, indices,
+            num_threads=speedups.global_registry.num_threads
+        )
 
     speedups.register(min_distance, _c_min_distance)
     del _c_min_distance
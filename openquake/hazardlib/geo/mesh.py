@@ -15,8 +15,8 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
-Module :mod:`openquake.hazardlib.geo.mesh` defines classes :class:`Mesh` and
-its subclass :class:`RectangularMesh`.
+Module :mod:`openquake.hazardlib.geo.mesh` defines classes :class:`Mesh`,
+its subclass :class:`RectangularMesh` and :class:`RectangularMeshDistances`.
 """
 import numpy
 import shapely.geometry
@@ -185,7 +185,15 @@ class Mesh(object):
         distances = geodetic.min_geodetic_distance(self.lons, self.lats,
                                                    mesh.lons.flatten(),
                                                    mesh.lats.flatten())
+        return self._refine_joyner_boore_distance(mesh, distances)
 
+    def _refine_joyner_boore_distance(self, mesh, distances):
+        """
+        Compute Joyner-Boore distance to each point of ``mesh`` from
+        the minimum geodetic distance ``distances`` between this mesh
+        and each point of ``mesh`` (flattened). See
+        :meth:`get_joyner_boore_distance`.
+        """
         # here we find the points for which calculated mesh-to-mesh
         # distance is below a threshold. this threshold is arbitrary:
         # lower values increase the maximum possible error, higher
@@ -760,3 +768,128 @@ class RectangularMesh(Mesh):
         # compute and return weighted mean
         return numpy.sum(widths * mean_cell_lengths) / \
             numpy.sum(mean_cell_lengths)
+
+
+class RectangularMeshDistances(object):
+    """
+    Distances from the points of a rectangular mesh to the points of
+    a target mesh, shared by all the rectangular sub-meshes of the mesh.
+
+    Ruptures floating on a fault surface are rectangular sub-meshes of
+    the mesh of the whole fault, overlapping each other. Instead of
+    computing the distance from each point of each rupture to each site,
+    the distances from the points of the whole mesh are computed once
+    and the minimum distance of each sub-mesh is then a minimum over
+    a sliding window of those distances. Minima over the rows of the
+    window are kept for the last number of rows asked for, since ruptures
+    of the same magnitude have the same number of rows.
+
+    Results are the same as the ones of the corresponding methods of
+    :class:`Mesh` called on the sub-mesh.
+
+    Distances are computed at the first call and kept until the object
+    is discarded: it is meant to be created by a calculator for the
+    ruptures of one source and one site collection, see
+    :meth:`~openquake.hazardlib.gsim.base.GroundShakingIntensityModel.iter_contexts`.
+
+    :param mesh:
+        Instance of :class:`RectangularMesh`.
+    :param target:
+        Instance of :class:`Mesh`.
+    """
+    #: Maximum number of pairs of points (of the whole mesh and of the
+    #: target mesh) distances should be computed for: callers are expected
+    #: to use the methods of the sub-meshes for larger grids.
+    MAX_GRID_SIZE = 5000000
+
+    def __init__(self, mesh, target):
+        self.mesh = mesh
+        self.target = target
+        self._grids = {}
+        self._row_minima = {}
+
+    def get_min_distance(self, sub_mesh, first_row, first_col):
+        """
+        Compute the minimum distance from a sub-mesh to each point
+        of the target mesh, see :meth:`Mesh.get_min_distance`.
+
+        :param sub_mesh:
+            Instance of :class:`RectangularMesh`, the part of the mesh
+            starting at row ``first_row`` and column ``first_col``.
+        """
+        squares = self._get_window_minima('squares', sub_mesh, first_row,
+                                          first_col)
+        return numpy.sqrt(squares).reshape(self.target.shape)
+
+    def get_joyner_boore_distance(self, sub_mesh, first_row, first_col):
+        """
+        Compute Joyner-Boore distance from a sub-mesh to each point
+        of the target mesh, see :meth:`Mesh.get_joyner_boore_distance`.
+
+        Parameters are the same as for :meth:`get_min_distance`.
+        """
+        distances = self._get_window_minima('geodetic', sub_mesh, first_row,
+                                            first_col)
+        return sub_mesh._refine_joyner_boore_distance(self.target, distances)
+
+    def _get_window_minima(self, name, sub_mesh, first_row, first_col):
+        """
+        Return the minimum over the window of ``sub_mesh`` of the grid
+        of distances ``name`` to the target mesh, as a 1d array with one
+        value for each point of the target mesh.
+        """
+        num_rows, num_cols = sub_mesh.shape
+        grid = self._get_grid(name)
+        return self._get_row_minima(name, grid, num_rows)[
+            first_row, first_col:first_col + num_cols
+        ].min(axis=0)
+
+    def _get_grid(self, name):
+        """
+        Return the 3d array of distances ``name`` from each point of
+        the mesh to each point of the target mesh: ``'geodetic'``
+        distances or ``'squares'`` of the distances considering depths.
+        """
+        if name in self._grids:
+            return self._grids[name]
+        target = self.target
+        if 'geodetic' in self._grids:
+            distances = self._grids['geodetic']
+        else:
+            # the same operations as geodetic.min_geodetic_distance()
+            # and geodetic.min_distance(), taking the minimum later
+            distances = geodetic.geodetic_distance(
+                self.mesh.lons.reshape(self.mesh.shape + (1, )),
+                self.mesh.lats.reshape(self.mesh.shape + (1, )),
+                target.lons.reshape(-1), target.lats.reshape(-1)
+            )
+        if name == 'geodetic':
+            grid = distances
+        else:
+            if self.mesh.depths is None:
+                depths = numpy.zeros(self.mesh.shape + (1, ))
+            else:
+                depths = self.mesh.depths.reshape(self.mesh.shape + (1, ))
+            if target.depths is None:
+                target_depths = numpy.zeros(target.lons.size)
+            else:
+                target_depths = target.depths.reshape(-1)
+            grid = distances ** 2 + (depths - target_depths) ** 2
+        self._grids[name] = grid
+        return grid
+
+    def _get_row_minima(self, name, grid, num_rows):
+        """
+        Return the array of the minima of ``grid`` over each group of
+        ``num_rows`` consecutive rows, indexed by the first row.
+        """
+        if name in self._row_minima:
+            cached_num_rows, minima = self._row_minima[name]
+            if cached_num_rows == num_rows:
+                return minima
+        num_windows = len(grid) - num_rows + 1
+        minima = grid[:num_windows].copy()
+        for row in xrange(1, num_rows):
+            numpy.minimum(minima, grid[row:row + num_windows], out=minima)
+        self._row_minima[name] = (num_rows, minima)
+        return minima
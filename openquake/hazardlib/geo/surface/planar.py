@@ -16,7 +16,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 Module :mod:`openquake.hazardlib.geo.surface.planar` contains
-:class:`PlanarSurface`.
+:class:`PlanarSurface` and :class:`PlanarSurfaceArray`.
 """
 import numpy
 
@@ -546,3 +546,197 @@ class PlanarSurface(BaseQuadrilateralSurface):
         depth = (self.corner_depths[0] + self.corner_depths[3]) / 2.
 
         return Point(lon, lat, depth)
+
+
+class PlanarSurfaceArray(object):
+    """
+    Geometry of many planar surfaces, computing the distances from all
+    of them to the points of a mesh at once.
+
+    Point and area sources generate thousands of planar ruptures, and
+    calling the methods of :class:`PlanarSurface` for each of them costs
+    mostly Python and numpy calls overhead when there are a few sites.
+    The corners and plane parameters of the surfaces are kept here in
+    arrays, and minimum, Joyner-Boore and Rx distances are computed for
+    chunks of surfaces, each of at most :attr:`MAX_CHUNK_SIZE` pairs of
+    surface and point, to keep memory bounded. Results are the same as
+    the ones of the methods of :class:`PlanarSurface`.
+
+    Used by calculators for the ruptures of point and area sources, see
+    :meth:`~openquake.hazardlib.gsim.base.GroundShakingIntensityModel.iter_contexts`.
+    The array keeps no distances: they are computed at each call.
+
+    :param surfaces:
+        List of :class:`PlanarSurface` objects.
+    """
+    #: Maximum number of pairs of surface and point distances are
+    #: computed for at once.
+    MAX_CHUNK_SIZE = 100000
+
+    def __init__(self, surfaces):
+        self.corner_lons = numpy.array([surf.corner_lons for surf in surfaces])
+        self.corner_lats = numpy.array([surf.corner_lats for surf in surfaces])
+        self.corner_depths = numpy.array([surf.corner_depths
+                                          for surf in surfaces])
+        self.strike = numpy.array([surf.strike for surf in surfaces],
+                                  dtype=float)
+        self.length = numpy.array([surf.length for surf in surfaces])
+        self.width = numpy.array([surf.width for surf in surfaces])
+        self.normal = numpy.array([surf.normal for surf in surfaces])
+        self.d = numpy.array([surf.d for surf in surfaces])
+        self.uv1 = numpy.array([surf.uv1 for surf in surfaces])
+        self.uv2 = numpy.array([surf.uv2 for surf in surfaces])
+        self.zero_zero = numpy.array([surf.zero_zero for surf in surfaces])
+
+    def __len__(self):
+        return len(self.strike)
+
+    def get_min_distance(self, mesh):
+        """
+        Compute the minimum distance from each surface to each point
+        of ``mesh``, see :meth:`PlanarSurface.get_min_distance`.
+
+        :returns:
+            Numpy array of distances in km, of shape ``(len(self), ) +
+            mesh.shape``.
+        """
+        return self._get_distances('rrup', mesh)
+
+    def get_joyner_boore_distance(self, mesh):
+        """
+        Compute Joyner-Boore distance from each surface to each point
+        of ``mesh``, see :meth:`PlanarSurface.get_joyner_boore_distance`.
+        The result is shaped as for :meth:`get_min_distance`.
+        """
+        return self._get_distances('rjb', mesh)
+
+    def get_rx_distance(self, mesh):
+        """
+        Compute Rx distance from each surface to each point of ``mesh``,
+        see :meth:`PlanarSurface.get_rx_distance`. The result is shaped
+        as for :meth:`get_min_distance`.
+        """
+        return self._get_distances('rx', mesh)
+
+    def get_top_edge_depth(self):
+        """
+        Return the array of the top edge depths of the surfaces, see
+        :meth:`PlanarSurface.get_top_edge_depth`.
+        """
+        return self.corner_depths[:, 0]
+
+    def _get_chunk_length(self, mesh):
+        """
+        Return the number of surfaces of a chunk for ``mesh``.
+        """
+        return max(1, self.MAX_CHUNK_SIZE // max(1, mesh.lons.size))
+
+    def _get_distances(self, name, mesh):
+        """
+        Compute distances ``name`` from all the surfaces to each point
+        of ``mesh``, a chunk of surfaces at a time.
+        """
+        dists = numpy.empty((len(self), mesh.lons.size))
+        chunk_length = self._get_chunk_length(mesh)
+        for start in xrange(0, len(self), chunk_length):
+            stop = min(len(self), start + chunk_length)
+            dists[start:stop] = self._compute_distances(name, start, stop,
+                                                        mesh)
+        return dists.reshape((len(self), ) + mesh.lons.shape)
+
+    def _compute_distances(self, name, start, stop, mesh):
+        """
+        Compute distances ``name`` from the surfaces from ``start`` to
+        ``stop`` to each point of ``mesh``, as a 2d array with one row
+        for each surface and one column for each point.
+        """
+        if name == 'rrup':
+            return self._compute_min_distance(start, stop, mesh)
+        elif name == 'rjb':
+            return self._compute_joyner_boore_distance(start, stop, mesh)
+        elif name == 'rx':
+            return self._compute_rx_distance(start, stop, mesh)
+        raise ValueError('unknown distance %r' % name)
+
+    def _compute_min_distance(self, start, stop, mesh):
+        """
+        Same operations as :meth:`PlanarSurface.get_min_distance`,
+        broadcasting surfaces over the first axis and points over
+        the second one.
+        """
+        depths = mesh.depths
+        if depths is not None:
+            depths = depths.reshape(-1)
+        points = geo_utils.spherical_to_cartesian(
+            mesh.lons.reshape(-1), mesh.lats.reshape(-1), depths
+        ).reshape(1, -1, 3)
+        normal = self.normal[start:stop, None]
+        # see PlanarSurface._project()
+        dists = (normal * points).sum(axis=-1) + self.d[start:stop, None]
+        t0 = - dists
+        projs = points + normal * t0.reshape(t0.shape + (1, ))
+        vectors2d = projs - self.zero_zero[start:stop, None]
+        xx = (vectors2d * self.uv1[start:stop, None]).sum(axis=-1)
+        yy = (vectors2d * self.uv2[start:stop, None]).sum(axis=-1)
+        length = self.length[start:stop, None]
+        width = self.width[start:stop, None]
+        mxx = numpy.select([xx < 0, xx > length], [xx, xx - length],
+                           default=0)
+        myy = numpy.select([yy < 0, yy > width], [yy, yy - width], default=0)
+        dists2d_squares = mxx ** 2 + myy ** 2
+        return numpy.sqrt(dists ** 2 + dists2d_squares)
+
+    def _compute_joyner_boore_distance(self, start, stop, mesh):
+        """
+        Same operations as :meth:`PlanarSurface.get_joyner_boore_distance`,
+        broadcasting surfaces over the first axis and points over
+        the second one.
+        """
+        corner_lons = self.corner_lons[start:stop, None]
+        corner_lats = self.corner_lats[start:stop, None]
+        strike = self.strike[start:stop, None, None]
+        downdip_azimuth = (strike + 90) % 360
+        arcs_azimuths = numpy.concatenate(
+            [strike, strike, downdip_azimuth, downdip_azimuth], axis=-1
+        )
+        mesh_lons = mesh.lons.reshape((1, -1, 1))
+        mesh_lats = mesh.lats.reshape((1, -1, 1))
+        dists_to_arcs = geodetic.distance_to_arc(
+            corner_lons.take([0, 2, 0, 1], axis=-1),
+            corner_lats.take([0, 2, 0, 1], axis=-1),
+            arcs_azimuths, mesh_lons, mesh_lats
+        )
+        # the same as geodetic.min_geodetic_distance() of the corners
+        dists_to_corners = geodetic.geodetic_distance(
+            corner_lons, corner_lats, mesh_lons, mesh_lats
+        ).min(axis=-1)
+        signs = numpy.sign(dists_to_arcs)
+        ds1, ds2, ds3, ds4 = [signs[..., i] for i in xrange(4)]
+        dists_to_arcs = numpy.abs(dists_to_arcs).reshape(
+            dists_to_arcs.shape[:2] + (2, 2)).min(axis=-1)
+        return numpy.select(
+            condlist=[(ds1 == ds2) & (ds3 == ds4), ds1 == ds2, ds3 == ds4],
+            choicelist=[dists_to_corners, dists_to_arcs[..., 0],
+                        dists_to_arcs[..., 1]],
+            default=0
+        )
+
+    def _compute_rx_distance(self, start, stop, mesh):
+        """
+        Same operations as :meth:`PlanarSurface.get_rx_distance`,
+        broadcasting surfaces over the first axis and points over
+        the second one.
+        """
+        # the same as geo_utils.get_middle_point() of the top corners
+        lons1, lons2 = self.corner_lons[start:stop, :2].transpose()
+        lats1, lats2 = self.corner_lats[start:stop, :2].transpose()
+        dists = geodetic.geodetic_distance(lons1, lats1, lons2, lats2)
+        azimuths = geodetic.azimuth(lons1, lats1, lons2, lats2)
+        lons, lats = geodetic.point_at(lons1, lats1, azimuths, dists / 2.0)
+        same = (lons1 == lons2) & (lats1 == lats2)
+        lons = numpy.where(same, lons1, lons)
+        lats = numpy.where(same, lats1, lats)
+        return geodetic.distance_to_arc(
+            lons[:, None], lats[:, None], self.strike[start:stop, None],
+            mesh.lons.reshape((1, -1)), mesh.lats.reshape((1, -1))
+        )
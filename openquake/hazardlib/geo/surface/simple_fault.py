@@ -33,17 +33,28 @@ class SimpleFaultSurface(BaseQuadrilateralSurface):
     :param mesh:
         Instance of :class:`~openquake.hazardlib.geo.mesh.RectangularMesh`
         representing surface geometry.
+    :param fault_mesh:
+        Optional :class:`~openquake.hazardlib.geo.mesh.RectangularMesh`
+        of the whole fault, when the surface is one of the ruptures
+        floating on it: ``mesh`` is then the part of ``fault_mesh``
+        starting at row ``first_row`` and column ``first_col``. Used by
+        calculators to compute the distances of all the ruptures of the
+        fault at once (see
+        :meth:`~openquake.hazardlib.gsim.base.GroundShakingIntensityModel.iter_contexts`).
 
     Another way to construct the surface object is to call
     :meth:`from_fault_data`.
     """
-    def __init__(self, mesh):
+    def __init__(self, mesh, fault_mesh=None, first_row=0, first_col=0):
         super(SimpleFaultSurface, self).__init__()
         self.mesh = mesh
         assert not 1 in self.mesh.shape, (
             "Mesh must have at least 2 nodes along both length and width."
         )
         self.strike = self.dip = None
+        self.fault_mesh = fault_mesh
+        self.first_row = first_row
+        self.first_col = first_col
 
     def _create_mesh(self):
         """
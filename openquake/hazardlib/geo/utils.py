@@ -127,6 +127,26 @@ def get_spherical_bounding_box(lons, lats):
     return west, east, north, south
 
 
+def get_bounding_circle(lons, lats):
+    """
+    Given a collection of points find and return a circle on the Earth
+    surface enclosing them.
+
+    The center of the circle is the normalized mean of the position vectors
+    of the points, so the circle is not necessarily the smallest one.
+
+    :return:
+        A tuple of three items: longitude and latitude of the center
+        in decimal degrees, and radius of the circle in km (the great
+        circle distance between the center and the farthest point).
+    """
+    vectors = spherical_to_cartesian(lons, lats, None).reshape((-1, 3))
+    center_lon, center_lat, _ = cartesian_to_spherical(vectors.mean(axis=0))
+    radius = geodetic.geodetic_distance(center_lon, center_lat,
+                                        lons, lats).max()
+    return float(center_lon), float(center_lat), radius
+
+
 @with_slots
 class OrthographicProjection(object):
     """
@@ -392,7 +412,8 @@ else:
         pyy = numpy.array(pyy, float)
         cxx, cyy = numpy.array(polygon.exterior).transpose()
         return _utils_speedups.point_to_polygon_distance(
-            cxx, cyy, pxx, pyy
+            cxx, cyy, pxx, pyy,
+            num_threads=speedups.global_registry.num_threads
         )
 
     speedups.register(point_to_polygon_distance, _c_point_to_polygon_distance)
@@ -24,6 +24,8 @@ import importlib
 from collections import OrderedDict
 from openquake.hazardlib.gsim.base import (
     GMPE, IPE, GroundShakingIntensityModel)
+from openquake.hazardlib.gsim.cache import CachedGSIM
+from openquake.hazardlib.gsim.tabulated import TabulatedGSIM
 
 
 def get_available_gsims():
@@ -40,6 +42,7 @@ def get_available_gsims():
             for cls in mod.__dict__.itervalues():
                 if inspect.isclass(cls) and issubclass(
                     cls, GroundShakingIntensityModel) and cls not in (
-                        GroundShakingIntensityModel, GMPE, IPE):
+                        GroundShakingIntensityModel, GMPE, IPE,
+                        CachedGSIM, TabulatedGSIM):
                     gsims[cls.__name__] = cls
     return OrderedDict((k, gsims[k]) for k in sorted(gsims))
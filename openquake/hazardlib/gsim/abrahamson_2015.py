@@ -92,10 +92,34 @@ class AbrahamsonEtAl2015SInter(GMPE):
         <.base.GroundShakingIntensityModel.get_mean_and_stddevs>`
         for spec of input and result values.
         """
-        # extract dictionaries of coefficients specific to required
-        # intensity measure type and for PGA
+        # extract dictionary of coefficients specific to required
+        # intensity measure type
         C = self.COEFFS[imt]
         dc1 = self._get_delta_c1(imt)
+        return self._get_mean_and_stddevs(C, dc1, sites, rup, dists,
+                                          stddev_types)
+
+    def get_mean_and_stddevs_multi(self, sites, rup, dists, imts,
+                                   stddev_types):
+        """
+        See :meth:`superclass method
+        <.base.GroundShakingIntensityModel.get_mean_and_stddevs_multi>`
+        for spec of input and result values.
+
+        Median PGA on rock is computed only once for all the IMTs.
+        """
+        C = self.COEFFS.get_coeffs_columns(imts)
+        dc1 = np.array([[self._get_delta_c1(imt)] for imt in imts])
+        return self._get_mean_and_stddevs(C, dc1, sites, rup, dists,
+                                          stddev_types)
+
+    def _get_mean_and_stddevs(self, C, dc1, sites, rup, dists, stddev_types):
+        """
+        Returns mean and standard deviations for coefficients ``C`` and
+        magnitude scaling parameter ``dc1``, either scalars of one IMT
+        or columns of several IMTs.
+        """
+        # extract dictionary of coefficients for PGA
         C_PGA = self.COEFFS[PGA()]
         dc1_pga = self._get_delta_c1(PGA())
         # compute median pga on rock (vs30=1000), needed for site response
@@ -137,13 +161,12 @@ class AbrahamsonEtAl2015SInter(GMPE):
         """
         base = C['theta1'] + (self.CONSTS['theta4'] * dc1)
         dmag = self.CONSTS["C1"] + dc1
-        if mag > dmag:
-            f_mag = (self.CONSTS['theta5'] * (mag - dmag)) +\
-                C['theta13'] * ((10. - mag) ** 2.)
-
-        else:
-            f_mag = (self.CONSTS['theta4'] * (mag - dmag)) +\
-                C['theta13'] * ((10. - mag) ** 2.)
+        f_mag = np.where(
+            mag > dmag,
+            (self.CONSTS['theta5'] * (mag - dmag)) +
+            C['theta13'] * ((10. - mag) ** 2.),
+            (self.CONSTS['theta4'] * (mag - dmag)) +
+            C['theta13'] * ((10. - mag) ** 2.))
 
         return base + f_mag
 
@@ -167,11 +190,12 @@ class AbrahamsonEtAl2015SInter(GMPE):
         """
         Computes the forearc/backarc scaling term given by equation (4)
         """
-        f_faba = np.zeros_like(dists.rrup)
+        # one row for each IMT if coefficients are columns
+        f_faba = np.zeros(np.broadcast(C['theta15'], dists.rrup).shape)
         # Term only applies to backarc sites (F_FABA = 0. for forearc)
         max_dist = dists.rrup[sites.backarc]
         max_dist[max_dist < 100.0] = 100.0
-        f_faba[sites.backarc] = C['theta15'] + \
+        f_faba[..., sites.backarc] = C['theta15'] + \
             (C['theta16'] * np.log(max_dist / 40.0))
         return f_faba
 
@@ -186,15 +210,14 @@ class AbrahamsonEtAl2015SInter(GMPE):
         vs_star[vs_star > 1000.0] = 1000.
         arg = vs_star / C["vlin"]
         site_resp_term = C["theta12"] * np.log(arg)
-        # Get linear scaling term
-        idx = sites.vs30 >= C["vlin"]
-        site_resp_term[idx] += (C["b"] * self.CONSTS["n"] * np.log(arg[idx]))
-        # Get nonlinear scaling term
-        idx = np.logical_not(idx)
-        site_resp_term[idx] += (
-            -C["b"] * np.log(pga1000[idx] + self.CONSTS["c"]) +
-            C["b"] * np.log(pga1000[idx] + self.CONSTS["c"] *
-                            (arg[idx] ** self.CONSTS["n"])))
+        site_resp_term = site_resp_term + np.where(
+            sites.vs30 >= C["vlin"],
+            # Get linear scaling term
+            C["b"] * self.CONSTS["n"] * np.log(arg),
+            # Get nonlinear scaling term
+            -C["b"] * np.log(pga1000 + self.CONSTS["c"]) +
+            C["b"] * np.log(pga1000 + self.CONSTS["c"] *
+                            (arg ** self.CONSTS["n"])))
         return site_resp_term
 
     def _get_stddevs(self, C, stddev_types, num_sites):
@@ -356,11 +379,12 @@ class AbrahamsonEtAl2015SSlab(AbrahamsonEtAl2015SInter):
         """
         Computes the forearc/backarc scaling term given by equation (4).
         """
-        f_faba = np.zeros_like(dists.rhypo)
+        # one row for each IMT if coefficients are columns
+        f_faba = np.zeros(np.broadcast(C['theta7'], dists.rhypo).shape)
         # Term only applies to backarc sites (F_FABA = 0. for forearc)
         max_dist = dists.rhypo[sites.backarc]
         max_dist[max_dist < 85.0] = 85.0
-        f_faba[sites.backarc] = C['theta7'] +\
+        f_faba[..., sites.backarc] = C['theta7'] +\
             (C['theta8'] * np.log(max_dist / 40.0))
         return f_faba
 
@@ -84,6 +84,26 @@ class AkkarEtAlRjb2014(GMPE):
 
         Implement equation 1, page 20.
         """
+        return self._get_mean_and_stddevs(self.COEFFS[imt], sites, rup, dists,
+                                          stddev_types)
+
+    def get_mean_and_stddevs_multi(self, sites, rup, dists, imts,
+                                   stddev_types):
+        """
+        See :meth:`superclass method
+        <.base.GroundShakingIntensityModel.get_mean_and_stddevs_multi>`
+        for spec of input and result values.
+
+        Median PGA on rock is computed only once for all the IMTs.
+        """
+        return self._get_mean_and_stddevs(self.COEFFS.get_coeffs_columns(imts),
+                                          sites, rup, dists, stddev_types)
+
+    def _get_mean_and_stddevs(self, C, sites, rup, dists, stddev_types):
+        """
+        Compute mean and standard deviations for coefficients ``C``,
+        either scalars of one IMT or columns of several IMTs.
+        """
         # compute median PGA on rock, needed to compute non-linear site
         # amplification
         C_pga = self.COEFFS[PGA()]
@@ -92,7 +112,6 @@ class AkkarEtAlRjb2014(GMPE):
         )
 
         # compute full mean value by adding nonlinear site amplification terms
-        C = self.COEFFS[imt]
         mean = (self._compute_mean(C, rup.mag, dists, rup.rake) +
                 self._compute_non_linear_term(C, median_pga, sites))
 
@@ -161,26 +180,25 @@ class AkkarEtAlRjb2014(GMPE):
         """
         Vref = 750.0
         Vcon = 1000.0
-        lnS = np.zeros_like(sites.vs30)
+        ratio = sites.vs30 / Vref
 
-        # equation (3a)
-        idx = sites.vs30 < Vref
-        lnS[idx] = (
-            C['b1'] * np.log(sites.vs30[idx] / Vref) +
+        lnS = np.where(
+            sites.vs30 < Vref,
+            # equation (3a)
+            C['b1'] * np.log(ratio) +
             C['b2'] * np.log(
-                (pga_only[idx] + C['c'] * (sites.vs30[idx] / Vref) ** C['n']) /
-                ((pga_only[idx] + C['c']) * (sites.vs30[idx] / Vref) ** C['n'])
+                (pga_only + C['c'] * ratio ** C['n']) /
+                ((pga_only + C['c']) * ratio ** C['n'])
+            ),
+            np.where(
+                sites.vs30 <= Vcon,
+                # equation (3b)
+                C['b1'] * np.log(ratio),
+                # equation (3c)
+                C['b1'] * np.log(Vcon/Vref)
             )
         )
 
-        # equation (3b)
-        idx = (sites.vs30 >= Vref) & (sites.vs30 <= Vcon)
-        lnS[idx] = C['b1'] * np.log(sites.vs30[idx]/Vref)
-
-        # equation (3c)
-        idx = sites.vs30 > Vcon
-        lnS[idx] = C['b1'] * np.log(Vcon/Vref)
-
         return lnS
 
     def _compute_mean(self, C, mag, dists, rake):
@@ -29,6 +29,28 @@ import numpy
 
 from openquake.hazardlib import const
 from openquake.hazardlib import imt as imt_module
+from openquake.hazardlib.geo.mesh import RectangularMeshDistances
+from openquake.hazardlib.geo.surface.planar import (PlanarSurface,
+                                                    PlanarSurfaceArray)
+from openquake.hazardlib.geo.surface.simple_fault import SimpleFaultSurface
+
+#: Maximum number of elements of the temporary (epsilon, site, IML) arrays
+#: used in computing PoEs jointly with CAV exceedance, see
+#: :meth:`GroundShakingIntensityModel.get_poes_multi`. Sites are processed
+#: in chunks not to exceed it.
+MAX_CAV_CHUNK_SIZE = 1000000
+
+#: Maximum number of pairs of rupture and site of the ruptures whose
+#: distances are computed together, see
+#: :meth:`GroundShakingIntensityModel.iter_contexts`.
+MAX_CONTEXTS_BATCH_SIZE = 100000
+
+#: Methods of rupture surfaces (and of
+#: :class:`~openquake.hazardlib.geo.surface.planar.PlanarSurfaceArray`)
+#: computing the distance measures of :class:`DistancesContext`.
+_SURFACE_DISTANCES = {'rrup': 'get_min_distance',
+                      'rjb': 'get_joyner_boore_distance',
+                      'rx': 'get_rx_distance'}
 
 
 class GroundShakingIntensityModel(object):
@@ -167,6 +189,39 @@ class GroundShakingIntensityModel(object):
         compute interim steps).
         """
 
+    def get_mean_and_stddevs_multi(self, sites, rup, dists, imts,
+                                   stddev_types):
+        """
+        Calculate and return mean values and standard deviations of the
+        intensity distributions of several intensity measure types at once.
+
+        This implementation calls :meth:`get_mean_and_stddevs` for each
+        IMT. GSIMs can override it, computing the terms that do not depend
+        on the IMT only once. Coefficients of all the IMTs can be obtained
+        at once from :meth:`CoeffsTable.get_coeffs_columns`.
+
+        :param imts:
+            List of intensity measure type objects.
+
+        Other parameters are the same as for :meth:`get_mean_and_stddevs`.
+
+        :returns:
+            Tuple of two items: 2d array of mean values, first dimension
+            represents IMTs (in the same order as ``imts``) and the second
+            represents sites, and list of 2d arrays of standard deviations
+            of the same shape, one for each of ``stddev_types``.
+        """
+        means = []
+        stddevs = [[] for _ in stddev_types]
+        for imt in imts:
+            mean, imt_stddevs = self.get_mean_and_stddevs(sites, rup, dists,
+                                                          imt, stddev_types)
+            means.append(mean)
+            for values, stddev in zip(stddevs, imt_stddevs):
+                values.append(stddev)
+        return (numpy.array(means, dtype=float),
+                [numpy.array(stddev, dtype=float) for stddev in stddevs])
+
     def get_poes(self, sctx, rctx, dctx, imt, imls, truncation_level):
         """
         Calculate and return probabilities of exceedance (PoEs) of one or more
@@ -249,7 +304,7 @@ class GroundShakingIntensityModel(object):
 
     def get_poes_cav(self, sctx, rctx, dctx, imt, imls, truncation_level,
                      cav_min=0.16, cav_max_mag=5.5, depsilon=0.02,
-                     eps_correlation_model="EUS"):
+                     eps_correlation_model="EUS", cav_tabulated=False):
         """
         Calculate and return probabilities of exceedance (PoEs) of one or more
         intensity measure levels (IMLs) of one intensity measure type (IMT)
@@ -306,6 +361,11 @@ class GroundShakingIntensityModel(object):
         :param eps_correlation_model:
             Str, name of model used for correlation of epsilon values
             of PGA and SA, either "WUS" or "EUS" (default: "EUS")
+        :param cav_tabulated:
+            Bool, whether CAV exceedance probabilities should be
+            interpolated in a precomputed table rather than computed
+            exactly, see :class:`~openquake.hazardlib.gsim.cav.CAVExceedanceTable`
+            (default: False)
 
         :returns:
             2-D float array, joint probabilities for each site (first
@@ -316,118 +376,117 @@ class GroundShakingIntensityModel(object):
             float number, and if ``imts`` dictionary contain wrong or
             unsupported IMTs (see :attr:`DEFINED_FOR_INTENSITY_MEASURE_TYPES`).
         """
+        return self.get_poes_multi(
+            sctx, rctx, dctx, {imt: imls}, truncation_level, cav_min,
+            cav_max_mag, depsilon, eps_correlation_model, cav_tabulated
+        )[imt]
+
+    def get_poes_multi(self, sctx, rctx, dctx, imtls, truncation_level,
+                       cav_min=0.16, cav_max_mag=5.5, depsilon=0.02,
+                       eps_correlation_model="EUS", cav_tabulated=False):
+        """
+        Calculate and return probabilities of exceedance (PoEs) of the
+        intensity measure levels (IMLs) of several intensity measure types
+        (IMTs) for one rupture, jointly with the probability of exceeding
+        a minimum CAV value.
+
+        Results are the same as calling :meth:`get_poes_cav` for each IMT,
+        but the terms related to the CAV filtering (PGA mean and standard
+        deviation, epsilon discretization and CAV exceedance probabilities)
+        are computed once for all the IMTs.
+
+        :param imtls:
+            Dictionary mapping intensity measure type objects to lists
+            of intensity measure levels.
+
+        Other parameters are the same as for :meth:`get_poes_cav`.
+
+        :returns:
+            Dictionary mapping intensity measure type objects to 2-D float
+            arrays of joint probabilities for each site (first dimension)
+            and each IML (second dimension).
+
+        :raises ValueError:
+            If truncation level is not ``None`` and neither non-negative
+            float number, and if ``imtls`` dictionary contain wrong or
+            unsupported IMTs (see :attr:`DEFINED_FOR_INTENSITY_MEASURE_TYPES`).
+        """
         if truncation_level is not None and truncation_level < 0:
             raise ValueError('truncation level must be zero, positive number '
                              'or None')
-        self._check_imt(imt)
+        for imt in imtls:
+            self._check_imt(imt)
+        poes = {}
+        imt_pga = imt_module.PGA()
+        # PGA goes first, so that its mean and stddev are reused
+        imts = sorted(imtls, key=lambda imt: imt != imt_pga)
         if truncation_level == 0:
             # zero truncation mode, just compare imls to mean
             # No CAV filtering
-            imls = self.to_distribution_values(imls)
-            mean, _ = self.get_mean_and_stddevs(sctx, rctx, dctx, imt, [])
-            mean = mean.reshape(mean.shape + (1, ))
-            return (imls <= mean).astype(float)
-        else:
-            # use real normal distribution
-            assert (const.StdDev.TOTAL
-                    in self.DEFINED_FOR_STANDARD_DEVIATION_TYPES)
-            ln_imls = self.to_distribution_values(imls)
-            ln_sa_med, [sigma_ln_sa] = self.get_mean_and_stddevs(sctx, rctx, dctx, imt,
-                                                       [const.StdDev.TOTAL])
+            means, _ = self.get_mean_and_stddevs_multi(sctx, rctx, dctx,
+                                                       imts, [])
+            for imt, mean in zip(imts, means):
+                imls = self.to_distribution_values(imtls[imt])
+                mean = mean.reshape(mean.shape + (1, ))
+                poes[imt] = (imls <= mean).astype(float)
+            return poes
+
+        # use real normal distribution
+        assert (const.StdDev.TOTAL
+                in self.DEFINED_FOR_STANDARD_DEVIATION_TYPES)
+        cav_filtering = (truncation_level is not None and cav_min != 0
+                         and rctx.mag <= cav_max_mag)
+        # PGA mean and stddev and CAV terms, by epsilon bin width,
+        # shared by all the IMTs
+        pga_mean_stddev = None
+        cav_terms = {}
+        means, [stddevs] = self.get_mean_and_stddevs_multi(
+            sctx, rctx, dctx, imts, [const.StdDev.TOTAL]
+        )
+        for imt, ln_sa_med, sigma_ln_sa in zip(imts, means, stddevs):
+            ln_imls = self.to_distribution_values(imtls[imt])
+            if imt == imt_pga:
+                pga_mean_stddev = (ln_sa_med, sigma_ln_sa)
             nsites = len(ln_sa_med)
             ln_sa_med = ln_sa_med.reshape((nsites, 1))
             sigma_ln_sa = sigma_ln_sa.reshape((nsites, 1))
             zvalues = (ln_imls - ln_sa_med) / sigma_ln_sa
             if truncation_level is None:
                 # CAV filtering not supported
-                try:
-                    from ..c_speedups import norm
-                except:
-                    #print("Failed importing truncnorm speedup!")
-                    return _norm_sf(zvalues)
-                else:
-                    return 1 - norm.cdf(zvalues)
-            else:
-                try:
-                    from ..c_speedups import truncnorm
-                except:
-                    #print("Failed importing truncnorm speedup!")
-                    from scipy.stats import truncnorm
-                #sa_exceedance_prob = _truncnorm_sf(truncation_level, zvalues)
-                sa_exceedance_prob = 1 - truncnorm.cdf(zvalues, -truncation_level, truncation_level)
-                if cav_min == 0 or rctx.mag > cav_max_mag:
-                    return sa_exceedance_prob
-                else:
-                    from cav import calc_cav_exceedance_prob
-
-                    imt_pga = imt_module.PGA()
-                    if imt != imt_pga:
-                        depsilon = 0.5
-                    ## Normally distributed epsilon values and corresponding probabilities
-                    neps = int(truncation_level / depsilon) * 2 + 1
-                    eps_pga_array = numpy.linspace(-truncation_level, truncation_level, neps)
-                    prob_eps_array = truncnorm.pdf(eps_pga_array, -truncation_level, truncation_level) * depsilon
-                    #prob_eps_array /= numpy.add.reduce(prob_eps_array)
-
-                    ## Pre-calculate CAV exceedance probabilities for epsilon PGA
-                    ln_pga_eps_pga_array = numpy.zeros((neps, nsites))
-                    cav_exceedance_prob = numpy.zeros((neps, nsites))
-                    ln_pga_med, [sigma_ln_pga] = self.get_mean_and_stddevs(sctx, rctx, dctx,
-                                                    imt_pga, [const.StdDev.TOTAL])
-
-                    for e, eps_pga in enumerate(eps_pga_array):
-                        ## Determine PGA corresponding to eps_pga
-                        ln_pga = ln_pga_med + eps_pga * sigma_ln_pga
-                        ln_pga_eps_pga_array[e] = ln_pga
-                        ## CAV exceedance probability for PGA
-                        cav_exceedance_prob[e] = calc_cav_exceedance_prob(ln_pga, rctx.mag, sctx.vs30, cav_min=cav_min)
-
-                    joint_exceedance_probs = numpy.zeros((nsites, len(imls)))
-
-                    if imt == imt_pga:
-                        ## Integrate explicitly over epsilon
-                        for e in range(neps):
-                            for d in range(nsites):
-                                idxs = numpy.where(ln_pga_eps_pga_array[e][d] > ln_imls)
-                                joint_exceedance_probs[d][idxs] += (prob_eps_array[e] * cav_exceedance_prob[e, d])
-
-                    else:
-                        ## Correlation coefficients between PGA and SA (Table 3-1)
-                        b1_freqs = numpy.array([0.5, 1, 2.5, 5, 10, 20, 25, 35])
-                        b1_WUS = numpy.array([0.59, 0.59, 0.6, 0.633, 0.787, 0.931, 0.956, 0.976])
-                        b1_EUS = numpy.array([0.5, 0.55, 0.6, 0.75, 0.88, 0.9, 0.91, 0.93])
-                        if eps_correlation_model == "WUS":
-                            b1 = numpy.interp([1./imt.period], b1_freqs, b1_WUS, left=b1_WUS[0], right=b1_WUS[-1])[0]
-                        elif eps_correlation_model == "EUS":
-                            b1 = numpy.interp([1./imt.period], b1_freqs, b1_EUS, left=b1_EUS[0], right=b1_EUS[-1])[0]
-
-                        ## Eq. 3-3
-                        sigma_ln_sa_given_pga = numpy.sqrt(1 - b1**2) * sigma_ln_sa
-
-                        ## Loop over eps_pga
-                        for e in range(neps):
-                            eps_pga = eps_pga_array[e]
-                            ## Determine epsilon value of SA, and sigma
-                            ## Eq. 3-1
-                            eps_sa = b1 * eps_pga
-
-                            ## Eq. 3-2
-                            ln_sa_given_pga = ln_sa_med + eps_sa * sigma_ln_sa
-
-                            for d in range(nsites):
-                                ## Determine probability of exceedance of SA given PGA
-                                ## Eq. 4-3
-                                eps_sa_dot = (ln_imls - ln_sa_given_pga[d]) / sigma_ln_sa_given_pga[d]
-                                ## Eq. 4-2
-                                prob_sa_given_pga = 1 - truncnorm.cdf(eps_sa_dot, -truncation_level, truncation_level)
-
-                                joint_exceedance_probs[d] += (prob_eps_array[e] * cav_exceedance_prob[e, d] * prob_sa_given_pga)
-
-                        ## Workaround to make sure SA values are properly truncated
-                        joint_exceedance_probs = numpy.minimum(joint_exceedance_probs, sa_exceedance_prob)
-
-                    return joint_exceedance_probs
+                poes[imt] = _norm_sf(zvalues)
+                continue
+            sa_exceedance_prob = _truncnorm_sf(truncation_level, zvalues)
+            if not cav_filtering:
+                poes[imt] = sa_exceedance_prob
+                continue
 
+            imt_depsilon = depsilon if imt == imt_pga else 0.5
+            if imt_depsilon not in cav_terms:
+                if pga_mean_stddev is None:
+                    ln_pga_med, [sigma_ln_pga] = self.get_mean_and_stddevs(
+                        sctx, rctx, dctx, imt_pga, [const.StdDev.TOTAL]
+                    )
+                    pga_mean_stddev = (ln_pga_med, sigma_ln_pga)
+                cav_terms[imt_depsilon] = _get_cav_terms(
+                    pga_mean_stddev[0], pga_mean_stddev[1], rctx.mag,
+                    sctx.vs30, truncation_level, cav_min, imt_depsilon,
+                    cav_tabulated
+                )
+            (eps_pga_array, prob_eps_array, ln_pga_eps_pga_array,
+             cav_exceedance_prob) = cav_terms[imt_depsilon]
+
+            if imt == imt_pga:
+                poes[imt] = _get_joint_poes_pga_cav(
+                    ln_imls, ln_pga_eps_pga_array, prob_eps_array,
+                    cav_exceedance_prob
+                )
+            else:
+                poes[imt] = _get_joint_poes_sa_cav(
+                    imt, ln_imls, ln_sa_med, sigma_ln_sa, sa_exceedance_prob,
+                    eps_pga_array, prob_eps_array, cav_exceedance_prob,
+                    truncation_level, eps_correlation_model
+                )
+        return poes
 
     def disaggregate_poe(self, sctx, rctx, dctx, imt, iml,
                          truncation_level, n_epsilons):
@@ -454,12 +513,6 @@ class GroundShakingIntensityModel(object):
             raise ValueError('truncation level must be positive')
         self._check_imt(imt)
 
-        try:
-            from ..c_speedups import truncnorm
-        except:
-            #print("Failed importing truncnorm speedup!")
-            from scipy.stats import truncnorm
-
         # compute mean and standard deviations
         mean, [stddev] = self.get_mean_and_stddevs(sctx, rctx, dctx, imt,
                                                    [const.StdDev.TOTAL])
@@ -469,49 +522,80 @@ class GroundShakingIntensityModel(object):
         iml = self.to_distribution_values(iml)
         standard_imls = (iml - mean) / stddev
 
-        #distribution = scipy.stats.truncnorm(- truncation_level,
-        #                                     truncation_level)
-        truncation_level = float(truncation_level)
-        epsilons = numpy.linspace(- truncation_level, truncation_level,
-                                  n_epsilons + 1)
-        # compute epsilon bins contributions
-        #contribution_by_bands = (distribution.cdf(epsilons[1:]) -
-        #                         distribution.cdf(epsilons[:-1]))
-        contribution_by_bands = (truncnorm.cdf(epsilons[1:], -truncation_level,
-                                truncation_level) - truncnorm.cdf(epsilons[:-1],
-                                 -truncation_level, truncation_level))
-
-        # take the minimum epsilon larger than standard_iml
-        iml_bin_indices = numpy.searchsorted(epsilons, standard_imls)
-
-        return numpy.array([
-            # take full disaggregated distribution for the case of
-            # ``iml <= mean - truncation_level * stddev``
-            contribution_by_bands
-            if idx == 0 else
-
-            # take zeros if ``iml >= mean + truncation_level * stddev``
-            numpy.zeros(n_epsilons)
-            if idx >= n_epsilons + 1 else
-
-            # for other cases (when ``iml`` falls somewhere in the
-            # histogram):
-            numpy.concatenate((
-                # take zeros for bins that are on the left hand side
-                # from the bin ``iml`` falls into,
-                numpy.zeros(idx - 1),
-                # ... area of the portion of the bin containing ``iml``
-                # (the portion is limited on the left hand side by
-                # ``iml`` and on the right hand side by the bin edge),
-                #[distribution.sf(standard_imls[i])
-                [truncnorm.sf(standard_imls[i], -truncation_level, truncation_level)
-                 - contribution_by_bands[idx:].sum()],
-                # ... and all bins on the right go unchanged.
-                contribution_by_bands[idx:]
-            ))
-
-            for i, idx in enumerate(iml_bin_indices)
-        ])
+        return _disaggregate_standard_imls(standard_imls, truncation_level,
+                                           n_epsilons)
+
+    def disaggregate_poe_multi(self, sctx, rctx, dctx, imt, imls,
+                               truncation_level, n_epsilons):
+        """
+        Disaggregate PoEs of several intensity measure levels at several
+        sites at once, computing mean and standard deviation only once.
+
+        :param imls:
+            1d array of intensity measure levels, shared by all sites,
+            or 2d array with one row of intensity measure levels per site.
+
+        Other parameters are the same as for :meth:`disaggregate_poe`,
+        contexts are those of the (possibly filtered) site collection
+        the rupture affects.
+
+        :returns:
+            3d numpy array of contributions to probability of exceedance,
+            first dimension represents sites, the second represents IMLs
+            and the third represents ``n_epsilons`` epsilon bins.
+        """
+        if not truncation_level > 0:
+            raise ValueError('truncation level must be positive')
+        self._check_imt(imt)
+
+        mean, [stddev] = self.get_mean_and_stddevs(sctx, rctx, dctx, imt,
+                                                   [const.StdDev.TOTAL])
+        mean = mean.reshape(mean.shape + (1, ))
+        stddev = stddev.reshape(stddev.shape + (1, ))
+        imls = self.to_distribution_values(imls)
+        standard_imls = (imls - mean) / stddev
+
+        return _disaggregate_standard_imls(standard_imls, truncation_level,
+                                           n_epsilons)
+
+    def get_poes_and_disaggregate(self, sctx, rctx, dctx, imt, imls,
+                                  disagg_imls, truncation_level, n_epsilons):
+        """
+        Calculate PoEs of intensity measure levels and disaggregate PoEs
+        of (possibly different) intensity measure levels at once, from
+        a single evaluation of mean and standard deviation.
+
+        :param imls:
+            List of intensity measure levels to calculate PoEs for,
+            as for :meth:`get_poes`.
+        :param disagg_imls:
+            Intensity measure levels to disaggregate PoEs for, as ``imls``
+            parameter of :meth:`disaggregate_poe_multi`.
+        :param truncation_level:
+            Positive float number, see :meth:`disaggregate_poe`.
+
+        Other parameters are the same as for :meth:`disaggregate_poe_multi`.
+
+        :returns:
+            Tuple of two items: 2d array of PoEs, as returned by
+            :meth:`get_poes`, and 3d array of contributions to PoEs,
+            as returned by :meth:`disaggregate_poe_multi`.
+        """
+        if not truncation_level > 0:
+            raise ValueError('truncation level must be positive')
+        self._check_imt(imt)
+
+        mean, [stddev] = self.get_mean_and_stddevs(sctx, rctx, dctx, imt,
+                                                   [const.StdDev.TOTAL])
+        mean = mean.reshape(mean.shape + (1, ))
+        stddev = stddev.reshape(stddev.shape + (1, ))
+        values = (self.to_distribution_values(imls) - mean) / stddev
+        standard_imls = (self.to_distribution_values(disagg_imls)
+                         - mean) / stddev
+
+        return (_truncnorm_sf(truncation_level, values),
+                _disaggregate_standard_imls(standard_imls, truncation_level,
+                                            n_epsilons))
 
     @abc.abstractmethod
     def to_distribution_values(self, values):
@@ -536,7 +620,7 @@ class GroundShakingIntensityModel(object):
         so there is no need to override it in actual GSIM implementations.
         """
 
-    def make_contexts(self, site_collection, rupture):
+    def make_contexts(self, site_collection, rupture, distances=None):
         """
         Create context objects for given site collection and rupture.
 
@@ -549,6 +633,11 @@ class GroundShakingIntensityModel(object):
             its subclass
             :class:`~openquake.hazardlib.source.rupture.ProbabilisticRupture`).
 
+        :param distances:
+            Optional dictionary mapping names of distance measures to
+            arrays of the distances from the rupture to the sites, already
+            computed (see :meth:`iter_contexts`).
+
         :returns:
             Tuple of three items: sites context, rupture context and
             distances context, that is, instances of
@@ -563,7 +652,9 @@ class GroundShakingIntensityModel(object):
         """
         dctx = DistancesContext()
         for param in self.REQUIRES_DISTANCES:
-            if param == 'rrup':
+            if distances is not None and param in distances:
+                dist = distances[param]
+            elif param == 'rrup':
                 dist = rupture.surface.get_min_distance(site_collection.mesh)
             elif param == 'rx':
                 dist = rupture.surface.get_rx_distance(site_collection.mesh)
@@ -592,6 +683,9 @@ class GroundShakingIntensityModel(object):
                 raise ValueError('%s requires unknown site parameter %r' %
                                  (type(self).__name__, param))
             setattr(sctx, param, value)
+        # sites do not change across ruptures: let the GSIM cache in the
+        # collection what it derives from the sites (see get_site_groups)
+        sctx.site_collection = site_collection
 
         rctx = RuptureContext()
         for param in self.REQUIRES_RUPTURE_PARAMETERS:
@@ -614,6 +708,128 @@ class GroundShakingIntensityModel(object):
 
         return sctx, rctx, dctx
 
+    def iter_contexts(self, ruptures_sites):
+        """
+        Create context objects for each pair of rupture and site collection,
+        as :meth:`make_contexts` does, computing the distances of many
+        ruptures to the sites at once.
+
+        Ruptures are taken in batches of at most
+        :data:`MAX_CONTEXTS_BATCH_SIZE` pairs of rupture and site. The
+        distances from the planar surfaces of the ruptures of a batch
+        (like the ones of point and area sources) to the same site
+        collection are computed together, see
+        :class:`~openquake.hazardlib.geo.surface.planar.PlanarSurfaceArray`,
+        and are discarded with the batch. Results are the same as the ones
+        of :meth:`make_contexts`.
+
+        Minimum and Joyner-Boore distances of the ruptures floating on
+        a simple fault (see
+        :class:`~openquake.hazardlib.geo.surface.simple_fault.SimpleFaultSurface`)
+        are computed from the distances of the points of the whole fault
+        to the sites, see
+        :class:`~openquake.hazardlib.geo.mesh.RectangularMeshDistances`.
+        Those are computed once for all the ruptures of ``ruptures_sites``
+        on the same fault and with the same site collection, if more than
+        one of them is in a batch, and are discarded when all the contexts
+        are generated.
+
+        :param ruptures_sites:
+            Iterable of pairs of rupture and site collection, like the
+            output of a rupture-site filter for the ruptures of a source.
+        :returns:
+            Generator of tuples of rupture, site collection, sites context,
+            rupture context and distances context.
+        """
+        # distances of the points of whole faults to the site collections
+        fault_distances = {}
+        batch = []
+        batch_size = 0
+        for rupture, sites in ruptures_sites:
+            batch.append((rupture, sites))
+            batch_size += len(sites)
+            if batch_size >= MAX_CONTEXTS_BATCH_SIZE:
+                for contexts in self._make_contexts_batch(batch,
+                                                          fault_distances):
+                    yield contexts
+                batch = []
+                batch_size = 0
+        for contexts in self._make_contexts_batch(batch, fault_distances):
+            yield contexts
+
+    def _make_contexts_batch(self, ruptures_sites, fault_distances):
+        """
+        Create context objects for a batch of pairs of rupture and site
+        collection, see :meth:`iter_contexts`.
+
+        :param fault_distances:
+            Dictionary of the distances of the points of whole faults to
+            the site collections, updated with the ones computed for the
+            batch.
+        :returns:
+            List of tuples of rupture, site collection, sites context,
+            rupture context and distances context.
+        """
+        names = [name for name in sorted(_SURFACE_DISTANCES)
+                 if name in self.REQUIRES_DISTANCES]
+        # rx of a floating rupture depends on its top edge only
+        fault_names = [name for name in names if name != 'rx']
+        distances = [{} for _ in ruptures_sites]
+        # indices of the ruptures with planar surfaces, for each site
+        # collection (the collections are kept alive by the batch), and
+        # of the ruptures floating on a simple fault, for each fault mesh
+        # and site mesh
+        planar = {}
+        faults = {}
+        for i, (rupture, sites) in enumerate(ruptures_sites):
+            surface = rupture.surface
+            if names and isinstance(surface, PlanarSurface):
+                planar.setdefault(id(sites), []).append(i)
+            elif (fault_names and isinstance(surface, SimpleFaultSurface)
+                    and surface.fault_mesh is not None):
+                key = (id(surface.fault_mesh), id(sites.mesh))
+                faults.setdefault(key, []).append(i)
+        for indices in planar.itervalues():
+            if len(indices) < 2:
+                continue
+            mesh = ruptures_sites[indices[0]][1].mesh
+            surface_array = PlanarSurfaceArray(
+                [ruptures_sites[i][0].surface for i in indices]
+            )
+            for name in names:
+                dists = getattr(surface_array, _SURFACE_DISTANCES[name])(mesh)
+                for i, dist in zip(indices, dists):
+                    # copied not to keep the whole array alive
+                    distances[i][name] = dist.copy()
+        for key, indices in faults.iteritems():
+            rupture, sites = ruptures_sites[indices[0]]
+            if not key in fault_distances:
+                if len(indices) < 2:
+                    continue
+                fault_mesh = rupture.surface.fault_mesh
+                if (fault_mesh.lons.size * len(sites)
+                        > RectangularMeshDistances.MAX_GRID_SIZE):
+                    mesh_distances = None
+                else:
+                    mesh_distances = RectangularMeshDistances(fault_mesh,
+                                                              sites.mesh)
+                # meshes are kept not to reuse their ids in the keys
+                fault_distances[key] = (fault_mesh, sites.mesh,
+                                        mesh_distances)
+            mesh_distances = fault_distances[key][2]
+            if mesh_distances is None:
+                continue
+            for i in indices:
+                surface = ruptures_sites[i][0].surface
+                for name in fault_names:
+                    distances[i][name] = getattr(
+                        mesh_distances, _SURFACE_DISTANCES[name]
+                    )(surface.mesh, surface.first_row, surface.first_col)
+        return [
+            (rupture, sites) + self.make_contexts(sites, rupture, dists)
+            for (rupture, sites), dists in zip(ruptures_sites, distances)
+        ]
+
     def _check_imt(self, imt):
         """
         Make sure that ``imt`` is valid and is supported by this GSIM.
@@ -625,6 +841,316 @@ class GroundShakingIntensityModel(object):
                              (type(imt).__name__, type(self).__name__))
 
 
+def get_site_groups(sites, params, get_key):
+    """
+    Group the sites using the same set of coefficients of a GSIM.
+
+    Sites are grouped by their values of the site parameters ``params``
+    and ``get_key`` is called only once for each distinct combination
+    of values, to find the key of the set of coefficients the sites with
+    those values use (for instance the nearest point of a grid of site
+    conditions the GSIM is tabulated for). Sites with the same key form
+    a group, so that a GSIM can evaluate each set of coefficients once
+    on all its sites and scatter the results back with
+    ``result[indices] = ...``.
+
+    If ``sites`` was created by
+    :meth:`GroundShakingIntensityModel.make_contexts`, the keys of the
+    sites are computed once for the whole site collection and cached in
+    it, also for the collections filtered from it, see
+    :meth:`~openquake.hazardlib.site.SiteCollection.get_site_keys`.
+
+    :param sites:
+        Instance of :class:`SitesContext`.
+    :param params:
+        Sequence of names of site parameters.
+    :param get_key:
+        Callable taking the values of ``params`` as positional arguments
+        and returning a hashable key. It identifies the cached groups
+        together with ``params``, so it should be the same object, or
+        an equal one (like a method bound to the same GSIM), at each call.
+    :returns:
+        List of pairs ``(key, indices)``, one for each group, where
+        ``indices`` is a read-only 1d array of the increasing indices
+        of the sites of the group.
+    """
+    params = tuple(params)
+    site_collection = getattr(sites, 'site_collection', None)
+    if site_collection is None:
+        keys, site_key_indices = _get_site_keys(sites, params, get_key)
+    else:
+        keys, site_key_indices = site_collection.get_site_keys(
+            (params, get_key),
+            lambda col: _get_site_keys(col, params, get_key)
+        )
+    # a stable sort keeps the indices of each group increasing
+    order = site_key_indices.argsort(kind='mergesort')
+    order.flags.writeable = False
+    counts = numpy.bincount(site_key_indices, minlength=len(keys))
+    groups = zip(keys, numpy.split(order, counts.cumsum()[:-1]))
+    # keys of the whole site collection can have no site in a filtered one
+    return [(key, indices) for key, indices in groups if len(indices)]
+
+
+def _get_site_keys(sites, params, get_key):
+    """
+    Compute the keys of the sites for :func:`get_site_groups`.
+
+    :returns:
+        A pair of a list of distinct keys and a 1d array with the index
+        in that list of the key of each site.
+    """
+    values = numpy.array([getattr(sites, param) for param in params]).T
+    # distinct rows of values, the same as numpy.unique(values, axis=0)
+    # which is not available in older versions of numpy
+    order = numpy.lexsort(values.T[::-1])
+    values = values[order]
+    distinct = numpy.ones(len(values), dtype=bool)
+    distinct[1:] = (values[1:] != values[:-1]).any(axis=1)
+    inverse = numpy.empty(len(values), dtype=int)
+    inverse[order] = distinct.cumsum() - 1
+    keys = []
+    key_indices = {}
+    unique_key_indices = []
+    for row in values[distinct]:
+        key = get_key(*row)
+        if key not in key_indices:
+            key_indices[key] = len(keys)
+            keys.append(key)
+        unique_key_indices.append(key_indices[key])
+    return keys, numpy.array(unique_key_indices, dtype=int)[inverse]
+
+
+class NearestSiteConditionsMixin(object):
+    """
+    Mixin for GSIMs with coefficients tabulated for a grid of site
+    conditions, using for each site the coefficients of the nearest
+    ``(vs30, kappa)`` they are defined for.
+
+    Subclasses define ``DEFINED_FOR_VS30``, a 1d array of vs30 values,
+    and ``DEFINED_FOR_KAPPA``, a dictionary mapping each of those to
+    a 1d array of kappa values.
+    """
+    def get_site_conditions_groups(self, sites):
+        """
+        Group the sites by the nearest site conditions the GSIM is defined
+        for, see :func:`get_site_groups`.
+
+        :param sites:
+            Instance of :class:`SitesContext`.
+        :returns:
+            List of pairs ``(key, indices)``, where ``key`` is a tuple
+            of vs30 and kappa in ``DEFINED_FOR_VS30`` and
+            ``DEFINED_FOR_KAPPA``.
+        """
+        return get_site_groups(sites, ('vs30', 'kappa'),
+                               self._get_nearest_site_conditions)
+
+    def _get_nearest_site_conditions(self, vs30, kappa):
+        """
+        Return the nearest ``(vs30, kappa)`` the GSIM is defined for,
+        with vs30 looked up first.
+        """
+        nearest_vs30 = self.DEFINED_FOR_VS30[
+            numpy.abs(self.DEFINED_FOR_VS30 - vs30).argmin()]
+        kappas = self.DEFINED_FOR_KAPPA[nearest_vs30]
+        nearest_kappa = kappas[numpy.abs(kappas - kappa).argmin()]
+        return nearest_vs30, nearest_kappa
+
+
+def _get_cav_terms(ln_pga_med, sigma_ln_pga, mag, vs30, truncation_level,
+                   cav_min, depsilon, tabulated=False):
+    """
+    Discretize the truncated normal distribution of PGA epsilon and
+    compute the CAV exceedance probabilities for each epsilon value.
+
+    :param ln_pga_med:
+        1-D array of the mean of natural logarithm of PGA for each site.
+    :param sigma_ln_pga:
+        1-D array of the total standard deviation of natural logarithm
+        of PGA for each site.
+    :param tabulated:
+        Whether CAV exceedance probabilities are interpolated in a table,
+        see :func:`~openquake.hazardlib.gsim.cav.calc_cav_exceedance_prob`.
+    :returns:
+        Tuple of four arrays: epsilon values, their probabilities,
+        natural logarithm of PGA for each epsilon and site and CAV
+        exceedance probability for each epsilon and site.
+    """
+    from cav import calc_cav_exceedance_prob
+
+    nsites = len(ln_pga_med)
+    ## Normally distributed epsilon values and corresponding probabilities
+    neps = int(truncation_level / depsilon) * 2 + 1
+    eps_pga_array = numpy.linspace(-truncation_level, truncation_level, neps)
+    prob_eps_array = _truncnorm_pdf(truncation_level, eps_pga_array) \
+                     * depsilon
+    #prob_eps_array /= numpy.add.reduce(prob_eps_array)
+
+    ## PGA corresponding to each eps_pga, and CAV exceedance probabilities
+    ln_pga_eps_pga_array = ln_pga_med + eps_pga_array.reshape((neps, 1)) \
+                                        * sigma_ln_pga
+    cav_exceedance_prob = calc_cav_exceedance_prob(
+        ln_pga_eps_pga_array.flatten(), mag,
+        numpy.tile(vs30, neps), cav_min=cav_min, tabulated=tabulated
+    ).reshape((neps, nsites))
+    return (eps_pga_array, prob_eps_array, ln_pga_eps_pga_array,
+            cav_exceedance_prob)
+
+
+def _get_sites_chunks(neps, nsites, nimls):
+    """
+    Split the sites in slices, so that arrays of shape (``neps``, number
+    of sites in the slice, ``nimls``) have at most
+    :data:`MAX_CAV_CHUNK_SIZE` elements (and at least one site).
+    """
+    chunk_size = max(MAX_CAV_CHUNK_SIZE // max(neps * nimls, 1), 1)
+    return [slice(start, start + chunk_size)
+            for start in xrange(0, nsites, chunk_size)]
+
+
+def _get_joint_poes_pga_cav(ln_imls, ln_pga_eps_pga_array, prob_eps_array,
+                            cav_exceedance_prob):
+    """
+    Compute joint probabilities of exceeding PGA levels and the minimum CAV,
+    from the terms computed by :func:`_get_cav_terms`.
+
+    :param ln_imls:
+        Natural logarithm of PGA levels.
+    :returns:
+        2-D array of joint probabilities for each site and PGA level.
+    """
+    neps, nsites = ln_pga_eps_pga_array.shape
+    ln_imls = numpy.asarray(ln_imls)
+    joint_exceedance_probs = numpy.zeros((nsites, len(ln_imls)))
+    ## Integrate explicitly over epsilon, epsilons being the first axis
+    ## of (eps, sites, imls) arrays
+    weights = prob_eps_array.reshape((neps, 1)) * cav_exceedance_prob
+    for chunk in _get_sites_chunks(neps, nsites, len(ln_imls)):
+        exceeded = (ln_pga_eps_pga_array[:, chunk, None] > ln_imls)
+        joint_exceedance_probs[chunk] = numpy.add.reduce(
+            weights[:, chunk, None] * exceeded, axis=0
+        )
+    return joint_exceedance_probs
+
+
+def _get_joint_poes_sa_cav(imt, ln_imls, ln_sa_med, sigma_ln_sa,
+                           sa_exceedance_prob, eps_pga_array, prob_eps_array,
+                           cav_exceedance_prob, truncation_level,
+                           eps_correlation_model):
+    """
+    Compute joint probabilities of exceeding SA levels and the minimum CAV,
+    from the terms computed by :func:`_get_cav_terms`, taking into
+    account the correlation of epsilons of SA and PGA.
+
+    :param ln_sa_med:
+        2-D array of the mean of natural logarithm of SA, with shape
+        (number of sites, 1).
+    :param sigma_ln_sa:
+        2-D array of the total standard deviation of natural logarithm
+        of SA, with the same shape as ``ln_sa_med``.
+    :param sa_exceedance_prob:
+        2-D array of probabilities of exceeding ``ln_imls`` without
+        CAV filtering.
+    :returns:
+        2-D array of joint probabilities for each site and SA level.
+    """
+    nsites = len(ln_sa_med)
+    neps = len(eps_pga_array)
+    ln_imls = numpy.asarray(ln_imls)
+    joint_exceedance_probs = numpy.zeros((nsites, len(ln_imls)))
+
+    ## Correlation coefficients between PGA and SA (Table 3-1)
+    b1_freqs = numpy.array([0.5, 1, 2.5, 5, 10, 20, 25, 35])
+    b1_WUS = numpy.array([0.59, 0.59, 0.6, 0.633, 0.787, 0.931, 0.956, 0.976])
+    b1_EUS = numpy.array([0.5, 0.55, 0.6, 0.75, 0.88, 0.9, 0.91, 0.93])
+    if eps_correlation_model == "WUS":
+        b1 = numpy.interp([1./imt.period], b1_freqs, b1_WUS,
+                          left=b1_WUS[0], right=b1_WUS[-1])[0]
+    elif eps_correlation_model == "EUS":
+        b1 = numpy.interp([1./imt.period], b1_freqs, b1_EUS,
+                          left=b1_EUS[0], right=b1_EUS[-1])[0]
+
+    ## Eq. 3-3
+    sigma_ln_sa_given_pga = numpy.sqrt(1 - b1**2) * sigma_ln_sa
+
+    ## Determine epsilon value of SA, and sigma
+    ## Eq. 3-1
+    eps_sa = (b1 * eps_pga_array).reshape((neps, 1, 1))
+    weights = prob_eps_array.reshape((neps, 1)) * cav_exceedance_prob
+
+    ## Arrays have epsilons along the first axis, then sites and imls
+    for chunk in _get_sites_chunks(neps, nsites, len(ln_imls)):
+        ## Eq. 3-2
+        ln_sa_given_pga = ln_sa_med[chunk] + eps_sa * sigma_ln_sa[chunk]
+        ## Determine probability of exceedance of SA given PGA
+        ## Eq. 4-3
+        eps_sa_dot = ((ln_imls - ln_sa_given_pga)
+                      / sigma_ln_sa_given_pga[chunk])
+        ## Eq. 4-2
+        prob_sa_given_pga = _truncnorm_sf(truncation_level, eps_sa_dot)
+        joint_exceedance_probs[chunk] = numpy.add.reduce(
+            weights[:, chunk, None] * prob_sa_given_pga, axis=0
+        )
+
+    ## Workaround to make sure SA values are properly truncated
+    return numpy.minimum(joint_exceedance_probs, sa_exceedance_prob)
+
+
+def _disaggregate_standard_imls(standard_imls, truncation_level, n_epsilons):
+    """
+    Disaggregate PoEs of intensity measure levels, expressed in units of
+    standard deviations from the mean, in contributions of ``n_epsilons``
+    bins of the truncated normal distribution.
+
+    :param standard_imls:
+        Numpy array of intensity measure levels with respect to the standard
+        (mean=0, std=1) normal distribution, of any shape.
+    :returns:
+        Numpy array of shape ``standard_imls.shape + (n_epsilons, )``.
+    """
+    standard_imls = numpy.asarray(standard_imls, dtype=float)
+    truncation_level = float(truncation_level)
+    epsilons = numpy.linspace(- truncation_level, truncation_level,
+                              n_epsilons + 1)
+    # compute epsilon bins contributions
+    poes = _truncnorm_sf(truncation_level, epsilons)
+    contribution_by_bands = poes[:-1] - poes[1:]
+    # contributions of all bins on the right of each bin edge
+    # (the last one being zero)
+    tail_contributions = numpy.append(
+        numpy.cumsum(contribution_by_bands[::-1])[::-1], 0.
+    )
+
+    # take the minimum epsilon larger than standard_iml
+    iml_bin_indices = numpy.searchsorted(epsilons, standard_imls)
+    iml_bin_indices = iml_bin_indices.reshape(iml_bin_indices.shape + (1, ))
+
+    # take full contributions of all bins that are on the right hand side
+    # of the bin ``iml`` falls into (that is all of them for the case of
+    # ``iml <= mean - truncation_level * stddev`` and none of them for the
+    # case of ``iml >= mean + truncation_level * stddev``), and zeros for
+    # bins on the left hand side
+    bins = numpy.arange(n_epsilons)
+    result = numpy.where(bins >= iml_bin_indices, contribution_by_bands, 0.)
+
+    # for bins containing ``iml``, take the area of the portion of the bin
+    # limited on the left hand side by ``iml`` and on the right hand side
+    # by the bin edge
+    inside = ((iml_bin_indices > 0) & (iml_bin_indices <= n_epsilons)
+              & (bins == iml_bin_indices - 1))
+    if inside.any():
+        partial = (
+            _truncnorm_sf(truncation_level, standard_imls)
+            - tail_contributions[numpy.minimum(iml_bin_indices[..., 0],
+                                               n_epsilons)]
+        )
+        result = numpy.where(inside, partial[..., numpy.newaxis], result)
+    return result
+
+
+# Functions of the standard normal and truncated normal distributions,
+# used by all the methods computing probabilities of exceedance.
 def _truncnorm_sf(truncation_level, values):
     """
     Survival function for truncated normal distribution.
@@ -672,6 +1198,26 @@ def _truncnorm_sf(truncation_level, values):
     return ((phi_b - ndtr(values)) / z).clip(0.0, 1.0)
 
 
+def _truncnorm_pdf(truncation_level, values):
+    """
+    Probability density function for truncated normal distribution.
+
+    Makes the same assumptions as :func:`_truncnorm_sf`, and takes
+    the same parameters.
+
+    >>> from scipy.stats import truncnorm
+    >>> numpy.allclose(truncnorm(-3, 3).pdf(0.12345),
+    ...                _truncnorm_pdf(3, 0.12345))
+    True
+    """
+    values = numpy.asarray(values, dtype=float)
+    # the PDF of the normal distribution, divided by ``Z = CDF(b) - CDF(a)``
+    # (see :func:`_truncnorm_sf`) inside the truncation range, zero outside
+    z = ndtr(truncation_level) * 2 - 1
+    pdf = numpy.exp(- values ** 2 / 2) / (math.sqrt(2 * math.pi) * z)
+    return numpy.where(abs(values) <= truncation_level, pdf, 0.)
+
+
 def _norm_sf(values):
     """
     Survival function for normal distribution.
@@ -749,7 +1295,8 @@ class SitesContext(object):
     Only those required parameters are made available in a result context
     object.
     """
-    __slots__ = ('vs30', 'vs30measured', 'z1pt0', 'z2pt5', "kappa")
+    __slots__ = ('vs30', 'vs30measured', 'z1pt0', 'z2pt5', "kappa",
+                 'site_collection')
 
 
 class DistancesContext(object):
@@ -886,6 +1433,11 @@ class CoeffsTable(object):
     Traceback (most recent call last):
         ...
     KeyError: SA(period=0.01, damping=5)
+
+    Interpolated coefficients are computed only once for each IMT:
+
+    >>> ct[imt.SA(period=0.2, damping=5)] is ct[imt.SA(0.2, 5)]
+    True
     """
     def __init__(self, **kwargs):
         if not 'table' in kwargs:
@@ -921,6 +1473,26 @@ class CoeffsTable(object):
                 imt = imt_module.SA(sa_period, sa_damping)
                 self.sa_coeffs[imt] = imt_coeffs
 
+        self._coeff_names = coeff_names
+        # SA coefficients as 2d arrays (periods x coefficients), sorted
+        # by period, and logarithms of periods, by damping
+        self._sa_tables = {}
+        for damping in set(imt.damping for imt in self.sa_coeffs):
+            imts = sorted(imt for imt in self.sa_coeffs
+                          if imt.damping == damping)
+            self._sa_tables[damping] = (
+                numpy.array([imt.period for imt in imts]),
+                numpy.array([math.log(imt.period) for imt in imts]),
+                numpy.array([[self.sa_coeffs[imt][name]
+                              for name in coeff_names] for imt in imts])
+            )
+        # dictionaries of coefficients by IMT, as returned by __getitem__,
+        # and of arrays of coefficients by tuple of IMTs, as returned by
+        # get_coeffs and get_coeffs_columns
+        self._coeffs_cache = {}
+        self._coeffs_arrays_cache = {}
+        self._coeffs_columns_cache = {}
+
     def __getitem__(self, imt):
         """
         Return a dictionary of coefficients corresponding to ``imt``
@@ -929,39 +1501,141 @@ class CoeffsTable(object):
         of type :class:`~openquake.hazardlib.imt.SA` and interpolation
         is possible.
 
+        Dictionaries are computed once and shared by all the callers
+        asking for the same ``imt``, they must not be modified.
+
         :raises KeyError:
             If ``imt`` is not available in the table and no interpolation
             can be done.
         """
+        try:
+            return self._coeffs_cache[imt]
+        except KeyError:
+            pass
         if not isinstance(imt, imt_module.SA):
-            return self.non_sa_coeffs[imt]
+            coeffs = self.non_sa_coeffs[imt]
+        elif imt in self.sa_coeffs:
+            coeffs = self.sa_coeffs[imt]
+        else:
+            [row] = self._get_sa_rows([imt])
+            coeffs = dict((name, float(value))
+                          for name, value in zip(self._coeff_names, row))
+        self._coeffs_cache[imt] = coeffs
+        return coeffs
 
+    def get_coeffs(self, imts):
+        """
+        Return the coefficients corresponding to several IMTs at once,
+        interpolating those of :class:`~openquake.hazardlib.imt.SA`
+        periods not in the table as :meth:`__getitem__` does.
+
+        >>> ct = CoeffsTable(sa_damping=5, table='''
+        ...     imt   a    b
+        ...     pga   1    2
+        ...     0.1  10   20
+        ...     1.0   1    2
+        ... ''')
+        >>> from openquake.hazardlib import imt
+        >>> coeffs = ct.get_coeffs([imt.SA(0.1, 5), imt.PGA(),
+        ...                         imt.SA(0.5, 5)])
+        >>> coeffs['a']
+        array([10.        ,  1.        ,  3.70926996])
+        >>> coeffs['b'][2] == ct[imt.SA(0.5, 5)]['b']
+        True
+
+        :param imts:
+            Sequence of intensity measure type objects.
+        :returns:
+            Dictionary mapping coefficient names to read-only 1d arrays
+            of values, one for each of ``imts``. Results are cached by
+            sequence of IMTs.
+        :raises KeyError:
+            If any of ``imts`` is not available in the table and no
+            interpolation can be done.
+        """
+        imts = tuple(imts)
         try:
-            return self.sa_coeffs[imt]
+            return self._coeffs_arrays_cache[imts]
         except KeyError:
             pass
+        rows = numpy.zeros((len(imts), len(self._coeff_names)))
+        sa_indexes = []
+        for i, imt in enumerate(imts):
+            if isinstance(imt, imt_module.SA):
+                sa_indexes.append(i)
+            else:
+                coeffs = self.non_sa_coeffs[imt]
+                rows[i] = [coeffs[name] for name in self._coeff_names]
+        # SA rows are computed at once for each damping
+        for damping in set(imts[i].damping for i in sa_indexes):
+            indexes = [i for i in sa_indexes if imts[i].damping == damping]
+            rows[indexes] = self._get_sa_rows([imts[i] for i in indexes])
+        rows.flags.writeable = False
+        coeffs = dict((name, rows[:, j])
+                      for j, name in enumerate(self._coeff_names))
+        self._coeffs_arrays_cache[imts] = coeffs
+        return coeffs
+
+    def get_coeffs_columns(self, imts):
+        """
+        Return the coefficients corresponding to several IMTs at once,
+        as :meth:`get_coeffs` does, but as arrays shaped as columns (one row
+        for each of ``imts``), so that arithmetic with 1d arrays of values
+        for each site gives 2d arrays (IMTs x sites).
+
+        >>> ct = CoeffsTable(table='''
+        ...     imt   a    b
+        ...     pga   1    2
+        ...     pgv   3    4
+        ... ''')
+        >>> from openquake.hazardlib import imt
+        >>> ct.get_coeffs_columns([imt.PGA(), imt.PGV()])['a'] * [1, 10, 100]
+        array([[  1.,  10., 100.],
+               [  3.,  30., 300.]])
+        """
+        imts = tuple(imts)
+        try:
+            return self._coeffs_columns_cache[imts]
+        except KeyError:
+            pass
+        coeffs = dict((name, values.reshape((-1, 1)))
+                      for name, values in self.get_coeffs(imts).iteritems())
+        self._coeffs_columns_cache[imts] = coeffs
+        return coeffs
 
-        max_below = min_above = None
-        for unscaled_imt in self.sa_coeffs.keys():
-            if unscaled_imt.damping != imt.damping:
-                continue
-            if unscaled_imt.period > imt.period:
-                if min_above is None or unscaled_imt.period < min_above.period:
-                    min_above = unscaled_imt
-            elif unscaled_imt.period < imt.period:
-                if max_below is None or unscaled_imt.period > max_below.period:
-                    max_below = unscaled_imt
-        if max_below is None or min_above is None:
-            raise KeyError(imt)
-
-        # ratio tends to 1 when target period tends to a minimum
-        # known period above and to 0 if target period is close
-        # to maximum period below.
-        ratio = ((math.log(imt.period) - math.log(max_below.period))
-                 / (math.log(min_above.period) - math.log(max_below.period)))
-        max_below = self.sa_coeffs[max_below]
-        min_above = self.sa_coeffs[min_above]
-        return dict(
-            (co, (min_above[co] - max_below[co]) * ratio + max_below[co])
-            for co in max_below.keys()
-        )
+    def _get_sa_rows(self, imts):
+        """
+        Return a 2d array of coefficients (IMTs x coefficients) of
+        :class:`~openquake.hazardlib.imt.SA` IMTs of the same damping,
+        interpolating them in a logarithmic scale of periods between
+        the closest periods of the table.
+
+        :raises KeyError:
+            If any of ``imts`` is out of the range of the periods with
+            the same damping in the table.
+        """
+        try:
+            periods, ln_periods, rows = self._sa_tables[imts[0].damping]
+        except KeyError:
+            raise KeyError(imts[0])
+        target_periods = numpy.array([imt.period for imt in imts])
+        out = (target_periods < periods[0]) | (target_periods > periods[-1])
+        if out.any():
+            raise KeyError(imts[out.nonzero()[0][0]])
+        above = numpy.searchsorted(periods, target_periods)
+        result = rows[above]
+        interpolated = (periods[above] != target_periods).nonzero()[0]
+        if len(interpolated):
+            above = above[interpolated]
+            below = above - 1
+            ln_target_periods = numpy.array(
+                [math.log(imts[i].period) for i in interpolated]
+            )
+            # ratio tends to 1 when target period tends to a minimum
+            # known period above and to 0 if target period is close
+            # to maximum period below.
+            ratio = ((ln_target_periods - ln_periods[below])
+                     / (ln_periods[above] - ln_periods[below]))
+            result[interpolated] = ((rows[above] - rows[below])
+                                    * ratio.reshape((-1, 1)) + rows[below])
+        return result
@@ -109,6 +109,24 @@ class BindiEtAl2014Rjb(GMPE):
         stddevs = np.log(10.0 ** np.array(istddevs))
         return mean, stddevs
 
+    def get_mean_and_stddevs_multi(self, sites, rup, dists, imts,
+                                   stddev_types):
+        """
+        See :meth:`superclass method
+        <.base.GroundShakingIntensityModel.get_mean_and_stddevs_multi>`
+        for spec of input and result values.
+        """
+        C = self.COEFFS.get_coeffs_columns(imts)
+        imean = self._get_mean(C, rup, dists, sites)
+        # units of PGA and SA are converted to g, not the ones of PGV
+        in_g = np.array([[isinstance(imt, (PGA, SA))] for imt in imts])
+        mean = np.where(in_g, np.log((10.0 ** (imean - 2.0)) / g),
+                        np.log(10.0 ** imean))
+
+        istddevs = self._get_stddevs(C, stddev_types, len(sites.vs30))
+        stddevs = np.log(10.0 ** np.array(istddevs))
+        return mean, stddevs
+
     def _get_mean(self, C, rup, dists, sites):
         """
         Returns the mean ground motion
@@ -231,17 +249,11 @@ class BindiEtAl2014RjbEC8(BindiEtAl2014Rjb):
         """
         Returns the site amplification given Eurocode 8 site classification
         """
-        f_s = np.zeros_like(vs30)
-        # Site class B
-        idx = np.logical_and(vs30 < 800.0, vs30 >= 360.0)
-        f_s[idx] = C["eB"]
-        # Site Class C
-        idx = np.logical_and(vs30 < 360.0, vs30 >= 180.0)
-        f_s[idx] = C["eC"]
-        # Site Class D
-        idx = vs30 < 180.0
-        f_s[idx] = C["eD"]
-        return f_s
+        # Site classes D, C, B and A
+        return np.select(
+            [vs30 < 180.0, vs30 < 360.0, vs30 < 800.0],
+            [C["eD"], C["eC"], C["eB"]], 0.0
+        )
 
     #: Coefficients from Table 1
     COEFFS = CoeffsTable(sa_damping=5, table="""
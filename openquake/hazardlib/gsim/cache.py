@@ -0,0 +1,247 @@
+# The Hazard Library
+# Copyright (C) 2012 GEM Foundation
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Module :mod:`openquake.hazardlib.gsim.cache` defines :class:`CachedGSIM`,
+memoizing the results of a ground shaking intensity model.
+"""
+import hashlib
+from collections import OrderedDict
+
+import numpy
+
+from openquake.hazardlib.gsim.base import GroundShakingIntensityModel
+
+#: Default maximum number of results kept by :class:`CachedGSIM`.
+DEFAULT_CACHE_SIZE = 128
+
+
+def _delegate(name):
+    """
+    Return a property reading attribute ``name`` of the wrapped GSIM.
+    """
+    return property(lambda self: getattr(self.gsim, name))
+
+
+class CachedGSIM(GroundShakingIntensityModel):
+    """
+    Wrapper around a ground shaking intensity model, memoizing the results
+    of :meth:`get_mean_and_stddevs`, :meth:`get_mean_and_stddevs_multi`,
+    :meth:`get_poes` and :meth:`get_poes_multi`.
+
+    Different ruptures often give the same GSIM inputs: point source ruptures
+    differing only in hypocenter depth are the same for a GSIM requiring
+    only ``mag`` and ``rjb``, and ruptures of area sources repeat the same
+    magnitudes and nodal planes. Results are then looked up by the values
+    of the parameters the GSIM declares in
+    :attr:`~GroundShakingIntensityModel.REQUIRES_RUPTURE_PARAMETERS`,
+    :attr:`~GroundShakingIntensityModel.REQUIRES_DISTANCES` and
+    :attr:`~GroundShakingIntensityModel.REQUIRES_SITES_PARAMETERS` (and
+    by the values of the other arguments), the only ones a GSIM can
+    depend on, and computed by the wrapped GSIM only if not found.
+
+    Results are kept in a least recently used cache of at most ``maxsize``
+    items. Arrays of cached results are read-only, since they are returned
+    to all the callers asking for the same values.
+
+    :param gsim:
+        Instance of :class:`~openquake.hazardlib.gsim.base.GMPE` or
+        :class:`~openquake.hazardlib.gsim.base.IPE` to wrap.
+    :param maxsize:
+        Maximum number of results kept in the cache.
+
+    The wrapper has the same ``DEFINED_FOR`` and ``REQUIRES`` attributes
+    as ``gsim`` and can be used anywhere ``gsim`` could, for instance in
+    the ``gsims`` dictionary of
+    :func:`~openquake.hazardlib.calc.hazard_curve.hazard_curves_poissonian`.
+
+    .. attribute:: hits
+
+        Number of results found in the cache.
+
+    .. attribute:: misses
+
+        Number of results computed by the wrapped GSIM.
+    """
+    DEFINED_FOR_TECTONIC_REGION_TYPE = _delegate(
+        'DEFINED_FOR_TECTONIC_REGION_TYPE')
+    DEFINED_FOR_INTENSITY_MEASURE_TYPES = _delegate(
+        'DEFINED_FOR_INTENSITY_MEASURE_TYPES')
+    DEFINED_FOR_INTENSITY_MEASURE_COMPONENT = _delegate(
+        'DEFINED_FOR_INTENSITY_MEASURE_COMPONENT')
+    DEFINED_FOR_STANDARD_DEVIATION_TYPES = _delegate(
+        'DEFINED_FOR_STANDARD_DEVIATION_TYPES')
+    REQUIRES_SITES_PARAMETERS = _delegate('REQUIRES_SITES_PARAMETERS')
+    REQUIRES_RUPTURE_PARAMETERS = _delegate('REQUIRES_RUPTURE_PARAMETERS')
+    REQUIRES_DISTANCES = _delegate('REQUIRES_DISTANCES')
+
+    def __init__(self, gsim, maxsize=DEFAULT_CACHE_SIZE):
+        if maxsize < 1:
+            raise ValueError('cache size must be positive')
+        self.gsim = gsim
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    def clear_cache(self):
+        """
+        Remove all the cached results and reset :attr:`hits` and
+        :attr:`misses` counters.
+        """
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def get_mean_and_stddevs(self, sites, rup, dists, imt, stddev_types):
+        """
+        See :meth:`~GroundShakingIntensityModel.get_mean_and_stddevs`.
+        """
+        key = ('mean_and_stddevs', self._get_contexts_key(sites, rup, dists),
+               imt, tuple(stddev_types))
+        return self._get_cached(key, self.gsim.get_mean_and_stddevs,
+                                sites, rup, dists, imt, stddev_types)
+
+    def get_mean_and_stddevs_multi(self, sites, rup, dists, imts,
+                                   stddev_types):
+        """
+        See :meth:`~GroundShakingIntensityModel.get_mean_and_stddevs_multi`.
+        """
+        key = ('mean_and_stddevs_multi',
+               self._get_contexts_key(sites, rup, dists),
+               tuple(imts), tuple(stddev_types))
+        return self._get_cached(key, self.gsim.get_mean_and_stddevs_multi,
+                                sites, rup, dists, imts, stddev_types)
+
+    def get_poes(self, sctx, rctx, dctx, imt, imls, truncation_level):
+        """
+        See :meth:`~GroundShakingIntensityModel.get_poes`.
+        """
+        key = ('poes', self._get_contexts_key(sctx, rctx, dctx),
+               imt, tuple(imls), truncation_level)
+        return self._get_cached(key, self.gsim.get_poes,
+                                sctx, rctx, dctx, imt, imls, truncation_level)
+
+    def get_poes_multi(self, sctx, rctx, dctx, imtls, truncation_level,
+                       cav_min=0.16, cav_max_mag=5.5, depsilon=0.02,
+                       eps_correlation_model="EUS", cav_tabulated=False):
+        """
+        See :meth:`~GroundShakingIntensityModel.get_poes_multi`.
+        """
+        if truncation_level is not None and cav_min != 0:
+            # CAV filtering depends on magnitude and vs30 even
+            # if the wrapped GSIM doesn't require them
+            contexts_key = self._get_contexts_key(
+                sctx, rctx, dctx, rup_params=['mag'], sites_params=['vs30'])
+        else:
+            contexts_key = self._get_contexts_key(sctx, rctx, dctx)
+        key = ('poes_multi', contexts_key,
+               tuple(sorted((imt, tuple(imls))
+                            for imt, imls in imtls.iteritems())),
+               truncation_level, cav_min, cav_max_mag, depsilon,
+               eps_correlation_model, cav_tabulated)
+        poes = self._get_cached(
+            key, self.gsim.get_poes_multi, sctx, rctx, dctx, imtls,
+            truncation_level, cav_min, cav_max_mag, depsilon,
+            eps_correlation_model, cav_tabulated
+        )
+        # the dictionary itself is not shared with the cache
+        return dict(poes)
+
+    def make_contexts(self, site_collection, rupture):
+        """
+        See :meth:`~GroundShakingIntensityModel.make_contexts`.
+        """
+        return self.gsim.make_contexts(site_collection, rupture)
+
+    def to_distribution_values(self, values):
+        """
+        See :meth:`~GroundShakingIntensityModel.to_distribution_values`.
+        """
+        return self.gsim.to_distribution_values(values)
+
+    def to_imt_unit_values(self, values):
+        """
+        See :meth:`~GroundShakingIntensityModel.to_imt_unit_values`.
+        """
+        return self.gsim.to_imt_unit_values(values)
+
+    def _get_contexts_key(self, sctx, rctx, dctx, rup_params=(),
+                          sites_params=()):
+        """
+        Return a hashable key identifying the values of the contexts
+        parameters required by the wrapped GSIM.
+
+        Rupture parameters are scalars and are part of the key as they are,
+        distances and sites parameters are arrays and are represented
+        by a digest of their content.
+
+        :param rup_params:
+            Names of rupture parameters to include in the key in addition
+            to the ones required by the wrapped GSIM.
+        :param sites_params:
+            Names of sites parameters to include in the key in addition
+            to the ones required by the wrapped GSIM.
+        """
+        rup_params = set(rup_params).union(
+            self.gsim.REQUIRES_RUPTURE_PARAMETERS)
+        sites_params = set(sites_params).union(
+            self.gsim.REQUIRES_SITES_PARAMETERS)
+        rup_values = tuple(getattr(rctx, param)
+                           for param in sorted(rup_params))
+        digest = hashlib.sha1()
+        arrays = ([getattr(dctx, param)
+                   for param in sorted(self.gsim.REQUIRES_DISTANCES)]
+                  + [getattr(sctx, param) for param in sorted(sites_params)])
+        for array in arrays:
+            array = numpy.ascontiguousarray(array)
+            digest.update('%s%s' % (array.dtype.str, array.shape))
+            digest.update(array)
+        return rup_values, digest.digest()
+
+    def _get_cached(self, key, func, *args):
+        """
+        Return the result cached for ``key``, calling ``func(*args)`` and
+        caching its result if not found. The least recently used result
+        is discarded when the cache is full.
+        """
+        try:
+            result = self._cache.pop(key)
+        except KeyError:
+            self.misses += 1
+            result = func(*args)
+            _set_read_only(result)
+            if len(self._cache) >= self.maxsize:
+                self._cache.popitem(last=False)
+        else:
+            self.hits += 1
+        # (re)inserted items are the most recently used ones
+        self._cache[key] = result
+        return result
+
+
+def _set_read_only(result):
+    """
+    Make the numpy arrays found in ``result``, possibly nested in lists,
+    tuples and dictionaries values, read-only.
+    """
+    if isinstance(result, numpy.ndarray):
+        result.flags.writeable = False
+    elif isinstance(result, dict):
+        for value in result.itervalues():
+            _set_read_only(value)
+    elif isinstance(result, (list, tuple)):
+        for value in result:
+            _set_read_only(value)
@@ -22,6 +22,8 @@ import numpy as np
 
 from openquake.hazardlib.gsim.campbell_2003 import Campbell2003
 from openquake.hazardlib.gsim.base import CoeffsTable
+from openquake.hazardlib.gsim.htt import (CorrectionFactorsTable,
+                                          find_nearest_indices)
 from openquake.hazardlib.imt import PGA, SA
 
 
@@ -35,6 +37,11 @@ class Campbell2003HTT(Campbell2003):
     DEFINED_FOR_VS30 = np.arange(600, 2700, 100)
     DEFINED_FOR_KAPPA = np.array([0.01, 0.015, 0.02, 0.025, 0.0275, 0.03, 0.04, 0.05])
 
+    #: If False, correction factors of the vs30 and kappa values closest
+    #: to the ones of the sites are used, if True correction factors
+    #: are interpolated (linearly in their logarithm).
+    interpolate_cf = False
+
     host_vs30 = 2800.
     host_kappa = 0.0069
 
@@ -51,31 +58,19 @@ class Campbell2003HTT(Campbell2003):
 
     def get_kappa_cf(self, target_kappas, imt):
         """
+        Return the kappa correction factors of ``imt`` for an array of
+        target kappa values, see :attr:`interpolate_cf`.
         """
-        kappa_coeffs = self.KAPPA_COEFFS[imt]
-        if (target_kappas == target_kappas[0]).all():
-            nearest_kappa = self.find_nearest(self.DEFINED_FOR_KAPPA, target_kappas[0])
-            return kappa_coeffs['%s' % nearest_kappa]
-        else:
-            cfs = []
-            nearest_kappas = self.find_nearest(self.DEFINED_FOR_KAPPA, target_kappas)
-            for nearest_kappa in nearest_kappas:
-               cfs.append(kappa_coeffs['%s' % nearest_kappa])
-            return np.array(cfs)
+        return self._KAPPA_CF.get_site_factors(imt, target_kappas,
+                                               self.interpolate_cf)
 
     def get_vs30_cf(self, target_vs30s, imt):
         """
+        Return the vs30 correction factors of ``imt`` for an array of
+        target vs30 values, see :attr:`interpolate_cf`.
         """
-        vs30_coeffs = self.VS30_COEFFS[imt]
-        if (target_vs30s == target_vs30s[0]).all():
-            nearest_vs30 = self.find_nearest(self.DEFINED_FOR_VS30, target_vs30s[0])
-            return vs30_coeffs['%.f' % nearest_vs30]
-        else:
-            cfs = []
-            nearest_vs30s = self.find_nearest(self.DEFINED_FOR_VS30, target_vs30s)
-            for nearest_vs30 in nearest_vs30s:
-               cfs.append(vs30_coeffs['%.f' % nearest_vs30])
-            return np.array(cfs)
+        return self._VS30_CF.get_site_factors(imt, target_vs30s,
+                                              self.interpolate_cf)
 
     @staticmethod
     def find_nearest(array, values):
@@ -83,16 +78,14 @@ class Campbell2003HTT(Campbell2003):
         Find nearest values in a particular array
 
         :param array:
-            float array, array containing predefined values
+            float array, increasing array containing predefined values
         :param values:
             float or float array, value(s) to be looked up in :param:`array`
 
         :return:
             float or float array selected from :param:`array`
         """
-        indices = np.abs(np.subtract.outer(array, values)).argmin(0)
-        return array[indices]
-
+        return array[find_nearest_indices(array, values)]
 
     VS30_COEFFS = CoeffsTable(sa_damping=5, table="""\
 imt 600 700 800 900 1000 1100 1200 1300 1400 1500 1600 1700 1800 1900 2000 2100 2200 2300 2400 2500 2600 2700
@@ -133,3 +126,6 @@ pga  0.9409 0.6376 0.4951 0.4109 0.3801 0.3541 0.2807 0.2339
 3.00 0.9992 0.9965 1.0046 1.0455 1.1341 0.9631 0.9588 0.9732
 4.00 0.9999 1.0057 1.0356 1.6432 0.9844 0.9860 1.0120 1.2118
     """)
+
+    _VS30_CF = CorrectionFactorsTable(VS30_COEFFS, DEFINED_FOR_VS30, '%.f')
+    _KAPPA_CF = CorrectionFactorsTable(KAPPA_COEFFS, DEFINED_FOR_KAPPA, '%s')
@@ -22,7 +22,8 @@ import numpy as np
 # standard acceleration of gravity in m/s**2
 from scipy.constants import g
 
-from openquake.hazardlib.gsim.base import CoeffsTable, GMPE
+from openquake.hazardlib.gsim.base import (CoeffsTable, GMPE,
+                                           NearestSiteConditionsMixin)
 from openquake.hazardlib import const
 from openquake.hazardlib.imt import PGA, SA
 
@@ -31,7 +32,7 @@ from openquake.hazardlib.imt import PGA, SA
 ln70, ln130 = np.log(70), np.log(130)
 ln_g = np.log(g)
 
-class Campbell2003adjusted(GMPE):
+class Campbell2003adjusted(NearestSiteConditionsMixin, GMPE):
     """
     Implements GMPE developed by K.W Campbell and published as "Prediction of
     Strong Ground Motion Using the Hybrid Empirical Method and Its Use in the
@@ -91,15 +92,11 @@ class Campbell2003adjusted(GMPE):
         assert all(stddev_type in self.DEFINED_FOR_STANDARD_DEVIATION_TYPES
                    for stddev_type in stddev_types)
 
-        ## Allow different (vs30, kappa) for different sites
+        ## Allow different (vs30, kappa) for different sites: evaluate
+        ## each set of coefficients once, on all the sites using it
         mean = np.zeros_like(sites.vs30)
-        vs30_kappa = set(zip(sites.vs30, sites.kappa))
-        for (vs30, kappa) in vs30_kappa:
-            ## Determine nearest vs30 and kappa that is defined
-            nearest_vs30 = self.DEFINED_FOR_VS30[np.abs(self.DEFINED_FOR_VS30 - vs30).argmin()]
-            nearest_kappa = self.DEFINED_FOR_KAPPA[nearest_vs30][np.abs(self.DEFINED_FOR_KAPPA[nearest_vs30] - kappa).argmin()]
-            C = self.COEFFS[(nearest_vs30, nearest_kappa)][imt]
-            idxs = (sites.vs30 == vs30) * (sites.kappa == kappa)
+        for coeffs_key, idxs in self.get_site_conditions_groups(sites):
+            C = self.COEFFS[coeffs_key][imt]
             self._compute_mean(C, rup.mag, dists.rrup, idxs, mean)
         ## Coefficients for standard deviations are independent of (vs30, kappa)
         stddevs = self._get_stddevs(C, stddev_types, rup.mag,
@@ -7,6 +7,7 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 import numpy as np
 
+from .base import _norm_sf
 
 
 ## Calculate these logs only once
@@ -48,18 +49,14 @@ def calc_ln_cav(ln_pga, mag, ln_vs30):
 	## Calculate uniform duration
 	ln_dur_uni, sigma_ln_dur_uni = calc_ln_dur_uni(ln_pga, mag, ln_vs30)
 
-	ln_CAV = np.zeros_like(ln_dur_uni)
-
-	indexes_below = np.where(ln_pga <= ln_1)
-	indexes_above = np.where(ln_pga > ln_1)
-
-	ln_CAV[indexes_below] = (C0 + C1 * (mag - 6.5) + C2 * (mag - 6.5)**2
-							+ C3 * ln_pga + C4 * ln_pga**2 + C5 * ln_pga**3
-							+ C6 * ln_pga**4 + C7 * (ln_vs30 - 6)
-							+ C8 * ln_dur_uni + C9 * ln_dur_uni**2)
-	ln_CAV[indexes_above] = (C0 + C1 * (mag - 6.5) + C2 * (mag - 6.5)**2
-							+ C3 * ln_pga + C7 * (ln_vs30 - 6)
-							+ C8 * ln_dur_uni + C9 * ln_dur_uni**2)
+	ln_CAV_below = (C0 + C1 * (mag - 6.5) + C2 * (mag - 6.5)**2
+					+ C3 * ln_pga + C4 * ln_pga**2 + C5 * ln_pga**3
+					+ C6 * ln_pga**4 + C7 * (ln_vs30 - 6)
+					+ C8 * ln_dur_uni + C9 * ln_dur_uni**2)
+	ln_CAV_above = (C0 + C1 * (mag - 6.5) + C2 * (mag - 6.5)**2
+					+ C3 * ln_pga + C7 * (ln_vs30 - 6)
+					+ C8 * ln_dur_uni + C9 * ln_dur_uni**2)
+	ln_CAV = np.where(ln_pga <= ln_1, ln_CAV_below, ln_CAV_above)
 
 	## Calculate standard deviation
 	sigma_ln_CAV1 = np.zeros_like(ln_dur_uni)
@@ -111,7 +108,7 @@ def calc_ln_dur_uni(ln_pga, mag, ln_vs30):
 	return (ln_dur_uni, sigma_ln_dur_uni)
 
 
-def calc_cav_exceedance_prob(ln_pga, mag, vs30, cav_min=0.16):
+def calc_cav_exceedance_prob(ln_pga, mag, vs30, cav_min=0.16, tabulated=False):
 	"""
 	Calculate probability of exceeding a specified CAV value
 
@@ -124,16 +121,17 @@ def calc_cav_exceedance_prob(ln_pga, mag, vs30, cav_min=0.16):
 		Shape should be same as ln_pga.
 	:param cav_min:
 		float, CAV threshold (default: 0.16 g.s)
+	:param tabulated:
+		bool, whether probabilities should be interpolated in the
+		:class:`CAVExceedanceTable` for cav_min, see
+		:func:`get_cav_exceedance_table` (default: False)
 
 	:return:
 		1-D array of probability values with same shape as ln_pga and vs30
 	"""
-	if cav_min > 0:
-		try:
-			from ..c_speedups import norm
-		except:
-			print("Failed importing norm speedup!")
-			from scipy.stats import norm
+	if cav_min > 0 and tabulated:
+		prob = get_cav_exceedance_table(cav_min)(ln_pga, mag, vs30)
+	elif cav_min > 0:
 		ln_pga = np.array(ln_pga)
 		vs30 = np.array(vs30)
 		if len(ln_pga) != len(vs30):
@@ -148,8 +146,140 @@ def calc_cav_exceedance_prob(ln_pga, mag, vs30, cav_min=0.16):
 
 		epsilon_CAV = ((np.log(cav_min) - ln_CAV[non_zero_indexes])
 						/ sigma_ln_CAV[non_zero_indexes])
-		prob[non_zero_indexes] = 1.0 - norm.cdf(epsilon_CAV)
+		prob[non_zero_indexes] = _norm_sf(epsilon_CAV)
 	else:
 		prob = np.ones_like(ln_pga, 'd')
 
 	return prob
+
+
+class CAVExceedanceTable(object):
+	"""
+	Table of probabilities of exceeding a CAV value, as computed by
+	:func:`calc_cav_exceedance_prob`, on a regular grid of ln_pga,
+	magnitude and ln_vs30 values.
+
+	Probabilities are computed once, when the table is created, and
+	obtained by trilinear interpolation afterwards. With the default
+	grid spacing and cav_min = 0.16 g.s, the absolute error with respect
+	to :func:`calc_cav_exceedance_prob` is lower than 0.003 (it shrinks
+	quadratically with the spacing). Probabilities are 0 for PGA values
+	below 0.025 g, as in :func:`calc_cav_exceedance_prob`, and values
+	outside of the range of the table are computed exactly.
+
+	:param cav_min:
+		float, CAV threshold (g.s)
+	:param max_pga:
+		float, maximum PGA (g) of the table, the minimum being 0.025 g
+	:param min_mag:
+		float, minimum magnitude of the table
+	:param max_mag:
+		float, maximum magnitude of the table
+	:param min_vs30:
+		float, minimum vs30 (m/s) of the table
+	:param max_vs30:
+		float, maximum vs30 (m/s) of the table
+	:param ln_pga_step:
+		float, grid spacing of natural log of PGA
+	:param mag_step:
+		float, grid spacing of magnitude
+	:param ln_vs30_step:
+		float, grid spacing of natural log of vs30
+	"""
+	def __init__(self, cav_min=0.16, max_pga=4., min_mag=3., max_mag=8.,
+				min_vs30=100., max_vs30=3000., ln_pga_step=0.02, mag_step=0.1,
+				ln_vs30_step=0.05):
+		self.cav_min = cav_min
+		self.ln_pga_grid = _make_grid(ln_0_025, np.log(max_pga), ln_pga_step)
+		self.mag_grid = _make_grid(min_mag, max_mag, mag_step)
+		self.ln_vs30_grid = _make_grid(np.log(min_vs30), np.log(max_vs30),
+										ln_vs30_step)
+		ln_pga, ln_vs30 = np.meshgrid(self.ln_pga_grid, self.ln_vs30_grid,
+										indexing='ij')
+		ln_pga, vs30 = ln_pga.flatten(), np.exp(ln_vs30.flatten())
+		## table indexes are ln_pga, mag and ln_vs30
+		self.table = np.zeros((len(self.ln_pga_grid), len(self.mag_grid),
+								len(self.ln_vs30_grid)))
+		for j, mag in enumerate(self.mag_grid):
+			self.table[:, j, :] = calc_cav_exceedance_prob(
+				ln_pga, mag, vs30, cav_min=cav_min).reshape(
+				(len(self.ln_pga_grid), len(self.ln_vs30_grid)))
+
+	def __call__(self, ln_pga, mag, vs30):
+		"""
+		Interpolate probabilities of exceeding cav_min.
+
+		Parameters and return value are the same as for
+		:func:`calc_cav_exceedance_prob`.
+		"""
+		ln_pga = np.array(ln_pga, dtype=float)
+		mag = mag * np.ones_like(ln_pga)
+		ln_vs30 = np.log(vs30) * np.ones_like(ln_pga)
+		prob = np.zeros_like(ln_pga)
+
+		grids = (self.ln_pga_grid, self.mag_grid, self.ln_vs30_grid)
+		values = (ln_pga, mag, ln_vs30)
+		inside = ln_pga >= ln_0_025
+		outside = np.zeros_like(inside)
+		for grid, value in zip(grids[1:], values[1:]):
+			outside |= (value < grid[0]) | (value > grid[-1])
+		outside |= ln_pga > grids[0][-1]
+		outside &= inside
+		inside &= ~outside
+
+		if outside.any():
+			prob[outside] = calc_cav_exceedance_prob(
+				ln_pga[outside], mag[outside], np.exp(ln_vs30[outside]),
+				cav_min=self.cav_min)
+		if inside.any():
+			prob[inside] = self._interpolate(
+				[value[inside] for value in values], grids)
+		return prob
+
+	def _interpolate(self, values, grids):
+		"""
+		Trilinear interpolation of the table at points within the grid.
+		"""
+		indexes, weights = [], []
+		for value, grid in zip(values, grids):
+			step = (grid[-1] - grid[0]) / (len(grid) - 1)
+			position = (value - grid[0]) / step
+			index = np.clip(np.floor(position).astype(int), 0, len(grid) - 2)
+			indexes.append(index)
+			weights.append(position - index)
+		prob = np.zeros_like(values[0])
+		for i in (0, 1):
+			for j in (0, 1):
+				for k in (0, 1):
+					weight = ((weights[0] if i else 1 - weights[0])
+							* (weights[1] if j else 1 - weights[1])
+							* (weights[2] if k else 1 - weights[2]))
+					prob += weight * self.table[indexes[0] + i,
+												indexes[1] + j,
+												indexes[2] + k]
+		return prob
+
+
+def _make_grid(start, stop, step):
+	"""
+	Return evenly spaced values from start to stop (both included),
+	with spacing not larger than step.
+	"""
+	return np.linspace(start, stop, int(np.ceil((stop - start) / step)) + 1)
+
+
+## CAV exceedance tables by cav_min, see get_cav_exceedance_table
+_CAV_EXCEEDANCE_TABLES = {}
+
+
+def get_cav_exceedance_table(cav_min=0.16):
+	"""
+	Return the :class:`CAVExceedanceTable` with default grid for cav_min,
+	creating it the first time it is requested.
+
+	:param cav_min:
+		float, CAV threshold (default: 0.16 g.s)
+	"""
+	if cav_min not in _CAV_EXCEEDANCE_TABLES:
+		_CAV_EXCEEDANCE_TABLES[cav_min] = CAVExceedanceTable(cav_min)
+	return _CAV_EXCEEDANCE_TABLES[cav_min]
@@ -0,0 +1,101 @@
+# The Hazard Library
+# Copyright (C) 2012 GEM Foundation
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Module :mod:`openquake.hazardlib.gsim.htt` defines
+:class:`CorrectionFactorsTable`, used by the GSIMs applying host-to-target
+(HTT) adjustments for vs30 and kappa.
+"""
+import numpy
+
+
+def find_nearest_indices(array, values):
+    """
+    Find the indices of the nearest values in a sorted array.
+
+    :param array:
+        Increasing 1d array of values.
+    :param values:
+        Float or array of floats to look up in ``array``.
+    :returns:
+        Integer or array of integers, indices of the items of ``array``
+        closest to ``values``. Ties are resolved in favour of the lower
+        index.
+
+    >>> find_nearest_indices(numpy.array([1., 2., 4.]), [0.5, 1.5, 3.1, 9.])
+    array([0, 0, 2, 2])
+    """
+    values = numpy.asarray(values, dtype=float)
+    upper = numpy.clip(numpy.searchsorted(array, values), 1, len(array) - 1)
+    lower = upper - 1
+    return numpy.where(numpy.abs(values - array[lower])
+                       <= numpy.abs(array[upper] - values), lower, upper)
+
+
+class CorrectionFactorsTable(object):
+    """
+    Correction factors of a site parameter, tabulated for each IMT
+    on a grid of values of the parameter.
+
+    Factors of each IMT are read once from the coefficients table and
+    kept as an array ordered as the grid, so that they can be looked
+    up for all the sites at once.
+
+    :param table:
+        Instance of :class:`~openquake.hazardlib.gsim.base.CoeffsTable`
+        with one column of factors for each value of the grid.
+    :param values:
+        Increasing 1d array, grid of values of the site parameter.
+    :param name_format:
+        Format string giving the name of the column of ``table``
+        corresponding to each value of the grid.
+    """
+    def __init__(self, table, values, name_format):
+        self.table = table
+        self.values = numpy.array(values, dtype=float)
+        self.names = [name_format % value for value in values]
+        self._factors = {}
+
+    def get_factors(self, imt):
+        """
+        Return the read-only array of the factors of ``imt``, one for
+        each value of the grid.
+        """
+        try:
+            return self._factors[imt]
+        except KeyError:
+            pass
+        coeffs = self.table[imt]
+        factors = numpy.array([coeffs[name] for name in self.names])
+        factors.flags.writeable = False
+        self._factors[imt] = factors
+        return factors
+
+    def get_site_factors(self, imt, values, interpolate=False):
+        """
+        Return the factors of ``imt`` for an array of values of the site
+        parameter.
+
+        :param interpolate:
+            If False, the factor of the nearest value of the grid is
+            returned. If True, the logarithm of the factors is interpolated
+            linearly between the values of the grid. In both cases, values
+            out of the grid get the factor of the closest end of the grid.
+        """
+        factors = self.get_factors(imt)
+        if interpolate:
+            return numpy.exp(numpy.interp(values, self.values,
+                                          numpy.log(factors)))
+        return factors[find_nearest_indices(self.values, values)]
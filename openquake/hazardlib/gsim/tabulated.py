@@ -0,0 +1,267 @@
+# The Hazard Library
+# Copyright (C) 2012 GEM Foundation
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Module :mod:`openquake.hazardlib.gsim.tabulated` defines
+:class:`TabulatedGSIM`, approximating a GMPE by interpolation
+of precomputed tables.
+"""
+import numpy
+
+from openquake.hazardlib.gsim.base import (GMPE, SitesContext,
+                                           RuptureContext, DistancesContext)
+from openquake.hazardlib.gsim.cache import _delegate
+
+
+class TabulatedGSIM(GMPE):
+    """
+    Wrapper around a GMPE whose mean and standard deviations depend only
+    on magnitude, one distance measure and possibly rake and vs30 (like
+    :class:`~openquake.hazardlib.gsim.toro_2002.ToroEtAl2002` or
+    :class:`~openquake.hazardlib.gsim.boore_atkinson_2008.BooreAtkinson2008`),
+    computing them by interpolation of tables instead of evaluating the
+    GMPE equations.
+
+    Tables of mean (natural logarithm) and of all the standard deviation
+    types the GMPE is defined for are computed once, for each intensity
+    measure type in ``imts``, for each of the ``rakes`` and ``vs30s``
+    values (site classes), on a grid of magnitudes and distances.
+    Values are interpolated linearly in magnitude and in the logarithm
+    of distance.
+
+    Rake and vs30 values are not interpolated: they must be equal to one
+    of the tabulated values. Mean and standard deviations of IMTs, rakes,
+    vs30 values, magnitudes and distances out of the tables are computed
+    by the wrapped GMPE.
+
+    :param gsim:
+        Instance of :class:`~openquake.hazardlib.gsim.base.GMPE` to wrap.
+    :param imts:
+        List of intensity measure type objects to tabulate.
+    :param mags:
+        Increasing list of magnitudes of the tables, at least two.
+    :param distances:
+        Increasing list of positive values, in km, of the distance
+        measure required by ``gsim``, at least two.
+    :param rakes:
+        List of rake values to tabulate, required if ``gsim`` requires
+        the rake.
+    :param vs30s:
+        List of vs30 values to tabulate, required if ``gsim`` requires
+        vs30.
+
+    :raises ValueError:
+        If ``gsim`` requires other parameters or if tables are not
+        well defined.
+
+    .. attribute:: max_errors
+
+        Dictionary mapping each tabulated IMT to the maximum absolute
+        difference between interpolated and exact values of the mean
+        (natural logarithm) and of the standard deviations, estimated
+        at the centers of the cells of the magnitude-distance grid.
+    """
+    DEFINED_FOR_TECTONIC_REGION_TYPE = _delegate(
+        'DEFINED_FOR_TECTONIC_REGION_TYPE')
+    DEFINED_FOR_INTENSITY_MEASURE_TYPES = _delegate(
+        'DEFINED_FOR_INTENSITY_MEASURE_TYPES')
+    DEFINED_FOR_INTENSITY_MEASURE_COMPONENT = _delegate(
+        'DEFINED_FOR_INTENSITY_MEASURE_COMPONENT')
+    DEFINED_FOR_STANDARD_DEVIATION_TYPES = _delegate(
+        'DEFINED_FOR_STANDARD_DEVIATION_TYPES')
+    REQUIRES_SITES_PARAMETERS = _delegate('REQUIRES_SITES_PARAMETERS')
+    REQUIRES_RUPTURE_PARAMETERS = _delegate('REQUIRES_RUPTURE_PARAMETERS')
+    REQUIRES_DISTANCES = _delegate('REQUIRES_DISTANCES')
+
+    def __init__(self, gsim, imts, mags, distances, rakes=(), vs30s=()):
+        if not isinstance(gsim, GMPE):
+            raise ValueError('only GMPEs can be tabulated')
+        name = type(gsim).__name__
+        if len(gsim.REQUIRES_DISTANCES) != 1:
+            raise ValueError('%s requires more than one distance measure'
+                             % name)
+        if not gsim.REQUIRES_RUPTURE_PARAMETERS <= set(('mag', 'rake')):
+            raise ValueError('%s requires rupture parameters other than '
+                             'mag and rake' % name)
+        if not gsim.REQUIRES_SITES_PARAMETERS <= set(('vs30', )):
+            raise ValueError('%s requires sites parameters other than vs30'
+                             % name)
+        self.mags = numpy.array(mags, dtype=float)
+        self.distances = numpy.array(distances, dtype=float)
+        if len(self.mags) < 2 or not (numpy.diff(self.mags) > 0).all():
+            raise ValueError('magnitudes must be at least two and '
+                             'strictly increasing')
+        if (len(self.distances) < 2 or not self.distances[0] > 0
+                or not (numpy.diff(self.distances) > 0).all()):
+            raise ValueError('distances must be at least two, positive '
+                             'and strictly increasing')
+        self.rakes = [None]
+        if 'rake' in gsim.REQUIRES_RUPTURE_PARAMETERS:
+            if not rakes:
+                raise ValueError('%s requires rake, rakes must be given'
+                                 % name)
+            self.rakes = [float(rake) for rake in rakes]
+        self.vs30s = [None]
+        if 'vs30' in gsim.REQUIRES_SITES_PARAMETERS:
+            if not vs30s:
+                raise ValueError('%s requires vs30, vs30s must be given'
+                                 % name)
+            self.vs30s = [float(vs30) for vs30 in vs30s]
+        self.gsim = gsim
+        [self.distance_type] = gsim.REQUIRES_DISTANCES
+        self.stddev_types = sorted(gsim.DEFINED_FOR_STANDARD_DEVIATION_TYPES)
+        self._ln_distances = numpy.log(self.distances)
+        # sorted vs30 values and their indexes in the tables, to look up
+        # site classes with numpy.searchsorted
+        if self.vs30s != [None]:
+            self._vs30_order = numpy.argsort(self.vs30s)
+            self._sorted_vs30s = numpy.array(self.vs30s)[self._vs30_order]
+
+        #: Dictionary mapping tabulated IMTs to arrays of mean and
+        #: standard deviations, shaped as (rakes, vs30s, magnitudes,
+        #: 1 + standard deviation types, distances).
+        self.tables = {}
+        self.max_errors = {}
+        mid_mags = (self.mags[:-1] + self.mags[1:]) / 2.
+        mid_distances = numpy.sqrt(self.distances[:-1] * self.distances[1:])
+        ln_mid_distances = numpy.log(mid_distances)
+        nmid = len(mid_distances)
+        rows = range(1 + len(self.stddev_types))
+        for imt in imts:
+            self._check_imt(imt)
+            self.tables[imt] = self._compute_table(imt, self.mags,
+                                                   self.distances)
+            exact = self._compute_table(imt, mid_mags, mid_distances)
+            error = 0.
+            for i, mag in enumerate(mid_mags):
+                for j, rake in enumerate(self.rakes):
+                    for k in xrange(len(self.vs30s)):
+                        values = self._interpolate(
+                            imt, j, mag, numpy.zeros(nmid, dtype=int) + k,
+                            ln_mid_distances, rows
+                        )
+                        error = max(error,
+                                    numpy.abs(values - exact[j, k, i]).max())
+            self.max_errors[imt] = error
+
+    def _compute_table(self, imt, mags, distances):
+        """
+        Compute mean and standard deviations with the wrapped GMPE for all
+        the combinations of rakes and vs30 values of the tables and of
+        ``mags`` and ``distances``.
+        """
+        table = numpy.zeros((len(self.rakes), len(self.vs30s), len(mags),
+                             1 + len(self.stddev_types), len(distances)))
+        sctx = SitesContext()
+        rctx = RuptureContext()
+        dctx = DistancesContext()
+        setattr(dctx, self.distance_type, distances)
+        for i, rake in enumerate(self.rakes):
+            if rake is not None:
+                rctx.rake = rake
+            for j, vs30 in enumerate(self.vs30s):
+                if vs30 is not None:
+                    sctx.vs30 = numpy.zeros(len(distances)) + vs30
+                for k, mag in enumerate(mags):
+                    rctx.mag = mag
+                    mean, stddevs = self.gsim.get_mean_and_stddevs(
+                        sctx, rctx, dctx, imt, self.stddev_types
+                    )
+                    table[i, j, k] = [mean] + stddevs
+        return table
+
+    def _interpolate(self, imt, rake_index, mag, vs30_indexes, ln_distances,
+                     rows):
+        """
+        Interpolate the table of ``imt`` for magnitude ``mag`` and arrays
+        of vs30 indexes and of logarithms of distances, within the tables.
+
+        :param rows:
+            Indexes of the values to interpolate: 0 for the mean and
+            ``i + 1`` for the i-th of :attr:`stddev_types`.
+        :returns:
+            2d array of values, one row for each of ``rows`` and one column
+            for each site.
+        """
+        table = self.tables[imt][rake_index]
+        i = min(numpy.searchsorted(self.mags, mag, 'right') - 1,
+                len(self.mags) - 2)
+        w = (mag - self.mags[i]) / (self.mags[i + 1] - self.mags[i])
+        table = (1 - w) * table[:, i, rows] + w * table[:, i + 1, rows]
+        values = numpy.zeros((len(rows), len(ln_distances)))
+        for k in xrange(len(self.vs30s)):
+            if len(self.vs30s) == 1:
+                idx = slice(None)
+            else:
+                idx = vs30_indexes == k
+                if not idx.any():
+                    continue
+            for r in xrange(len(rows)):
+                values[r, idx] = numpy.interp(
+                    ln_distances[idx], self._ln_distances, table[k, r]
+                )
+        return values
+
+    def get_mean_and_stddevs(self, sites, rup, dists, imt, stddev_types):
+        """
+        See :meth:`~openquake.hazardlib.gsim.base.GroundShakingIntensityModel.get_mean_and_stddevs`.
+        """
+        rake = (rup.rake if 'rake' in self.gsim.REQUIRES_RUPTURE_PARAMETERS
+                else None)
+        if (imt not in self.tables or rake not in self.rakes
+                or not self.mags[0] <= rup.mag <= self.mags[-1]
+                or not set(stddev_types) <= set(self.stddev_types)):
+            return self.gsim.get_mean_and_stddevs(sites, rup, dists, imt,
+                                                  stddev_types)
+        distances = getattr(dists, self.distance_type)
+        if self.vs30s == [None]:
+            vs30_indexes = numpy.zeros(len(distances), dtype=int)
+        else:
+            i = numpy.searchsorted(self._sorted_vs30s, sites.vs30)
+            i = numpy.clip(i, 0, len(self.vs30s) - 1)
+            vs30_indexes = numpy.where(self._sorted_vs30s[i] == sites.vs30,
+                                       self._vs30_order[i], -1)
+        in_table = ((vs30_indexes >= 0) & (distances >= self.distances[0])
+                    & (distances <= self.distances[-1]))
+        rows = [0] + [self.stddev_types.index(stddev_type) + 1
+                      for stddev_type in stddev_types]
+        if in_table.all():
+            values = self._interpolate(
+                imt, self.rakes.index(rake), rup.mag, vs30_indexes,
+                numpy.log(distances), rows
+            )
+        else:
+            values = numpy.zeros((len(rows), len(distances)))
+            values[:, in_table] = self._interpolate(
+                imt, self.rakes.index(rake), rup.mag, vs30_indexes[in_table],
+                numpy.log(distances[in_table]), rows
+            )
+            out = ~in_table
+            sctx = SitesContext()
+            for param in self.gsim.REQUIRES_SITES_PARAMETERS:
+                setattr(sctx, param, getattr(sites, param)[out])
+            dctx = DistancesContext()
+            setattr(dctx, self.distance_type, distances[out])
+            mean, stddevs = self.gsim.get_mean_and_stddevs(
+                sctx, rup, dctx, imt, stddev_types
+            )
+            values[:, out] = [mean] + stddevs
+        return values[0], list(values[1:])
+
+    def make_contexts(self, site_collection, rupture):
+        """
+        See :meth:`~openquake.hazardlib.gsim.base.GroundShakingIntensityModel.make_contexts`.
+        """
+        return self.gsim.make_contexts(site_collection, rupture)
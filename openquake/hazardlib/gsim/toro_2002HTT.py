@@ -22,6 +22,8 @@ import numpy as np
 
 from openquake.hazardlib.gsim.toro_2002 import ToroEtAl2002
 from openquake.hazardlib.gsim.base import CoeffsTable
+from openquake.hazardlib.gsim.htt import (CorrectionFactorsTable,
+                                          find_nearest_indices)
 from openquake.hazardlib.imt import PGA, SA
 
 
@@ -35,6 +37,11 @@ class ToroEtAl2002HTT(ToroEtAl2002):
     DEFINED_FOR_VS30 = np.arange(600, 2700, 100)
     DEFINED_FOR_KAPPA = np.array([0.01, 0.015, 0.02, 0.025, 0.0275, 0.03, 0.04, 0.05])
 
+    #: If False, correction factors of the vs30 and kappa values closest
+    #: to the ones of the sites are used, if True correction factors
+    #: are interpolated (linearly in their logarithm).
+    interpolate_cf = False
+
     host_vs30 = 2800
     host_kappa = 0.007
 
@@ -51,31 +58,19 @@ class ToroEtAl2002HTT(ToroEtAl2002):
 
     def get_kappa_cf(self, target_kappas, imt):
         """
+        Return the kappa correction factors of ``imt`` for an array of
+        target kappa values, see :attr:`interpolate_cf`.
         """
-        kappa_coeffs = self.KAPPA_COEFFS[imt]
-        if (target_kappas == target_kappas[0]).all():
-            nearest_kappa = self.find_nearest(self.DEFINED_FOR_KAPPA, target_kappas[0])
-            return kappa_coeffs['%s' % nearest_kappa]
-        else:
-            cfs = []
-            nearest_kappas = self.find_nearest(self.DEFINED_FOR_KAPPA, target_kappas)
-            for nearest_kappa in nearest_kappas:
-               cfs.append(kappa_coeffs['%s' % nearest_kappa])
-            return np.array(cfs)
+        return self._KAPPA_CF.get_site_factors(imt, target_kappas,
+                                               self.interpolate_cf)
 
     def get_vs30_cf(self, target_vs30s, imt):
         """
+        Return the vs30 correction factors of ``imt`` for an array of
+        target vs30 values, see :attr:`interpolate_cf`.
         """
-        vs30_coeffs = self.VS30_COEFFS[imt]
-        if (target_vs30s == target_vs30s[0]).all():
-            nearest_vs30 = self.find_nearest(self.DEFINED_FOR_VS30, target_vs30s[0])
-            return vs30_coeffs['%.f' % nearest_vs30]
-        else:
-            cfs = []
-            nearest_vs30s = self.find_nearest(self.DEFINED_FOR_VS30, target_vs30s)
-            for nearest_vs30 in nearest_vs30s:
-               cfs.append(vs30_coeffs['%.f' % nearest_vs30])
-            return np.array(cfs)
+        return self._VS30_CF.get_site_factors(imt, target_vs30s,
+                                              self.interpolate_cf)
 
     @staticmethod
     def find_nearest(array, values):
@@ -83,16 +78,14 @@ class ToroEtAl2002HTT(ToroEtAl2002):
         Find nearest values in a particular array
 
         :param array:
-            float array, array containing predefined values
+            float array, increasing array containing predefined values
         :param values:
             float or float array, value(s) to be looked up in :param:`array`
 
         :return:
             float or float array selected from :param:`array`
         """
-        indices = np.abs(np.subtract.outer(array, values)).argmin(0)
-        return array[indices]
-
+        return array[find_nearest_indices(array, values)]
 
     VS30_COEFFS = CoeffsTable(sa_damping=5, table="""\
 imt 600 700 800 900 1000 1100 1200 1300 1400 1500 1600 1700 1800 1900 2000 2100 2200 2300 2400 2500 2600 2700
@@ -117,3 +110,6 @@ pga  0.9745 0.7627 0.6361 0.5489 0.5145 0.4846 0.3951 0.3350
 1.00 0.9972 0.9748 0.9543 0.9354 0.9264 0.9178 0.8869 0.8623
 2.00 0.9989 0.9927 0.9923 1.0037 1.0196 1.0550 0.9384 0.9289
     """)
+
+    _VS30_CF = CorrectionFactorsTable(VS30_COEFFS, DEFINED_FOR_VS30, '%.f')
+    _KAPPA_CF = CorrectionFactorsTable(KAPPA_COEFFS, DEFINED_FOR_KAPPA, '%s')
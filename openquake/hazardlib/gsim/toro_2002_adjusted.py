@@ -23,7 +23,8 @@ import numpy as np
 from scipy.constants import g
 
 from openquake.hazardlib.gsim.campbell_2003 import _compute_faulting_style_term
-from openquake.hazardlib.gsim.base import CoeffsTable, GMPE
+from openquake.hazardlib.gsim.base import (CoeffsTable, GMPE,
+                                           NearestSiteConditionsMixin)
 from openquake.hazardlib import const
 from openquake.hazardlib.imt import PGA, SA
 
@@ -32,7 +33,7 @@ from openquake.hazardlib.imt import PGA, SA
 ln_g = np.log(g)
 
 
-class ToroEtAl2002adjusted(GMPE):
+class ToroEtAl2002adjusted(NearestSiteConditionsMixin, GMPE):
     """
     Implements GMPE developed by G. R. Toro, N. A. Abrahamson, J. F. Sneider
     and published in "Model of Strong Ground Motions from Earthquakes in
@@ -94,15 +95,11 @@ class ToroEtAl2002adjusted(GMPE):
         assert all(stddev_type in self.DEFINED_FOR_STANDARD_DEVIATION_TYPES
                    for stddev_type in stddev_types)
 
-        ## Allow different (vs30, kappa) for different sites
+        ## Allow different (vs30, kappa) for different sites: evaluate
+        ## each set of coefficients once, on all the sites using it
         mean = np.zeros_like(sites.vs30)
-        vs30_kappa = set(zip(sites.vs30, sites.kappa))
-        for (vs30, kappa) in vs30_kappa:
-            ## Determine nearest vs30 and kappa that is defined
-            nearest_vs30 = self.DEFINED_FOR_VS30[np.abs(self.DEFINED_FOR_VS30 - vs30).argmin()]
-            nearest_kappa = self.DEFINED_FOR_KAPPA[nearest_vs30][np.abs(self.DEFINED_FOR_KAPPA[nearest_vs30] - kappa).argmin()]
-            C = self.COEFFS[(nearest_vs30, nearest_kappa)][imt]
-            idxs = (sites.vs30 == vs30) * (sites.kappa == kappa)
+        for coeffs_key, idxs in self.get_site_conditions_groups(sites):
+            C = self.COEFFS[coeffs_key][imt]
             self._compute_mean(C, rup.mag, dists.rjb, idxs, mean)
         ## Coefficients for standard deviations are independent of (vs30, kappa)
         stddevs = self._compute_stddevs(C, rup.mag, dists.rjb, imt,
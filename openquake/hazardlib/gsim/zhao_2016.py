@@ -89,6 +89,27 @@ class ZhaoEtAl2016Asc(GMPE):
         # intensity measure type.
         C = self.COEFFS[imt]
         C_SITE = self.SITE_COEFFS[imt]
+        return self._get_mean_and_stddevs(C, C_SITE, sites, rup, dists,
+                                          stddev_types)
+
+    def get_mean_and_stddevs_multi(self, sites, rup, dists, imts,
+                                   stddev_types):
+        """
+        See :meth:`superclass method
+        <.base.GroundShakingIntensityModel.get_mean_and_stddevs_multi>`
+        for spec of input and result values.
+        """
+        C = self.COEFFS.get_coeffs_columns(imts)
+        C_SITE = self.SITE_COEFFS.get_coeffs_columns(imts)
+        return self._get_mean_and_stddevs(C, C_SITE, sites, rup, dists,
+                                          stddev_types)
+
+    def _get_mean_and_stddevs(self, C, C_SITE, sites, rup, dists,
+                              stddev_types):
+        """
+        Returns mean and standard deviations for coefficients ``C`` and
+        ``C_SITE``, either scalars of one IMT or columns of several IMTs.
+        """
         s_c, idx = self._get_site_classification(sites.vs30)
         sa_rock = (self.get_magnitude_scaling_term(C, rup) +
                    self.get_sof_term(C, rup) +
@@ -141,8 +162,8 @@ class ZhaoEtAl2016Asc(GMPE):
             np.ones_like(x_ij)
         idx = x_ij <= 30.0
         if np.any(idx):
-            g_n[idx] = C["gcrN"] * np.log(self.CONSTANTS["xcro"] +
-                                          x_ij[idx] + gn_exp)
+            g_n[..., idx] = C["gcrN"] * np.log(self.CONSTANTS["xcro"] +
+                                               x_ij[idx] + gn_exp)
 
         # equation 5
         c_m = min(rup.mag, self.CONSTANTS["m_c"])
@@ -156,7 +177,8 @@ class ZhaoEtAl2016Asc(GMPE):
         Applies the site amplification scaling defined in equations from 10
         to 15
         """
-        n_sites = sites.vs30.shape
+        # one row for each IMT if coefficients are columns
+        n_sites = sa_rock.shape
         # Convert from reference rock to hard rock
         hard_rock_sa = sa_rock - C["lnSC1AM"]
         # Gets the elastic site amplification ratio
@@ -179,10 +201,11 @@ class ZhaoEtAl2016Asc(GMPE):
             if not np.any(idx_i):
                 # No sites of the given site class
                 continue
+            ln_amax_1d = C_SITE["LnAmax1D{:g}".format(i)] + np.zeros(n_sites)
             idx2 = np.logical_and(lnamax_idx, idx_i)
             if np.any(idx2):
                 # Use the approximate method for SRC and SNC
-                c_a = C_SITE["LnAmax1D{:g}".format(i)] /\
+                c_a = ln_amax_1d[idx2] /\
                     (np.log(beta) - np.log(sreffc[idx2] ** alpha + beta))
                 c_b = -c_a * np.log(sreffc[idx2] ** alpha + beta)
 
@@ -197,15 +220,15 @@ class ZhaoEtAl2016Asc(GMPE):
                 snc[idx2] = (np.exp((ln_a_n_max[idx2] *
                              np.log(sreffc[idx2] ** alpha + beta) -
                              ln_sf[idx2] * np.log(beta)) /
-                             C_SITE["LnAmax1D{:g}".format(i)]) - beta) **\
+                             ln_amax_1d[idx2]) - beta) **\
                              (1.0 / alpha)
 
-            smr[idx_i] = sreff[idx_i] * (snc[idx_i] / sreffc[idx_i]) *\
-                f_sr[idx_i]
+            smr[..., idx_i] = sreff[..., idx_i] *\
+                (snc[..., idx_i] / sreffc[..., idx_i]) * f_sr[..., idx_i]
             # For the cases when site class = i and SMR != 0
             idx2 = np.logical_and(idx_i, np.fabs(smr) > 0.0)
             if np.any(idx2):
-                sa_soil[idx2] += (-C_SITE["LnAmax1D{:g}".format(i)] *
+                sa_soil[idx2] += (-ln_amax_1d[idx2] *
                                   (np.log(smr[idx2] ** alpha + beta) -
                                   np.log(beta)) /
                                   (np.log(sreffc[idx2] ** alpha + beta) -
@@ -221,10 +244,11 @@ class ZhaoEtAl2016Asc(GMPE):
         sreffc = np.zeros(n_sites)
         f_sr = np.zeros(n_sites)
         for i in range(1, 5):
-            sreff[idx[i]] += (np.exp(sa_rock[idx[i]]) * self.IMF[i])
-            sreffc[idx[i]] += (C_SITE["Src1D{:g}".format(i)] * self.IMF[i])
+            sreff[..., idx[i]] += (np.exp(sa_rock[..., idx[i]]) * self.IMF[i])
+            sreffc[..., idx[i]] += (C_SITE["Src1D{:g}".format(i)] *
+                                    self.IMF[i])
             # Get f_SR
-            f_sr[idx[i]] += C_SITE["fsr{:g}".format(i)]
+            f_sr[..., idx[i]] += C_SITE["fsr{:g}".format(i)]
         return sreff, sreffc, f_sr
 
     def _get_ln_a_n_max(self, C, n_sites, idx, rup):
@@ -234,7 +258,7 @@ class ZhaoEtAl2016Asc(GMPE):
         ln_a_n_max = C["lnSC1AM"] * np.ones(n_sites)
         for i in [2, 3, 4]:
             if np.any(idx[i]):
-                ln_a_n_max[idx[i]] += C["S{:g}".format(i)]
+                ln_a_n_max[..., idx[i]] += C["S{:g}".format(i)]
         return ln_a_n_max
 
     def _get_ln_sf(self, C, C_SITE, idx, n_sites, rup):
@@ -246,7 +270,7 @@ class ZhaoEtAl2016Asc(GMPE):
             ln_sf_i = (C["lnSC1AM"] - C_SITE["LnAmax1D{:g}".format(i)])
             if i > 1:
                 ln_sf_i += C["S{:g}".format(i)]
-            ln_sf[idx[i]] += ln_sf_i
+            ln_sf[..., idx[i]] += ln_sf_i
         return ln_sf
 
     def _get_site_classification(self, vs30):
@@ -396,9 +420,9 @@ class ZhaoEtAl2016AscSiteSigma(ZhaoEtAl2016Asc):
         """
         stddevs = []
         tau = C["tau"] + np.zeros(n_sites)
-        phi = np.zeros(n_sites)
+        phi = np.zeros(tau.shape)
         for i in range(1, 5):
-            phi[idx[i]] += C["sc{:g}_sigma_S".format(i)]
+            phi[..., idx[i]] += C["sc{:g}_sigma_S".format(i)]
 
         for stddev_type in stddev_types:
             assert stddev_type in self.DEFINED_FOR_STANDARD_DEVIATION_TYPES
@@ -449,8 +473,8 @@ class ZhaoEtAl2016UpperMantle(ZhaoEtAl2016Asc):
             np.ones_like(x_ij)
         idx = x_ij <= 30.0
         if np.any(idx):
-            g_n[idx] = C["gcrN"] * np.log(self.CONSTANTS["xcro"] +
-                                          x_ij[idx] + gn_exp)
+            g_n[..., idx] = C["gcrN"] * np.log(self.CONSTANTS["xcro"] +
+                                               x_ij[idx] + gn_exp)
         c_m = min(rup.mag, self.CONSTANTS["m_c"])
         r_ij = self.CONSTANTS["xcro"] + x_ij + np.exp(C["c1"] + C["c2"] * c_m)
         return C["gUM"] * np.log(r_ij) +\
@@ -512,9 +536,9 @@ class ZhaoEtAl2016UpperMantleSiteSigma(ZhaoEtAl2016UpperMantle):
         """
         stddevs = []
         tau = C["tau"] + np.zeros(n_sites)
-        phi = np.zeros(n_sites)
+        phi = np.zeros(tau.shape)
         for i in range(1, 5):
-            phi[idx[i]] += C["sc{:g}_sigma_S".format(i)]
+            phi[..., idx[i]] += C["sc{:g}_sigma_S".format(i)]
 
         for stddev_type in stddev_types:
             assert stddev_type in self.DEFINED_FOR_STANDARD_DEVIATION_TYPES
@@ -614,7 +638,7 @@ class ZhaoEtAl2016SInter(ZhaoEtAl2016Asc):
                     loc = i + 3
                 else:
                     loc = i
-                ln_a_n_max[idx[i]] += C["S{:g}".format(loc)]
+                ln_a_n_max[..., idx[i]] += C["S{:g}".format(loc)]
         return ln_a_n_max
 
     def _get_ln_sf(self, C, C_SITE, idx, n_sites, rup):
@@ -635,7 +659,7 @@ class ZhaoEtAl2016SInter(ZhaoEtAl2016Asc):
                     # For shallow events the conventional approach applies
                     loc = i
                 ln_sf_i += C["S{:g}".format(loc)]
-            ln_sf[idx[i]] += ln_sf_i
+            ln_sf[..., idx[i]] += ln_sf_i
         return ln_sf
 
     # Coefficients table taken from spreadsheet supplied by the author
@@ -736,9 +760,9 @@ class ZhaoEtAl2016SInterSiteSigma(ZhaoEtAl2016SInter):
         """
         stddevs = []
         tau = C["tau"] + np.zeros(n_sites)
-        phi = np.zeros(n_sites)
+        phi = np.zeros(tau.shape)
         for i in range(1, 5):
-            phi[idx[i]] += C["sc{:g}_sigma_S".format(i)]
+            phi[..., idx[i]] += C["sc{:g}_sigma_S".format(i)]
 
         for stddev_type in stddev_types:
             assert stddev_type in self.DEFINED_FOR_STANDARD_DEVIATION_TYPES
@@ -927,9 +951,9 @@ class ZhaoEtAl2016SSlabSiteSigma(ZhaoEtAl2016SSlab):
         """
         stddevs = []
         tau = C["tau"] + np.zeros(n_sites)
-        phi = np.zeros(n_sites)
+        phi = np.zeros(tau.shape)
         for i in range(1, 5):
-            phi[idx[i]] += C["sc{:g}_sigma_S".format(i)]
+            phi[..., idx[i]] += C["sc{:g}_sigma_S".format(i)]
 
         for stddev_type in stddev_types:
             assert stddev_type in self.DEFINED_FOR_STANDARD_DEVIATION_TYPES
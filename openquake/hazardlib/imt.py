@@ -64,6 +64,10 @@ class _IMT(tuple):
     def __new__(cls, sa_period=None, sa_damping=None):
         return tuple.__new__(cls, (cls.__name__, sa_period, sa_damping))
 
+    def __getnewargs__(self):
+        # arguments of __new__ for unpickling with protocol 2
+        return tuple(self[1:])
+
     def __repr__(self):
         return '%s(%s)' % (type(self).__name__,
                            ', '.join('%s=%s' % (field, getattr(self, field))
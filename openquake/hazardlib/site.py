@@ -17,8 +17,11 @@
 Module :mod:`openquake.hazardlib.site` defines :class:`Site`.
 """
 import numpy
+from scipy.spatial import cKDTree
 
 from openquake.hazardlib.geo.mesh import Mesh
+from openquake.hazardlib.geo.geodetic import EARTH_RADIUS
+from openquake.hazardlib.geo.utils import spherical_to_cartesian
 from openquake.hazardlib.slots import with_slots
 
 
@@ -118,6 +121,9 @@ class SiteCollection(object):
     """
     def __init__(self, sites):
         self.indices = None
+        self._root = None
+        self._spatial_index = None
+        self._site_keys = {}
         self.vs30 = numpy.zeros(len(sites))
         self.vs30measured = numpy.zeros(len(sites), dtype=bool)
         self.z1pt0 = self.vs30.copy()
@@ -150,6 +156,15 @@ class SiteCollection(object):
                     self.kappa, self.mesh.lons, self.mesh.lats):
             arr.flags.writeable = False
 
+    def __getstate__(self):
+        # the spatial index and the keys of sites are not pickled, they
+        # are rebuilt when needed. the whole collection a filtered one
+        # was created from is, since :attr:`indices` point into it
+        state = self.__dict__.copy()
+        state['_spatial_index'] = None
+        state['_site_keys'] = {}
+        return state
+
     def __iter__(self):
         """
         Iterate through all :class:`sites <Site>` in the collection, yielding
@@ -276,6 +291,11 @@ class SiteCollection(object):
             col.indices = self.indices.take(indices)
         else:
             col.indices = indices
+        # the whole collection, sharing its keys of sites
+        # (see get_site_keys) with the filtered ones
+        col._root = self if self._root is None else self._root
+        col._spatial_index = None
+        col._site_keys = {}
         # do the same as in the constructor
         for arr in (col.vs30, col.vs30measured, col.z1pt0, col.z2pt5,
                     col.mesh.lons, col.mesh.lats):
@@ -287,3 +307,79 @@ class SiteCollection(object):
         Return a number of sites in a collection.
         """
         return len(self.mesh)
+
+    def filter_by_distance(self, lon, lat, distance):
+        """
+        Create a new collection with only the sites that are not further
+        than some distance from a point.
+
+        Sites are looked up in a spatial index (a KD-tree of the positions
+        of the sites in Cartesian space, see :meth:`get_spatial_index`),
+        so that the cost of filtering grows with the number of sites close
+        to the point rather than with the number of sites in the collection.
+
+        :param lon:
+            Longitude of the point, in decimal degrees.
+        :param lat:
+            Latitude of the point, in decimal degrees.
+        :param distance:
+            Great circle distance in km. Sites at exactly that distance
+            from the point are included (up to rounding errors).
+        :returns:
+            Same as for :meth:`filter`.
+        """
+        if distance >= numpy.pi * EARTH_RADIUS:
+            return self
+        # chord of the great circle arc of length distance
+        chord = 2 * EARTH_RADIUS * numpy.sin(distance / (2 * EARTH_RADIUS))
+        indices = self.get_spatial_index().query_ball_point(
+            spherical_to_cartesian(lon, lat, None), chord * (1 + 1e-12)
+        )
+        mask = numpy.zeros(len(self), dtype=bool)
+        mask[indices] = True
+        return self.filter(mask)
+
+    def get_spatial_index(self):
+        """
+        Return a spatial index of the sites, building it at the first call.
+
+        :returns:
+            Instance of :class:`scipy.spatial.cKDTree` of the positions of
+            the sites on the Earth surface in Cartesian space (see
+            :func:`~openquake.hazardlib.geo.utils.spherical_to_cartesian`),
+            in the same order as the sites in the collection.
+        """
+        if self._spatial_index is None:
+            self._spatial_index = cKDTree(spherical_to_cartesian(
+                self.mesh.lons, self.mesh.lats, None
+            ).reshape((-1, 3)))
+        return self._spatial_index
+
+    def get_site_keys(self, key, func):
+        """
+        Return the keys of the sites identified by ``key``, calling
+        ``func`` to compute them only the first time they are asked for.
+
+        Used by :func:`~openquake.hazardlib.gsim.base.get_site_groups`:
+        sites parameters do not change across ruptures, and so do not
+        the sets of coefficients a GSIM uses for each site. Keys are
+        computed once for the whole collection and shared with all the
+        collections created from it by :meth:`filter`, which take the
+        keys of their sites according to :attr:`indices`.
+
+        :param func:
+            Callable taking a site collection and returning a pair of
+            a list of distinct keys and a 1d integer array with the index
+            in that list of the key of each site of the collection.
+        :returns:
+            The same pair returned by ``func``, with the indices of the
+            keys of the sites of this collection.
+        """
+        root = self if self._root is None else self._root
+        try:
+            keys, key_indices = root._site_keys[key]
+        except KeyError:
+            keys, key_indices = root._site_keys[key] = func(root)
+        if root is not self:
+            key_indices = key_indices.take(self.indices)
+        return keys, key_indices
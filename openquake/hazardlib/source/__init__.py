@@ -23,3 +23,4 @@ from openquake.hazardlib.source.area import AreaSource
 from openquake.hazardlib.source.simple_fault import SimpleFaultSource
 from openquake.hazardlib.source.complex_fault import ComplexFaultSource
 from openquake.hazardlib.source.characteristic import CharacteristicFaultSource
+from openquake.hazardlib.source.split import split_source
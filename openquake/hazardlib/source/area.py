@@ -121,14 +121,37 @@ class AreaSource(PointSource):
                 # translate the surface from first epicenter position
                 # to the target one preserving it's geometry
                 surface = surface.translate(epicenter0, epicenter)
-                hypocenter = epicenter
-                hypocenter.depth = hc_depth
+                # ruptures can be kept together by the caller (see
+                # GroundShakingIntensityModel.iter_contexts()), so each
+                # of them needs its own hypocenter
+                hypocenter = Point(epicenter.longitude, epicenter.latitude,
+                                   hc_depth)
                 rupture = ProbabilisticRupture(
                     mag, rake, self.tectonic_region_type, hypocenter,
                     surface, type(self), occ_rate, temporal_occurrence_model
                 )
                 yield rupture
 
+    def count_ruptures(self):
+        """
+        See :meth:
+        `openquake.hazardlib.source.base.SeismicSource.count_ruptures`.
+
+        The number of ruptures of a point source times the number of points
+        the polygon discretizes to.
+        """
+        polygon_mesh = self.polygon.discretize(self.area_discretization)
+        return len(polygon_mesh) * super(AreaSource, self).count_ruptures()
+
+    def get_bounding_circle(self):
+        """
+        Overrides :meth:`implementation
+        <openquake.hazardlib.source.point.PointSource.get_bounding_circle>`
+        of the point source class just to call the :meth:`base class one
+        <openquake.hazardlib.source.base.SeismicSource.get_bounding_circle>`.
+        """
+        return super(PointSource, self).get_bounding_circle()
+
     def filter_sites_by_distance_to_source(self, integration_distance, sites):
         """
         Overrides :meth:`implementation
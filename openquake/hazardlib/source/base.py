@@ -19,6 +19,8 @@ seismic sources.
 """
 import abc
 from openquake.hazardlib.slots import with_slots
+from openquake.hazardlib.geo.utils import get_bounding_circle
+from openquake.hazardlib.tom import PoissonTOM
 
 
 @with_slots
@@ -119,6 +121,57 @@ class SeismicSource(object):
             `~openquake.hazardlib.source.rupture.ProbabilisticRupture`.
         """
 
+    def count_ruptures(self):
+        """
+        Count the ruptures generated by :meth:`iter_ruptures`.
+
+        Base class implementation generates all the ruptures, subclasses
+        override it computing the number of ruptures without creating them.
+
+        :returns:
+            Integer number of ruptures.
+        """
+        return sum(1 for _ in self.iter_ruptures(PoissonTOM(1.0)))
+
+    def estimate_weight(self, sites, integration_distance=None):
+        """
+        Estimate the computational cost of the source in a hazard
+        calculation, as the number of rupture-site pairs.
+
+        :param sites:
+            Instance of :class:`openquake.hazardlib.site.SiteCollection`.
+        :param integration_distance:
+            Optional distance in km. If given, only sites closer than
+            that to the source are counted (see
+            :meth:`filter_sites_by_distance_to_source`).
+        :returns:
+            Number of ruptures (see :meth:`count_ruptures`) times number
+            of sites.
+        """
+        if integration_distance is not None:
+            sites = self.filter_sites_by_distance_to_source(
+                integration_distance, sites
+            )
+            if sites is None:
+                return 0
+        return self.count_ruptures() * len(sites)
+
+    def get_bounding_circle(self):
+        """
+        Get a circle on the Earth surface enclosing the surface projections
+        of all the ruptures generated by the source.
+
+        Base class implementation encloses the vertices of the polygon
+        returned by :meth:`get_rupture_enclosing_polygon` (see
+        :func:`openquake.hazardlib.geo.utils.get_bounding_circle`).
+
+        :returns:
+            Tuple of three items: longitude and latitude of the center of
+            the circle in decimal degrees and its radius in km.
+        """
+        polygon = self.get_rupture_enclosing_polygon()
+        return get_bounding_circle(polygon.lons, polygon.lats)
+
     def filter_sites_by_distance_to_source(self, integration_distance, sites):
         """
         Filter out sites from the collection that are further from the source
@@ -208,3 +261,54 @@ class SeismicSource(object):
         return [(mag, occ_rate)
                 for (mag, occ_rate) in self.mfd.get_annual_occurrence_rates()
                 if min_rate is None or occ_rate > min_rate]
+
+
+class BaseFaultSource(SeismicSource):
+    """
+    Base class for fault sources, whose ruptures float on the surface
+    of the whole fault.
+
+    Sources are iterated several times (in filtering, hazard curves,
+    disaggregation and stochastic event set calculators) and the
+    geometry of the whole fault and the placements of the ruptures
+    on it are computed only once, keeping them in the source (see
+    :meth:`_get_cached`). They are kept in a slot which is not listed
+    in the ``__slots__`` of the subclasses, so they are neither compared
+    nor pickled.
+    """
+    __slots__ = ['_cache']
+
+    def _get_cached(self, name, key, func):
+        """
+        Return the value cached as ``name``, calling ``func()`` to compute
+        and cache it if it is not cached or if it was cached for a different
+        ``key``.
+
+        :param key:
+            A value representing all the parameters the value depends on,
+            like the geometry of the fault or the magnitudes and rates of
+            the MFD (so that the value is computed again if the MFD is
+            modified). Keys are compared by equality.
+        """
+        try:
+            cache = self._cache
+        except AttributeError:
+            cache = self._cache = {}
+        if name in cache:
+            cached_key, value = cache[name]
+            if cached_key == key:
+                return value
+        value = func()
+        cache[name] = (key, value)
+        return value
+
+    @staticmethod
+    def _get_lines_key(lines):
+        """
+        Return a key (see :meth:`_get_cached`) representing the coordinates
+        of the points of a list of
+        :class:`lines <openquake.hazardlib.geo.line.Line>`.
+        """
+        return tuple(tuple((point.longitude, point.latitude, point.depth)
+                           for point in line.points)
+                     for line in lines)
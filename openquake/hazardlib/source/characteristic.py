@@ -106,3 +106,12 @@ class CharacteristicFaultSource(SeismicSource):
                 self.surface, type(self), occurrence_rate,
                 temporal_occurrence_model
             )
+
+    def count_ruptures(self):
+        """
+        See :meth:
+        `openquake.hazardlib.source.base.SeismicSource.count_ruptures`.
+
+        One rupture for each magnitude.
+        """
+        return len(self.get_annual_occurrence_rates())
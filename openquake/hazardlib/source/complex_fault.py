@@ -19,7 +19,7 @@ defines :class:`ComplexFaultSource`.
 """
 import numpy
 
-from openquake.hazardlib.source.base import SeismicSource
+from openquake.hazardlib.source.base import BaseFaultSource, SeismicSource
 from openquake.hazardlib.geo.surface.complex_fault import ComplexFaultSurface
 from openquake.hazardlib.geo.nodalplane import NodalPlane
 from openquake.hazardlib.source.rupture import ProbabilisticRupture
@@ -27,7 +27,7 @@ from openquake.hazardlib.slots import with_slots
 
 
 @with_slots
-class ComplexFaultSource(SeismicSource):
+class ComplexFaultSource(BaseFaultSource):
     """
     Complex fault source typology represents seismicity occurring on a fault
     surface with an arbitrarily complex geometry.
@@ -93,24 +93,8 @@ class ComplexFaultSource(SeismicSource):
         Uses :func:`_float_ruptures` for finding possible rupture locations
         on the whole fault surface.
         """
-        whole_fault_surface = ComplexFaultSurface.from_fault_data(
-            self.edges, self.rupture_mesh_spacing
-        )
-        whole_fault_mesh = whole_fault_surface.get_mesh()
-        cell_center, cell_length, cell_width, cell_area = (
-            whole_fault_mesh.get_cell_dimensions()
-        )
-
-        for (mag, mag_occ_rate) in self.get_annual_occurrence_rates():
-            rupture_area = self.magnitude_scaling_relationship.get_median_area(
-                mag, self.rake
-            )
-            rupture_length = numpy.sqrt(rupture_area
-                                        * self.rupture_aspect_ratio)
-            rupture_slices = _float_ruptures(rupture_area, rupture_length,
-                                             cell_area, cell_length)
-            occurrence_rate = mag_occ_rate / float(len(rupture_slices))
-
+        whole_fault_mesh = self._get_whole_fault_geometry()[0]
+        for mag, occurrence_rate, rupture_slices in self._get_rupture_slices():
             for rupture_slice in rupture_slices:
                 mesh = whole_fault_mesh[rupture_slice]
                 # XXX: use surface centroid as rupture's hypocenter
@@ -128,6 +112,70 @@ class ComplexFaultSource(SeismicSource):
                     occurrence_rate, temporal_occurrence_model
                 )
 
+    def count_ruptures(self):
+        """
+        See :meth:
+        `openquake.hazardlib.source.base.SeismicSource.count_ruptures`.
+
+        Counts the rupture placements found by :func:`_float_ruptures`,
+        without creating the ruptures.
+        """
+        return sum(len(rupture_slices)
+                   for _, _, rupture_slices in self._get_rupture_slices())
+
+    def _get_whole_fault_geometry(self):
+        """
+        Return the mesh of the whole fault surface (see
+        :meth:`~openquake.hazardlib.geo.surface.complex_fault.ComplexFaultSurface.from_fault_data`)
+        and the 2d arrays of length and area of its cells, computed once
+        for the source geometry.
+        """
+        def make_geometry():
+            mesh = ComplexFaultSurface.from_fault_data(
+                self.edges, self.rupture_mesh_spacing
+            ).get_mesh()
+            _, cell_length, _, cell_area = mesh.get_cell_dimensions()
+            return mesh, cell_length, cell_area
+        return self._get_cached('geometry', self._get_geometry_key(),
+                                make_geometry)
+
+    def _get_geometry_key(self):
+        """
+        Return the key of the cached geometry of the whole fault.
+        """
+        return self._get_lines_key(self.edges), self.rupture_mesh_spacing
+
+    def _get_rupture_slices(self):
+        """
+        Return a list of triples: magnitude, occurrence rate of each
+        rupture of that magnitude and list of slices of the whole fault
+        mesh found by :func:`_float_ruptures`, one for each magnitude
+        of the MFD. The list is computed again only if the geometry or
+        the MFD of the source are modified.
+        """
+        _, cell_length, cell_area = self._get_whole_fault_geometry()
+        mag_rates = self.get_annual_occurrence_rates()
+
+        def make_slices():
+            mag_slices = []
+            for (mag, mag_occ_rate) in mag_rates:
+                rupture_area = \
+                    self.magnitude_scaling_relationship.get_median_area(
+                        mag, self.rake
+                    )
+                rupture_length = numpy.sqrt(rupture_area
+                                            * self.rupture_aspect_ratio)
+                rupture_slices = _float_ruptures(
+                    rupture_area, rupture_length, cell_area, cell_length
+                )
+                occurrence_rate = mag_occ_rate / float(len(rupture_slices))
+                mag_slices.append((mag, occurrence_rate, rupture_slices))
+            return mag_slices
+        key = (self._get_geometry_key(), tuple(mag_rates),
+               self.magnitude_scaling_relationship, self.rake,
+               self.rupture_aspect_ratio)
+        return self._get_cached('slices', key, make_slices)
+
 
 def _float_ruptures(rupture_area, rupture_length, cell_area, cell_length):
     """
@@ -156,70 +204,140 @@ def _float_ruptures(rupture_area, rupture_length, cell_area, cell_length):
         # return the single slice that doesn't cut anything out.
         return [slice(None)]
 
+    # all the rupture placements of a row are computed at once. sums
+    # of cells are accumulated in the same order as they would be
+    # starting from each column separately, so that rounding errors
+    # (and therefore ruptures fitting exactly) don't depend on the column
+    cols = numpy.arange(ncols)
+    col_areas = numpy.sum(cell_area, axis=0)
+
     rupture_slices = []
 
-    dead_ends = set()
+    dead_ends = numpy.zeros(ncols, dtype=bool)
     for row in xrange(nrows):
-        for col in xrange(ncols):
-            if col in dead_ends:
-                continue
-            # find the lengths of all possible subsurfaces containing
-            # only the current row and from the current column till
-            # the last one.
-            lengths_acc = numpy.add.accumulate(cell_length[row, col:])
-            # find the "best match" number of columns, the one that gives
-            # the least difference between actual and requested rupture
-            # length (note that we only consider top row here, mainly
-            # for simplicity: it's not yet clear how many rows will we
-            # end up with).
-            rup_cols = numpy.argmin(numpy.abs(lengths_acc - rupture_length))
-            last_col = rup_cols + col + 1
-            if last_col == ncols and lengths_acc[rup_cols] < rupture_length:
-                # rupture doesn't fit along length (the requested rupture
-                # length is greater than the length of the part of current
-                # row that starts from the current column).
-                if col != 0:
-                    # if we are not in the first column, it means that we
-                    # hit the right border, so we need to go to the next
-                    # row.
-                    break
-
-            # now try to find the optimum (the one providing the closest
-            # to requested area) number of rows.
-            areas_acc = numpy.sum(cell_area[row:, col:last_col], axis=1)
-            areas_acc = numpy.add.accumulate(areas_acc, axis=0)
-            rup_rows = numpy.argmin(numpy.abs(areas_acc - rupture_area))
-            last_row = rup_rows + row + 1
-            if last_row == nrows and areas_acc[rup_rows] < rupture_area:
-                # rupture doesn't fit along width.
-                # we can try to extend it along length but only if we are
-                # at the first row
-                if row == 0:
-                    if last_col == ncols:
-                        # there is no place to extend, exiting
-                        return rupture_slices
-                    else:
-                        # try to extend along length
-                        areas_acc = numpy.sum(cell_area[:, col:], axis=0)
-                        areas_acc = numpy.add.accumulate(areas_acc, axis=0)
-                        rup_cols = numpy.argmin(numpy.abs(areas_acc
-                                                          - rupture_area))
-                        last_col = rup_cols + col + 1
-                        if last_col == ncols \
-                                and areas_acc[rup_cols] < rupture_area:
-                            # still doesn't fit, return
-                            return rupture_slices
-                else:
-                    # row is not the first and the required area exceeds
-                    # available area starting from target row and column.
-                    # mark the column as "dead end" so we don't create
-                    # one more rupture from the same column on all
-                    # subsequent rows.
-                    dead_ends.add(col)
-
-            # here we add 1 to last row and column numbers because we want
-            # to return slices for cutting the mesh of vertices, not the cell
-            # data (like cell_area or cell_length).
-            rupture_slices.append((slice(row, last_row + 1),
-                                   slice(col, last_col + 1)))
+        # find the "best match" number of columns for each column, the one
+        # that gives the least difference between actual and requested
+        # rupture length (note that we only consider top row here, mainly
+        # for simplicity: it's not yet clear how many rows will we end up
+        # with).
+        last_cols, lengths = _best_match(cell_length[row], cols,
+                                         rupture_length)
+        # rupture doesn't fit along length (the requested rupture length
+        # is greater than the length of the part of current row that
+        # starts from the column). if we are not in the first column,
+        # it means that we hit the right border, so we need to go to
+        # the next row.
+        too_long = ((last_cols == ncols) & (lengths < rupture_length)
+                    & (cols != 0) & ~dead_ends)
+        [border] = too_long.nonzero()
+        end = border[0] if len(border) else ncols
+        [row_cols] = (~dead_ends[:end]).nonzero()
+        last_cols = last_cols[row_cols]
+
+        # now try to find the optimum (the one providing the closest
+        # to requested area) number of rows.
+        areas_acc = _sum_row_cells(cell_area[row:], row_cols, last_cols)
+        numpy.add.accumulate(areas_acc, axis=0, out=areas_acc)
+        last_rows = row + numpy.abs(areas_acc - rupture_area).argmin(axis=0)
+        last_rows += 1
+        # rupture doesn't fit along width.
+        [too_wide] = ((last_rows == nrows)
+                      & (areas_acc[-1] < rupture_area)).nonzero()
+        exiting = False
+        if row == 0 and len(too_wide):
+            # we can try to extend it along length but only if we are
+            # at the first row
+            ext_cols = row_cols[too_wide]
+            ext_last_cols, ext_areas = _best_match(col_areas, ext_cols,
+                                                   rupture_area)
+            # there is no place to extend or it still doesn't fit
+            no_fit = ((last_cols[too_wide] == ncols)
+                      | ((ext_last_cols == ncols)
+                         & (ext_areas < rupture_area)))
+            last_cols[too_wide] = ext_last_cols
+            if no_fit.any():
+                # exiting with the placements found before that column
+                exiting = True
+                row_cols = row_cols[:too_wide[no_fit.argmax()]]
+        elif len(too_wide):
+            # row is not the first and the required area exceeds
+            # available area starting from target row and column.
+            # mark the column as "dead end" so we don't create
+            # one more rupture from the same column on all
+            # subsequent rows.
+            dead_ends[row_cols[too_wide]] = True
+
+        # here we add 1 to last row and column numbers because we want
+        # to return slices for cutting the mesh of vertices, not the cell
+        # data (like cell_area or cell_length).
+        rupture_slices.extend(
+            (slice(row, last_row + 1), slice(col, last_col + 1))
+            for col, last_col, last_row in zip(row_cols.tolist(),
+                                               last_cols.tolist(),
+                                               last_rows.tolist())
+        )
+        if exiting:
+            return rupture_slices
     return rupture_slices
+
+
+def _best_match(values, starts, target):
+    """
+    Find the "best match" ends of the intervals of ``values`` starting
+    from ``starts``.
+
+    :param values:
+        1d array of non-negative values.
+    :param starts:
+        1d array of indices of ``values``.
+    :param target:
+        The requested sum of the values in the intervals.
+    :returns:
+        Tuple of two 1d arrays: the index ``end`` greater than the
+        corresponding index ``start`` that gives the least difference
+        between the sum of ``values[start:end]`` and ``target``, the
+        first one if there are several, and that sum. Sums are
+        accumulated from ``start`` to ``end``, giving the same result
+        as ``numpy.add.accumulate(values[start:])[end - start - 1]``.
+    """
+    # accumulated sums are sorted, so the best match is either the first
+    # end giving a sum not less than the target or the one before it.
+    # sums starting from zero give an upper bound to the number of values
+    # that need to be accumulated, apart from rounding errors
+    cum = numpy.zeros(len(values) + 1)
+    numpy.add.accumulate(values, out=cum[1:])
+    tolerance = 1e-9 * (cum[-1] + target)
+    ends = numpy.searchsorted(cum, cum[starts] + target + tolerance, 'right')
+    width = min(numpy.max(ends - starts) + 2, len(values))
+    # ``sums[i, j]`` is the sum of ``values[starts[i]:starts[i] + j + 1]``,
+    # infinite for intervals going beyond the last value
+    indices = starts[:, None] + numpy.arange(width)
+    padded = numpy.append(values, numpy.inf)
+    sums = padded[numpy.minimum(indices, len(values))]
+    numpy.add.accumulate(sums, axis=1, out=sums)
+    best = numpy.abs(sums - target).argmin(axis=1)
+    return starts + best + 1, sums[numpy.arange(len(starts)), best]
+
+
+def _sum_row_cells(values, starts, ends):
+    """
+    Sum the values of each row of a 2d array from columns ``starts``
+    to columns ``ends``.
+
+    :returns:
+        2d array with one row for each row of ``values`` and one column
+        for each interval, with the same sums as
+        ``numpy.sum(values[:, start:end], axis=1)``.
+    """
+    sums = numpy.empty((len(values), len(starts)))
+    widths = ends - starts
+    # sums of intervals of the same width are computed at once. values
+    # are summed along the contiguous last axis of a 2d array, which
+    # numpy does in the same order as for a row of ``values``
+    for width in numpy.unique(widths):
+        [idx] = (widths == width).nonzero()
+        cells = values[:, starts[idx, None] + numpy.arange(width)]
+        cells = numpy.ascontiguousarray(cells).reshape(-1, width)
+        sums[:, idx] = numpy.sum(cells, axis=1).reshape(len(values),
+                                                        len(idx))
+    return sums
@@ -127,6 +127,18 @@ class PointSource(SeismicSource):
         max_rup_radius = self._get_max_rupture_projection_radius()
         return self.location.to_polygon(max_rup_radius + dilation)
 
+    def get_bounding_circle(self):
+        """
+        Returns the location of the source and
+        :meth:`_get_max_rupture_projection_radius`.
+
+        See :meth:`superclass method
+        <openquake.hazardlib.source.base.SeismicSource.get_bounding_circle>`
+        for return value definition.
+        """
+        return (self.location.longitude, self.location.latitude,
+                self._get_max_rupture_projection_radius())
+
     def filter_sites_by_distance_to_source(self, integration_distance, sites):
         """
         Filter sites that are closer than maximum rupture projection radius
@@ -150,6 +162,18 @@ class PointSource(SeismicSource):
         return self._iter_ruptures_at_location(temporal_occurrence_model,
                                                self.location)
 
+    def count_ruptures(self):
+        """
+        See :meth:
+        `openquake.hazardlib.source.base.SeismicSource.count_ruptures`.
+
+        One rupture for each combination of magnitude, nodal plane
+        and hypocenter depth.
+        """
+        return (len(self.get_annual_occurrence_rates())
+                * len(self.nodal_plane_distribution.data)
+                * len(self.hypocenter_distribution.data))
+
     def _iter_ruptures_at_location(self, temporal_occurrence_model, location,
                                    rate_scaling_factor=1):
         """
@@ -19,7 +19,7 @@ Module :mod:`openquake.hazardlib.source.simple_fault` defines
 """
 import math
 
-from openquake.hazardlib.source.base import SeismicSource
+from openquake.hazardlib.source.base import BaseFaultSource, SeismicSource
 from openquake.hazardlib.geo.surface.simple_fault import SimpleFaultSurface
 from openquake.hazardlib.geo.nodalplane import NodalPlane
 from openquake.hazardlib.source.rupture import ProbabilisticRupture
@@ -27,7 +27,7 @@ from openquake.hazardlib.slots import with_slots
 
 
 @with_slots
-class SimpleFaultSource(SeismicSource):
+class SimpleFaultSource(BaseFaultSource):
     """
     Simple fault source typology represents seismicity occurring on a fault
     surface with simple geometry.
@@ -119,12 +119,12 @@ class SimpleFaultSource(SeismicSource):
         size on the surface of the whole fault source. The occurrence
         rate of each of those ruptures is the magnitude occurrence rate
         divided by the number of ruptures that can be placed in a fault.
+
+        Surfaces of the ruptures refer to the mesh of the whole fault
+        (see :class:`SimpleFaultSurface`), so that calculators can compute
+        the distances from each of its points once for all the ruptures.
         """
-        whole_fault_surface = SimpleFaultSurface.from_fault_data(
-            self.fault_trace, self.upper_seismogenic_depth,
-            self.lower_seismogenic_depth, self.dip, self.rupture_mesh_spacing
-        )
-        whole_fault_mesh = whole_fault_surface.get_mesh()
+        whole_fault_mesh = self._get_whole_fault_mesh()
         mesh_rows, mesh_cols = whole_fault_mesh.shape
         fault_length = float((mesh_cols - 1) * self.rupture_mesh_spacing)
         fault_width = float((mesh_rows - 1) * self.rupture_mesh_spacing)
@@ -144,13 +144,52 @@ class SimpleFaultSource(SeismicSource):
                     mesh = whole_fault_mesh[first_row: first_row + rup_rows,
                                             first_col: first_col + rup_cols]
                     hypocenter = mesh.get_middle_point()
-                    surface = SimpleFaultSurface(mesh)
+                    surface = SimpleFaultSurface(
+                        mesh, whole_fault_mesh, first_row, first_col
+                    )
                     yield ProbabilisticRupture(
                         mag, self.rake, self.tectonic_region_type, hypocenter,
                         surface, type(self),
                         occurrence_rate, temporal_occurrence_model
                     )
 
+    def count_ruptures(self):
+        """
+        See :meth:
+        `openquake.hazardlib.source.base.SeismicSource.count_ruptures`.
+
+        Counts the ruptures placed by the "floating" algorithm of
+        :meth:`iter_ruptures`, building only the mesh of the whole fault.
+        """
+        mesh_rows, mesh_cols = self._get_whole_fault_mesh().shape
+        fault_length = float((mesh_cols - 1) * self.rupture_mesh_spacing)
+        fault_width = float((mesh_rows - 1) * self.rupture_mesh_spacing)
+
+        num_rup = 0
+        for (mag, mag_occ_rate) in self.get_annual_occurrence_rates():
+            rup_cols, rup_rows = self._get_rupture_dimensions(
+                fault_length, fault_width, mag
+            )
+            num_rup += (mesh_cols - rup_cols + 1) * (mesh_rows - rup_rows + 1)
+        return num_rup
+
+    def _get_whole_fault_mesh(self):
+        """
+        Return the mesh of the whole fault surface (see
+        :meth:`~openquake.hazardlib.geo.surface.simple_fault.SimpleFaultSurface.from_fault_data`),
+        computed once for the source geometry.
+        """
+        key = (self._get_lines_key([self.fault_trace]),
+               self.upper_seismogenic_depth, self.lower_seismogenic_depth,
+               self.dip, self.rupture_mesh_spacing)
+        return self._get_cached('mesh', key, lambda: (
+            SimpleFaultSurface.from_fault_data(
+                self.fault_trace, self.upper_seismogenic_depth,
+                self.lower_seismogenic_depth, self.dip,
+                self.rupture_mesh_spacing
+            ).get_mesh()
+        ))
+
     def _get_rupture_dimensions(self, fault_length, fault_width, mag):
         """
         Calculate rupture dimensions for a given magnitude.
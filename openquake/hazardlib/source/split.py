@@ -0,0 +1,138 @@
+# The Hazard Library
+# Copyright (C) 2012 GEM Foundation
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Module :mod:`openquake.hazardlib.source.split` defines :func:`split_source`,
+breaking heavy seismic sources in lighter ones, so that they can be
+distributed evenly among parallel tasks.
+"""
+import copy
+
+import numpy
+
+from openquake.hazardlib.mfd import EvenlyDiscretizedMFD
+from openquake.hazardlib.source.point import PointSource
+from openquake.hazardlib.source.area import AreaSource
+
+
+def split_source(source, max_ruptures):
+    """
+    Split a seismic source in sub-sources generating at most
+    ``max_ruptures`` ruptures each, if possible.
+
+    Area sources are split in point sources, one for each point of the
+    polygon discretization, with occurrence rates divided by the number of
+    points. Sources that are still too heavy are split by magnitude, each
+    sub-source having the same geometry and a subset of the magnitudes
+    (and rates) of the MFD. Since a sub-source has at least one magnitude
+    (and, for area sources, one location), it may generate more than
+    ``max_ruptures`` ruptures.
+
+    Ruptures of all the sub-sources are the same as those of the source,
+    except for rounding errors in locations (area sources) and magnitudes
+    of the rebuilt MFDs, which are instances of
+    :class:`~openquake.hazardlib.mfd.evenly_discretized.EvenlyDiscretizedMFD`.
+
+    :param source:
+        Instance of subclass of
+        :class:`~openquake.hazardlib.source.base.SeismicSource`.
+    :param max_ruptures:
+        Maximum number of ruptures of each sub-source, see
+        :meth:`~openquake.hazardlib.source.base.SeismicSource.count_ruptures`.
+    :returns:
+        Generator of sources, either ``source`` itself, if it is light
+        enough, or sub-sources whose ``source_id`` is the one of ``source``
+        followed by a colon and the number of the sub-source.
+    """
+    if source.count_ruptures() <= max_ruptures:
+        yield source
+        return
+
+    if isinstance(source, AreaSource):
+        polygon_mesh = source.polygon.discretize(source.area_discretization)
+        rate_scaling_factor = 1.0 / len(polygon_mesh)
+        mfd = _make_mfd([(mag, rate * rate_scaling_factor) for (mag, rate)
+                         in source.get_annual_occurrence_rates()])
+        sub_sources = (
+            PointSource(
+                '%s:%s' % (source.source_id, i), source.name,
+                source.tectonic_region_type, mfd,
+                source.rupture_mesh_spacing,
+                source.magnitude_scaling_relationship,
+                source.rupture_aspect_ratio, source.upper_seismogenic_depth,
+                source.lower_seismogenic_depth, location,
+                source.nodal_plane_distribution,
+                source.hypocenter_distribution
+            )
+            for i, location in enumerate(polygon_mesh)
+        )
+        for sub_source in sub_sources:
+            for split in split_source(sub_source, max_ruptures):
+                yield split
+        return
+
+    # split by magnitude, grouping consecutive magnitudes so that
+    # sub-sources generate about max_ruptures ruptures
+    rates = source.get_annual_occurrence_rates()
+    groups = [[]]
+    num_ruptures = 0
+    for mag, rate in rates:
+        sub_source = _with_mfd(source, _make_mfd([(mag, rate)]))
+        mag_num_ruptures = sub_source.count_ruptures()
+        if groups[-1] and num_ruptures + mag_num_ruptures > max_ruptures:
+            groups.append([])
+            num_ruptures = 0
+        groups[-1].append((mag, rate))
+        num_ruptures += mag_num_ruptures
+    if len(groups) == 1:
+        yield source
+        return
+    for i, group in enumerate(groups):
+        sub_source = _with_mfd(source, _make_mfd(group))
+        sub_source.source_id = '%s:%s' % (source.source_id, i)
+        yield sub_source
+
+
+def _with_mfd(source, mfd):
+    """
+    Return a shallow copy of ``source`` with ``mfd`` as MFD.
+    """
+    source = copy.copy(source)
+    source.mfd = mfd
+    return source
+
+
+def _make_mfd(rates):
+    """
+    Create an evenly discretized MFD with given magnitudes and rates.
+
+    :param rates:
+        Non empty list of (magnitude, rate) pairs, sorted by magnitude,
+        magnitudes being multiples of a bin width apart.
+    :returns:
+        Instance of
+        :class:`~openquake.hazardlib.mfd.evenly_discretized.EvenlyDiscretizedMFD`
+        with ``rates`` as annual occurrence rates, and zero rates for
+        the missing magnitudes in between.
+    """
+    mags = [mag for (mag, rate) in rates]
+    if len(mags) == 1:
+        return EvenlyDiscretizedMFD(mags[0], 1.0, [rates[0][1]])
+    bin_width = numpy.diff(mags).min()
+    occurrence_rates = [0.] * (int(round((mags[-1] - mags[0])
+                                         / bin_width)) + 1)
+    for mag, rate in rates:
+        occurrence_rates[int(round((mag - mags[0]) / bin_width))] = rate
+    return EvenlyDiscretizedMFD(mags[0], bin_width, occurrence_rates)
@@ -59,11 +59,23 @@ class SpeedupsRegistry(object):
             del _c_do_bar
 
     Global registry is being used here. All speedups are enabled by default.
-    In order to disable them, use :meth:`disable`.
+    In order to disable them, use :meth:`disable`. Use :meth:`get_active`
+    to find out which implementation of each function is in use.
+
+    Alternative implementations may split their work across threads
+    (the C geodetic and geoutils speedups do, if compiled with OpenMP
+    support). They should read the number of threads to use from
+    :attr:`num_threads`, set by :meth:`set_num_threads`.
+
+    .. attribute:: num_threads
+
+        Number of threads alternative implementations can use,
+        1 by default.
     """
     def __init__(self):
         self.enabled = True
         self.funcs = {}
+        self.num_threads = 1
 
     def register(self, func, altfunc):
         """
@@ -107,6 +119,41 @@ class SpeedupsRegistry(object):
             func.func_code = origcode
         self.enabled = False
 
+    def set_num_threads(self, num_threads):
+        """
+        Set the number of threads alternative implementations can use.
+
+        :param num_threads:
+            Positive integer.
+        :raises ValueError:
+            If ``num_threads`` is not a positive integer.
+        """
+        if not (isinstance(num_threads, (int, long)) and num_threads > 0):
+            raise ValueError('number of threads must be a positive integer, '
+                             'got %r' % (num_threads, ))
+        self.num_threads = num_threads
+
+    def get_active(self):
+        """
+        Find out which implementation of each registered function is in use.
+
+        :returns:
+            Dictionary mapping the names of the registered functions,
+            prefixed with their module names, to either ``'alternative'``
+            or ``'original'``. Functions whose alternative implementation
+            is not available (for instance, because the C extension is not
+            compiled) are never registered and are missing from it.
+        """
+        active = {}
+        for func in self.funcs:
+            origcode, altcode = self.funcs[func]
+            name = '%s.%s' % (func.__module__, func.__name__)
+            if func.func_code is altcode:
+                active[name] = 'alternative'
+            else:
+                active[name] = 'original'
+        return active
+
 
 global_registry = SpeedupsRegistry()
 
@@ -116,3 +163,7 @@ register = global_registry.register
 enable = global_registry.enable
 #: Global (default) registry :meth:`disable`.
 disable = global_registry.disable
+#: Global (default) registry :meth:`set_num_threads`.
+set_num_threads = global_registry.set_num_threads
+#: Global (default) registry :meth:`get_active`.
+get_active = global_registry.get_active
@@ -15,6 +15,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import unittest
 
+import mock
 import numpy
 
 from openquake.hazardlib.source import AreaSource
@@ -22,18 +23,21 @@ from openquake.hazardlib.pmf import PMF
 from openquake.hazardlib.scalerel import WC1994
 from openquake.hazardlib.gsim.boore_atkinson_2008 import BooreAtkinson2008
 from openquake.hazardlib.calc import disagg
+from openquake.hazardlib.calc.hazard_curve import hazard_curves_poissonian
+from openquake.hazardlib.calc import filters
 from openquake.hazardlib.geo import Point, Polygon, NodalPlane
 from openquake.hazardlib.mfd import TruncatedGRMFD
 from openquake.hazardlib.imt import SA
 from openquake.hazardlib.tom import PoissonTOM
-from openquake.hazardlib.site import Site
+from openquake.hazardlib.site import Site, SiteCollection
 
 
 class DisaggTestCase(unittest.TestCase):
-    def test_areasource(self):
+    def _make_area_source(self, area_discretization=9.0, source_id='src_1',
+                          lon=0.0, lat=0.0):
         nodalplane = NodalPlane(strike=0.0, dip=90.0, rake=0.0)
-        src = AreaSource(
-            source_id='src_1',
+        return AreaSource(
+            source_id=source_id,
             name='area source',
             tectonic_region_type='Active Shallow Crust',
             mfd=TruncatedGRMFD(a_val=3.5, b_val=1.0, min_mag=5.0,
@@ -44,11 +48,16 @@ class DisaggTestCase(unittest.TestCase):
             lower_seismogenic_depth=10.0,
             magnitude_scaling_relationship = WC1994(),
             rupture_aspect_ratio=1.0,
-            polygon=Polygon([Point(-0.5,-0.5), Point(-0.5,0.5),
-                             Point(0.5,0.5), Point(0.5,-0.5)]),
-            area_discretization=9.0,
+            polygon=Polygon([Point(lon - 0.5, lat - 0.5),
+                             Point(lon - 0.5, lat + 0.5),
+                             Point(lon + 0.5, lat + 0.5),
+                             Point(lon + 0.5, lat - 0.5)]),
+            area_discretization=area_discretization,
             rupture_mesh_spacing=1.0
         )
+
+    def test_areasource(self):
+        src = self._make_area_source()
         site = Site(location=Point(0.0,0.0),
                     vs30=800.0,
                     vs30measured=True,
@@ -185,3 +194,275 @@ Nel7gDyKhBkqLaZERnxB8LlDUkTiZSj+HXUbExBQHB9RpN59KCcjHiSn9r0WIA4LlV3x5CJgXUAP
 NpRJAfK4Qs8XqReSkY+u6eonXVBeRAqK/ohy3LXjZOi5/h2he0qoeUFB0Qv8H5mRW2E=\
 """.decode('base64').decode('zip')).reshape((8, 8, 6, 6, 3, 1))
         numpy.testing.assert_almost_equal(diss_matrix, expected_matrix)
+
+    def test_areasource_multi(self):
+        src = self._make_area_source(area_discretization=20.0)
+        sites = [Site(location=Point(0.0, 0.0), vs30=800.0,
+                      vs30measured=True, z1pt0=500.0, z2pt5=2.0),
+                 Site(location=Point(0.3, -0.2), vs30=400.0,
+                      vs30measured=True, z1pt0=500.0, z2pt5=2.0)]
+        sitecol = SiteCollection(sites)
+        gsims = {'Active Shallow Crust': BooreAtkinson2008()}
+        imt = SA(period=0.1, damping=5.0)
+        imls = numpy.array([0.1, 0.2])
+        site_imtls = dict(((site.location.longitude, site.location.latitude),
+                           {imt: imls}) for site in sites)
+        disagg_params = dict(time_span=50.0, truncation_level=3.0,
+                             n_epsilons=3, mag_bin_width=0.2,
+                             dist_bin_width=10.0, coord_bin_width=0.2)
+
+        results = list(disagg.disaggregation_poissonian_multi(
+            [src], sitecol, site_imtls, gsims, **disagg_params
+        ))
+        self.assertEqual(len(results), 2)
+
+        # results must be the same as the ones of single site disaggregation
+        for site, (_, bin_edges, diss_matrix) in zip(sites, results):
+            self.assertEqual(diss_matrix.shape[:2], (1, 2))
+            for l, iml in enumerate(imls):
+                exp_bin_edges, exp_diss_matrix = \
+                    disagg.disaggregation_poissonian(
+                        [src], site, imt, iml, gsims, **disagg_params
+                    )
+                for edges, exp_edges in zip(bin_edges[:-1],
+                                            exp_bin_edges[:-1]):
+                    numpy.testing.assert_almost_equal(edges, exp_edges)
+                numpy.testing.assert_almost_equal(diss_matrix[0, l],
+                                                  exp_diss_matrix)
+
+    def test_areasource_multi_max_distance(self):
+        src = self._make_area_source(area_discretization=20.0)
+        sites = [Site(location=Point(0.0, 0.0), vs30=800.0,
+                      vs30measured=True, z1pt0=500.0, z2pt5=2.0),
+                 Site(location=Point(0.3, -0.2), vs30=400.0,
+                      vs30measured=True, z1pt0=500.0, z2pt5=2.0),
+                 Site(location=Point(5.0, 5.0), vs30=400.0,
+                      vs30measured=True, z1pt0=500.0, z2pt5=2.0)]
+        sitecol = SiteCollection(sites)
+        gsims = {'Active Shallow Crust': BooreAtkinson2008()}
+        imls = numpy.array([0.1, 0.2])
+        site_imtls = dict(((site.location.longitude, site.location.latitude),
+                           {SA(period=0.1, damping=5.0): imls})
+                          for site in sites)
+        disagg_params = dict(
+            time_span=50.0, truncation_level=3.0, n_epsilons=3,
+            mag_bin_width=0.2, dist_bin_width=10.0, coord_bin_width=0.2,
+            source_site_filter=filters.source_site_distance_filter(200),
+            rupture_site_filter=filters.rupture_site_distance_filter(200)
+        )
+
+        results = list(disagg.disaggregation_poissonian_multi(
+            [src], sitecol, site_imtls, gsims, **disagg_params
+        ))
+        acc_results = list(disagg.disaggregation_poissonian_multi(
+            [src], sitecol, site_imtls, gsims, max_distance=200,
+            **disagg_params
+        ))
+
+        # the third site is too far from the source
+        self.assertEqual(acc_results[2][1:], (None, None))
+
+        for (_, bin_edges, matrix), (_, acc_bin_edges, acc_matrix) in zip(
+                results[:2], acc_results[:2]):
+            mag_bins, dist_bins, lon_bins, lat_bins, eps_bins, trt_bins = \
+                acc_bin_edges
+            numpy.testing.assert_almost_equal(
+                mag_bins, [5., 5.2, 5.4, 5.6, 5.8, 6., 6.2, 6.4, 6.6]
+            )
+            numpy.testing.assert_almost_equal(dist_bins, numpy.arange(0, 210,
+                                                                      10))
+            self.assertEqual(len(lon_bins), 21)
+            self.assertEqual(len(lat_bins), 20)
+            self.assertEqual(trt_bins, ['src_1'])
+            self.assertEqual(acc_matrix.shape, (1, 2, 8, 20, 20, 19, 3, 1))
+
+            # bins defined from the source model include the bins
+            # defined from the collected data
+            mag_pmf = disagg.mag_pmf(matrix)
+            numpy.testing.assert_almost_equal(disagg.mag_pmf(acc_matrix),
+                                              mag_pmf)
+            lon_idx = int(round((bin_edges[2][0] - lon_bins[0]) / 0.2))
+            lat_idx = int(round((bin_edges[3][0] - lat_bins[0]) / 0.2))
+            lon_lat_pmf = disagg.lon_lat_pmf(matrix)
+            numpy.testing.assert_almost_equal(
+                disagg.lon_lat_pmf(acc_matrix)[
+                    :, :, lon_idx:lon_idx + lon_lat_pmf.shape[2],
+                    lat_idx:lat_idx + lon_lat_pmf.shape[3]],
+                lon_lat_pmf
+            )
+            dist_idx = int(round(bin_edges[1][0] / 10.0))
+            mag_dist_eps_pmf = disagg.mag_dist_eps_pmf(matrix)
+            numpy.testing.assert_almost_equal(
+                disagg.mag_dist_eps_pmf(acc_matrix)[
+                    :, :, :, dist_idx:dist_idx + mag_dist_eps_pmf.shape[3]],
+                mag_dist_eps_pmf
+            )
+
+    def test_multi_max_distance_contributing_sources(self):
+        src1 = self._make_area_source(area_discretization=20.0)
+        src2 = self._make_area_source(area_discretization=20.0,
+                                      source_id='src_2', lon=5.0, lat=5.0)
+        sites = [Site(location=Point(0.0, 0.0), vs30=800.0,
+                      vs30measured=True, z1pt0=500.0, z2pt5=2.0),
+                 Site(location=Point(5.0, 5.0), vs30=400.0,
+                      vs30measured=True, z1pt0=500.0, z2pt5=2.0)]
+        sitecol = SiteCollection(sites)
+        gsims = {'Active Shallow Crust': BooreAtkinson2008()}
+        site_imtls = dict(((site.location.longitude, site.location.latitude),
+                           {SA(period=0.1, damping=5.0): [0.1, 0.2]})
+                          for site in sites)
+        disagg_params = dict(
+            time_span=50.0, truncation_level=3.0, n_epsilons=3,
+            mag_bin_width=0.2, dist_bin_width=10.0, coord_bin_width=0.2,
+            source_site_filter=filters.source_site_distance_filter(200),
+            rupture_site_filter=filters.rupture_site_distance_filter(200),
+            max_distance=200
+        )
+        results = list(disagg.disaggregation_poissonian_multi(
+            [src1, src2], sitecol, site_imtls, gsims, **disagg_params
+        ))
+        # each site has a tectonic region type bin only for the source
+        # affecting it, with the same matrix as if it was the only source
+        for i, src in enumerate([src1, src2]):
+            _, bin_edges, matrix = results[i]
+            self.assertEqual(bin_edges[-1], [src.source_id])
+            _, _, exp_matrix = list(disagg.disaggregation_poissonian_multi(
+                [src], sitecol, site_imtls, gsims, **disagg_params
+            ))[i]
+            numpy.testing.assert_almost_equal(matrix, exp_matrix)
+
+        # contributions summed in many steps give the same matrices
+        with mock.patch.object(disagg._SparseBins, 'MAX_BUFFERED', 7):
+            small_results = list(disagg.disaggregation_poissonian_multi(
+                [src1, src2], sitecol, site_imtls, gsims, **disagg_params
+            ))
+        for (_, _, matrix), (_, _, small_matrix) in zip(results,
+                                                        small_results):
+            numpy.testing.assert_allclose(small_matrix, matrix, rtol=1e-12)
+
+    def test_hazard_curves_and_disaggregation(self):
+        src = self._make_area_source(area_discretization=20.0)
+        sites = [Site(location=Point(0.0, 0.0), vs30=800.0,
+                      vs30measured=True, z1pt0=500.0, z2pt5=2.0),
+                 Site(location=Point(0.3, -0.2), vs30=400.0,
+                      vs30measured=True, z1pt0=500.0, z2pt5=2.0),
+                 Site(location=Point(5.0, 5.0), vs30=400.0,
+                      vs30measured=True, z1pt0=500.0, z2pt5=2.0)]
+        sitecol = SiteCollection(sites)
+        gsims = {'Active Shallow Crust': BooreAtkinson2008()}
+        imt = SA(period=0.1, damping=5.0)
+        imtls = {imt: [0.05, 0.1, 0.2, 0.4]}
+        site_imtls = dict(((site.location.longitude, site.location.latitude),
+                           {imt: numpy.array([0.1, 0.2])})
+                          for site in sites)
+        disagg_params = dict(
+            time_span=50.0, truncation_level=3.0, n_epsilons=3,
+            mag_bin_width=0.2, dist_bin_width=10.0, coord_bin_width=0.2,
+            max_distance=200,
+            source_site_filter=filters.source_site_distance_filter(200),
+            rupture_site_filter=filters.rupture_site_distance_filter(200)
+        )
+
+        curves, disagg_imtls, results = \
+            disagg.hazard_curves_and_disaggregation_poissonian(
+                [src], sitecol, imtls, gsims, site_imtls=site_imtls,
+                **disagg_params
+            )
+        self.assertIs(disagg_imtls, site_imtls)
+        exp_curves = hazard_curves_poissonian(
+            [src], sitecol, imtls, 50.0, gsims, 3.0,
+            disagg_params['source_site_filter'],
+            disagg_params['rupture_site_filter']
+        )
+        numpy.testing.assert_allclose(curves[imt], exp_curves[imt],
+                                      rtol=1e-10)
+        self.assertTrue((curves[imt][2] == 0).all())
+
+        exp_results = disagg.disaggregation_poissonian_multi(
+            [src], sitecol, site_imtls, gsims, **disagg_params
+        )
+        for (_, bin_edges, matrix), (_, exp_bin_edges, exp_matrix) in zip(
+                results, exp_results):
+            if exp_matrix is None:
+                self.assertIsNone(bin_edges)
+                self.assertIsNone(matrix)
+                continue
+            for edges, exp_edges in zip(bin_edges, exp_bin_edges):
+                numpy.testing.assert_equal(edges, exp_edges)
+            numpy.testing.assert_almost_equal(matrix, exp_matrix)
+
+        # target poes equal to the hazard curve of the first site at
+        # its second and fourth iml give back those iml's, and the
+        # corresponding disaggregation matrices
+        poes = curves[imt][0, [1, 3]]
+        _, disagg_imtls, results = \
+            disagg.hazard_curves_and_disaggregation_poissonian(
+                [src], sitecol, imtls, gsims, poes=poes, **disagg_params
+            )
+        numpy.testing.assert_almost_equal(disagg_imtls[(0.0, 0.0)][imt],
+                                          [0.1, 0.4])
+        site_imtls = dict(((site.location.longitude, site.location.latitude),
+                           {imt: numpy.array([0.1, 0.4])})
+                          for site in sites)
+        exp_results = list(disagg.disaggregation_poissonian_multi(
+            [src], sitecol, site_imtls, gsims, **disagg_params
+        ))
+        numpy.testing.assert_almost_equal(results[0][2], exp_results[0][2])
+
+        # target poes between the ones of the iml's of the hazard curves
+        # are disaggregated at the inferred iml's
+        poes = numpy.sqrt(curves[imt][0, [0, 2]] * curves[imt][0, [1, 3]])
+        _, disagg_imtls, results = \
+            disagg.hazard_curves_and_disaggregation_poissonian(
+                [src], sitecol, imtls, gsims, poes=poes, **disagg_params
+            )
+        inferred = disagg_imtls[(0.0, 0.0)][imt]
+        self.assertTrue((inferred > [0.05, 0.2]).all())
+        self.assertTrue((inferred < [0.1, 0.4]).all())
+        exp_results = disagg.disaggregation_poissonian_multi(
+            [src], sitecol, disagg_imtls, gsims, **disagg_params
+        )
+        for (_, bin_edges, matrix), (_, exp_bin_edges, exp_matrix) in zip(
+                results, exp_results):
+            if exp_matrix is None:
+                self.assertIsNone(matrix)
+                continue
+            self.assertEqual(matrix.shape[:2], (1, 2))
+            numpy.testing.assert_allclose(matrix, exp_matrix, rtol=1e-12)
+
+        # hazard curves are CAV filtered as the ones of
+        # hazard_curves_poissonian(), disaggregation matrices are not
+        cav_curves, _, cav_results = \
+            disagg.hazard_curves_and_disaggregation_poissonian(
+                [src], sitecol, imtls, gsims, site_imtls=site_imtls,
+                cav_min=0.16, **disagg_params
+            )
+        exp_curves = hazard_curves_poissonian(
+            [src], sitecol, imtls, 50.0, gsims, 3.0,
+            disagg_params['source_site_filter'],
+            disagg_params['rupture_site_filter'], cav_min=0.16
+        )
+        numpy.testing.assert_allclose(cav_curves[imt], exp_curves[imt],
+                                      rtol=1e-10)
+        self.assertTrue((cav_curves[imt][0] < curves[imt][0]).all())
+        _, _, results = disagg.hazard_curves_and_disaggregation_poissonian(
+            [src], sitecol, imtls, gsims, site_imtls=site_imtls,
+            **disagg_params
+        )
+        for (_, _, matrix), (_, _, cav_matrix) in zip(results, cav_results):
+            if matrix is None:
+                self.assertIsNone(cav_matrix)
+                continue
+            numpy.testing.assert_allclose(cav_matrix, matrix, rtol=1e-12)
+        cav_curves, _, _ = \
+            disagg.hazard_curves_and_disaggregation_poissonian(
+                [src], sitecol, imtls, gsims, poes=poes, cav_min=0.16,
+                **disagg_params
+            )
+        numpy.testing.assert_allclose(cav_curves[imt], exp_curves[imt],
+                                      rtol=1e-10)
+
+        self.assertRaises(
+            ValueError, disagg.hazard_curves_and_disaggregation_poissonian,
+            [src], sitecol, imtls, gsims, **disagg_params
+        )
@@ -0,0 +1,82 @@
+# The Hazard Library
+# Copyright (C) 2012 GEM Foundation
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import unittest
+
+import numpy
+import scipy.stats
+
+try:
+    from openquake.hazardlib.c_speedups import truncnorm, norm
+except ImportError:
+    truncnorm = norm = None
+
+
+@unittest.skipIf(truncnorm is None, 'truncated normal speedups not built')
+class TruncnormTestCase(unittest.TestCase):
+    def setUp(self):
+        self.x = numpy.linspace(-4, 4, 81).reshape((9, 9))
+        self.dist = scipy.stats.truncnorm(-2.5, 2.5, loc=0.5, scale=2.)
+
+    def test_cdf(self):
+        cdf = truncnorm.cdf(self.x, -2.5, 2.5, loc=0.5, scale=2.)
+        self.assertEqual(cdf.shape, self.x.shape)
+        numpy.testing.assert_allclose(cdf, self.dist.cdf(self.x), atol=1e-10)
+        self.assertAlmostEqual(truncnorm.cdf(1., -2.5, 2.5, 0.5, 2.),
+                               self.dist.cdf(1.))
+
+    def test_sf(self):
+        numpy.testing.assert_allclose(
+            truncnorm.sf(self.x, -2.5, 2.5, loc=0.5, scale=2.),
+            self.dist.sf(self.x), atol=1e-10
+        )
+
+    def test_pdf(self):
+        numpy.testing.assert_allclose(
+            truncnorm.pdf(self.x, -2.5, 2.5, loc=0.5, scale=2.),
+            self.dist.pdf(self.x), atol=1e-10
+        )
+
+    def test_ppf(self):
+        cdf = numpy.linspace(0.01, 0.99, 99)
+        numpy.testing.assert_allclose(
+            truncnorm.ppf(cdf, -2.5, 2.5, loc=0.5, scale=2.),
+            self.dist.ppf(cdf), atol=1e-10
+        )
+        self.assertAlmostEqual(truncnorm.ppf(0.3, -2.5, 2.5, 0.5, 2.),
+                               self.dist.ppf(0.3))
+
+    def test_not_contiguous(self):
+        x = self.x[:, ::2]
+        numpy.testing.assert_allclose(
+            truncnorm.cdf(x, -2.5, 2.5, loc=0.5, scale=2.),
+            self.dist.cdf(x), atol=1e-10
+        )
+
+
+@unittest.skipIf(norm is None, 'truncated normal speedups not built')
+class NormTestCase(unittest.TestCase):
+    def test(self):
+        x = numpy.linspace(-4, 4, 81)
+        dist = scipy.stats.norm(loc=0.5, scale=2.)
+        numpy.testing.assert_allclose(norm.cdf(x, 0.5, 2.), dist.cdf(x),
+                                      atol=1e-10)
+        numpy.testing.assert_allclose(norm.sf(x, 0.5, 2.), dist.sf(x),
+                                      atol=1e-10)
+        numpy.testing.assert_allclose(norm.pdf(x, 0.5, 2.), dist.pdf(x),
+                                      atol=1e-10)
+        cdf = numpy.linspace(0.01, 0.99, 99)
+        numpy.testing.assert_allclose(norm.ppf(cdf, 0.5, 2.), dist.ppf(cdf),
+                                      atol=1e-10)
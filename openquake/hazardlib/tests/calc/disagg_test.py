@@ -79,6 +79,9 @@ class _BaseDisaggTestCase(unittest.TestCase):
             self.dists = object()
         def make_contexts(self, sites, rupture):
             return (sites, rupture, self.dists)
+        def iter_contexts(self, ruptures_sites):
+            for rupture, sites in ruptures_sites:
+                yield (rupture, sites) + self.make_contexts(sites, rupture)
         def disaggregate_poe(self, sctx, rctx, dctx, imt, iml,
                              truncation_level, n_epsilons):
             assert truncation_level is self.truncation_level
@@ -284,6 +287,52 @@ class ArangeDataInBinsTestCase(unittest.TestCase):
 
         self.assertEqual(diss_matrix.sum(), 0)
 
+    def test_bin_edges_and_date_line(self):
+        # values on bin edges go to the lower bin, values below the first
+        # edge go to the first bin, values above the last edge are ignored
+        mags = numpy.array([6, 3, 5, 8], float)
+        dists = numpy.array([4, 6, 0, 1], float)
+        lons = numpy.array([-179, 179, 180, 179.5], float)
+        lats = numpy.array([41, 41.5, 40, 40.5], float)
+        trts = numpy.array([0, 1, 1, 0], int)
+        trt_bins = ['trt1', 'trt2']
+
+        probs_one_or_more = numpy.array([0.1, 0.2, 1.0, 0.3])
+        probs_exceed_given_rup = numpy.array([[0.5, 0.1],
+                                              [0.2, 0.0],
+                                              [0.0, 0.3],
+                                              [0.4, 0.4]])
+        src_idxs = numpy.zeros(mags.shape, dtype=int)
+
+        bins_data = (mags, dists, lons, lats, trts, trt_bins,
+                     probs_one_or_more, probs_exceed_given_rup, src_idxs)
+
+        mag_bins = numpy.array([4, 6, 7], float)
+        dist_bins = numpy.array([0, 4, 8], float)
+        lon_bins = numpy.array([179, 180, -179], float)
+        lat_bins = numpy.array([40, 41, 42], float)
+        eps_bins = numpy.array([-2, 0, 2], float)
+
+        bin_edges = mag_bins, dist_bins, lon_bins, lat_bins, eps_bins, trt_bins
+
+        bins_indices = disagg._get_bins_indices(bins_data, bin_edges)
+        diss_matrix = disagg._arrange_data_in_bins(bins_data, bin_edges)
+        numpy.testing.assert_array_equal(
+            diss_matrix,
+            disagg._arrange_data_in_bins(bins_data, bin_edges, bins_indices)
+        )
+
+        self.assertEqual(diss_matrix.shape, (2, 2, 2, 2, 2, 2))
+
+        for idx, value in [((0, 0, 1, 0, 0, 0), 1 - 0.9 ** 0.5),
+                           ((0, 0, 1, 0, 1, 0), 1 - 0.9 ** 0.1),
+                           ((0, 1, 0, 1, 0, 1), 1 - 0.8 ** 0.2),
+                           ((0, 0, 0, 0, 1, 1), 1.0)]:
+            self.assertAlmostEqual(diss_matrix[idx], value)
+            diss_matrix[idx] = 0
+
+        self.assertEqual(diss_matrix.sum(), 0)
+
 
 class DisaggregateTestCase(_BaseDisaggTestCase):
     def test(self):
@@ -510,3 +559,20 @@ class PMFExtractorsTestCase(unittest.TestCase):
                         [0.999998665328, 0.999969082487, 0.999980380612]],
                        [[0.999447922645, 0.999996344798, 0.999999678475],
                         [0.999981572755, 0.999464007617, 0.999983196102]]])
+
+    def test_all_pmfs(self):
+        pmfs = disagg.all_pmfs(self.matrix)
+        self.assertEqual(len(pmfs), 8)
+        for name, pmf in pmfs.items():
+            self.aae(pmf, getattr(disagg, name)(self.matrix))
+
+    def test_leading_dimensions(self):
+        # matrices from disaggregation_poissonian_multi have imt and iml
+        # dimensions in front of the six disaggregation ones
+        matrix = numpy.array([[self.matrix, self.matrix / 2]])
+        self.assertEqual(matrix.shape[:2], (1, 2))
+        for name, pmf in disagg.all_pmfs(matrix).items():
+            extractor = getattr(disagg, name)
+            self.aae(pmf, extractor(matrix))
+            self.aae(pmf[0, 0], extractor(self.matrix))
+            self.aae(pmf[0, 1], extractor(self.matrix / 2))
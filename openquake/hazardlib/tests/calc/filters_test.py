@@ -26,17 +26,28 @@ class SourceSiteDistanceFilterTestCase(unittest.TestCase):
             def __init__(self, integration_distance, sites_mapping):
                 self.integration_distance = integration_distance
                 self.sites_mapping = sites_mapping
+            def get_bounding_circle(self):
+                return 1, 2, 5
             def filter_sites_by_distance_to_source(self, integration_distance,
                                                    sites):
                 assert integration_distance is self.integration_distance
                 return self.sites_mapping[sites]
-        sites1 = object()
-        sites2 = object()
-        sites3 = object()
+        class FakeSites(object):
+            def __init__(self, candidates=True):
+                self.candidates = candidates
+            def filter_by_distance(self, lon, lat, distance):
+                assert (lon, lat) == (1, 2)
+                assert distance == (5 + 123) * filters.BOUNDING_RADIUS_MARGIN
+                return self if self.candidates else None
+        sites1 = FakeSites()
+        sites2 = FakeSites()
+        sites3 = FakeSites()
+        sites4 = FakeSites(candidates=False)
         sources = [FakeSource(123, {sites1: None}),  # all filtered out
                    FakeSource(123, {sites2: sites3}),  # partial filtering
+                   FakeSource(123, {}),  # no candidate sites
                    FakeSource(123, {sites1: sites1})]  # nothing filtered out
-        sites = [sites1, sites2, sites1]
+        sites = [sites1, sites2, sites4, sites1]
         filter_func = filters.source_site_distance_filter(123)
         filtered = filter_func(izip(sources, sites))
         self.assertIsInstance(filtered, GeneratorType)
@@ -46,7 +57,7 @@ class SourceSiteDistanceFilterTestCase(unittest.TestCase):
         self.assertIs(sites, sites3)
 
         source, sites = next(filtered)
-        self.assertIs(source, sources[2])
+        self.assertIs(source, sources[3])
         self.assertIs(sites, sites1)
 
         self.assertEqual(list(filtered), [])
@@ -54,10 +65,14 @@ class SourceSiteDistanceFilterTestCase(unittest.TestCase):
 
 class RuptureSiteDistanceFilterTestCase(unittest.TestCase):
     def test(self):
+        class FakeSurface(object):
+            def get_bounding_box(self):
+                return -1, 1, 1, -1
         class FakeRupture(object):
             def __init__(self, integration_distance, sites_mapping):
                 self.integration_distance = integration_distance
                 self.sites_mapping = sites_mapping
+                self.surface = FakeSurface()
             @property
             def source_typology(self):
                 return self
@@ -67,14 +82,26 @@ class RuptureSiteDistanceFilterTestCase(unittest.TestCase):
                 assert rupture is self
                 assert integration_distance is self.integration_distance
                 return self.sites_mapping[sites]
-        sites1 = object()
-        sites2 = object()
-        sites3 = object()
+        class FakeSites(object):
+            def __init__(self, candidates=True):
+                self.candidates = candidates
+            def filter_by_distance(self, lon, lat, distance):
+                # the circle is centered in the middle of the bounding box
+                # and passes through its corners
+                assert abs(lon) < 1e-9 and abs(lat) < 1e-9
+                expected = (157.2 + 13) * filters.BOUNDING_RADIUS_MARGIN
+                assert abs(distance - expected) < 0.1
+                return self if self.candidates else None
+        sites1 = FakeSites()
+        sites2 = FakeSites()
+        sites3 = FakeSites()
+        sites4 = FakeSites(candidates=False)
 
         ruptures = [FakeRupture(13, {sites1: None}),  # all filtered out
                     FakeRupture(13, {sites2: sites3}),  # partial filtering
+                    FakeRupture(13, {}),  # no candidate sites
                     FakeRupture(13, {sites1: sites1})]  # nothing filtered out
-        sites = [sites1, sites2, sites1]
+        sites = [sites1, sites2, sites4, sites1]
         filter_func = filters.rupture_site_distance_filter(13)
         filtered = filter_func(izip(ruptures, sites))
         self.assertIsInstance(filtered, GeneratorType)
@@ -84,7 +111,96 @@ class RuptureSiteDistanceFilterTestCase(unittest.TestCase):
         self.assertIs(sites, sites3)
 
         source, sites = next(filtered)
-        self.assertIs(source, ruptures[2])
+        self.assertIs(source, ruptures[3])
         self.assertIs(sites, sites1)
 
         self.assertEqual(list(filtered), [])
+
+
+class MagnitudeDependentDistanceFilterTestCase(unittest.TestCase):
+    class FakeSource(object):
+        tectonic_region_type = 'Stable Continental Crust'
+        def __init__(self, mags):
+            self.mags = mags
+        def get_annual_occurrence_rates(self, min_rate=0):
+            return [(mag, 0.1) for mag in self.mags]
+        def get_bounding_circle(self):
+            return 0, 0, 0
+        def filter_sites_by_distance_to_source(self, integration_distance,
+                                               sites):
+            self.integration_distance = integration_distance
+            return sites
+
+    class FakeRupture(object):
+        tectonic_region_type = 'Stable Continental Crust'
+        def __init__(self, mag):
+            self.mag = mag
+        @property
+        def surface(self):
+            return self
+        @property
+        def source_typology(self):
+            return self
+        def get_bounding_box(self):
+            return 0, 0, 0, 0
+        def filter_sites_by_distance_to_rupture(self, rupture,
+                                                integration_distance, sites):
+            self.integration_distance = integration_distance
+            return sites
+
+    class FakeSites(object):
+        def filter_by_distance(self, lon, lat, distance):
+            return self
+
+    def test_scalar(self):
+        self.assertIs(filters._get_distance_func(100), None)
+        self.assertIs(filters._get_distance_func(100.), None)
+
+    def test_function(self):
+        get_distance = filters._get_distance_func(lambda mag: mag * 10)
+        self.assertEqual(get_distance('Active Shallow Crust', 4.5), 45)
+
+    def test_table(self):
+        get_distance = filters._get_distance_func([(5, 50), (7, 200)])
+        self.assertEqual(get_distance(None, 4), 50)
+        self.assertEqual(get_distance(None, 5), 50)
+        self.assertEqual(get_distance(None, 6), 125)
+        self.assertEqual(get_distance(None, 7.5), 200)
+
+    def test_table_not_sorted(self):
+        self.assertRaises(ValueError, filters._get_distance_func,
+                          [(7, 200), (5, 50)])
+
+    def test_tectonic_region_types(self):
+        get_distance = filters._get_distance_func({
+            'Active Shallow Crust': 200,
+            'Stable Continental Crust': lambda mag: mag * 10,
+            'Subduction Interface': [(5, 100), (9, 300)]
+        })
+        self.assertEqual(get_distance('Active Shallow Crust', 4), 200)
+        self.assertEqual(get_distance('Stable Continental Crust', 4), 40)
+        self.assertEqual(get_distance('Subduction Interface', 7), 200)
+        self.assertRaises(KeyError, get_distance, 'Volcanic', 4)
+
+    def test_source_filter_uses_max_mag(self):
+        source = self.FakeSource([4.5, 5.5, 6.5])
+        sites = self.FakeSites()
+        filter_func = filters.source_site_distance_filter(
+            {'Stable Continental Crust': [(4, 20), (8, 300)]}
+        )
+        [(s, ss)] = filter_func([(source, sites)])
+        self.assertIs(s, source)
+        self.assertIs(ss, sites)
+        self.assertAlmostEqual(source.integration_distance, 195)
+
+    def test_rupture_filter(self):
+        ruptures = [self.FakeRupture(4.5), self.FakeRupture(6.5)]
+        sites = self.FakeSites()
+        filter_func = filters.rupture_site_distance_filter(
+            lambda mag: 10 ** (mag - 4.5) * 10
+        )
+        filtered = list(filter_func((rupture, sites)
+                                    for rupture in ruptures))
+        self.assertEqual(len(filtered), 2)
+        self.assertAlmostEqual(ruptures[0].integration_distance, 10)
+        self.assertAlmostEqual(ruptures[1].integration_distance, 1000)
@@ -26,6 +26,7 @@ from openquake.hazardlib.geo import Point
 from openquake.hazardlib.calc.gmf import (
     ground_motion_fields, ground_motion_field_with_residuals)
 from openquake.hazardlib.correlation import JB2009CorrelationModel
+from openquake.hazardlib.gsim.base import GroundShakingIntensityModel
 
 
 class BaseGMFCalcTestCase(unittest.TestCase):
@@ -95,6 +96,10 @@ class BaseGMFCalcTestCase(unittest.TestCase):
             def to_imt_unit_values(gsim, intensities):
                 return intensities - 10.
 
+            # calls get_mean_and_stddevs() for each IMT
+            get_mean_and_stddevs_multi = (GroundShakingIntensityModel
+                                          .get_mean_and_stddevs_multi.im_func)
+
         class FakeGSIMInterIntraStdDevs(BaseFakeGSIM):
             DEFINED_FOR_STANDARD_DEVIATION_TYPES = set(
                 [const.StdDev.INTER_EVENT, const.StdDev.INTRA_EVENT]
@@ -24,6 +24,9 @@ from openquake.hazardlib.site import Site, SiteCollection
 from openquake.hazardlib.geo import Point
 from openquake.hazardlib.tom import PoissonTOM
 from openquake.hazardlib.calc.hazard_curve import hazard_curves_poissonian
+from openquake.hazardlib.calc.hazard_curve import \
+    hazard_curves_poissonian_parallel
+from openquake.hazardlib.calc.hazard_curve import _split_in_tasks
 
 
 class HazardCurvesTestCase(unittest.TestCase):
@@ -40,6 +43,7 @@ class HazardCurvesTestCase(unittest.TestCase):
             self.source_id = source_id
             self.time_span = time_span
             self.ruptures = ruptures
+            self.tectonic_region_type = ruptures[0].tectonic_region_type
 
         def iter_ruptures(self, tom):
             assert tom.time_span is self.time_span
@@ -58,6 +62,9 @@ class HazardCurvesTestCase(unittest.TestCase):
             self.dists = object()
         def make_contexts(self, sites, rupture):
             return (sites, rupture, self.dists)
+        def iter_contexts(self, ruptures_sites):
+            for rupture, sites in ruptures_sites:
+                yield (rupture, sites) + self.make_contexts(sites, rupture)
         def get_poes(self, sctx, rctx, dctx, imt, imls, truncation_level):
             assert truncation_level is self.truncation_level
             assert dctx is self.dists
@@ -273,3 +280,88 @@ class HazardCurvesFiltersTestCase(unittest.TestCase):
                          [('point2', [1, 3, 4])])
         self.assertEqual(rupture_site_filter.counts,
                          [(6, [4]), (8, [3, 4])])
+
+
+class HazardCurvesParallelTestCase(unittest.TestCase):
+    def _make_source(self, source_id, location, occurrence_rates):
+        return openquake.hazardlib.source.PointSource(
+            source_id=source_id, name=source_id,
+            tectonic_region_type=const.TRT.ACTIVE_SHALLOW_CRUST,
+            mfd=openquake.hazardlib.mfd.EvenlyDiscretizedMFD(
+                min_mag=5, bin_width=1, occurrence_rates=occurrence_rates
+            ),
+            nodal_plane_distribution=openquake.hazardlib.pmf.PMF([
+                (1, openquake.hazardlib.geo.NodalPlane(strike=0.0, dip=90.0,
+                                                       rake=0.0))
+            ]),
+            hypocenter_distribution=openquake.hazardlib.pmf.PMF([(1, 10)]),
+            upper_seismogenic_depth=0.0,
+            lower_seismogenic_depth=20.0,
+            magnitude_scaling_relationship=
+            openquake.hazardlib.scalerel.PeerMSR(),
+            rupture_aspect_ratio=2,
+            rupture_mesh_spacing=2.0,
+            location=location
+        )
+
+    def test_same_as_serial(self):
+        from openquake.hazardlib.gsim.sadigh_1997 import SadighEtAl1997
+        from openquake.hazardlib.calc import filters
+
+        sources = [
+            self._make_source('src%d' % i, Point(10 + 0.1 * i, 10),
+                              [0.1, 0.01, 0.001][:i % 3 + 1])
+            for i in range(7)
+        ]
+        sitecol = SiteCollection([Site(Point(10, 10.2), 1, True, 2, 3),
+                                  Site(Point(10.3, 10), 2, True, 2, 3),
+                                  Site(Point(12, 12), 3, True, 2, 3)])
+        imts = {imt.PGA(): [0.01, 0.1, 0.5], imt.SA(0.2, 5): [0.05, 0.3]}
+        gsims = {const.TRT.ACTIVE_SHALLOW_CRUST: SadighEtAl1997()}
+        # filters are closures, they do not need to be picklable
+        kwargs = dict(
+            source_site_filter=filters.source_site_distance_filter(100),
+            rupture_site_filter=filters.rupture_site_distance_filter(100)
+        )
+        expected = hazard_curves_poissonian(sources, sitecol, imts, 1.0,
+                                            gsims, 2, **kwargs)
+        for num_workers in (1, 2):
+            curves = hazard_curves_poissonian_parallel(
+                iter(sources), sitecol, imts, 1.0, gsims, 2,
+                num_workers=num_workers, num_tasks=3,
+                source_weight=lambda src: len(src.mfd.occurrence_rates),
+                **kwargs
+            )
+            self.assertEqual(set(curves), set(imts))
+            for imt_ in imts:
+                numpy.testing.assert_allclose(curves[imt_], expected[imt_],
+                                              rtol=1e-12)
+            self.assertTrue((curves[imt.PGA()][2] == 0).all())
+
+        # sources split by magnitude, weighted by number of ruptures
+        curves = hazard_curves_poissonian_parallel(
+            sources, sitecol, imts, 1.0, gsims, 2, num_workers=2,
+            max_source_ruptures=1, **kwargs
+        )
+        for imt_ in imts:
+            numpy.testing.assert_allclose(curves[imt_], expected[imt_],
+                                          rtol=1e-12)
+
+    def test_source_errors(self):
+        source = self._make_source('src1', Point(10, 10), [0.1])
+        gsims = {}
+        sitecol = SiteCollection([Site(Point(10, 10.2), 1, True, 2, 3)])
+        with self.assertRaises(RuntimeError) as ae:
+            hazard_curves_poissonian_parallel(
+                [source], sitecol, {imt.PGA(): [0.1]}, 1.0, gsims, 2,
+                num_workers=2
+            )
+        self.assertEqual(ae.exception.message,
+                         "An error occurred with source id=src1. "
+                         "Error: Active Shallow Crust")
+
+    def test_split_in_tasks(self):
+        self.assertEqual(_split_in_tasks([5, 1, 1, 3, 2, 4], 3),
+                         [[0, 2], [1, 5], [3, 4]])
+        self.assertEqual(_split_in_tasks([1, 1], 4), [[0], [1]])
+        self.assertEqual(_split_in_tasks([], 4), [])
@@ -15,6 +15,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import unittest
 
+import mock
 import numpy
 
 from openquake.hazardlib.geo import geodetic
@@ -189,6 +190,38 @@ class MinDistanceTest(SpeedupsTestCase):
                    expected_mpoint_indices=[0, 1])
 
 
+    def test_blocks(self):
+        rnd = numpy.random.RandomState(3)
+        mlons, mlats = rnd.uniform(10, 11, 30), rnd.uniform(40, 41, 30)
+        mdepths = rnd.uniform(0, 20, 30)
+        slons, slats = rnd.uniform(8, 13, 17), rnd.uniform(38, 43, 17)
+        sdepths = rnd.uniform(0, 2, 17)
+        dists = geodetic.distance(mlons, mlats, mdepths,
+                                  slons.reshape(-1, 1), slats.reshape(-1, 1),
+                                  sdepths.reshape(-1, 1))
+        geodetic_dists = geodetic.geodetic_distance(
+            mlons, mlats, slons.reshape(-1, 1), slats.reshape(-1, 1)
+        )
+        # one site per block, a few sites per block, all sites in a block
+        for block_size in (1, 100, 1000):
+            with mock.patch.object(geodetic, 'MAX_BLOCK_SIZE', block_size):
+                numpy.testing.assert_equal(
+                    geodetic.min_distance(mlons, mlats, mdepths,
+                                          slons, slats, sdepths,
+                                          indices=True),
+                    dists.argmin(axis=1)
+                )
+                numpy.testing.assert_allclose(
+                    geodetic.min_distance(mlons, mlats, mdepths,
+                                          slons, slats, sdepths),
+                    dists.min(axis=1), rtol=1e-12
+                )
+                numpy.testing.assert_allclose(
+                    geodetic.min_geodetic_distance(mlons, mlats,
+                                                   slons, slats),
+                    geodetic_dists.min(axis=1), rtol=1e-12
+                )
+
 class DistanceToArcTest(unittest.TestCase):
     # values in this test have not been checked by hand
     def test_one_point(self):
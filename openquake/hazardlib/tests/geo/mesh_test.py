@@ -20,7 +20,8 @@ import numpy
 
 from openquake.hazardlib.geo.point import Point
 from openquake.hazardlib.geo.polygon import Polygon
-from openquake.hazardlib.geo.mesh import Mesh, RectangularMesh
+from openquake.hazardlib.geo.mesh import (Mesh, RectangularMesh,
+                                          RectangularMeshDistances)
 from openquake.hazardlib.geo import utils as geo_utils
 
 from openquake.hazardlib.tests import assert_angles_equal
@@ -788,3 +789,43 @@ class RectangularMeshGetMeanWidthTestCase(unittest.TestCase):
                               [4.0, 4.0, 4.0, 4.0]])
         mesh = RectangularMesh(lons, lats, depths)
         self.assertAlmostEqual(mesh.get_mean_width(), 2.0)
+
+
+class RectangularMeshDistancesTestCase(unittest.TestCase):
+    def setUp(self):
+        lons, lats = numpy.meshgrid(numpy.linspace(0, 0.3, 7),
+                                    numpy.linspace(0, 0.1, 4))
+        depths = numpy.zeros_like(lons) + numpy.arange(4).reshape((4, 1))
+        self.mesh = RectangularMesh(lons, lats, depths)
+        self.sites = Mesh(numpy.array([0.1, 0.35, -0.2, 0.15, 0.5]),
+                          numpy.array([0.05, 0.2, 0., -0.1, 0.5]),
+                          numpy.array([0., 0.5, 1., 0., 0.]))
+
+    def _check(self, distances, first_row, first_col, num_rows, num_cols):
+        sub_mesh = self.mesh[first_row:first_row + num_rows,
+                             first_col:first_col + num_cols]
+        numpy.testing.assert_array_equal(
+            distances.get_min_distance(sub_mesh, first_row, first_col),
+            sub_mesh.get_min_distance(distances.target)
+        )
+        numpy.testing.assert_array_equal(
+            distances.get_joyner_boore_distance(sub_mesh, first_row,
+                                                first_col),
+            sub_mesh.get_joyner_boore_distance(distances.target)
+        )
+
+    def test_same_as_sub_mesh(self):
+        distances = RectangularMeshDistances(self.mesh, self.sites)
+        self.assertEqual(distances._grids, {})
+        for num_rows, num_cols in [(2, 2), (3, 5), (4, 7), (2, 2)]:
+            for first_row in xrange(4 - num_rows + 1):
+                for first_col in xrange(7 - num_cols + 1):
+                    self._check(distances, first_row, first_col,
+                                num_rows, num_cols)
+        self.assertEqual(sorted(distances._grids), ['geodetic', 'squares'])
+
+    def test_no_depths(self):
+        sites = Mesh(self.sites.lons, self.sites.lats, None)
+        distances = RectangularMeshDistances(self.mesh, sites)
+        self._check(distances, 0, 1, 2, 2)
+        self._check(distances, 1, 1, 3, 4)
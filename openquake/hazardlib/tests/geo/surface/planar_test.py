@@ -13,6 +13,7 @@
 #
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import pickle
 import unittest
 
 import numpy
@@ -20,7 +21,8 @@ import numpy
 from openquake.hazardlib.geo import Point
 from openquake.hazardlib.geo.mesh import Mesh
 from openquake.hazardlib.geo import utils as geo_utils
-from openquake.hazardlib.geo.surface.planar import PlanarSurface
+from openquake.hazardlib.geo.surface.planar import (PlanarSurface,
+                                                    PlanarSurfaceArray)
 
 from openquake.hazardlib.tests.geo.surface import _planar_test_data as test_data
 from openquake.hazardlib.tests.geo.surface import _utils as utils
@@ -535,3 +537,49 @@ class PlanarSurfaceGetMiddlePointTestCase(unittest.TestCase):
         self.assertTrue(
             Point(0.0, 0.044966, 5.0) == surface.get_middle_point()
         )
+
+
+class PlanarSurfaceArrayTestCase(unittest.TestCase):
+    def setUp(self):
+        corners = [Point(0, 0, 8), Point(-0.1, 0, 8),
+                   Point(-0.1, 0, 9), Point(0, 0, 9)]
+        surfaces = [PlanarSurface(1, 90, 60, *corners),
+                    PlanarSurface(1, 2, 3, *test_data.TEST_7_RUPTURE_2_CORNERS),
+                    PlanarSurface(1, 2, 3, *test_data.TEST_7_RUPTURE_6_CORNERS)]
+        surfaces.append(surfaces[0].translate(Point(0, 0), Point(0.3, -0.2)))
+        surfaces.append(surfaces[1].translate(Point(0, 0), Point(0, 0)))
+        self.surfaces = surfaces
+        lons, lats = numpy.meshgrid(numpy.linspace(-0.5, 0.5, 7),
+                                    numpy.linspace(-0.4, 0.4, 5))
+        self.mesh = Mesh(lons, lats, numpy.linspace(0, 1, 35).reshape(5, 7))
+        self.methods = ['get_min_distance', 'get_joyner_boore_distance',
+                        'get_rx_distance']
+        # distances computed by each surface on its own
+        self.expected = dict(
+            (method, [getattr(surface, method)(self.mesh)
+                      for surface in surfaces])
+            for method in self.methods
+        )
+
+    def test_same_as_surfaces(self):
+        surface_array = PlanarSurfaceArray(self.surfaces)
+        surface_array.MAX_CHUNK_SIZE = 70
+        self.assertEqual(len(surface_array), 5)
+        expected = self.expected
+        for method in self.methods:
+            dists = getattr(surface_array, method)(self.mesh)
+            self.assertEqual(dists.shape, (5, 5, 7))
+            numpy.testing.assert_array_equal(dists, expected[method])
+        numpy.testing.assert_array_equal(
+            surface_array.get_top_edge_depth(),
+            [surface.get_top_edge_depth() for surface in self.surfaces]
+        )
+
+    def test_pickleable(self):
+        surface_array = pickle.loads(pickle.dumps(
+            PlanarSurfaceArray(self.surfaces)))
+        self.assertEqual(len(surface_array), 5)
+        numpy.testing.assert_array_equal(
+            surface_array.get_min_distance(self.mesh),
+            self.expected['get_min_distance']
+        )
@@ -127,6 +127,23 @@ class GetSphericalBoundingBox(unittest.TestCase):
                                  'extent wider than 180 deg')
 
 
+class GetBoundingCircleTestCase(unittest.TestCase):
+    def test_one_point(self):
+        lon, lat, radius = utils.get_bounding_circle([20], [-40])
+        self.assertAlmostEqual(lon, 20)
+        self.assertAlmostEqual(lat, -40)
+        self.assertAlmostEqual(radius, 0)
+
+    def test_international_date_line(self):
+        lon, lat, radius = utils.get_bounding_circle([179, -179, 179, -179],
+                                                     [-1, -1, 1, 1])
+        self.assertAlmostEqual(abs(lon), 180)
+        self.assertAlmostEqual(lat, 0)
+        self.assertAlmostEqual(radius, geo.geodetic.geodetic_distance(
+            180, 0, 179, 1
+        ))
+
+
 class GetOrthographicProjectionTestCase(unittest.TestCase):
     def test_projection(self):
         # values verified against pyproj's implementation
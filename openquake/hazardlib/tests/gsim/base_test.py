@@ -15,17 +15,26 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import unittest
 import collections
+import pickle
 
+import mock
 import numpy
 
 from openquake.hazardlib import const
+from openquake.hazardlib.gsim import base
 from openquake.hazardlib.gsim.base import (GMPE, IPE, SitesContext,
                                            RuptureContext, DistancesContext)
-from openquake.hazardlib.geo.mesh import Mesh
+from openquake.hazardlib.geo.mesh import Mesh, RectangularMeshDistances
 from openquake.hazardlib.geo.point import Point
-from openquake.hazardlib.imt import PGA, PGV
+from openquake.hazardlib.geo.surface.planar import (PlanarSurface,
+                                                    PlanarSurfaceArray)
+from openquake.hazardlib.imt import PGA, PGV, PGD, SA
 from openquake.hazardlib.site import Site, SiteCollection
+from openquake.hazardlib.mfd import TruncatedGRMFD
 from openquake.hazardlib.source.rupture import Rupture
+from openquake.hazardlib.tom import PoissonTOM
+from openquake.hazardlib.tests.source.simple_fault_test import \
+    make_simple_fault_source
 
 
 class _FakeGSIMTestCase(unittest.TestCase):
@@ -294,6 +303,221 @@ class DisaggregatePoETestCase(_FakeGSIMTestCase):
                  [0.03467403, 0.23896796, 0.45271601, 0.23896796, 0.03467403]]
         aaae(poes, epoes)
 
+    def test_multi(self):
+        self.gsim_class.DEFINED_FOR_STANDARD_DEVIATION_TYPES.add(
+            const.StdDev.TOTAL
+        )
+
+        def get_mean_and_stddevs(sites, rup, dists, imt, stddev_types):
+            mean = numpy.array([3, 4.5, 5, 8])
+            stddev = numpy.array([1, 2, 0.5, 0.9])
+            get_mean_and_stddevs.call_count += 1
+            return mean, [stddev]
+
+        get_mean_and_stddevs.call_count = 0
+        self.gsim.get_mean_and_stddevs = get_mean_and_stddevs
+        aaae = numpy.testing.assert_array_almost_equal
+
+        imls = [1.2, 5.3, 9.7, 20]
+        poes = self.gsim.disaggregate_poe_multi(
+            SitesContext(), RuptureContext(), DistancesContext(),
+            self.DEFAULT_IMT(), imls, truncation_level=3, n_epsilons=5
+        )
+        self.assertEqual(get_mean_and_stddevs.call_count, 1)
+        self.assertIsInstance(poes, numpy.ndarray)
+        self.assertEqual(poes.shape, (4, 4, 5))
+        for l, iml in enumerate(imls):
+            aaae(poes[:, l], self._disaggregate_poe(
+                imt=self.DEFAULT_IMT(), iml=iml, n_epsilons=5,
+                truncation_level=3
+            ))
+
+        # one row of imls per site
+        site_imls = [imls, imls[::-1], imls, imls[::-1]]
+        site_poes = self.gsim.disaggregate_poe_multi(
+            SitesContext(), RuptureContext(), DistancesContext(),
+            self.DEFAULT_IMT(), site_imls, truncation_level=3, n_epsilons=5
+        )
+        aaae(site_poes[::2], poes[::2])
+        aaae(site_poes[1::2], poes[1::2, ::-1])
+
+    def test_get_poes_and_disaggregate(self):
+        self.gsim_class.DEFINED_FOR_STANDARD_DEVIATION_TYPES.add(
+            const.StdDev.TOTAL
+        )
+
+        def get_mean_and_stddevs(sites, rup, dists, imt, stddev_types):
+            mean = numpy.array([3, 4.5, 5, 8])
+            stddev = numpy.array([1, 2, 0.5, 0.9])
+            get_mean_and_stddevs.call_count += 1
+            return mean, [stddev]
+
+        get_mean_and_stddevs.call_count = 0
+        self.gsim.get_mean_and_stddevs = get_mean_and_stddevs
+        aaae = numpy.testing.assert_array_almost_equal
+
+        contexts = (SitesContext(), RuptureContext(), DistancesContext(),
+                    self.DEFAULT_IMT())
+        imls = [1.2, 5.3, 9.7, 20]
+        disagg_imls = [4.1, 7.5]
+        poes, disagg_poes = self.gsim.get_poes_and_disaggregate(
+            *contexts, imls=imls, disagg_imls=disagg_imls,
+            truncation_level=3, n_epsilons=5
+        )
+        self.assertEqual(get_mean_and_stddevs.call_count, 1)
+        aaae(poes, self.gsim.get_poes(*contexts, imls=imls,
+                                      truncation_level=3))
+        aaae(disagg_poes, self.gsim.disaggregate_poe_multi(
+            *contexts, imls=disagg_imls, truncation_level=3, n_epsilons=5
+        ))
+        self.assertRaises(ValueError, self.gsim.get_poes_and_disaggregate,
+                          *contexts, imls=imls, disagg_imls=disagg_imls,
+                          truncation_level=0, n_epsilons=5)
+
+
+class GetPoEsMultiTestCase(_FakeGSIMTestCase):
+    def setUp(self):
+        super(GetPoEsMultiTestCase, self).setUp()
+        self.gsim_class.DEFINED_FOR_STANDARD_DEVIATION_TYPES.add(
+            const.StdDev.TOTAL
+        )
+        self.gsim.DEFINED_FOR_INTENSITY_MEASURE_TYPES.add(SA)
+        self.calls = []
+
+        def get_mean_and_stddevs(sites, rup, dists, imt, stddev_types):
+            self.calls.append(imt)
+            if imt == PGA():
+                return numpy.log([0.2]), [numpy.array([0.6])]
+            return numpy.log([0.4 * imt.period]), [numpy.array([0.7])]
+
+        self.gsim.get_mean_and_stddevs = get_mean_and_stddevs
+        self.sctx = SitesContext()
+        self.sctx.vs30 = numpy.array([400.])
+        self.rctx = RuptureContext()
+        self.rctx.mag = 5.
+        self.dctx = DistancesContext()
+        self.imtls = {PGA(): numpy.log([0.05, 0.1, 0.3, 0.6]),
+                      SA(0.2, 5): numpy.log([0.02, 0.1, 0.5]),
+                      SA(1.0, 5): numpy.log([0.1, 0.3])}
+
+    def test_same_as_get_poes_cav(self):
+        poes = self.gsim.get_poes_multi(self.sctx, self.rctx, self.dctx,
+                                        self.imtls, 3, cav_min=0.16)
+        self.assertEqual(sorted(poes), sorted(self.imtls))
+        # mean and stddev of each IMT are computed once, PGA included
+        self.assertEqual(len(self.calls), 3)
+        for imt, imls in self.imtls.iteritems():
+            numpy.testing.assert_array_almost_equal(
+                poes[imt], self.gsim.get_poes_cav(
+                    self.sctx, self.rctx, self.dctx, imt, imls, 3,
+                    cav_min=0.16
+                )
+            )
+        # CAV filtering makes PoEs lower
+        for imt, imls in self.imtls.iteritems():
+            sa_poes = self.gsim.get_poes(self.sctx, self.rctx, self.dctx,
+                                         imt, imls, 3)
+            self.assertTrue((poes[imt] <= sa_poes + 1e-12).all())
+            self.assertTrue((poes[imt] < sa_poes).any())
+
+    def test_pga_computed_once(self):
+        del self.imtls[PGA()]
+        self.gsim.get_poes_multi(self.sctx, self.rctx, self.dctx,
+                                 self.imtls, 3, cav_min=0.16)
+        self.assertEqual(self.calls.count(PGA()), 1)
+        self.assertEqual(len(self.calls), 3)
+
+    def test_no_cav_filtering(self):
+        for truncation_level, kwargs in [(3, dict(cav_min=0)),
+                                         (3, dict(cav_max_mag=4.5)),
+                                         (None, {}), (0, {})]:
+            poes = self.gsim.get_poes_multi(
+                self.sctx, self.rctx, self.dctx, self.imtls,
+                truncation_level, **kwargs
+            )
+            for imt, imls in self.imtls.iteritems():
+                numpy.testing.assert_array_almost_equal(
+                    poes[imt], self.gsim.get_poes(
+                        self.sctx, self.rctx, self.dctx, imt, imls,
+                        truncation_level
+                    )
+                )
+
+    def test_several_sites(self):
+        def get_mean_and_stddevs(sites, rup, dists, imt, stddev_types):
+            factor = 1 if imt == PGA() else imt.period
+            return (numpy.log(sites.vs30 / 2000. * factor),
+                    [sites.vs30 / 1000.])
+
+        self.gsim.get_mean_and_stddevs = get_mean_and_stddevs
+        vs30 = numpy.array([200., 400., 760., 1000., 1500.])
+        self.sctx.vs30 = vs30
+        self.addCleanup(setattr, base, 'MAX_CAV_CHUNK_SIZE',
+                        base.MAX_CAV_CHUNK_SIZE)
+        for chunk_size in [1000000, 300]:
+            base.MAX_CAV_CHUNK_SIZE = chunk_size
+            poes = self.gsim.get_poes_multi(self.sctx, self.rctx, self.dctx,
+                                            self.imtls, 3, cav_min=0.16)
+            for i in xrange(len(vs30)):
+                self.sctx.vs30 = vs30[i:i + 1]
+                site_poes = self.gsim.get_poes_multi(
+                    self.sctx, self.rctx, self.dctx, self.imtls, 3,
+                    cav_min=0.16
+                )
+                self.sctx.vs30 = vs30
+                for imt in self.imtls:
+                    numpy.testing.assert_array_almost_equal(
+                        poes[imt][i:i + 1], site_poes[imt]
+                    )
+
+    def test_cav_tabulated(self):
+        poes = self.gsim.get_poes_multi(self.sctx, self.rctx, self.dctx,
+                                        self.imtls, 3, cav_min=0.16)
+        tabulated_poes = self.gsim.get_poes_multi(
+            self.sctx, self.rctx, self.dctx, self.imtls, 3, cav_min=0.16,
+            cav_tabulated=True
+        )
+        for imt in self.imtls:
+            self.assertLess(numpy.abs(poes[imt] - tabulated_poes[imt]).max(),
+                            0.003)
+
+    def test_wrong_imt(self):
+        err = 'imt PGV is not supported by FakeGSIM'
+        self._assert_value_error(
+            self.gsim.get_poes_multi, err, sctx=self.sctx, rctx=self.rctx,
+            dctx=self.dctx, imtls={PGV(): [1.]}, truncation_level=3
+        )
+
+
+class GetMeanAndStddevsMultiTestCase(_FakeGSIMTestCase):
+    def setUp(self):
+        super(GetMeanAndStddevsMultiTestCase, self).setUp()
+
+        def get_mean_and_stddevs(sites, rup, dists, imt, stddev_types):
+            mean = numpy.array([1., 2.]) * imt.period
+            return mean, [mean + i for i in xrange(len(stddev_types))]
+
+        self.gsim.get_mean_and_stddevs = get_mean_and_stddevs
+
+    def test_loop_over_imts(self):
+        means, stddevs = self.gsim.get_mean_and_stddevs_multi(
+            SitesContext(), RuptureContext(), DistancesContext(),
+            [SA(0.5, 5), SA(2., 5), SA(1., 5)],
+            [const.StdDev.TOTAL, const.StdDev.INTER_EVENT]
+        )
+        numpy.testing.assert_equal(means, [[0.5, 1.], [2., 4.], [1., 2.]])
+        self.assertEqual(len(stddevs), 2)
+        numpy.testing.assert_equal(stddevs[0], means)
+        numpy.testing.assert_equal(stddevs[1], means + 1)
+
+    def test_no_stddevs(self):
+        means, stddevs = self.gsim.get_mean_and_stddevs_multi(
+            SitesContext(), RuptureContext(), DistancesContext(),
+            [SA(0.5, 5)], []
+        )
+        self.assertEqual(means.shape, (1, 2))
+        self.assertEqual(stddevs, [])
+
 
 class ToIMTUnitsToDistributionTestCase(unittest.TestCase):
     def test_gmpe(self):
@@ -444,6 +668,7 @@ class MakeContextsTestCase(_FakeGSIMTestCase):
         self.assertTrue((sctx.vs30measured == [False, True]).all())
         self.assertTrue((sctx.z1pt0 == [12.1, 112.1]).all())
         self.assertTrue((sctx.z2pt5 == [15.1, 115.1]).all())
+        self.assertIs(sctx.site_collection, sites)
         self.assertTrue((dctx.rjb == [6, 7]).all())
         self.assertTrue((dctx.rx == [4, 5]).all())
         self.assertTrue((dctx.rrup == [10, 11]).all())
@@ -475,3 +700,244 @@ class MakeContextsTestCase(_FakeGSIMTestCase):
         self.assertEqual(self.fake_surface.call_counts,
                          {'get_rx_distance': 1,
                           'get_joyner_boore_distance': 1})
+
+
+class IterContextsTestCase(_FakeGSIMTestCase):
+    def setUp(self):
+        super(IterContextsTestCase, self).setUp()
+        self.gsim_class.REQUIRES_SITES_PARAMETERS = set(['vs30'])
+        self.gsim_class.REQUIRES_RUPTURE_PARAMETERS = set(['mag'])
+        self.gsim_class.REQUIRES_DISTANCES = set(['rrup', 'rjb', 'rx',
+                                                  'repi'])
+        self.sites = SiteCollection([
+            Site(Point(lon, lat), 760, True, 10, 20)
+            for lon, lat in [(0, 0), (0.2, 0.1), (-0.3, 0.4), (0.1, -0.2)]
+        ])
+        surface = PlanarSurface(1, 90, 60, Point(0, 0, 8), Point(-0.1, 0, 8),
+                                Point(-0.1, 0, 9), Point(0, 0, 9))
+        self.ruptures = [
+            Rupture(5, 0, const.TRT.VOLCANIC, Point(lon, lat, 8.5),
+                    surface.translate(Point(0, 0), Point(lon, lat)), None)
+            for lon, lat in [(0, 0), (0.1, 0.3), (-0.2, 0.1), (0.3, 0),
+                             (0.05, -0.1)]
+        ]
+
+    def _check(self, ruptures_sites):
+        contexts = list(self.gsim.iter_contexts(ruptures_sites))
+        self.assertEqual(len(contexts), len(ruptures_sites))
+        for (rupture, sites), ctxs in zip(ruptures_sites, contexts):
+            self.assertIs(ctxs[0], rupture)
+            self.assertIs(ctxs[1], sites)
+            sctx, rctx, dctx = self.gsim.make_contexts(sites, rupture)
+            self.assertIs(ctxs[2].vs30, sctx.vs30)
+            self.assertEqual(ctxs[3].mag, rctx.mag)
+            for param in self.gsim.REQUIRES_DISTANCES:
+                numpy.testing.assert_array_equal(getattr(ctxs[4], param),
+                                                 getattr(dctx, param))
+
+    def test_same_as_make_contexts(self):
+        filtered = self.sites.filter(numpy.array([1, 0, 1, 1], bool))
+        ruptures_sites = [(self.ruptures[0], self.sites),
+                          (self.ruptures[1], filtered),
+                          (self.ruptures[2], self.sites),
+                          (self.ruptures[3], self.sites),
+                          (self.ruptures[4], filtered)]
+        with mock.patch.object(base, 'PlanarSurfaceArray',
+                               side_effect=PlanarSurfaceArray) as array:
+            self._check(ruptures_sites)
+        # surfaces of the same batch and site collection together
+        self.assertEqual([len(args[0]) for args, _ in array.call_args_list],
+                         [3, 2])
+
+    def test_batches(self):
+        ruptures_sites = [(rupture, self.sites) for rupture in self.ruptures]
+        with mock.patch.object(base, 'PlanarSurfaceArray',
+                               side_effect=PlanarSurfaceArray) as array:
+            with mock.patch.object(base, 'MAX_CONTEXTS_BATCH_SIZE', 8):
+                self._check(ruptures_sites)
+        # the last rupture is alone in its batch
+        self.assertEqual([len(args[0]) for args, _ in array.call_args_list],
+                         [2, 2])
+
+    def _get_simple_fault_ruptures(self):
+        mfd = TruncatedGRMFD(a_val=0.5, b_val=1.0, min_mag=3.0, max_mag=4.0,
+                             bin_width=1.0)
+        source = make_simple_fault_source(mfd=mfd, aspect_ratio=1.0)
+        return list(source.iter_ruptures(PoissonTOM(50)))
+
+    def test_simple_fault_ruptures(self):
+        ruptures = self._get_simple_fault_ruptures()
+        filtered = self.sites.filter(numpy.array([1, 0, 1, 1], bool))
+        # the last rupture is the only one with its site collection
+        ruptures_sites = [(rupture, self.sites) for rupture in ruptures]
+        ruptures_sites[-1] = (ruptures[-1], filtered)
+        with mock.patch.object(base, 'RectangularMeshDistances',
+                               side_effect=RectangularMeshDistances) as grid:
+            grid.MAX_GRID_SIZE = RectangularMeshDistances.MAX_GRID_SIZE
+            with mock.patch.object(base, 'MAX_CONTEXTS_BATCH_SIZE', 8):
+                self._check(ruptures_sites)
+        # computed once for all the batches
+        self.assertEqual(grid.call_count, 1)
+        [(args, _)] = grid.call_args_list
+        self.assertIs(args[0], ruptures[0].surface.fault_mesh)
+        self.assertIs(args[1], self.sites.mesh)
+
+    def test_simple_fault_grid_too_large(self):
+        ruptures = self._get_simple_fault_ruptures()
+        ruptures_sites = [(rupture, self.sites) for rupture in ruptures]
+        fault_size = ruptures[0].surface.fault_mesh.lons.size
+        with mock.patch.object(base, 'RectangularMeshDistances') as grid:
+            grid.MAX_GRID_SIZE = fault_size * len(self.sites) - 1
+            self._check(ruptures_sites)
+        self.assertFalse(grid.called)
+
+    def test_no_surface_distances(self):
+        self.gsim_class.REQUIRES_DISTANCES = set(['repi'])
+        ruptures_sites = [(rupture, self.sites) for rupture in self.ruptures]
+        with mock.patch.object(base, 'PlanarSurfaceArray') as array:
+            self._check(ruptures_sites)
+        self.assertFalse(array.called)
+
+
+class GetSiteGroupsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.sites = SiteCollection([
+            Site(Point(0, 0), vs30, False, 10, 20, kappa)
+            for vs30, kappa in [(800, 0.02), (2000, 0.01), (760, 0.021),
+                                (800, 0.02), (2100, 0.01), (2000, 0.03)]
+        ])
+        self.calls = []
+
+    def get_key(self, vs30, kappa):
+        self.calls.append((vs30, kappa))
+        return vs30 > 1000
+
+    def _check(self, groups):
+        self.assertEqual([key for key, _ in groups], [False, True])
+        numpy.testing.assert_array_equal(groups[0][1], [0, 2, 3])
+        numpy.testing.assert_array_equal(groups[1][1], [1, 4, 5])
+
+    def test_without_site_collection(self):
+        sctx = SitesContext()
+        sctx.vs30 = self.sites.vs30
+        sctx.kappa = self.sites.kappa
+        self._check(base.get_site_groups(sctx, ('vs30', 'kappa'),
+                                         self.get_key))
+        # get_key is called once for each combination of values
+        self.assertEqual(sorted(self.calls),
+                         [(760, 0.021), (800, 0.02), (2000, 0.01),
+                          (2000, 0.03), (2100, 0.01)])
+
+    def test_cached_in_site_collection(self):
+        class FakeGSIM(GMPE):
+            get_mean_and_stddevs = None
+            DEFINED_FOR_TECTONIC_REGION_TYPE = None
+            DEFINED_FOR_INTENSITY_MEASURE_TYPES = set()
+            DEFINED_FOR_INTENSITY_MEASURE_COMPONENT = None
+            DEFINED_FOR_STANDARD_DEVIATION_TYPES = set()
+            REQUIRES_SITES_PARAMETERS = set(['vs30', 'kappa'])
+            REQUIRES_RUPTURE_PARAMETERS = set()
+            REQUIRES_DISTANCES = set()
+
+        gsim = FakeGSIM()
+        sctx, _, _ = gsim.make_contexts(self.sites, rupture=None)
+        groups = base.get_site_groups(sctx, ['vs30', 'kappa'], self.get_key)
+        self._check(groups)
+        sctx, _, _ = gsim.make_contexts(self.sites, rupture=None)
+        self._check(base.get_site_groups(sctx, ['vs30', 'kappa'],
+                                         self.get_key))
+        self.assertEqual(len(self.calls), 5)
+        self.assertFalse(groups[0][1].flags.writeable)
+        # different parameters give different groups
+        [(key, indices)] = base.get_site_groups(sctx, ['kappa'],
+                                                lambda kappa: kappa < 1)
+        self.assertTrue(key)
+        numpy.testing.assert_array_equal(indices, range(6))
+        # filtered collections use the keys of the whole collection,
+        # groups without sites are left out
+        sites = self.sites.filter(numpy.array([1, 0, 1, 1, 0, 0], bool))
+        sctx, _, _ = gsim.make_contexts(sites, rupture=None)
+        [(key, indices)] = base.get_site_groups(sctx, ['vs30', 'kappa'],
+                                                self.get_key)
+        self.assertFalse(key)
+        numpy.testing.assert_array_equal(indices, [0, 1, 2])
+        sites = self.sites.filter(numpy.array([0, 1, 1, 0, 0, 1], bool))
+        sctx, _, _ = gsim.make_contexts(sites, rupture=None)
+        groups = base.get_site_groups(sctx, ['vs30', 'kappa'], self.get_key)
+        self.assertEqual([key for key, _ in groups], [False, True])
+        numpy.testing.assert_array_equal(groups[0][1], [1])
+        numpy.testing.assert_array_equal(groups[1][1], [0, 2])
+        self.assertEqual(len(self.calls), 5)
+
+    def test_nearest_site_conditions(self):
+        class FakeGSIM(base.NearestSiteConditionsMixin):
+            DEFINED_FOR_VS30 = numpy.array([800, 2000])
+            DEFINED_FOR_KAPPA = {800: numpy.array([0.02, 0.03]),
+                                 2000: numpy.array([0.01, 0.02])}
+
+        sctx = SitesContext()
+        sctx.vs30 = self.sites.vs30
+        sctx.kappa = self.sites.kappa
+        groups = FakeGSIM().get_site_conditions_groups(sctx)
+        self.assertEqual([key for key, _ in groups],
+                         [(800, 0.02), (2000, 0.01), (2000, 0.02)])
+        numpy.testing.assert_array_equal(groups[0][1], [0, 2, 3])
+        numpy.testing.assert_array_equal(groups[1][1], [1, 4])
+        numpy.testing.assert_array_equal(groups[2][1], [5])
+
+    def test_no_sites(self):
+        sctx = SitesContext()
+        sctx.vs30 = sctx.kappa = numpy.array([])
+        self.assertEqual(base.get_site_groups(sctx, ('vs30', 'kappa'),
+                                              self.get_key), [])
+
+    def test_pickled_filtered_collection(self):
+        sites = self.sites.filter(numpy.array([0, 1, 0, 1, 1, 0], bool))
+        sites = pickle.loads(pickle.dumps(sites))
+        sites = sites.filter(numpy.array([0, 1, 1], bool))
+        numpy.testing.assert_array_equal(sites.indices, [3, 4])
+        sctx = SitesContext()
+        sctx.vs30 = sites.vs30
+        sctx.kappa = sites.kappa
+        sctx.site_collection = sites
+        groups = base.get_site_groups(sctx, ['vs30', 'kappa'], self.get_key)
+        self.assertEqual([key for key, _ in groups], [False, True])
+        numpy.testing.assert_array_equal(groups[0][1], [0])
+        numpy.testing.assert_array_equal(groups[1][1], [1])
+
+
+class CoeffsTableGetCoeffsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.table = base.CoeffsTable(sa_damping=5, table="""
+            imt   a    b
+            pga   1    2
+            pgv   3    4
+            0.1  10   20
+            0.2   5    6
+            1.0   1    2
+        """)
+
+    def test_same_as_getitem(self):
+        imts = [SA(0.15, 5), PGV(), SA(1.0, 5), SA(0.1, 5), SA(0.7, 5),
+                PGA(), SA(0.2, 5)]
+        coeffs = self.table.get_coeffs(imts)
+        self.assertEqual(sorted(coeffs), ['a', 'b'])
+        for i, imt in enumerate(imts):
+            self.assertEqual(coeffs['a'][i], self.table[imt]['a'])
+            self.assertEqual(coeffs['b'][i], self.table[imt]['b'])
+        self.assertIs(self.table.get_coeffs(imts), coeffs)
+        self.assertRaises(ValueError, coeffs['a'].__setitem__, 0, 1.)
+
+    def test_not_available(self):
+        self.assertRaises(KeyError, self.table.get_coeffs,
+                          [PGA(), SA(0.5, 5), SA(2.0, 5)])
+        self.assertRaises(KeyError, self.table.get_coeffs, [SA(0.5, 10)])
+        self.assertRaises(KeyError, self.table.get_coeffs, [PGD()])
+
+    def test_columns(self):
+        imts = [SA(0.15, 5), PGV(), PGA()]
+        columns = self.table.get_coeffs_columns(imts)
+        self.assertEqual(columns['a'].shape, (3, 1))
+        numpy.testing.assert_equal(columns['b'][:, 0],
+                                   self.table.get_coeffs(imts)['b'])
+        self.assertIs(self.table.get_coeffs_columns(imts), columns)
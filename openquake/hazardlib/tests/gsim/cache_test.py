@@ -0,0 +1,177 @@
+# The Hazard Library
+# Copyright (C) 2012 GEM Foundation
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import unittest
+
+import numpy
+
+from openquake.hazardlib import const
+from openquake.hazardlib.gsim.base import (SitesContext, RuptureContext,
+                                           DistancesContext)
+from openquake.hazardlib.gsim.cache import CachedGSIM
+from openquake.hazardlib.gsim.boore_atkinson_2008 import BooreAtkinson2008
+from openquake.hazardlib.gsim.campbell_2003 import Campbell2003
+from openquake.hazardlib.imt import PGA, SA
+
+
+class CachedGSIMTestCase(unittest.TestCase):
+    def setUp(self):
+        self.gsim = BooreAtkinson2008()
+        self.cached = CachedGSIM(self.gsim, maxsize=2)
+        self.sctx = SitesContext()
+        self.sctx.vs30 = numpy.array([300., 600., 800.])
+        self.rctx = RuptureContext()
+        self.rctx.mag = 6.
+        self.rctx.rake = 90.
+        self.dctx = DistancesContext()
+        self.dctx.rjb = numpy.array([5., 20., 100.])
+
+    def _copy_contexts(self, mag=6., rjb=(5., 20., 100.)):
+        sctx = SitesContext()
+        sctx.vs30 = self.sctx.vs30.copy()
+        rctx = RuptureContext()
+        rctx.mag = mag
+        rctx.rake = 90.
+        # not required by the GSIM, does not make a difference
+        rctx.hypo_depth = 15.
+        dctx = DistancesContext()
+        dctx.rjb = numpy.array(rjb)
+        return sctx, rctx, dctx
+
+    def test_attributes(self):
+        self.assertEqual(self.cached.REQUIRES_DISTANCES, set(['rjb']))
+        self.assertEqual(self.cached.DEFINED_FOR_INTENSITY_MEASURE_TYPES,
+                         self.gsim.DEFINED_FOR_INTENSITY_MEASURE_TYPES)
+        self.assertEqual(self.cached.DEFINED_FOR_TECTONIC_REGION_TYPE,
+                         const.TRT.ACTIVE_SHALLOW_CRUST)
+
+    def test_get_mean_and_stddevs(self):
+        stddev_types = [const.StdDev.TOTAL]
+        mean, [stddev] = self.cached.get_mean_and_stddevs(
+            self.sctx, self.rctx, self.dctx, PGA(), stddev_types
+        )
+        self.assertEqual((self.cached.hits, self.cached.misses), (0, 1))
+        mean2, [stddev2] = self.cached.get_mean_and_stddevs(
+            *self._copy_contexts() + (PGA(), stddev_types)
+        )
+        self.assertEqual((self.cached.hits, self.cached.misses), (1, 1))
+        self.assertIs(mean2, mean)
+        self.assertFalse(mean.flags.writeable)
+        emean, [estddev] = self.gsim.get_mean_and_stddevs(
+            self.sctx, self.rctx, self.dctx, PGA(), stddev_types
+        )
+        numpy.testing.assert_equal(mean, emean)
+        numpy.testing.assert_equal(stddev, estddev)
+
+        # different imt, stddev types, distances and magnitude all miss
+        self.cached.get_mean_and_stddevs(
+            self.sctx, self.rctx, self.dctx, SA(0.1, 5), stddev_types)
+        self.cached.get_mean_and_stddevs(
+            self.sctx, self.rctx, self.dctx, PGA(), [const.StdDev.INTER_EVENT])
+        self.cached.get_mean_and_stddevs(
+            *self._copy_contexts(rjb=(5., 20., 101.)) + (PGA(), stddev_types)
+        )
+        self.cached.get_mean_and_stddevs(
+            *self._copy_contexts(mag=6.5) + (PGA(), stddev_types)
+        )
+        self.assertEqual((self.cached.hits, self.cached.misses), (1, 5))
+
+    def test_get_mean_and_stddevs_multi(self):
+        imts = [PGA(), SA(0.1, 5)]
+        stddev_types = [const.StdDev.TOTAL]
+        means, [stddevs] = self.cached.get_mean_and_stddevs_multi(
+            self.sctx, self.rctx, self.dctx, imts, stddev_types)
+        emeans, [estddevs] = self.gsim.get_mean_and_stddevs_multi(
+            self.sctx, self.rctx, self.dctx, imts, stddev_types)
+        numpy.testing.assert_equal(means, emeans)
+        numpy.testing.assert_equal(stddevs, estddevs)
+        means2, _ = self.cached.get_mean_and_stddevs_multi(
+            *self._copy_contexts() + (imts, stddev_types))
+        self.assertIs(means2, means)
+        # the order of the IMTs makes a difference
+        self.cached.get_mean_and_stddevs_multi(
+            *self._copy_contexts() + (imts[::-1], stddev_types))
+        self.assertEqual((self.cached.hits, self.cached.misses), (1, 2))
+
+    def test_lru(self):
+        contexts = [self._copy_contexts(mag=mag) for mag in (5., 6., 7.)]
+        for sctx, rctx, dctx in contexts:
+            self.cached.get_poes(sctx, rctx, dctx, PGA(), [0.1, 0.2], 3)
+        self.assertEqual((self.cached.hits, self.cached.misses), (0, 3))
+        # the first one has been discarded
+        self.cached.get_poes(*contexts[0] + (PGA(), [0.1, 0.2], 3))
+        self.assertEqual((self.cached.hits, self.cached.misses), (0, 4))
+        # the third one is still there, and becomes the most recently used
+        self.cached.get_poes(*contexts[2] + (PGA(), [0.1, 0.2], 3))
+        self.cached.get_poes(*contexts[1] + (PGA(), [0.1, 0.2], 3))
+        self.cached.get_poes(*contexts[2] + (PGA(), [0.1, 0.2], 3))
+        self.assertEqual((self.cached.hits, self.cached.misses), (2, 5))
+
+        self.cached.clear_cache()
+        self.assertEqual((self.cached.hits, self.cached.misses), (0, 0))
+        self.cached.get_poes(*contexts[2] + (PGA(), [0.1, 0.2], 3))
+        self.assertEqual((self.cached.hits, self.cached.misses), (0, 1))
+
+    def test_get_poes_multi(self):
+        imtls = {PGA(): [0.1, 0.2, 0.3], SA(0.1, 5): [0.1, 0.4]}
+        poes = self.cached.get_poes_multi(self.sctx, self.rctx, self.dctx,
+                                          imtls, 3, cav_min=0)
+        expected = self.gsim.get_poes_multi(self.sctx, self.rctx, self.dctx,
+                                            imtls, 3, cav_min=0)
+        for imt in imtls:
+            numpy.testing.assert_equal(poes[imt], expected[imt])
+        # modifying the returned dictionary does not affect the cache
+        del poes[PGA()]
+        poes = self.cached.get_poes_multi(*self._copy_contexts() + (imtls, 3),
+                                          cav_min=0)
+        self.assertEqual(sorted(poes), sorted(imtls))
+        self.assertEqual((self.cached.hits, self.cached.misses), (1, 1))
+        # different truncation level
+        self.cached.get_poes_multi(self.sctx, self.rctx, self.dctx, imtls, 2,
+                                   cav_min=0)
+        self.assertEqual((self.cached.hits, self.cached.misses), (1, 2))
+
+    def test_get_poes_multi_cav_vs30(self):
+        # the GSIM does not require vs30, but CAV filtering does
+        gsim = Campbell2003()
+        cached = CachedGSIM(gsim)
+        imtls = {PGA(): [0.1, 0.2]}
+        rctx = RuptureContext()
+        rctx.mag = 5.
+        dctx = DistancesContext()
+        dctx.rrup = numpy.array([5., 10., 20.])
+        for vs30 in (200., 2000.):
+            sctx = SitesContext()
+            sctx.vs30 = numpy.array([vs30] * 3)
+            poes = cached.get_poes_multi(sctx, rctx, dctx, imtls, 3)
+            expected = gsim.get_poes_multi(sctx, rctx, dctx, imtls, 3)
+            numpy.testing.assert_equal(poes[PGA()], expected[PGA()])
+        self.assertEqual((cached.hits, cached.misses), (0, 2))
+        # without CAV filtering vs30 makes no difference
+        for vs30 in (200., 2000.):
+            sctx = SitesContext()
+            sctx.vs30 = numpy.array([vs30] * 3)
+            cached.get_poes_multi(sctx, rctx, dctx, imtls, 3, cav_min=0)
+        self.assertEqual((cached.hits, cached.misses), (1, 3))
+
+    def test_disaggregate_poe_uses_cache(self):
+        self.cached.get_mean_and_stddevs(self.sctx, self.rctx, self.dctx,
+                                         PGA(), [const.StdDev.TOTAL])
+        self.cached.disaggregate_poe(self.sctx, self.rctx, self.dctx, PGA(),
+                                     0.1, 3, 3)
+        self.assertEqual((self.cached.hits, self.cached.misses), (1, 1))
+
+    def test_wrong_size(self):
+        self.assertRaises(ValueError, CachedGSIM, self.gsim, maxsize=0)
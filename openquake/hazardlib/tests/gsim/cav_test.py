@@ -0,0 +1,85 @@
+# The Hazard Library
+# Copyright (C) 2012 GEM Foundation
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import unittest
+
+import numpy
+
+from openquake.hazardlib.gsim import cav
+
+
+class CalcCAVExceedanceProbTestCase(unittest.TestCase):
+    def test_several_sites(self):
+        ln_pga = numpy.log([0.01, 0.1, 0.5, 1.5])
+        vs30 = numpy.array([760., 300., 1200., 500.])
+        prob = cav.calc_cav_exceedance_prob(ln_pga, 5., vs30)
+        for i in xrange(len(ln_pga)):
+            [site_prob] = cav.calc_cav_exceedance_prob(ln_pga[i:i + 1], 5.,
+                                                       vs30[i:i + 1])
+            self.assertEqual(prob[i], site_prob)
+        self.assertEqual(prob[0], 0)
+        self.assertTrue((numpy.diff(prob) > 0).all())
+
+    def test_no_cav_min(self):
+        prob = cav.calc_cav_exceedance_prob(numpy.log([0.01, 0.1]), 5.,
+                                            [760., 760.], cav_min=0)
+        numpy.testing.assert_array_equal(prob, [1, 1])
+
+
+class CAVExceedanceTableTestCase(unittest.TestCase):
+    def setUp(self):
+        self.table = cav.get_cav_exceedance_table(0.16)
+
+    def test_cached(self):
+        self.assertIs(cav.get_cav_exceedance_table(0.16), self.table)
+        self.assertIsNot(cav.get_cav_exceedance_table(0.2), self.table)
+
+    def test_error(self):
+        rnd = numpy.random.RandomState(42)
+        ln_pga = rnd.uniform(numpy.log(0.025), numpy.log(4.), 100000)
+        mags = rnd.uniform(3., 8., 100000)
+        vs30 = numpy.exp(rnd.uniform(numpy.log(100.), numpy.log(3000.),
+                                     100000))
+        exact = cav.calc_cav_exceedance_prob(ln_pga, mags, vs30)
+        prob = self.table(ln_pga, mags, vs30)
+        self.assertLess(numpy.abs(prob - exact).max(), 0.003)
+
+    def test_grid_points(self):
+        ln_pga = self.table.ln_pga_grid[::20]
+        vs30 = numpy.exp(self.table.ln_vs30_grid[7]) * numpy.ones_like(ln_pga)
+        mag = self.table.mag_grid[12]
+        numpy.testing.assert_array_almost_equal(
+            self.table(ln_pga, mag, vs30),
+            cav.calc_cav_exceedance_prob(ln_pga, mag, vs30)
+        )
+
+    def test_outside_table(self):
+        ln_pga = numpy.log([0.02, 0.1, 5., 0.3, 0.3])
+        mags = numpy.array([5., 5., 5., 8.5, 5.])
+        vs30 = numpy.array([760., 760., 760., 760., 4000.])
+        prob = self.table(ln_pga, mags, vs30)
+        self.assertEqual(prob[0], 0)
+        for i in [2, 3, 4]:
+            [exact] = cav.calc_cav_exceedance_prob(ln_pga[i:i + 1], mags[i],
+                                                   vs30[i:i + 1])
+            self.assertEqual(prob[i], exact)
+
+    def test_tabulated(self):
+        ln_pga = numpy.log([0.01, 0.1, 0.5])
+        vs30 = numpy.array([760., 300., 1200.])
+        numpy.testing.assert_array_equal(
+            cav.calc_cav_exceedance_prob(ln_pga, 5.5, vs30, tabulated=True),
+            self.table(ln_pga, 5.5, vs30)
+        )
@@ -0,0 +1,73 @@
+# The Hazard Library
+# Copyright (C) 2012 GEM Foundation
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import unittest
+
+import numpy
+
+from openquake.hazardlib.gsim.htt import find_nearest_indices
+from openquake.hazardlib.gsim.toro_2002HTT import ToroEtAl2002HTT
+from openquake.hazardlib.gsim.campbell_2003HTT import Campbell2003HTT
+from openquake.hazardlib.imt import PGA, SA
+
+
+class FindNearestIndicesTestCase(unittest.TestCase):
+    def test_same_as_argmin(self):
+        array = numpy.array([0.01, 0.015, 0.02, 0.025, 0.0275, 0.03, 0.04])
+        values = numpy.concatenate([numpy.linspace(0, 0.05, 101), array,
+                                    [0.0125, 0.035]])
+        expected = numpy.abs(numpy.subtract.outer(array, values)).argmin(0)
+        numpy.testing.assert_equal(find_nearest_indices(array, values),
+                                   expected)
+        self.assertEqual(find_nearest_indices(array, 0.0126), 1)
+
+
+class CorrectionFactorsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.gsim = ToroEtAl2002HTT()
+
+    def test_nearest(self):
+        kappas = numpy.array([0.01, 0.012, 0.0124, 0.013, 0.0276, 0.1])
+        coeffs = self.gsim.KAPPA_COEFFS[SA(1., 5)]
+        expected = [coeffs[name] for name in ('0.01', '0.01', '0.01',
+                                              '0.015', '0.0275', '0.05')]
+        numpy.testing.assert_equal(self.gsim.get_kappa_cf(kappas, SA(1., 5)),
+                                   expected)
+        vs30s = numpy.array([100., 649., 651., 2600., 3000.])
+        coeffs = self.gsim.VS30_COEFFS[PGA()]
+        expected = [coeffs[name] for name in ('600', '600', '700', '2600',
+                                              '2600')]
+        numpy.testing.assert_equal(self.gsim.get_vs30_cf(vs30s, PGA()),
+                                   expected)
+
+    def test_interpolation(self):
+        gsim = Campbell2003HTT()
+        gsim.interpolate_cf = True
+        coeffs = gsim.KAPPA_COEFFS[PGA()]
+        cfs = gsim.get_kappa_cf(numpy.array([0.005, 0.015, 0.0125, 0.06]),
+                                PGA())
+        numpy.testing.assert_allclose(
+            cfs, [coeffs['0.01'], coeffs['0.015'],
+                  numpy.sqrt(coeffs['0.01'] * coeffs['0.015']),
+                  coeffs['0.05']]
+        )
+        # not shared with other instances
+        self.assertFalse(Campbell2003HTT().interpolate_cf)
+
+    def test_factors_cached(self):
+        factors = self.gsim._KAPPA_CF.get_factors(PGA())
+        self.assertIs(self.gsim._KAPPA_CF.get_factors(PGA()), factors)
+        self.assertFalse(factors.flags.writeable)
+        self.assertEqual(len(factors), len(self.gsim.DEFINED_FOR_KAPPA))
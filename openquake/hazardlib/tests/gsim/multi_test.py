@@ -0,0 +1,120 @@
+# The Hazard Library
+# Copyright (C) 2012 GEM Foundation
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Check that vectorized implementations of ``get_mean_and_stddevs_multi()``
+give the same results as ``get_mean_and_stddevs()`` called for each IMT.
+"""
+import unittest
+
+import numpy
+
+from openquake.hazardlib import const
+from openquake.hazardlib.imt import PGA, PGV, SA
+from openquake.hazardlib.gsim.akkar_2014 import (
+    AkkarEtAlRjb2014, AkkarEtAlRepi2014)
+from openquake.hazardlib.gsim.bindi_2014 import (
+    BindiEtAl2014Rjb, BindiEtAl2014RhypEC8)
+from openquake.hazardlib.gsim.campbell_bozorgnia_2014 import (
+    CampbellBozorgnia2014, CampbellBozorgnia2014JapanSite)
+from openquake.hazardlib.gsim.zhao_2016 import (
+    ZhaoEtAl2016Asc, ZhaoEtAl2016SInterSiteSigma, ZhaoEtAl2016SSlab)
+from openquake.hazardlib.gsim.abrahamson_2015 import (
+    AbrahamsonEtAl2015SInter, AbrahamsonEtAl2015SSlab)
+
+
+class _Context(object):
+    # ``rvolc`` and ``backarc``, required by some of the GSIMs,
+    # are not attributes of the contexts classes
+    pass
+
+
+class GetMeanAndStddevsMultiTestCase(unittest.TestCase):
+    # vs30 values of all the site classes, distances before and after
+    # all the distance thresholds
+    VS30 = [100., 170., 250., 359., 450., 760., 800., 900., 1100., 1500.]
+    DISTANCES = [0., 5., 25., 35., 60., 90., 110., 150., 250., 400.]
+
+    def _get_contexts(self, gsim, mag, rake, ztor):
+        sctx, rctx, dctx = _Context(), _Context(), _Context()
+        sctx.vs30 = numpy.array(self.VS30)
+        sctx.z2pt5 = numpy.linspace(0.3, 5., len(self.VS30))
+        sctx.backarc = numpy.arange(len(self.VS30)) % 2 == 0
+        rctx.mag = mag
+        rctx.rake = rake
+        rctx.dip = 45.
+        rctx.ztor = ztor
+        rctx.width = 15.
+        rctx.hypo_depth = ztor + 5.
+        dctx.rjb = numpy.array(self.DISTANCES)
+        dctx.rrup = numpy.sqrt(dctx.rjb ** 2 + ztor ** 2 + 1.)
+        dctx.rx = dctx.rjb - 20.
+        dctx.rhypo = numpy.sqrt(dctx.rjb ** 2 + rctx.hypo_depth ** 2)
+        dctx.repi = dctx.rjb + 1.
+        dctx.rvolc = numpy.where(dctx.rjb > 100., 20., 0.)
+        return sctx, rctx, dctx
+
+    def _check(self, gsim, imts):
+        stddev_types = sorted(gsim.DEFINED_FOR_STANDARD_DEVIATION_TYPES)
+        for mag in (4.3, 5., 6., 6.9, 7.5, 8.2):
+            for rake, ztor in ((0., 2.), (90., 10.), (-90., 40.)):
+                contexts = self._get_contexts(gsim, mag, rake, ztor)
+                means, stddevs = gsim.get_mean_and_stddevs_multi(
+                    *contexts + (imts, stddev_types))
+                self.assertEqual(means.shape, (len(imts), len(self.VS30)))
+                self.assertEqual(len(stddevs), len(stddev_types))
+                for i, imt in enumerate(imts):
+                    mean, imt_stddevs = gsim.get_mean_and_stddevs(
+                        *contexts + (imt, stddev_types))
+                    numpy.testing.assert_allclose(means[i], mean,
+                                                  rtol=1e-12)
+                    for stddev, imt_stddev in zip(stddevs, imt_stddevs):
+                        numpy.testing.assert_allclose(stddev[i], imt_stddev,
+                                                      rtol=1e-12)
+
+    def test_akkar_2014(self):
+        imts = [PGA(), SA(0.05, 5), SA(0.3, 5), SA(2., 5), PGV()]
+        self._check(AkkarEtAlRjb2014(), imts)
+        self._check(AkkarEtAlRepi2014(), imts)
+
+    def test_bindi_2014(self):
+        imts = [SA(0.1, 5), PGA(), PGV(), SA(1.5, 5)]
+        self._check(BindiEtAl2014Rjb(), imts)
+        self._check(BindiEtAl2014RhypEC8(), imts)
+
+    def test_campbell_bozorgnia_2014(self):
+        imts = [PGA(), SA(0.02, 5), SA(0.2, 5), SA(0.25, 5), SA(0.5, 5),
+                SA(3., 5), PGV()]
+        self._check(CampbellBozorgnia2014(), imts)
+        self._check(CampbellBozorgnia2014JapanSite(), imts)
+
+    def test_zhao_2016(self):
+        imts = [PGA(), SA(0.1, 5), SA(0.75, 5), SA(3., 5)]
+        self._check(ZhaoEtAl2016Asc(), imts)
+        self._check(ZhaoEtAl2016SInterSiteSigma(), imts)
+        self._check(ZhaoEtAl2016SSlab(), imts)
+
+    def test_abrahamson_2015(self):
+        imts = [PGA(), SA(0.2, 5), SA(1., 5), SA(4., 5)]
+        self._check(AbrahamsonEtAl2015SInter(), imts)
+        self._check(AbrahamsonEtAl2015SSlab(), imts)
+
+    def test_single_imt(self):
+        gsim = AkkarEtAlRjb2014()
+        contexts = self._get_contexts(gsim, 6., 0., 2.)
+        means, [stddev] = gsim.get_mean_and_stddevs_multi(
+            *contexts + ([SA(0.2, 5)], [const.StdDev.TOTAL]))
+        self.assertEqual(means.shape, (1, len(self.VS30)))
+        self.assertEqual(stddev.shape, (1, len(self.VS30)))
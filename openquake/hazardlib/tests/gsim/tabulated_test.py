@@ -0,0 +1,123 @@
+# The Hazard Library
+# Copyright (C) 2012 GEM Foundation
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import unittest
+
+import numpy
+
+from openquake.hazardlib import const
+from openquake.hazardlib.gsim.base import (SitesContext, RuptureContext,
+                                           DistancesContext)
+from openquake.hazardlib.gsim.tabulated import TabulatedGSIM
+from openquake.hazardlib.gsim.toro_2002 import ToroEtAl2002
+from openquake.hazardlib.gsim.boore_atkinson_2008 import BooreAtkinson2008
+from openquake.hazardlib.gsim.abrahamson_silva_2008 import (
+    AbrahamsonSilva2008)
+from openquake.hazardlib.gsim.atkinson_boore_2006 import AtkinsonBoore2006
+from openquake.hazardlib.imt import PGA, PGV, SA
+
+
+def _get_contexts(mag, rake, vs30, rjb):
+    sctx = SitesContext()
+    sctx.vs30 = numpy.array(vs30, dtype=float)
+    rctx = RuptureContext()
+    rctx.mag = mag
+    rctx.rake = rake
+    dctx = DistancesContext()
+    dctx.rjb = numpy.array(rjb, dtype=float)
+    return sctx, rctx, dctx
+
+
+class TabulatedGSIMTestCase(unittest.TestCase):
+    MAGS = numpy.arange(5., 7.51, 0.1)
+    DISTANCES = numpy.logspace(0, 2.5, 51)
+
+    def setUp(self):
+        self.gsim = BooreAtkinson2008()
+        self.stddev_types = [const.StdDev.TOTAL, const.StdDev.INTRA_EVENT]
+        self.tabulated = TabulatedGSIM(
+            self.gsim, [PGA(), SA(1., 5)], self.MAGS, self.DISTANCES,
+            rakes=[0., 90.], vs30s=[300., 760.]
+        )
+
+    def _assert_close(self, contexts, imt, atol):
+        mean, stddevs = self.tabulated.get_mean_and_stddevs(
+            *contexts + (imt, self.stddev_types)
+        )
+        emean, estddevs = self.gsim.get_mean_and_stddevs(
+            *contexts + (imt, self.stddev_types)
+        )
+        self.assertEqual(len(stddevs), 2)
+        numpy.testing.assert_allclose(mean, emean, rtol=0, atol=atol)
+        for stddev, estddev in zip(stddevs, estddevs):
+            numpy.testing.assert_allclose(stddev, estddev, rtol=0, atol=atol)
+
+    def test_grid_nodes(self):
+        contexts = _get_contexts(self.MAGS[3], 90., [760., 300., 760.],
+                                 self.DISTANCES[[0, 10, -1]])
+        self._assert_close(contexts, PGA(), 1e-12)
+
+    def test_interpolation(self):
+        for imt in (PGA(), SA(1., 5)):
+            self.assertTrue(0 < self.tabulated.max_errors[imt] < 0.05)
+        contexts = _get_contexts(6.33, 0., [300.] * 4 + [760.] * 4,
+                                 [1.3, 7.7, 45.1, 299.] * 2)
+        self._assert_close(contexts, SA(1., 5),
+                           self.tabulated.max_errors[SA(1., 5)])
+
+    def test_out_of_tables(self):
+        # site class, distance and magnitude out of the tables, imt
+        # and rake not tabulated are computed exactly
+        contexts = _get_contexts(6.0, 90., [300., 500., 760., 760.],
+                                 [10., 10., 0.5, 400.])
+        self._assert_close(contexts, PGA(), 1e-12)
+        mean = self.tabulated.get_mean_and_stddevs(
+            *contexts + (PGA(), []))[0]
+        self.assertTrue(mean[0] != mean[1])
+        self._assert_close(_get_contexts(8., 90., [300.], [10.]), PGA(), 0)
+        self._assert_close(_get_contexts(6.2, 90., [300.], [10.]), PGV(), 0)
+        self._assert_close(_get_contexts(6.2, -90., [300.], [10.]), PGA(), 0)
+
+    def test_only_mag_and_distance(self):
+        gsim = ToroEtAl2002()
+        tabulated = TabulatedGSIM(gsim, [PGA()], self.MAGS, self.DISTANCES)
+        self.assertEqual(tabulated.tables[PGA()].shape, (1, 1, 26, 2, 51))
+        sctx, rctx, dctx = _get_contexts(5.55, None, [], [3., 33., 333.])
+        mean, [stddev] = tabulated.get_mean_and_stddevs(
+            sctx, rctx, dctx, PGA(), [const.StdDev.TOTAL])
+        emean, [estddev] = gsim.get_mean_and_stddevs(
+            sctx, rctx, dctx, PGA(), [const.StdDev.TOTAL])
+        atol = tabulated.max_errors[PGA()]
+        numpy.testing.assert_allclose(mean, emean, rtol=0, atol=atol)
+        numpy.testing.assert_allclose(stddev, estddev, rtol=0, atol=atol)
+        self.assertEqual(tabulated.REQUIRES_RUPTURE_PARAMETERS,
+                         set(['mag']))
+
+    def test_wrong_gsims(self):
+        self.assertRaises(ValueError, TabulatedGSIM, AbrahamsonSilva2008(),
+                          [PGA()], self.MAGS, self.DISTANCES)
+        self.assertRaises(ValueError, TabulatedGSIM, AtkinsonBoore2006(),
+                          [PGA()], self.MAGS, self.DISTANCES, rakes=[0.])
+        self.assertRaises(ValueError, TabulatedGSIM, self.gsim,
+                          [PGA()], self.MAGS, self.DISTANCES, rakes=[0.])
+
+    def test_wrong_grids(self):
+        gsim = ToroEtAl2002()
+        self.assertRaises(ValueError, TabulatedGSIM, gsim, [PGA()],
+                          [5.], self.DISTANCES)
+        self.assertRaises(ValueError, TabulatedGSIM, gsim, [PGA()],
+                          [6., 5.], self.DISTANCES)
+        self.assertRaises(ValueError, TabulatedGSIM, gsim, [PGA()],
+                          self.MAGS, [0., 10.])
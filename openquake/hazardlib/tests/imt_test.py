@@ -71,6 +71,9 @@ class BaseIMTTestCase(unittest.TestCase):
     def test_pickeable(self):
         imt = imt_module.SA(0.2)
         self.assertEqual(cPickle.loads(cPickle.dumps(imt)), imt)
+        self.assertEqual(cPickle.loads(cPickle.dumps(imt, 2)), imt)
+        imt = imt_module.PGA()
+        self.assertEqual(cPickle.loads(cPickle.dumps(imt, 2)), imt)
 
     def test_from_string(self):
         sa = imt_module.from_string('SA(0.1)')
@@ -150,6 +150,79 @@ class SiteCollectionFilterTestCase(unittest.TestCase):
         filtered2 = filtered.filter(numpy.array([True, False, True]))
         arreq(filtered2.indices, [0, 3])
 
+    def test_filter_by_distance(self):
+        col = SiteCollection(self.SITES)
+        # distances from (0.5, 1.5) are about 2302, 1644, 78.6 and 78.6 km
+        filtered = col.filter_by_distance(0.5, 1.5, 100)
+        numpy.testing.assert_array_equal(filtered.indices, [2, 3])
+        self.assertIsNone(filtered._spatial_index)
+        filtered2 = filtered.filter_by_distance(0, 2, 10)
+        numpy.testing.assert_array_equal(filtered2.indices, [2])
+        self.assertIs(col.filter_by_distance(0.5, 1.5, 2400), col)
+        self.assertIs(col.filter_by_distance(0.5, 1.5, 30000), col)
+        self.assertIsNone(col.filter_by_distance(-170, -60, 100))
+
+        # the index is built once
+        index = col.get_spatial_index()
+        col.filter_by_distance(0.5, 1.5, 1000)
+        self.assertIs(col.get_spatial_index(), index)
+
+        # sites at exactly the distance are included
+        [[dist]] = Point(1, 1).distance_to_mesh(
+            SiteCollection(self.SITES[2:3]).mesh
+        ).reshape((1, 1))
+        filtered = col.filter_by_distance(1, 1, dist)
+        numpy.testing.assert_array_equal(filtered.indices, [2, 3])
+
+    def test_pickle_without_spatial_index(self):
+        col = SiteCollection(self.SITES)
+        col.get_spatial_index()
+        col2 = pickle.loads(pickle.dumps(col))
+        self.assertIsNone(col2._spatial_index)
+        numpy.testing.assert_array_equal(
+            col2.filter_by_distance(0.5, 1.5, 100).indices, [2, 3]
+        )
+
+    def test_get_site_keys(self):
+        col = SiteCollection(self.SITES)
+        calls = []
+
+        def func(sites):
+            calls.append(len(sites))
+            return ['a', 'b'], numpy.arange(len(sites)) % 2
+
+        keys, indices = col.get_site_keys('keys', func)
+        self.assertEqual(keys, ['a', 'b'])
+        numpy.testing.assert_array_equal(indices, [0, 1, 0, 1])
+        self.assertIs(col.get_site_keys('keys', func)[1], indices)
+        self.assertEqual(calls, [4])
+        col.get_site_keys('other keys', func)
+        self.assertEqual(calls, [4, 4])
+        # shared with filtered collections, computed on the whole one
+        filtered = col.filter(numpy.array([False, True, True, True]))
+        filtered = filtered.filter(numpy.array([True, False, True]))
+        keys, indices = filtered.get_site_keys('keys', func)
+        numpy.testing.assert_array_equal(indices, [1, 1])
+        self.assertEqual(calls, [4, 4])
+        filtered.get_site_keys('new keys', func)
+        self.assertEqual(calls, [4, 4, 4])
+        # keys are not pickled, the whole collection is
+        col2 = pickle.loads(pickle.dumps(col))
+        self.assertEqual(col2._site_keys, {})
+        filtered2 = pickle.loads(pickle.dumps(filtered))
+        self.assertEqual(filtered2._root._site_keys, {})
+        keys, indices = filtered2.get_site_keys('keys', func)
+        numpy.testing.assert_array_equal(indices, [1, 1])
+        self.assertEqual(calls, [4, 4, 4, 4])
+        # and filtering an unpickled collection again keeps the indices
+        # pointing into it
+        filtered3 = filtered2.filter(numpy.array([False, True]))
+        numpy.testing.assert_array_equal(filtered3.indices, [3])
+        self.assertIs(filtered3._root, filtered2._root)
+        keys, indices = filtered3.get_site_keys('keys', func)
+        numpy.testing.assert_array_equal(indices, [1])
+        self.assertEqual(calls, [4, 4, 4, 4])
+
     def test_expand_2d(self):
         col = SiteCollection(self.SITES)
         col.indices = numpy.array([1, 3, 5, 6])
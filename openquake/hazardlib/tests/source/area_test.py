@@ -66,6 +66,7 @@ class AreaSourceIterRupturesTestCase(unittest.TestCase):
                                        rupture_mesh_spacing=5)
         ruptures = list(source.iter_ruptures(PoissonTOM(50)))
         self.assertEqual(len(ruptures), 9 * 2)
+        self.assertEqual(source.count_ruptures(), 9 * 2)
         # resulting 3x3 mesh has points in these coordinates:
         lons = [-1.4, -0.8, -0.2]
         lats = [-0.6, -1.2, -1.8]
@@ -98,6 +99,20 @@ class AreaSourceIterRupturesTestCase(unittest.TestCase):
             self.assertNotEqual(rupture.occurrence_rate, 3)
             self.assertEqual(rupture.occurrence_rate, 3.0 / 4.0)
 
+    def test_own_hypocenters(self):
+        polygon = Polygon([Point(-2, -2), Point(0, -2),
+                           Point(0, 0), Point(-2, 0)])
+        hypocenter_distribution = PMF([(0.5, 2.0), (0.5, 4.0)])
+        source = self.make_area_source(
+            polygon, discretization=66.7,
+            hypocenter_distribution=hypocenter_distribution
+        )
+        ruptures = list(source.iter_ruptures(PoissonTOM(50)))
+        self.assertEqual(len(ruptures), 9 * 4)
+        # each hypocenter keeps its own depth
+        self.assertEqual([rupture.hypocenter.depth for rupture in ruptures],
+                         [2.0, 4.0] * 18)
+
 
 class AreaSourceRupEncPolyTestCase(unittest.TestCase):
     def test_no_dilation(self):
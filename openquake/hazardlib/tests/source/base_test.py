@@ -143,3 +143,25 @@ class SeismicSourceFilterSitesByRuptureTestCase(_BaseSeismicSourceTestCase):
         )
         numpy.testing.assert_array_equal(filtered.indices,
                                          [0, 1, 2, 3, 4, 5, 6, 7, 8])
+
+
+class SeismicSourceCountRupturesTestCase(_BaseSeismicSourceTestCase):
+    def setUp(self):
+        super(SeismicSourceCountRupturesTestCase, self).setUp()
+        self.source.iter_ruptures = lambda tom: iter([None] * 4)
+        def get_rup_encl_poly(dilation=0):
+            return self.POLYGON.dilate(dilation)
+        self.source.get_rupture_enclosing_polygon = get_rup_encl_poly
+
+    def test_count_ruptures(self):
+        self.assertEqual(self.source.count_ruptures(), 4)
+
+    def test_estimate_weight(self):
+        self.assertEqual(self.source.estimate_weight(self.sitecol), 4 * 12)
+        self.assertEqual(self.source.estimate_weight(
+            self.sitecol, integration_distance=50
+        ), 4 * 11)
+        col = SiteCollection([Site(Point(10, 10), 1, True, 2, 3)])
+        self.assertEqual(self.source.estimate_weight(
+            col, integration_distance=50
+        ), 0)
@@ -82,6 +82,7 @@ class CharacteristicFaultSourceIterRuptures(_BaseFaultSourceTestCase):
         ruptures = [rup for rup in source.iter_ruptures(self.TOM)]
 
         self.assertTrue(len(ruptures) == 3)
+        self.assertEqual(source.count_ruptures(), 3)
 
         self.assertTrue(ruptures[0].mag == 5.0)
         self.assertTrue(ruptures[1].mag == 5.1)
@@ -22,6 +22,8 @@ from openquake.hazardlib.source.complex_fault import (ComplexFaultSource,
 from openquake.hazardlib.geo import Line, Point
 from openquake.hazardlib.geo.surface.simple_fault import SimpleFaultSurface
 from openquake.hazardlib.scalerel.peer import PeerMSR
+from openquake.hazardlib.mfd import TruncatedGRMFD
+from openquake.hazardlib.tom import PoissonTOM
 
 from openquake.hazardlib.tests.source import simple_fault_test
 from openquake.hazardlib.tests.source import _complex_fault_test_data as test_data
@@ -240,6 +242,43 @@ class ComplexFaultSourceIterRupturesTestCase(
         self._test_ruptures(test_data.TEST4_RUPTURES, source)
 
 
+class ComplexFaultSourceCacheTestCase(ComplexFaultSourceIterRupturesTestCase):
+    def _make_test4_source(self):
+        mfd = TruncatedGRMFD(a_val=0.5, b_val=1.0, min_mag=3.95,
+                             max_mag=4.05, bin_width=0.1)
+        return self._make_source(mfd, test_data.TEST4_RUPTURE_ASPECT_RATIO,
+                                 test_data.TEST4_MESH_SPACING,
+                                 test_data.TEST4_EDGES)
+
+    def test_geometry_and_slices_cached(self):
+        source = self._make_test4_source()
+        geometry = source._get_whole_fault_geometry()
+        slices = source._get_rupture_slices()
+        self.assertIs(source._get_whole_fault_geometry(), geometry)
+        self.assertIs(source._get_rupture_slices(), slices)
+        self.assertEqual(source.count_ruptures(), 6)
+        self._test_ruptures(test_data.TEST4_RUPTURES, source)
+
+    def test_cache_invalidated(self):
+        source = self._make_test4_source()
+        geometry = source._get_whole_fault_geometry()
+        slices = source._get_rupture_slices()
+        source.mfd.modify('increment_max_mag', {'value': 0.1})
+        self.assertIs(source._get_whole_fault_geometry(), geometry)
+        self.assertIsNot(source._get_rupture_slices(), slices)
+        self.assertEqual(source.count_ruptures(),
+                         len(list(source.iter_ruptures(PoissonTOM(50)))))
+        source.rupture_mesh_spacing = 1.0
+        self.assertIsNot(source._get_whole_fault_geometry(), geometry)
+
+    def test_cache_not_compared_nor_pickled(self):
+        source = self._make_test4_source()
+        list(source.iter_ruptures(PoissonTOM(50)))
+        self.assertEqual(source, self._make_test4_source())
+        assert_pickleable(source)
+        self.assertNotIn('_cache', source.__getstate__())
+
+
 class ComplexFaultSourceRupEnclPolyTestCase(
         simple_fault_test.SimpleFaultRupEncPolyTestCase):
     # test that complex fault sources of simple geometry behave
@@ -330,3 +369,29 @@ class FloatRupturesTestCase(unittest.TestCase):
         self.assertEqual(bl, (slice(1, 4), slice(0, 2)))
         self.assertEqual(bm, (slice(1, 4), slice(1, 3)))
         self.assertEqual(br, (slice(1, 4), slice(2, 4)))
+
+    def test_zero_length_cells(self):
+        cell_area = numpy.array([[1, 1, 0, 1],
+                                 [1, 1, 0, 1]], dtype=float)
+        cell_length = numpy.array([[1, 1, 0, 1],
+                                   [1, 1, 0, 1]], dtype=float)
+        slices = _float_ruptures(2.0, 2.0, cell_area, cell_length)
+        self.assertEqual(slices, [(slice(0, 2), slice(0, 3)),
+                                  (slice(0, 2), slice(1, 5)),
+                                  (slice(1, 3), slice(0, 3)),
+                                  (slice(1, 3), slice(1, 5))])
+
+    def test_uniform_cells_exact_fit(self):
+        # sums of cells are accumulated from each column, a rupture
+        # fitting exactly the last cells of the row is not lost to
+        # rounding errors
+        cells = 0.3 * numpy.ones((1, 3))
+        slices = _float_ruptures(0.3, 0.3, cells, cells)
+        self.assertEqual(slices, [(slice(0, 2), slice(0, 2)),
+                                  (slice(0, 2), slice(1, 3)),
+                                  (slice(0, 2), slice(2, 4))])
+        cells = 0.1 * numpy.ones((5, 9))
+        slices = _float_ruptures(3.15, 0.85, cells, cells)
+        self.assertEqual(slices, [(slice(0, 4), slice(0, 10)),
+                                  (slice(1, 5), slice(0, 10)),
+                                  (slice(2, 6), slice(0, 10))])
@@ -311,6 +311,7 @@ class PointSourceIterRupturesTestCase(unittest.TestCase):
         )
         actual_ruptures = list(point_source.iter_ruptures(tom))
         self.assertEqual(len(actual_ruptures), 8)
+        self.assertEqual(point_source.count_ruptures(), 8)
         expected_ruptures = {
             (mag1, nodalplane1.rake, hypocenter1): (
                 # probabilistic rupture's occurrence rate
@@ -30,31 +30,35 @@ from openquake.hazardlib.tests.geo.surface._utils import assert_mesh_is
 from openquake.hazardlib.tests.source import _simple_fault_test_data as test_data
 
 
+def make_simple_fault_source(mfd, aspect_ratio, fault_trace=None, dip=45,
+                             trt=TRT.ACTIVE_SHALLOW_CRUST, rake=0):
+    source_id = name = 'test-source'
+    rupture_mesh_spacing = 1
+    upper_seismogenic_depth = 0
+    lower_seismogenic_depth = 4.2426406871192848
+    magnitude_scaling_relationship = PeerMSR()
+    rupture_aspect_ratio = aspect_ratio
+    if fault_trace is None:
+        fault_trace = Line([Point(0.0, 0.0),
+                            Point(0.0, 0.0359728811758),
+                            Point(0.0190775080917, 0.0550503815181),
+                            Point(0.03974514139, 0.0723925718855)])
+
+    return SimpleFaultSource(
+        source_id, name, trt, mfd, rupture_mesh_spacing,
+        magnitude_scaling_relationship, rupture_aspect_ratio,
+        upper_seismogenic_depth, lower_seismogenic_depth,
+        fault_trace, dip, rake
+    )
+
+
 class _BaseFaultSourceTestCase(unittest.TestCase):
     TRT = TRT.ACTIVE_SHALLOW_CRUST
     RAKE = 0
 
     def _make_source(self, mfd, aspect_ratio, fault_trace=None, dip=45):
-        source_id = name = 'test-source'
-        trt = self.TRT
-        rake = self.RAKE
-        rupture_mesh_spacing = 1
-        upper_seismogenic_depth = 0
-        lower_seismogenic_depth = 4.2426406871192848
-        magnitude_scaling_relationship = PeerMSR()
-        rupture_aspect_ratio = aspect_ratio
-        if fault_trace is None:
-            fault_trace = Line([Point(0.0, 0.0),
-                                Point(0.0, 0.0359728811758),
-                                Point(0.0190775080917, 0.0550503815181),
-                                Point(0.03974514139, 0.0723925718855)])
-
-        sfs = SimpleFaultSource(
-            source_id, name, trt, mfd, rupture_mesh_spacing,
-            magnitude_scaling_relationship, rupture_aspect_ratio,
-            upper_seismogenic_depth, lower_seismogenic_depth,
-            fault_trace, dip, rake
-        )
+        sfs = make_simple_fault_source(mfd, aspect_ratio, fault_trace, dip,
+                                       self.TRT, self.RAKE)
         assert_pickleable(sfs)
         return sfs
 
@@ -67,6 +71,7 @@ class _BaseFaultSourceTestCase(unittest.TestCase):
             self.assertIs(rupture.tectonic_region_type, self.TRT)
             self.assertEqual(rupture.rake, self.RAKE)
         self.assertEqual(len(expected_ruptures), len(ruptures))
+        self.assertEqual(source.count_ruptures(), len(ruptures))
         for i in xrange(len(expected_ruptures)):
             expected_rupture, rupture = expected_ruptures[i], ruptures[i]
             self.assertAlmostEqual(rupture.mag, expected_rupture['mag'])
@@ -144,6 +149,29 @@ class SimpleFaultIterRupturesTestCase(_BaseFaultSourceTestCase):
         self.assertEqual(len(list(fault.iter_ruptures(tom))), 1)
 
 
+class SimpleFaultRupturesFaultMeshTestCase(_BaseFaultSourceTestCase):
+    def test_sub_meshes_of_fault_mesh(self):
+        mfd = TruncatedGRMFD(a_val=0.5, b_val=1.0, min_mag=3.0, max_mag=4.0,
+                             bin_width=1.0)
+        source = self._make_source(mfd=mfd, aspect_ratio=1.0)
+        ruptures = list(source.iter_ruptures(PoissonTOM(time_span=50)))
+        fault_mesh = source._get_whole_fault_mesh()
+        for rupture in ruptures:
+            surface = rupture.surface
+            self.assertIs(surface.fault_mesh, fault_mesh)
+            num_rows, num_cols = surface.mesh.shape
+            sub_mesh = fault_mesh[
+                surface.first_row:surface.first_row + num_rows,
+                surface.first_col:surface.first_col + num_cols
+            ]
+            numpy.testing.assert_array_equal(surface.mesh.lons,
+                                             sub_mesh.lons)
+            numpy.testing.assert_array_equal(surface.mesh.lats,
+                                             sub_mesh.lats)
+            numpy.testing.assert_array_equal(surface.mesh.depths,
+                                             sub_mesh.depths)
+
+
 class SimpleFaultParametersChecksTestCase(_BaseFaultSourceTestCase):
     def test_mesh_spacing_too_small(self):
         mfd = TruncatedGRMFD(a_val=0.5, b_val=1.0, min_mag=0.5, max_mag=1.5,
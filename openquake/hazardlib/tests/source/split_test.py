@@ -0,0 +1,94 @@
+# The Hazard Library
+# Copyright (C) 2012 GEM Foundation
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import unittest
+
+from openquake.hazardlib.source import PointSource
+from openquake.hazardlib.source.split import split_source
+from openquake.hazardlib.mfd import TruncatedGRMFD, EvenlyDiscretizedMFD
+from openquake.hazardlib.geo import Point, Polygon
+from openquake.hazardlib.tom import PoissonTOM
+
+from openquake.hazardlib.tests.source.area_test import make_area_source
+from openquake.hazardlib.tests.source.simple_fault_test import (
+    make_simple_fault_source)
+
+
+class SplitSourceTestCase(unittest.TestCase):
+    def assert_same_ruptures(self, source, sub_sources):
+        tom = PoissonTOM(1)
+        ruptures = sorted(
+            (rup.mag, rup.hypocenter.longitude, rup.hypocenter.latitude,
+             rup.occurrence_rate) for rup in source.iter_ruptures(tom)
+        )
+        sub_ruptures = sorted(
+            (rup.mag, rup.hypocenter.longitude, rup.hypocenter.latitude,
+             rup.occurrence_rate)
+            for sub_source in sub_sources
+            for rup in sub_source.iter_ruptures(tom)
+        )
+        self.assertEqual(len(ruptures), len(sub_ruptures))
+        for rup, sub_rup in zip(ruptures, sub_ruptures):
+            for value, sub_value in zip(rup, sub_rup):
+                self.assertAlmostEqual(value, sub_value, places=6)
+
+    def test_light_source(self):
+        source = make_area_source(Polygon([Point(-2, -2), Point(0, -2),
+                                           Point(0, 0), Point(-2, 0)]),
+                                  discretization=66.7)
+        self.assertEqual(list(split_source(source, 18)), [source])
+
+    def test_area_source(self):
+        source = make_area_source(Polygon([Point(-2, -2), Point(0, -2),
+                                           Point(0, 0), Point(-2, 0)]),
+                                  discretization=66.7)
+        sub_sources = list(split_source(source, 2))
+        self.assertEqual(len(sub_sources), 9)
+        for i, sub_source in enumerate(sub_sources):
+            self.assertIsInstance(sub_source, PointSource)
+            self.assertEqual(sub_source.source_id, 'source_id:%s' % i)
+            self.assertEqual(sub_source.count_ruptures(), 2)
+        self.assert_same_ruptures(source, sub_sources)
+
+        # point sources are further split by magnitude
+        sub_sources = list(split_source(source, 1))
+        self.assertEqual(len(sub_sources), 18)
+        self.assertEqual(sub_sources[1].source_id, 'source_id:0:1')
+        self.assert_same_ruptures(source, sub_sources)
+
+    def test_fault_source(self):
+        mfd = TruncatedGRMFD(a_val=0.5, b_val=1.0, min_mag=4.0, max_mag=6.0,
+                             bin_width=0.5)
+        source = make_simple_fault_source(mfd=mfd, aspect_ratio=1.0)
+        sub_sources = list(split_source(source, 60))
+        self.assertEqual([sub_source.source_id for sub_source in sub_sources],
+                         ['test-source:0', 'test-source:1', 'test-source:2'])
+        self.assertEqual([sub_source.count_ruptures()
+                          for sub_source in sub_sources], [60, 45, 23])
+        self.assertEqual(sum(sub_source.count_ruptures()
+                             for sub_source in sub_sources), source.count_ruptures())
+        self.assert_same_ruptures(source, sub_sources)
+        # the source itself is not modified
+        self.assertIs(source.mfd, mfd)
+
+    def test_gaps_in_mfd(self):
+        mfd = EvenlyDiscretizedMFD(min_mag=4.0, bin_width=0.5,
+                                   occurrence_rates=[1, 0, 2, 3])
+        source = make_simple_fault_source(mfd=mfd, aspect_ratio=1.0)
+        sub_sources = list(split_source(source, 95))
+        self.assertEqual(len(sub_sources), 2)
+        self.assertEqual(sub_sources[0].mfd.get_annual_occurrence_rates(),
+                         [(4.0, 1), (5.0, 2)])
+        self.assert_same_ruptures(source, sub_sources)
@@ -61,3 +61,22 @@ class SpeedupsRegistryTestCase(unittest.TestCase):
             self.registry.register(self.orig, alt2)
         self.assertTrue(str(ar.exception).startswith('functions signatures ' \
                                                      'are different'))
+
+    def test_set_num_threads(self):
+        self.assertEqual(self.registry.num_threads, 1)
+        self.registry.set_num_threads(4)
+        self.assertEqual(self.registry.num_threads, 4)
+        for num_threads in (0, -1, 2.5, None):
+            with self.assertRaises(ValueError):
+                self.registry.set_num_threads(num_threads)
+        self.assertEqual(self.registry.num_threads, 4)
+
+    def test_get_active(self):
+        self.assertEqual(self.registry.get_active(), {})
+        self.registry.register(self.orig, self.alt)
+        name = '%s.orig' % __name__
+        self.assertEqual(self.registry.get_active(), {name: 'alternative'})
+        self.registry.disable()
+        self.assertEqual(self.registry.get_active(), {name: 'original'})
+        self.registry.enable()
+        self.assertEqual(self.registry.get_active(), {name: 'alternative'})
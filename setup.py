@@ -29,8 +29,14 @@ suggestions and criticisms from the community are always very welcome.
 
 Copyright (C) 2012-2013 GEM Foundation.
 """
+import os
 import re
+import shutil
 import sys
+import tempfile
+from distutils.ccompiler import new_compiler
+from distutils.errors import CompileError, LinkError
+from distutils.sysconfig import customize_compiler
 from setuptools import setup, find_packages, Extension
 
 import numpy
@@ -54,12 +60,44 @@ version = get_version()
 
 url = "http://github.com/gem/oq-hazardlib"
 
+
+def get_openmp_flags():
+    """
+    Return the compiler and linker flags enabling OpenMP, or an empty
+    list if the compiler does not support OpenMP (speedups are then
+    built without it and run in a single thread).
+    """
+    flags = ['-fopenmp']
+    tmpdir = tempfile.mkdtemp()
+    try:
+        source = os.path.join(tmpdir, 'test_openmp.c')
+        with open(source, 'w') as test_file:
+            test_file.write('#include <omp.h>\n'
+                            'int main(void) { return omp_get_max_threads() '
+                            '< 1; }\n')
+        compiler = new_compiler()
+        customize_compiler(compiler)
+        objects = compiler.compile([source], output_dir=tmpdir,
+                                   extra_postargs=flags)
+        compiler.link_executable(objects, os.path.join(tmpdir, 'test_openmp'),
+                                 extra_postargs=flags)
+    except (CompileError, LinkError):
+        return []
+    finally:
+        shutil.rmtree(tmpdir)
+    return flags
+openmp_flags = get_openmp_flags()
+
 geoutils_speedups = Extension('openquake.hazardlib.geo._utils_speedups',
                               sources=['speedups/geoutilsmodule.c'],
-                              extra_compile_args=['-Wall', '-O2'])
+                              extra_compile_args=['-Wall', '-O2']
+                              + openmp_flags,
+                              extra_link_args=openmp_flags)
 geodetic_speedups = Extension('openquake.hazardlib.geo._geodetic_speedups',
                               sources=['speedups/geodeticmodule.c'],
-                              extra_compile_args=['-Wall', '-O2'])
+                              extra_compile_args=['-Wall', '-O2']
+                              + openmp_flags,
+                              extra_link_args=openmp_flags)
 truncnorm_speedups = Extension('openquake.hazardlib.c_speedups.truncated_normal._truncated_normal',
                               sources=['openquake/hazardlib/c_speedups/truncated_normal/truncated_normal.c', 'openquake/hazardlib/c_speedups/truncated_normal/truncated_normal_wrap.c'],
                               extra_compile_args=['-Wall', '-O2'])
@@ -0,0 +1,91 @@
+# The Hazard Library
+# Copyright (C) 2012 GEM Foundation
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Compare the running times of the C and numpy implementations of
+:func:`openquake.hazardlib.geo.geodetic.min_distance` and
+:func:`openquake.hazardlib.geo.geodetic.min_geodetic_distance`.
+
+Run as ``python benchmark_geodetic.py [repeats]``. Only the numpy
+implementation is timed if the geodetic speedups are not compiled.
+"""
+import sys
+import timeit
+
+import numpy
+
+from openquake.hazardlib import speedups
+from openquake.hazardlib.geo import geodetic
+
+#: Number of points of the mesh and number of sites of each benchmark,
+#: from small planar ruptures to large fault surfaces.
+SIZES = [(4, 5000), (50, 5000), (500, 2000), (5000, 500), (20000, 100)]
+
+
+def _get_args(num_points, num_sites):
+    """
+    Return random arguments for :func:`geodetic.min_distance`
+    and :func:`geodetic.min_geodetic_distance`.
+    """
+    rnd = numpy.random.RandomState(42)
+    mlons = rnd.uniform(10, 11, num_points)
+    mlats = rnd.uniform(40, 41, num_points)
+    mdepths = rnd.uniform(0, 20, num_points)
+    slons = rnd.uniform(8, 13, num_sites)
+    slats = rnd.uniform(38, 43, num_sites)
+    sdepths = numpy.zeros(num_sites)
+    return ((mlons, mlats, mdepths, slons, slats, sdepths),
+            (mlons, mlats, slons, slats))
+
+
+def _time(func, args, repeats):
+    """
+    Return the best time of ``repeats`` calls of ``func(*args)``.
+    """
+    return min(timeit.repeat(lambda: func(*args), number=1, repeat=repeats))
+
+
+def main(repeats=5):
+    has_c = geodetic.min_distance in speedups.global_registry.funcs
+    if has_c:
+        print '%6s %6s %-22s %10s %10s %7s' % ('points', 'sites', 'function',
+                                              'numpy, s', 'C, s', 'ratio')
+    else:
+        print 'geodetic speedups are not available, timing numpy only'
+        print '%6s %6s %-22s %10s' % ('points', 'sites', 'function',
+                                      'numpy, s')
+    for num_points, num_sites in SIZES:
+        min_distance_args, min_geodetic_args = _get_args(num_points,
+                                                         num_sites)
+        for func, args in [(geodetic.min_distance, min_distance_args),
+                           (geodetic.min_geodetic_distance,
+                            min_geodetic_args)]:
+            speedups.disable()
+            try:
+                numpy_time = _time(func, args, repeats)
+            finally:
+                speedups.enable()
+            if has_c:
+                c_time = _time(func, args, repeats)
+                print '%6d %6d %-22s %10.5f %10.5f %7.2f' % (
+                    num_points, num_sites, func.__name__, numpy_time,
+                    c_time, numpy_time / c_time)
+            else:
+                print '%6d %6d %-22s %10.5f' % (
+                    num_points, num_sites, func.__name__, numpy_time)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
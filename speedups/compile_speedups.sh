@@ -1,4 +1,11 @@
 #! /bin/bash
 
-gcc -I/usr/include/python2.7 geoutilsmodule.c -lpython2.7 -shared -fPIC -O3 -o ../openquake/hazardlib/geo/_utils_speedups.so
-gcc -I/usr/include/python2.7 geodeticmodule.c -lpython2.7 -shared -fPIC -O3 -o ../openquake/hazardlib/geo/_geodetic_speedups.so
+# build with OpenMP only if the compiler supports it
+OPENMP=
+if echo '#include <omp.h>
+int main(void) { return omp_get_max_threads() < 1; }' | gcc -fopenmp -x c - -o /dev/null 2> /dev/null; then
+    OPENMP=-fopenmp
+fi
+
+gcc -I/usr/include/python2.7 geoutilsmodule.c -lpython2.7 -shared -fPIC -O3 $OPENMP -o ../openquake/hazardlib/geo/_utils_speedups.so
+gcc -I/usr/include/python2.7 geodeticmodule.c -lpython2.7 -shared -fPIC -O3 $OPENMP -o ../openquake/hazardlib/geo/_geodetic_speedups.so
@@ -39,22 +39,86 @@ geodetic__geodetic_distance(double lon1, double lat1, double lon2, double lat2)
 }
 
 
+/*
+ * Find the point of the mesh closest to a site.
+ * Mesh coordinates are arrays of "m_size" items, except depths,
+ * read with stride "mdepths_stride" (either 1 or 0, for a single depth).
+ * Stores the minimum distance in "min_dist" and the index of the closest
+ * point in "min_dist_idx".
+ */
+static inline void
+geodetic__closest_point(
+        const double *mlons, const double *mlats, const double *mdepths,
+        npy_intp m_size, npy_intp mdepths_stride,
+        double slon, double slat, double sdepth,
+        double *min_dist, npy_intp *min_dist_idx)
+{
+    npy_intp i;
+
+    // initialize the minimum distance with inf
+    *min_dist = INFINITY;
+    *min_dist_idx = -1;
+
+    for (i = 0; i < m_size; i++)
+    {
+        double geodetic_dist = geodetic__geodetic_distance(
+            mlons[i], mlats[i], slon, slat);
+
+        double vertical_dist = sdepth - mdepths[i * mdepths_stride];
+        double dist;
+        if (vertical_dist == 0)
+            // total distance is the geodetic one
+            dist = geodetic_dist;
+        else
+            // total distance is hypotenuse of geodetic
+            // and vertical distance
+            dist = sqrt(geodetic_dist * geodetic_dist
+                        + vertical_dist * vertical_dist);
+
+        if (dist < *min_dist) {
+            // distance that we just found is the smallest so far
+            *min_dist = dist;
+            *min_dist_idx = i;
+        }
+    }
+}
+
+
+/*
+ * Return a C-contiguous array of doubles with the same content
+ * as "array" (new reference), or NULL on error.
+ */
+static PyArrayObject *
+geodetic__as_double_array(PyArrayObject *array)
+{
+    return (PyArrayObject *) PyArray_FROMANY(
+        (PyObject *) array, NPY_DOUBLE, 0, 0, NPY_ARRAY_IN_ARRAY);
+}
+
+
 static const char geodetic_min_distance__doc__[] = "\n\
     Calculate the minimum distance between two collections of points.\n\
     \n\
     min_distance(mlons, mlats, mdepths, slons, \\\n\
-            slats, sdepths, indices) -> min distances or indices of such\n\
+            slats, sdepths, indices, num_threads=1) \\\n\
+            -> min distances or indices of such\n\
     \n\
     Parameters mlons, mlats and mdepths represent coordinates of the first\n\
     collection of points and slons, slats, sdepths are for the second one.\n\
     All the coordinates must be numpy arrays of double. Longitudes and \n\
-    latitudes are in radians, depths are in km.\n\
+    latitudes are in radians, depths are in km. Depths of a collection\n\
+    are either an array of the same size as longitudes and latitudes\n\
+    or a single value.\n\
     \n\
     Boolean parameter \"indices\" determines whether actual minimum\n\
     distances should be returned or integer indices of closest points\n\
     from first collection. Thus, result is numpy array of either distances\n\
     (array of double, when indices=False) or indices (array of integers,\n\
-    when indices=True).\n\
+    when indices=True), of the same shape as slons.\n\
+    \n\
+    The GIL is released during the computation. If the module is compiled\n\
+    with OpenMP support, points of the second collection are split among\n\
+    \"num_threads\" threads.\n\
 ";
 static PyObject *
 geodetic_min_distance(
@@ -65,12 +129,14 @@ geodetic_min_distance(
     static char *kwlist[] = {"mlons", "mlats", "mdepths", /* mesh coords */
                              "slons", "slats", "sdepths", /* site coords */
                              "indices", /* min distance / closest points */
+                             "num_threads", /* threads to split sites in */
                              NULL}; /* sentinel */
 
     PyArrayObject *mlons, *mlats, *mdepths, *slons, *slats, *sdepths;
     unsigned char indices = 0;
+    int num_threads = 1;
 
-    if (!PyArg_ParseTupleAndKeywords(args, keywds, "O!O!O!O!O!O!b", kwlist,
+    if (!PyArg_ParseTupleAndKeywords(args, keywds, "O!O!O!O!O!O!b|i", kwlist,
                 // mesh coords
                 &PyArray_Type, &mlons, &PyArray_Type, &mlats,
                 &PyArray_Type, &mdepths,
@@ -78,116 +144,94 @@ geodetic_min_distance(
                 &PyArray_Type, &slons, &PyArray_Type, &slats,
                 &PyArray_Type, &sdepths,
                 // min distance / closest points switch
-                &indices))
+                &indices,
+                // number of threads
+                &num_threads))
         return NULL;
 
-    PyArray_Descr *double_dtype = PyArray_DescrFromType(NPY_DOUBLE);
-    PyArray_Descr *int_dtype = PyArray_DescrFromType(NPY_INT);
-
-    /* we need two iterators: one for mesh points (will run it as inner loop)
-     * and one for site points (for outer one).
-     */
-
-    PyArrayObject *op_s[4] = {slons, slats, sdepths, NULL /* min distance */};
-    PyArrayObject *op_m[3] = {mlons, mlats, mdepths};
-    npy_uint32 flags_s = 0, flags_m = 0;
-    npy_uint32 op_flags_s[4], op_flags_m[3];
-    NpyIter_IterNextFunc *iternext_s, *iternext_m;
-    PyArray_Descr *op_dtypes_s[] = {double_dtype, double_dtype, double_dtype,
-                                    indices ? int_dtype : double_dtype};
-
-    PyArray_Descr *op_dtypes_m[] = {double_dtype, double_dtype, double_dtype};
-    char **dataptrarray_s, **dataptrarray_m;
-
-    op_flags_s[0] = op_flags_s[1] = op_flags_s[2] = NPY_ITER_READONLY;
-    op_flags_s[3] = NPY_ITER_WRITEONLY | NPY_ITER_ALLOCATE;
-
-    NpyIter *iter_s = NpyIter_MultiNew(
-            4, op_s, flags_s, NPY_KEEPORDER, NPY_NO_CASTING,
-            op_flags_s, op_dtypes_s);
-    Py_DECREF(int_dtype);
-    if (iter_s == NULL) {
-        Py_DECREF(double_dtype);
+    if (num_threads < 1) {
+        PyErr_SetString(PyExc_ValueError,
+                        "number of threads must be positive");
         return NULL;
     }
-    iternext_s = NpyIter_GetIterNext(iter_s, NULL);
-    dataptrarray_s = NpyIter_GetDataPtrArray(iter_s);
 
-    op_flags_m[0] = op_flags_m[1] = op_flags_m[2] = NPY_ITER_READONLY;
+    /* coordinates are read from contiguous arrays of doubles, so that
+     * the computation doesn't need any python object and can run
+     * without the GIL.
+     */
+    PyArrayObject *inputs[6] = {mlons, mlats, mdepths, slons, slats, sdepths};
+    PyArrayObject *arrays[6] = {NULL, NULL, NULL, NULL, NULL, NULL};
+    PyArrayObject *result = NULL;
+    int i;
+
+    for (i = 0; i < 6; i++) {
+        arrays[i] = geodetic__as_double_array(inputs[i]);
+        if (arrays[i] == NULL)
+            goto exit;
+    }
 
-    NpyIter *iter_m = NpyIter_MultiNew(
-            3, op_m, flags_m, NPY_KEEPORDER, NPY_NO_CASTING,
-            op_flags_m, op_dtypes_m);
-    Py_DECREF(double_dtype);
-    if (iter_m == NULL) {
-        NpyIter_Deallocate(iter_s);
-        return NULL;
+    npy_intp m_size = PyArray_SIZE(arrays[0]);
+    npy_intp s_size = PyArray_SIZE(arrays[3]);
+    npy_intp mdepths_size = PyArray_SIZE(arrays[2]);
+    npy_intp sdepths_size = PyArray_SIZE(arrays[5]);
+
+    if (PyArray_SIZE(arrays[1]) != m_size
+            || PyArray_SIZE(arrays[4]) != s_size
+            || (mdepths_size != m_size && mdepths_size != 1)
+            || (sdepths_size != s_size && sdepths_size != 1)) {
+        PyErr_SetString(PyExc_ValueError,
+                        "coordinates arrays have different sizes");
+        goto exit;
     }
 
-    iternext_m = NpyIter_GetIterNext(iter_m, NULL);
-    dataptrarray_m = NpyIter_GetDataPtrArray(iter_m);
+    result = (PyArrayObject *) PyArray_SimpleNew(
+        PyArray_NDIM(slons), PyArray_DIMS(slons),
+        indices ? NPY_INT : NPY_DOUBLE);
+    if (result == NULL)
+        goto exit;
 
-    do
     {
-        // iterate sites in the outer loop
-        double slon = *(double *) dataptrarray_s[0];
-        double slat = *(double *) dataptrarray_s[1];
-        double sdepth = *(double *) dataptrarray_s[2];
-
-        // initialize the minimum distance with inf
-        double min_dist = INFINITY;
-        int min_dist_idx = -1;
-
-        do
+        const double *mlons_data = (double *) PyArray_DATA(arrays[0]);
+        const double *mlats_data = (double *) PyArray_DATA(arrays[1]);
+        const double *mdepths_data = (double *) PyArray_DATA(arrays[2]);
+        const double *slons_data = (double *) PyArray_DATA(arrays[3]);
+        const double *slats_data = (double *) PyArray_DATA(arrays[4]);
+        const double *sdepths_data = (double *) PyArray_DATA(arrays[5]);
+        npy_intp mdepths_stride = (mdepths_size == m_size) ? 1 : 0;
+        npy_intp sdepths_stride = (sdepths_size == s_size) ? 1 : 0;
+        char *result_data = PyArray_DATA(result);
+        npy_intp j;
+
+        Py_BEGIN_ALLOW_THREADS
+#ifdef _OPENMP
+#pragma omp parallel for num_threads(num_threads) schedule(static)
+#endif
+        for (j = 0; j < s_size; j++)
         {
-            // iterate points of the mesh in the inner one.
-            // this loop is executed for each site
-            double mlon = *(double *) dataptrarray_m[0];
-            double mlat = *(double *) dataptrarray_m[1];
-            double mdepth = *(double *) dataptrarray_m[2];
-
-            double geodetic_dist = geodetic__geodetic_distance(
-                mlon, mlat, slon, slat);
-
-            double vertical_dist = sdepth - mdepth;
-            double dist;
-            if (vertical_dist == 0)
-                // total distance is the geodetic one
-                dist = geodetic_dist;
+            // iterate sites in the outer loop, points of the mesh
+            // in the inner one
+            double min_dist;
+            npy_intp min_dist_idx;
+
+            geodetic__closest_point(
+                mlons_data, mlats_data, mdepths_data, m_size, mdepths_stride,
+                slons_data[j], slats_data[j], sdepths_data[j * sdepths_stride],
+                &min_dist, &min_dist_idx);
+
+            // save the result for the current site: either index
+            // of the closest point or actual minimum distance
+            if (indices)
+                ((int *) result_data)[j] = (int) min_dist_idx;
             else
-                // total distance is hypotenuse of geodetic
-                // and vertical distance
-                dist = sqrt(geodetic_dist * geodetic_dist
-                            + vertical_dist * vertical_dist);
-
-            if (dist < min_dist) {
-                // distance that we just found is the smallest so far
-                min_dist = dist;
-                if (indices)
-                    // if we are finding indices of closest points --
-                    // remember that index
-                    min_dist_idx = NpyIter_GetIterIndex(iter_m);
-            }
-
-        } while (iternext_m(iter_m));
-        NpyIter_Reset(iter_m, NULL);
-
-        // save the result for the current site: either index
-        // of the closest point or actual minimum distance
-        if (indices)
-            *(int *) dataptrarray_s[3] = min_dist_idx;
-        else
-            *(double *) dataptrarray_s[3] = min_dist;
-    } while (iternext_s(iter_s));
-
-    PyArrayObject *result = NpyIter_GetOperandArray(iter_s)[3];
-    Py_INCREF(result);
-    if (NpyIter_Deallocate(iter_s) != NPY_SUCCEED
-            || NpyIter_Deallocate(iter_m) != NPY_SUCCEED) {
-        Py_DECREF(result);
-        return NULL;
+                ((double *) result_data)[j] = min_dist;
+        }
+        Py_END_ALLOW_THREADS
     }
 
+exit:
+    for (i = 0; i < 6; i++)
+        Py_XDECREF(arrays[i]);
+
     return (PyObject *) result;
 }
 
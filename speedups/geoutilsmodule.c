@@ -20,11 +20,159 @@
 #include <numpy/arrayobject.h>
 
 
+/*
+ * Calculate the distance between a point and a polygon, zero if the point
+ * lies inside the polygon.
+ *
+ * Polygon has "num_vertices" vertices of coordinates "cxx" and "cyy".
+ * Edge "i" (for "i" from 1 to "num_vertices" - 1) goes from vertex "i"
+ * (its "base point") to vertex "i" - 1 (its "end point"), its length
+ * and the cosine and sine of the angle between x-axis and the edge
+ * (measured counterclockwise) are items "i" of "lengths", "cos_thetas"
+ * and "sin_thetas".
+ */
+static double
+geoutils__point_to_polygon_distance(
+        const double *cxx, const double *cyy, const double *lengths,
+        const double *cos_thetas, const double *sin_thetas,
+        npy_intp num_vertices, double px, double py)
+{
+    // minimum distance found
+    double min_distance = INFINITY;
+
+    // number of intersections between the ray, starting from the point
+    // and running along x-axis, with polygon edges. we use that to find
+    // out whether the point is lying inside the polygon or outside:
+    // zero or even number of intersections means that point is outside
+    int intersections = 0;
+
+    npy_intp i;
+
+    for (i = 1; i < num_vertices; i++)
+    {
+        // loop over edges
+        double bcx = cxx[i];
+        double bcy = cyy[i];
+        double ecy = cyy[i - 1];
+        double length = lengths[i];
+        double cos_theta = cos_thetas[i];
+        double sin_theta = sin_thetas[i];
+
+        if ((px == bcx) && (py == bcy)) {
+            // point is equal to edge's beginning point, set number
+            // of intersections to "1", which means "point is inside"
+            // and quit the loop
+            intersections = 1;
+            break;
+        }
+
+        // here we want to check if the ray from the point rightwards
+        // intersects the current edge. this is only true if one of the
+        // points of the edge has ordinate equal to or greater than the
+        // current point's ordinate and another point has smaller one.
+        // note that we use non-strict equation for only one point: this
+        // way we don't count intersections for edges that lie on the
+        // ray and we don't count intersection twice if ray crosses one
+        // of polygon's vertices.
+        if (((bcy >= py) && (ecy < py)) || ((ecy >= py) && (bcy < py))) {
+            // checking for intersection is simple: we solve two line
+            // equations, where first one represents the edge and second
+            // one the ray. then we find the abscissa of intersection
+            // point and compare it to point's abscissa: if it is greater,
+            // than the edge crosses the ray.
+            double x_int;
+
+            if (cos_theta == 0) {
+                // edge is purely vertical, intersection point is equal
+                // to abscissa of any point belonging to it
+                x_int = bcx;
+            } else {
+                // edge's line equation is "y(x) = k*x + b". here "k"
+                // is the tangent of edge's inclination angle.
+                double k = sin_theta / cos_theta;
+                // find the "b" coefficient putting beginning point of the edge
+                // to the equation with known "k"
+                double b = bcy - k * bcx;
+                // find the abscissa of the intersection point between lines
+                x_int = (py - b) / k;
+            }
+
+            if (x_int > px)
+                // ray intersects the edge
+                intersections += 1;
+            else if (x_int == px) {
+                // point is lying on the edge, distance is zero, no need
+                // to continue the loop
+                intersections = 1;
+                break;
+            }
+        }
+
+        // now move the point to the coordinate space of the edge (where
+        // "base point" of the edge has coordinates (0, 0) and the edge
+        // itself goes along x axis) using affine transformations
+
+        // first translate the coordinates
+        double px2 = px - bcx;
+        double py2 = py - bcy;
+        // then rotate them
+        double dist_x = px2 * cos_theta + py2 * sin_theta;
+        double dist_y = - px2 * sin_theta + py2 * cos_theta;
+        // now dist_y is the perpendicular distance between the point
+        // and the line, containing the edge. it is negative in case
+        // when point lies on the right hand side of the edge vector.
+        // dist_x is the 1d coordinate of the projection of the point
+        // on that line. sign is negative if the projection is on the
+        // opposite side from the "end point" of the vector with respect
+        // to its "base point"
+
+        double dist;
+
+        if ((0 <= dist_x) && (dist_x <= length)) {
+            // if point projection falls inside the vector itself,
+            // the actual shortest distance to the vector is dist_y
+            dist = fabs(dist_y);
+        } else {
+            // otherwise we need to consider both dist_x and dist_y,
+            // combining them in Pythagorean formula
+            if (dist_x > length)
+                // point lies above the "end point" of the vector
+                // along the line, so closest x-distance to the vector
+                // is the distance to the end point
+                dist_x -= length;
+            dist = sqrt(dist_x * dist_x + dist_y * dist_y);
+        }
+
+        if (dist < min_distance)
+            // update the "minimum distance so far" variable if needed
+            min_distance = dist;
+    }
+
+    if (intersections & 0x01)
+        // odd number of intersections between the ray from the point
+        // and all the edges means that the point is inside the polygon
+        return 0;
+    return min_distance;
+}
+
+
+/*
+ * Return a C-contiguous array of doubles with the same content
+ * as "array" (new reference), or NULL on error.
+ */
+static PyArrayObject *
+geoutils__as_double_array(PyArrayObject *array)
+{
+    return (PyArrayObject *) PyArray_FROMANY(
+        (PyObject *) array, NPY_DOUBLE, 0, 0, NPY_ARRAY_IN_ARRAY);
+}
+
+
 static const char geoutils_point_to_polygon_distance__doc__[] = "\n\
     For each point of the collection calculate the distance to polygon\n\
     treating points lying inside the polygon as having zero distance.\n\
     \n\
-    point_to_polygon_distance(cxx, cyy, pxx, pyy) -> dists\n\
+    point_to_polygon_distance(cxx, cyy, pxx, pyy, num_threads=1) -> dists\n\
     \n\
     Parameters cxx and cyy represent coordinates of polygon vertices\n\
     in either clockwise or counterclockwise order. The last point must\n\
@@ -35,7 +183,10 @@ static const char geoutils_point_to_polygon_distance__doc__[] = "\n\
     treated as the ones in 2d Cartesian space.\n\
     \n\
     Result is numpy array of doubles -- distance in units of coordinate\n\
-    system.\n\
+    system, of the same shape as pxx.\n\
+    \n\
+    The GIL is released during the computation. If the module is compiled\n\
+    with OpenMP support, points are split among \"num_threads\" threads.\n\
 ";
 static PyObject *
 geoutils_point_to_polygon_distance(
@@ -45,245 +196,111 @@ geoutils_point_to_polygon_distance(
 {
     static char *kwlist[] = {"cxx", "cyy", /* polygon coords */
                              "pxx", "pyy", /* points coords */
+                             "num_threads", /* threads to split points in */
                              NULL}; /* sentinel */
 
     PyArrayObject *cxx, *cyy, *pxx, *pyy;
+    int num_threads = 1;
 
-    if (!PyArg_ParseTupleAndKeywords(args, keywds, "O!O!O!O!", kwlist,
+    if (!PyArg_ParseTupleAndKeywords(args, keywds, "O!O!O!O!|i", kwlist,
                 // polygon coords
                 &PyArray_Type, &cxx, &PyArray_Type, &cyy,
                 // points coords
-                &PyArray_Type, &pxx, &PyArray_Type, &pyy))
+                &PyArray_Type, &pxx, &PyArray_Type, &pyy,
+                // number of threads
+                &num_threads))
         return NULL;
 
-    PyArray_Descr *double_dtype = PyArray_DescrFromType(NPY_DOUBLE);
-
-    // we use the first iterator for iterating over edges of the polygon
-    PyArrayObject *op_c[5];
-    npy_uint32 op_flags_c[5];
-    npy_uint32 flags_c = 0;
-    NpyIter_IterNextFunc *iternext_c;
-    PyArray_Descr *op_dtypes_c[] = {double_dtype, double_dtype, double_dtype,
-                                    double_dtype, double_dtype};
-    char **dataptrarray_c;
-
-    op_c[0] = cxx;
-    op_c[1] = cyy;
-    op_c[2] = NULL; /* length of the edge */
-    op_c[3] = NULL; /* cos theta (angle between x-axis and the
-                       edge, counterclockwise) */
-    op_c[4] = NULL; /* sin theta */
-
-    op_flags_c[0] = op_flags_c[1] = NPY_ITER_READONLY;
-    op_flags_c[2] = op_flags_c[3] = op_flags_c[4] \
-            = NPY_ITER_WRITEONLY | NPY_ITER_ALLOCATE;
-    NpyIter *iter_c = NpyIter_MultiNew(
-            5, op_c, flags_c, NPY_KEEPORDER, NPY_NO_CASTING,
-            op_flags_c, op_dtypes_c);
-    if (iter_c == NULL) {
-        Py_DECREF(double_dtype);
+    if (num_threads < 1) {
+        PyErr_SetString(PyExc_ValueError,
+                        "number of threads must be positive");
         return NULL;
     }
-    iternext_c = NpyIter_GetIterNext(iter_c, NULL);
-    dataptrarray_c = NpyIter_GetDataPtrArray(iter_c);
 
-    double bcx, bcy, ecx, ecy, length, cos_theta, sin_theta;
-    // remember the "end point" of the first segment
-    ecx = *(double *) dataptrarray_c[0];
-    ecy = *(double *) dataptrarray_c[1];
-
-    // here we ignore the first iteration, this is intentional: we need
-    // to iterate over edges, not points
-    while (iternext_c(iter_c))
-    {
-        // bcx and bcy are coordinates of the "base point" of the current edge
-        // vector, ecx and ecy are ones of the "end point" of it
-        bcx = *(double *) dataptrarray_c[0];
-        bcy = *(double *) dataptrarray_c[1];
-        // get the free vector coordinates from the bound one
-        double vx = ecx - bcx;
-        double vy = ecy - bcy;
-        // calculate the length of the edge
-        length = sqrt(vx * vx + vy * vy);
-        // calculate cosine and sine of the angle between x-axis
-        // and the free vector, measured counterclockwise
-        cos_theta = vx / length;
-        sin_theta = vy / length;
-
-        *(double *) dataptrarray_c[2] = length;
-        *(double *) dataptrarray_c[3] = cos_theta;
-        *(double *) dataptrarray_c[4] = sin_theta;
-
-        // the "base point" of the current vector is in turn the "end point"
-        // of the next one
-        ecx = bcx;
-        ecy = bcy;
+    /* coordinates are read from contiguous arrays of doubles, so that
+     * the computation doesn't need any python object and can run
+     * without the GIL.
+     */
+    PyArrayObject *inputs[4] = {cxx, cyy, pxx, pyy};
+    PyArrayObject *arrays[4] = {NULL, NULL, NULL, NULL};
+    PyArrayObject *result = NULL;
+    double *edges = NULL;
+    int i;
+
+    for (i = 0; i < 4; i++) {
+        arrays[i] = geoutils__as_double_array(inputs[i]);
+        if (arrays[i] == NULL)
+            goto exit;
     }
 
-    // second iterator is over the target points.
-    // we will collect distance in it as well.
-    PyArrayObject *op_p[3] = {pxx, pyy, NULL /* distance */};
-    npy_uint32 op_flags_p[3];
-    npy_uint32 flags_p = 0;
-    NpyIter_IterNextFunc *iternext_p;
-    PyArray_Descr *op_dtypes_p[] = {double_dtype, double_dtype, double_dtype};
-    char **dataptrarray_p;
-
-    op_flags_p[0] = op_flags_p[1] = NPY_ITER_READONLY;
-    op_flags_p[2] = NPY_ITER_WRITEONLY | NPY_ITER_ALLOCATE;
-
-    NpyIter *iter_p = NpyIter_MultiNew(
-            3, op_p, flags_p, NPY_KEEPORDER, NPY_NO_CASTING,
-            op_flags_p, op_dtypes_p);
-
-    Py_DECREF(double_dtype);
-    if (iter_p == NULL) {
-        NpyIter_Deallocate(iter_c);
-        return NULL;
-    }
-    iternext_p = NpyIter_GetIterNext(iter_p, NULL);
-    dataptrarray_p = NpyIter_GetDataPtrArray(iter_p);
-
-    do
-    {
-        // loop over points
+    npy_intp num_vertices = PyArray_SIZE(arrays[0]);
+    npy_intp num_points = PyArray_SIZE(arrays[2]);
 
-        // minimum distance found
-        double min_distance = INFINITY;
-
-        // point coordinates
-        double px = *(double *) dataptrarray_p[0];
-        double py = *(double *) dataptrarray_p[1];
+    if (PyArray_SIZE(arrays[1]) != num_vertices
+            || PyArray_SIZE(arrays[3]) != num_points) {
+        PyErr_SetString(PyExc_ValueError,
+                        "coordinates arrays have different sizes");
+        goto exit;
+    }
 
-        // number of intersections between the ray, starting from the point
-        // and running along x-axis, with polygon edges. we use that to find
-        // out whether the point is lying inside the polygon or outside:
-        // zero or even number of intersections means that point is outside
-        int intersections = 0;
+    // lengths, cosines and sines of the angles of the edges
+    edges = PyMem_Malloc(3 * (num_vertices + 1) * sizeof(double));
+    if (edges == NULL) {
+        PyErr_NoMemory();
+        goto exit;
+    }
 
-        NpyIter_Reset(iter_c, NULL);
+    result = (PyArrayObject *) PyArray_SimpleNew(
+        PyArray_NDIM(pxx), PyArray_DIMS(pxx), NPY_DOUBLE);
+    if (result == NULL)
+        goto exit;
 
-        ecx = *(double *) dataptrarray_c[0];
-        ecy = *(double *) dataptrarray_c[1];
-        while (iternext_c(iter_c))
+    {
+        const double *cxx_data = (double *) PyArray_DATA(arrays[0]);
+        const double *cyy_data = (double *) PyArray_DATA(arrays[1]);
+        const double *pxx_data = (double *) PyArray_DATA(arrays[2]);
+        const double *pyy_data = (double *) PyArray_DATA(arrays[3]);
+        double *lengths = edges;
+        double *cos_thetas = edges + num_vertices + 1;
+        double *sin_thetas = edges + 2 * (num_vertices + 1);
+        double *result_data = (double *) PyArray_DATA(result);
+        npy_intp j;
+
+        Py_BEGIN_ALLOW_THREADS
+
+        // here we ignore the first vertex, this is intentional: we need
+        // to iterate over edges, not points
+        for (j = 1; j < num_vertices; j++)
         {
-            // loop over edges: again ignore the first iteration
-            bcx = *(double *) dataptrarray_c[0];
-            bcy = *(double *) dataptrarray_c[1];
-            length = *(double *) dataptrarray_c[2];
-            cos_theta = *(double *) dataptrarray_c[3];
-            sin_theta = *(double *) dataptrarray_c[4];
-
-            if ((px == bcx) && (py == bcy)) {
-                // point is equal to edge's beginning point, set number
-                // of intersections to "1", which means "point is inside"
-                // and quit the loop
-                intersections = 1;
-                break;
-            }
-
-            // here we want to check if the ray from the point rightwards
-            // intersects the current edge. this is only true if one of the
-            // points of the edge has ordinate equal to or greater than the
-            // current point's ordinate and another point has smaller one.
-            // note that we use non-strict equation for only one point: this
-            // way we don't count intersections for edges that lie on the
-            // ray and we don't count intersection twice if ray crosses one
-            // of polygon's vertices.
-            if (((bcy >= py) && (ecy < py)) || ((ecy >= py) && (bcy < py))) {
-                // checking for intersection is simple: we solve two line
-                // equations, where first one represents the edge and second
-                // one the ray. then we find the abscissa of intersection
-                // point and compare it to point's abscissa: if it is greater,
-                // than the edge crosses the ray.
-                double x_int;
-
-                if (cos_theta == 0) {
-                    // edge is purely vertical, intersection point is equal
-                    // to abscissa of any point belonging to it
-                    x_int = bcx;
-                } else {
-                    // edge's line equation is "y(x) = k*x + b". here "k"
-                    // is the tangent of edge's inclination angle.
-                    double k = sin_theta / cos_theta;
-                    // find the "b" coefficient putting beginning point of the edge
-                    // to the equation with known "k"
-                    double b = bcy - k * bcx;
-                    // find the abscissa of the intersection point between lines
-                    x_int = (py - b) / k;
-                }
-
-                if (x_int > px)
-                    // ray intersects the edge
-                    intersections += 1;
-                else if (x_int == px) {
-                    // point is lying on the edge, distance is zero, no need
-                    // to continue the loop
-                    intersections = 1;
-                    break;
-                }
-            }
-
-            ecx = bcx;
-            ecy = bcy;
-
-            // now move the point to the coordinate space of the edge (where
-            // "base point" of the edge has coordinates (0, 0) and the edge
-            // itself goes along x axis) using affine transformations
-
-            // first translate the coordinates
-            double px2 = px - bcx;
-            double py2 = py - bcy;
-            // then rotate them
-            double dist_x = px2 * cos_theta + py2 * sin_theta;
-            double dist_y = - px2 * sin_theta + py2 * cos_theta;
-            // now dist_y is the perpendicular distance between the point
-            // and the line, containing the edge. it is negative in case
-            // when point lies on the right hand side of the edge vector.
-            // dist_x is the 1d coordinate of the projection of the point
-            // on that line. sign is negative if the projection is on the
-            // opposite side from the "end point" of the vector with respect
-            // to its "base point"
-
-            double dist;
-
-            if ((0 <= dist_x) && (dist_x <= length)) {
-                // if point projection falls inside the vector itself,
-                // the actual shortest distance to the vector is dist_y
-                dist = fabs(dist_y);
-            } else {
-                // otherwise we need to consider both dist_x and dist_y,
-                // combining them in Pythagorean formula
-                if (dist_x > length)
-                    // point lies above the "end point" of the vector
-                    // along the line, so closest x-distance to the vector
-                    // is the distance to the end point
-                    dist_x -= length;
-                dist = sqrt(dist_x * dist_x + dist_y * dist_y);
-            }
-
-            if (dist < min_distance)
-                // update the "minimum distance so far" variable if needed
-                min_distance = dist;
+            // get the free vector coordinates from the bound one,
+            // going from the "base point" of the edge to its "end point"
+            double vx = cxx_data[j - 1] - cxx_data[j];
+            double vy = cyy_data[j - 1] - cyy_data[j];
+            // calculate the length of the edge
+            lengths[j] = sqrt(vx * vx + vy * vy);
+            // calculate cosine and sine of the angle between x-axis
+            // and the free vector, measured counterclockwise
+            cos_thetas[j] = vx / lengths[j];
+            sin_thetas[j] = vy / lengths[j];
         }
 
-        if (intersections & 0x01)
-            // odd number of intersections between the ray from the point
-            // and all the edges means that the point is inside the polygon
-            *(double *) dataptrarray_p[2] = 0;
-        else
-            *(double *) dataptrarray_p[2] = min_distance;
+#ifdef _OPENMP
+#pragma omp parallel for num_threads(num_threads) schedule(static)
+#endif
+        for (j = 0; j < num_points; j++)
+            // loop over points
+            result_data[j] = geoutils__point_to_polygon_distance(
+                cxx_data, cyy_data, lengths, cos_thetas, sin_thetas,
+                num_vertices, pxx_data[j], pyy_data[j]);
 
-    } while (iternext_p(iter_p));
-
-    PyArrayObject *result = NpyIter_GetOperandArray(iter_p)[2];
-    Py_INCREF(result);
-    if (NpyIter_Deallocate(iter_c) != NPY_SUCCEED
-            || NpyIter_Deallocate(iter_p) != NPY_SUCCEED) {
-        Py_DECREF(result);
-        return NULL;
+        Py_END_ALLOW_THREADS
     }
 
+exit:
+    PyMem_Free(edges);
+    for (i = 0; i < 4; i++)
+        Py_XDECREF(arrays[i]);
+
     return (PyObject *) result;
 }
 